@@ -0,0 +1,228 @@
+# autosave_journal.py
+# Append-only crash-recovery journal: per-change table deltas on top of a base file or a compacted checkpoint.
+#
+# Directory layout:
+#   session.json            base file, latest checkpoint segment; written atomically
+#   checkpoint.erd          binary .erd of the whole model at the start of segment "checkpoint_segment"
+#   journal.NNNNNN.jsonl    one JSON object per change, in order
+# Each entry holds the full current state of the tables it names (deleted if absent from "tables") and every
+# relationship touching them, plus "notes"/"canvas" when those changed. Replaying an entry twice, or replaying
+# entries older than the checkpoint, gives the same result as long as the newer entries follow.
+
+import json
+import os
+
+from diagram_io import atomic_replace, read_diagram_file
+from erd_binary_format import read_erd_binary
+from model_snapshot import ColumnSnapshot, TableSnapshot, RelationshipSnapshot, DiagramSnapshot
+
+JOURNAL_VERSION = 1
+META_FILE_NAME = "session.json"
+CHECKPOINT_FILE_NAME = "checkpoint.erd"
+SEGMENT_PREFIX = "journal."
+SEGMENT_SUFFIX = ".jsonl"
+
+
+def make_journal_entry(table_names, tables, relationships, notes=None, canvas=None):
+    """Builds one journal entry from snapshots of the named tables and the relationships touching them."""
+    entry = {"names": sorted(table_names), "tables": list(tables), "relationships": list(relationships)}
+    if notes is not None:
+        entry["notes"] = notes
+    if canvas is not None:
+        entry["canvas"] = list(canvas)
+    return entry
+
+
+def _table_from_json(row):
+    return TableSnapshot(*row[:7], tuple(ColumnSnapshot(*col) for col in row[7]))
+
+
+def _segment_number(file_name):
+    if file_name.startswith(SEGMENT_PREFIX) and file_name.endswith(SEGMENT_SUFFIX):
+        number = file_name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]
+        if number.isdigit():
+            return int(number)
+    return None
+
+
+def _segment_numbers(directory):
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    return sorted(n for n in map(_segment_number, names) if n is not None)
+
+
+def _read_meta(directory):
+    try:
+        with open(os.path.join(directory, META_FILE_NAME), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get("version") == JOURNAL_VERSION else None
+
+
+def _iter_segment_entries(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                return # Torn last line from a crash mid-write
+
+
+class AutosaveJournal:
+    """
+    Writes the journal for one editing session. reset() starts over on a new base file, append() adds
+    an entry to the current segment and rotate()/commit_checkpoint() compact everything before a checkpoint.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self.meta = None
+        self.segment = 0
+        self.generation = 0 # Bumped by reset() so a checkpoint started earlier is not committed afterwards
+        self._file = None
+
+    @property
+    def checkpoint_path(self):
+        return os.path.join(self.directory, CHECKPOINT_FILE_NAME)
+
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{segment:06d}{SEGMENT_SUFFIX}")
+
+    def _write_meta(self):
+        with atomic_replace(os.path.join(self.directory, META_FILE_NAME)) as temp_path:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.meta, f)
+
+    def _open_segment(self, segment):
+        self.close()
+        self.segment = segment
+        self._file = open(self._segment_path(segment), 'a', encoding='utf-8')
+
+    def reset(self, base_path=None, base_format=None):
+        """Drops every entry and checkpoint; the session's state is now exactly base_path (or empty)."""
+        self.close()
+        os.makedirs(self.directory, exist_ok=True)
+        self.generation += 1
+        self.meta = {"version": JOURNAL_VERSION, "base_path": base_path, "base_format": base_format,
+                     "checkpoint_segment": None}
+        self._write_meta()
+        self._remove_segments_before(None)
+        try:
+            os.remove(self.checkpoint_path)
+        except FileNotFoundError:
+            pass
+        self._open_segment(0)
+
+    def resume(self):
+        """Continues a recovered session: keeps its files and appends to a new segment after them."""
+        self.meta = _read_meta(self.directory)
+        if self.meta is None:
+            self.reset()
+            return
+        self.generation += 1
+        segments = _segment_numbers(self.directory)
+        self._open_segment(segments[-1] + 1 if segments else 0)
+
+    def append(self, entry):
+        """Appends one entry. Flushed to the OS right away; fsync is left to checkpoints."""
+        self._file.write(json.dumps(entry, separators=(',', ':')) + "\n")
+        self._file.flush()
+
+    def rotate(self):
+        """Starts a new segment for a checkpoint taken now and returns its number."""
+        self._open_segment(self.segment + 1)
+        return self.segment
+
+    def commit_checkpoint(self, segment, generation):
+        """Records that checkpoint.erd holds the state at the start of segment, then drops older segments."""
+        if generation != self.generation:
+            return False
+        self.meta["checkpoint_segment"] = segment
+        self._write_meta()
+        self._remove_segments_before(segment)
+        return True
+
+    def _remove_segments_before(self, segment):
+        for number in _segment_numbers(self.directory):
+            if segment is None or number < segment:
+                if number == self.segment and self._file is not None:
+                    continue
+                try:
+                    os.remove(self._segment_path(number))
+                except OSError:
+                    pass
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def discard(self):
+        """Removes the whole journal, e.g. after a normal exit."""
+        self.close()
+        self.meta = None
+        self.generation += 1
+        for name in (META_FILE_NAME, CHECKPOINT_FILE_NAME):
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+        self._remove_segments_before(None)
+
+
+def has_recoverable_session(directory):
+    """True when a previous session left journal entries behind (it did not exit normally)."""
+    meta = _read_meta(directory)
+    if meta is None:
+        return False
+    first_segment = meta.get("checkpoint_segment") or 0
+    for segment in _segment_numbers(directory):
+        path = os.path.join(directory, f"{SEGMENT_PREFIX}{segment:06d}{SEGMENT_SUFFIX}")
+        if segment >= first_segment and os.path.getsize(path) > 0:
+            return True
+    return meta.get("checkpoint_segment") is not None
+
+
+def recover_session(directory):
+    """
+    Rebuilds the last state of a journaled session: the checkpoint (or base file) plus the entries after it.
+    Returns (DiagramSnapshot, base_path, base_format).
+    """
+    meta = _read_meta(directory)
+    if meta is None:
+        raise ValueError("No recoverable session found.")
+    checkpoint_segment = meta.get("checkpoint_segment")
+    checkpoint_path = os.path.join(directory, CHECKPOINT_FILE_NAME)
+    if checkpoint_segment is not None and os.path.exists(checkpoint_path):
+        base = read_erd_binary(checkpoint_path)
+    elif meta.get("base_path"):
+        checkpoint_segment = 0
+        base, _ = read_diagram_file(meta["base_path"])
+    else:
+        checkpoint_segment = 0
+        base = DiagramSnapshot((), (), None, None, "")
+
+    tables = {t.name: t for t in base.tables}
+    relationships = list(base.relationships)
+    canvas_width, canvas_height, notes = base.canvas_width, base.canvas_height, base.notes
+    for segment in _segment_numbers(directory):
+        if segment < checkpoint_segment:
+            continue
+        for entry in _iter_segment_entries(os.path.join(directory, f"{SEGMENT_PREFIX}{segment:06d}{SEGMENT_SUFFIX}")):
+            names = set(entry["names"])
+            for name in names:
+                tables.pop(name, None)
+            for row in entry["tables"]:
+                tables[row[0]] = _table_from_json(row)
+            relationships = [rel for rel in relationships if rel.table1_name not in names and rel.table2_name not in names]
+            relationships.extend(RelationshipSnapshot(*row) for row in entry["relationships"])
+            if "notes" in entry:
+                notes = entry["notes"]
+            if "canvas" in entry:
+                canvas_width, canvas_height = entry["canvas"]
+
+    snapshot = DiagramSnapshot(tuple(tables[name] for name in sorted(tables)), tuple(relationships),
+                               canvas_width, canvas_height, notes)
+    return snapshot, meta.get("base_path"), meta.get("base_format")
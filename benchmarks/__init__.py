@@ -0,0 +1,2 @@
+# benchmarks/__init__.py
+# Performance benchmarks, run as modules (e.g. python -m benchmarks.startup_benchmark) from the project root.
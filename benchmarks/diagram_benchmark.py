@@ -0,0 +1,189 @@
+# benchmarks/diagram_benchmark.py
+# Times parsing, SQL generation, .erd load/save, imports into a window, rerouting, explorer population and painting on synthetic schemas.
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.synthetic_schema import (
+    generate_schema, write_schema_files, DEFAULT_SEED, DEFAULT_COLUMNS, DEFAULT_FK_DENSITY
+)
+
+DEFAULT_SIZES = (100, 500)
+DEFAULT_REPEAT = 5
+PAINT_SIZE = (1920, 1080) # Pixels of scene rendered for scene_paint, from the diagram's top-left corner
+REGRESSION_THRESHOLD = 0.10 # --compare flags medians this much slower than the baseline
+
+
+def time_runs(func, repeat, setup=None):
+    """Calls func repeat times (after setup, which isn't timed) and returns its timings in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": round(statistics.median(timings), 3), "min_ms": round(min(timings), 3),
+            "max_ms": round(max(timings), 3), "runs": repeat}
+
+
+def run_size(window, app, table_count, args, work_dir):
+    """All benchmarks for one schema size; returns {"schema": stats, "timings": {benchmark: stats}}."""
+    import constants
+    from PyQt6.QtCore import QRectF
+    from PyQt6.QtGui import QImage, QPainter
+    from diagram_io import read_diagram_file, write_diagram_file
+    from sql_generator import generate_sql_for_diagram
+    from sql_parser import parse_sql_schema
+    from main_window_file_operations import load_erd_file_impl, import_parsed_schema_impl
+
+    snapshot = generate_schema(table_count, args.seed, tuple(args.columns), args.fk_density)
+    sql_path, erd_path = write_schema_files(snapshot, work_dir, f"schema_{table_count}")
+    with open(sql_path, encoding="utf-8") as f:
+        sql_text = f.read()
+    save_path = os.path.join(work_dir, f"saved_{table_count}.erd")
+    timings = {}
+    repeat = args.repeat
+
+    def clear_window():
+        window.undo_stack.setClean() # new_diagram() doesn't prompt for a clean stack
+        window.new_diagram()
+        app.processEvents()
+
+    def import_sql():
+        tables, relationships = parse_sql_schema(sql_text, window.sql_dialect_name)
+        import_parsed_schema_impl(window, tables, relationships, "Import SQL", "SQL", interactive=False)
+        app.processEvents()
+
+    def load_erd():
+        load_erd_file_impl(window, erd_path, interactive=False)
+        app.processEvents()
+
+    timings["parse_sql_schema"] = time_runs(lambda: parse_sql_schema(sql_text), repeat)
+    timings["erd_save"] = time_runs(lambda: write_diagram_file(save_path, constants.ERD_FILE_FORMAT_BINARY, snapshot), repeat)
+    timings["erd_load"] = time_runs(lambda: read_diagram_file(erd_path), repeat)
+    timings["sql_import_window"] = time_runs(import_sql, repeat, clear_window)
+    timings["erd_import_window"] = time_runs(load_erd, repeat, clear_window)
+
+    # The rest work on the diagram the last ERD import left in the window
+    timings["generate_sql_for_diagram"] = time_runs(
+        lambda: generate_sql_for_diagram(window.tables_data, window.relationships_data, window.sql_dialect_name), repeat)
+    timings["reroute_relationships"] = time_runs(window.update_all_relationships_graphics, repeat)
+    timings["populate_explorer"] = time_runs(window.populate_diagram_explorer, repeat)
+
+    image = QImage(PAINT_SIZE[0], PAINT_SIZE[1], QImage.Format.Format_ARGB32_Premultiplied)
+    def paint_scene():
+        painter = QPainter(image)
+        window.scene.render(painter, QRectF(image.rect()), QRectF(0, 0, PAINT_SIZE[0], PAINT_SIZE[1]))
+        painter.end()
+    timings["scene_paint"] = time_runs(paint_scene, repeat)
+
+    schema = {"tables": len(snapshot.tables), "columns": sum(len(t.columns) for t in snapshot.tables),
+              "relationships": len(snapshot.relationships), "sql_bytes": len(sql_text.encode("utf-8")),
+              "erd_bytes": os.path.getsize(erd_path)}
+    clear_window()
+    return {"schema": schema, "timings": timings}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(args):
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import QT_VERSION_STR, PYQT_VERSION_STR
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    report = {
+        "benchmark": "diagram",
+        "metadata": {"commit": git_commit(), "python": platform.python_version(), "qt": QT_VERSION_STR,
+                     "pyqt": PYQT_VERSION_STR, "platform": platform.platform(), "qpa": os.environ.get("QT_QPA_PLATFORM"),
+                     "seed": args.seed, "columns": list(args.columns), "fk_density": args.fk_density,
+                     "repeat": args.repeat, "paint_size": list(PAINT_SIZE)},
+        "sizes": {},
+    }
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.chdir(work_dir) # The window reads and writes config.ini in the working directory; start from defaults
+        try:
+            import main_window
+            window = main_window.ERDCanvasWindow()
+            for table_count in args.tables:
+                print(f"Benchmarking {table_count} tables...", file=sys.stderr)
+                report["sizes"][str(table_count)] = run_size(window, app, table_count, args, work_dir)
+            window.undo_stack.setClean()
+        finally:
+            os.chdir(cwd)
+    return report
+
+
+def compare_reports(report, baseline, threshold=REGRESSION_THRESHOLD):
+    """Prints each median next to the baseline's; returns the (size, benchmark) pairs slower by more than threshold."""
+    regressions = []
+    print(f"{'size':>6}  {'benchmark':<26} {'baseline ms':>12} {'current ms':>12} {'change':>8}")
+    for size, result in report["sizes"].items():
+        baseline_timings = baseline.get("sizes", {}).get(size, {}).get("timings", {})
+        for name, stats in result["timings"].items():
+            if name not in baseline_timings:
+                continue
+            before, after = baseline_timings[name]["median_ms"], stats["median_ms"]
+            change = (after - before) / before if before else 0.0
+            flag = ""
+            if change > threshold:
+                regressions.append((size, name))
+                flag = "  slower"
+            print(f"{size:>6}  {name:<26} {before:12.2f} {after:12.2f} {change:+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diagram benchmarks on seeded synthetic schemas (medians, as JSON).")
+    parser.add_argument("--tables", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Schema sizes to run")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--columns", type=int, nargs=3, default=DEFAULT_COLUMNS, metavar=("MIN", "MODE", "MAX"),
+                        help="Columns per table besides the id (triangular distribution)")
+    parser.add_argument("--fk-density", type=float, default=DEFAULT_FK_DENSITY, help="Average foreign keys per table")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--compare", metavar="BASELINE", help="A report from an earlier run to compare the medians with")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="With --compare, exit with 1 if a median is this fraction slower than the baseline")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    elif not args.compare:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("metadata", {}).get("seed") != args.seed:
+            print("Warning: the baseline used a different seed; the schemas differ.", file=sys.stderr)
+        return 1 if compare_reports(report, baseline, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
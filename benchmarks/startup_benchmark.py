@@ -0,0 +1,99 @@
+# benchmarks/startup_benchmark.py
+# Measures time to first paint of the main window under the offscreen Qt platform, each run in a fresh process.
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIRST_PAINT_TARGET_MS = 250 # Process start (after the interpreter) to the canvas' first paint; about 165 ms here
+
+# config.ini contents per scenario; None starts without a config file (SQL preview and notes open)
+SCENARIOS = {
+    "first_run": None,
+    "docks_closed": "[UIState]\nsql_preview_visible = False\nnotes_visible = False\noverview_visible = False\n",
+}
+
+
+def run_child():
+    """One measurement in this process; prints a JSON line with the timings in milliseconds."""
+    start = time.perf_counter()
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import QObject, QEvent
+    app = QApplication(sys.argv[:1])
+    qt_ready = time.perf_counter()
+    sys.path.insert(0, PROJECT_ROOT)
+    import main_window
+    imported = time.perf_counter()
+    window = main_window.ERDCanvasWindow()
+    constructed = time.perf_counter()
+
+    painted = []
+    class PaintWatcher(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Type.Paint and not painted:
+                painted.append(time.perf_counter())
+            return False
+    watcher = PaintWatcher()
+    window.view.viewport().installEventFilter(watcher)
+    window.show()
+    deadline = time.perf_counter() + 10
+    while not painted and time.perf_counter() < deadline:
+        app.processEvents()
+    first_paint = painted[0] if painted else float("nan")
+
+    ms = lambda t: round((t - start) * 1000, 2)
+    print(json.dumps({"qapplication_ms": ms(qt_ready), "import_ms": ms(imported) - ms(qt_ready),
+                      "construct_ms": ms(constructed) - ms(imported), "first_paint_ms": ms(first_paint),
+                      "loaded_modules": len(sys.modules)}))
+    sys.stdout.flush()
+    os._exit(0) # Skips closeEvent (no save prompt) and teardown
+
+
+def measure(scenario, runs):
+    results = []
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as work_dir: # config.ini is read from and written to the working directory
+            if SCENARIOS[scenario] is not None:
+                with open(os.path.join(work_dir, "config.ini"), "w") as f:
+                    f.write(SCENARIOS[scenario])
+            out = subprocess.run([sys.executable, "-m", "benchmarks.startup_benchmark", "--child"], cwd=work_dir,
+                                 env=dict(env, PYTHONPATH=PROJECT_ROOT), capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(out.strip().splitlines()[-1]))
+    summary = {key: round(statistics.median(r[key] for r in results), 2) for key in results[0]}
+    summary["runs"] = runs
+    summary["meets_target"] = summary["first_paint_ms"] <= FIRST_PAINT_TARGET_MS
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time benchmark (median of fresh-process runs).")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_child()
+        return
+
+    report = {"benchmark": "startup", "target_first_paint_ms": FIRST_PAINT_TARGET_MS,
+              "scenarios": {name: measure(name, args.runs) for name in (args.scenario or SCENARIOS)}}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0 if all(s["meets_target"] for s in report["scenarios"].values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+# benchmarks/synthetic_schema.py
+# Seeded synthetic schemas for benchmarks: N tables with a column-count distribution and foreign-key density, as DDL and .erd files.
+
+import argparse
+import os
+import random
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import constants
+from model_snapshot import ColumnSnapshot, TableSnapshot, RelationshipSnapshot, DiagramSnapshot
+from utils import calculate_table_height
+
+DEFAULT_SEED = 1
+DEFAULT_COLUMNS = (2, 6, 30) # Columns per table, not counting the id: (min, most common, max) of a triangular distribution
+DEFAULT_FK_DENSITY = 1.0 # Average foreign keys per table
+TABLES_PER_ROW = 20
+TABLE_SPACING = 60 # Scene units between neighbouring tables
+
+
+def generate_schema(table_count, seed=DEFAULT_SEED, columns=DEFAULT_COLUMNS, fk_density=DEFAULT_FK_DENSITY):
+    """
+    Returns a DiagramSnapshot of table_count tables laid out on a grid. Every table has an "id" INTEGER primary key;
+    foreign keys ("<table>_id" columns) point at the id of a random other table. The same arguments always give the same schema.
+    """
+    rng = random.Random(seed)
+    min_columns, mode_columns, max_columns = columns
+    names = [f"table_{i:05d}" for i in range(table_count)]
+
+    # fk_density foreign keys per table on average, at most one from a table to each other table
+    fk_targets = {name: set() for name in names}
+    fk_count = round(fk_density * table_count) if table_count > 1 else 0
+    added = 0
+    for _ in range(4 * fk_count): # Bounded, in case the density asks for more keys than table pairs
+        if added == fk_count:
+            break
+        fk_table, target = rng.choice(names), rng.choice(names)
+        if target != fk_table and target not in fk_targets[fk_table]:
+            fk_targets[fk_table].add(target)
+            added += 1
+
+    tables = []
+    relationships = []
+    x = y = row_height = 0
+    for i, name in enumerate(names):
+        column_list = [ColumnSnapshot("id", "INTEGER", True, False, None, None, "N:1")]
+        for target in sorted(fk_targets[name]):
+            column_list.append(ColumnSnapshot(f"{target}_id", "INTEGER", False, True, target, "id", "N:1"))
+            relationships.append(RelationshipSnapshot(name, f"{target}_id", target, "id", "N:1", None))
+        for j in range(round(rng.triangular(min_columns, max_columns, mode_columns))):
+            column_list.append(ColumnSnapshot(f"col_{j:02d}", rng.choice(constants.DEFAULT_COLUMN_DATA_TYPES),
+                                              False, False, None, None, "N:1"))
+
+        height = calculate_table_height(len(column_list))
+        if i and i % TABLES_PER_ROW == 0:
+            x, y, row_height = 0, y + row_height + TABLE_SPACING, 0
+        tables.append(TableSnapshot(name, x + TABLE_SPACING, y + TABLE_SPACING, constants.DEFAULT_TABLE_WIDTH, height,
+                                    "#ffffff", "#d3d3d3", tuple(column_list)))
+        x += constants.DEFAULT_TABLE_WIDTH + TABLE_SPACING
+        row_height = max(row_height, height)
+
+    width = max(constants.DEFAULT_CANVAS_WIDTH, TABLES_PER_ROW * (constants.DEFAULT_TABLE_WIDTH + TABLE_SPACING) + TABLE_SPACING)
+    height = max(constants.DEFAULT_CANVAS_HEIGHT, y + row_height + 2 * TABLE_SPACING)
+    return DiagramSnapshot(tuple(tables), tuple(relationships), width, height, f"Synthetic schema: {table_count} tables, seed {seed}")
+
+
+def schema_sql(snapshot, dialect=None):
+    """The schema's DDL as the app exports it (snapshots have the attributes the SQL generator reads)."""
+    from sql_generator import generate_sql_for_diagram
+    return generate_sql_for_diagram({table.name: table for table in snapshot.tables}, snapshot.relationships, dialect)
+
+
+def write_schema_files(snapshot, directory, basename="schema", dialect=None):
+    """Writes <basename>.sql and <basename>.erd (binary) into directory; returns their paths."""
+    from diagram_io import write_diagram_file
+    sql_path = os.path.join(directory, basename + ".sql")
+    erd_path = os.path.join(directory, basename + ".erd")
+    with open(sql_path, "w", encoding="utf-8") as f:
+        f.write(schema_sql(snapshot, dialect))
+    write_diagram_file(erd_path, constants.ERD_FILE_FORMAT_BINARY, snapshot)
+    return sql_path, erd_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Writes a seeded synthetic schema as .sql and .erd files.")
+    parser.add_argument("--tables", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--columns", type=int, nargs=3, default=DEFAULT_COLUMNS, metavar=("MIN", "MODE", "MAX"),
+                        help="Columns per table besides the id (triangular distribution)")
+    parser.add_argument("--fk-density", type=float, default=DEFAULT_FK_DENSITY, help="Average foreign keys per table")
+    parser.add_argument("--output-dir", default=".")
+    parser.add_argument("--basename", default="schema")
+    args = parser.parse_args()
+
+    snapshot = generate_schema(args.tables, args.seed, tuple(args.columns), args.fk_density)
+    for path in write_schema_files(snapshot, args.output_dir, args.basename):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
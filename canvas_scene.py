@@ -6,16 +6,27 @@ from PyQt6.QtWidgets import (
     QGraphicsScene, QGraphicsPathItem, QMessageBox, QApplication, QGraphicsView,
     QGraphicsSceneMouseEvent, QMenu, QInputDialog
 )
-from PyQt6.QtCore import Qt, QPointF, QRectF, QSizeF
+from PyQt6.QtCore import Qt, QPointF, QRectF, QSizeF, QTimer, pyqtSignal
 from PyQt6.QtGui import QPen, QColor, QPainterPath, QTransform, QAction
 
-from constants import GRID_SIZE, DEFAULT_TABLE_WIDTH, TABLE_HEADER_HEIGHT, current_theme_settings
+from constants import GRID_SIZE, DEFAULT_TABLE_WIDTH, TABLE_HEADER_HEIGHT, current_theme_settings, current_canvas_dimensions
 from utils import snap_to_grid
 from gui_items import TableGraphicItem, OrthogonalRelationshipPathItem # Assuming TableGraphicItem is imported
 from data_models import Table
+from spatial_index import TableSpatialIndex
+from profiling import profiled_paint
+from theme_stylesheets import theme_stylesheets
+
+MIN_GRID_SPACING_PX = 4 # The grid isn't drawn when its dots would be closer than this on screen
+VIRTUALIZATION_MARGIN = 600 # Scene units around the viewport that stay materialized in virtualized mode
+SCENE_CONTENT_MARGIN = 1000 # Free space kept around the tables when the scene rect is sized to content
+SCENE_RECT_UPDATE_DELAY_MS = 100 # Coalesces table moves into one scene rect update
 
 
 class ERDGraphicsScene(QGraphicsScene):
+    # Emitted with the table name and the scene area (old and new bounds) whenever a table moves, resizes, appears or goes away
+    table_geometry_changed = pyqtSignal(str, QRectF)
+
     def __init__(self, parent_window=None):
         super().__init__(parent_window)
         self.line_in_progress = None
@@ -27,13 +38,30 @@ class ERDGraphicsScene(QGraphicsScene):
         self.drawing_relationship_shortcut_active = False
         self.shortcut_start_table_item = None
         self.shortcut_start_column_obj = None
+        self.relationship_updates_suspended = False # Set while many tables are repositioned in one pass
+        self.layout_preview_active = False # Set while auto-arrange moves graphics only; the model keeps its positions
+        self.table_index = TableSpatialIndex() # Geometry of every table, with or without a graphic item
+        self.virtualized = False # When True only items near the viewport have graphic items
+        self.grid_visible = True # Turned off while rendering thumbnails and exports
+        self.auto_size_to_content = False # When True the scene rect follows the table bounds instead of the canvas size
+
+        self._scene_rect_timer = QTimer(self)
+        self._scene_rect_timer.setSingleShot(True)
+        self._scene_rect_timer.setInterval(SCENE_RECT_UPDATE_DELAY_MS)
+        self._scene_rect_timer.timeout.connect(self.apply_scene_rect)
+        self.table_geometry_changed.connect(lambda *_: self.schedule_scene_rect_update())
 
     def update_grid_pen_color(self): # Helper to update grid pen if theme changes
         self.shortcut_start_column_obj = None
 
 
+    @profiled_paint
     def drawBackground(self, painter, rect):
         super().drawBackground(painter, rect)
+        if not self.grid_visible:
+            return
+        if GRID_SIZE * painter.worldTransform().m11() < MIN_GRID_SPACING_PX:
+            return # Zoomed out this far the dots would only tint the background, at the cost of millions of points
         self.grid_pen.setColor(QColor(current_theme_settings.get("grid_color", QColor(200, 200, 200, 60))))
         left = int(rect.left()) - (int(rect.left()) % GRID_SIZE)
         top = int(rect.top()) - (int(rect.top()) % GRID_SIZE)
@@ -227,11 +255,107 @@ class ERDGraphicsScene(QGraphicsScene):
 
     def mouseReleaseEvent(self, event: QGraphicsSceneMouseEvent):
         super().mouseReleaseEvent(event)
+        self.schedule_scene_rect_update() # A drag may have ended with the scene still grown around it
+
+    def keyPressEvent(self, event):
+        # Arrow keys nudge the selected tables by one grid step; without a selection the view scrolls as before
+        nudges = {Qt.Key.Key_Left: (-GRID_SIZE, 0), Qt.Key.Key_Right: (GRID_SIZE, 0),
+                  Qt.Key.Key_Up: (0, -GRID_SIZE), Qt.Key.Key_Down: (0, GRID_SIZE)}
+        if event.key() in nudges and self.main_window and not self.focusItem():
+            if self.main_window.nudge_selected_tables(*nudges[event.key()]):
+                event.accept()
+                return
+        super().keyPressEvent(event)
+
+    def selected_table_names(self):
+        return [item.table_data.name for item in self.selectedItems() if isinstance(item, TableGraphicItem)]
 
 
     def update_relationships_for_table(self, table_name_moved: str):
-        if self.main_window and hasattr(self.main_window, 'update_all_relationships_graphics'):
-            self.main_window.update_all_relationships_graphics()
+        if self.relationship_updates_suspended:
+            return
+        if not self.main_window or not hasattr(self.main_window, 'update_all_relationships_graphics'):
+            return
+        if self.main_window.view_refresh_batch_depth:
+            self.main_window.update_all_relationships_graphics() # Deferred to the end of the batch
+            return
+        # Only relationships with an end on this table change shape; dragging 200 tables then doesn't reroute everything 200 times
+        for rel_data in self.main_window.relationships_data:
+            if rel_data.table1_name == table_name_moved or rel_data.table2_name == table_name_moved:
+                self.main_window.update_relationship_graphic_path(rel_data)
+
+    def index_table(self, table_data):
+        """Records the table's current geometry in the spatial index and returns the record."""
+        if table_data is None:
+            return None
+        old_record = self.table_index.record_for(table_data)
+        old_rect = old_record.sceneBoundingRect() if old_record else QRectF()
+        record = self.table_index.update_table(table_data)
+        new_rect = record.sceneBoundingRect()
+        if new_rect != old_rect:
+            self.table_geometry_changed.emit(table_data.name, old_rect.united(new_rect))
+        return record
+
+    def unindex_table(self, table_data):
+        old_record = self.table_index.record_for(table_data)
+        if old_record:
+            old_rect = old_record.sceneBoundingRect()
+            self.table_index.remove_table(table_data)
+            self.table_geometry_changed.emit(table_data.name, old_rect)
+
+    def table_geometry(self, table_data):
+        """Returns the table's graphic item, or its spatial index record when it has none (virtualized mode)."""
+        if table_data is None:
+            return None
+        if table_data.graphic_item:
+            return table_data.graphic_item
+        return self.table_index.record_for(table_data)
+
+    def schedule_scene_rect_update(self):
+        if self.auto_size_to_content:
+            self._scene_rect_timer.start()
+
+    def content_scene_rect(self):
+        """Table bounds plus SCENE_CONTENT_MARGIN, or the configured canvas size for an empty diagram."""
+        bounds = self.table_index.bounding_rect()
+        if bounds.isEmpty():
+            return QRectF(0, 0, current_canvas_dimensions["width"], current_canvas_dimensions["height"])
+        return bounds.adjusted(-SCENE_CONTENT_MARGIN, -SCENE_CONTENT_MARGIN, SCENE_CONTENT_MARGIN, SCENE_CONTENT_MARGIN)
+
+    def apply_scene_rect(self):
+        """Sets the scene rect from the content bounds (auto-size) or the fixed canvas dimensions."""
+        self._scene_rect_timer.stop()
+        if not self.auto_size_to_content:
+            rect = QRectF(0, 0, current_canvas_dimensions["width"], current_canvas_dimensions["height"])
+        else:
+            rect = self.content_scene_rect()
+            if self.mouseGrabberItem():
+                rect = rect.united(self.sceneRect()) # Only grow mid-drag so the view doesn't jump under the mouse
+        if rect != self.sceneRect():
+            self.setSceneRect(rect)
+
+    def materialization_rect(self):
+        """The visible scene region of all views, grown by VIRTUALIZATION_MARGIN."""
+        visible = QRectF()
+        for view in self.views():
+            visible = visible.united(view.mapToScene(view.viewport().rect()).boundingRect())
+        return visible.adjusted(-VIRTUALIZATION_MARGIN, -VIRTUALIZATION_MARGIN, VIRTUALIZATION_MARGIN, VIRTUALIZATION_MARGIN)
+
+    def should_materialize_table(self, table_data):
+        if not self.virtualized:
+            return True
+        record = self.table_index.record_for(table_data)
+        return record is None or record.sceneBoundingRect().intersects(self.materialization_rect())
+
+    def should_materialize_relationship(self, relationship_data, region=None):
+        if not self.virtualized or not self.main_window:
+            return True
+        t1_record = self.table_index.record_for(self.main_window.tables_data.get(relationship_data.table1_name))
+        t2_record = self.table_index.record_for(self.main_window.tables_data.get(relationship_data.table2_name))
+        if not (t1_record and t2_record):
+            return True
+        span = t1_record.sceneBoundingRect().united(t2_record.sceneBoundingRect())
+        return span.intersects(region if region is not None else self.materialization_rect())
 
     def snap_to_grid(self, value, grid_size): 
         if grid_size == 0: return value
@@ -247,16 +371,7 @@ class ERDGraphicsScene(QGraphicsScene):
         if not item_at_pos and self.main_window: 
             menu = QMenu()
             if hasattr(self.main_window, 'current_theme_settings'):
-                 menu.setStyleSheet(f"""
-                    QMenu {{
-                        background-color: {self.main_window.current_theme_settings.get('toolbar_bg', QColor(240,240,240)).name()};
-                        color: {self.main_window.current_theme_settings.get('text_color', QColor(0,0,0)).name()};
-                        border: 1px solid {self.main_window.current_theme_settings.get('toolbar_border', QColor(200,200,200)).name()};
-                    }}
-                    QMenu::item:selected {{
-                        background-color: {self.main_window.current_theme_settings.get('button_hover_bg', QColor(220,220,220)).name()};
-                    }}
-                """)
+                menu.setStyleSheet(theme_stylesheets(self.main_window.current_theme_settings)["menu"])
 
             add_table_action = QAction("Add Table", menu)
             add_table_action.triggered.connect(lambda: self.main_window.handle_add_table_button(pos=event.scenePos()))
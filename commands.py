@@ -6,11 +6,30 @@ from PyQt6.QtCore import QPointF, QRectF
 from data_models import Table, Column, Relationship
 # from gui_items import TableGraphicItem, OrthogonalRelationshipPathItem, GroupGraphicItem # Keep as local imports
 import copy
+import time
 import constants
 from utils import snap_to_grid # Import constants for GRID_SIZE
+from undo_history_log import read_history_step
+from profiling import profiled_command
+
+EDIT_NOTES_COMMAND_ID = 1 # QUndoCommand.id() for notes edits, so consecutive ones merge
+NOTES_MERGE_WINDOW_MS = 2000 # Notes edits less than this apart become one undo step
+MOVE_TABLES_COMMAND_ID = 2 # QUndoCommand.id() for arrow key nudges, so a run of them merges
+NUDGE_MERGE_WINDOW_MS = 1000 # Nudges of the same tables less than this apart become one undo step
 
 # print("commands.py loaded") # DEBUG
 
+def column_states(columns):
+    """Compact, immutable snapshot of a column list for undo history (a tuple per column, no Column objects)."""
+    return tuple((col.name, col.data_type, col.is_pk, col.is_fk, col.references_table,
+                  col.references_column, col.fk_relationship_type) for col in columns)
+
+
+def columns_from_states(states):
+    return [Column(*state) for state in states]
+
+
+@profiled_command
 class AddTableCommand(QUndoCommand):
     def __init__(self, main_window, table_data, description="Add Table"):
         super().__init__(description)
@@ -22,37 +41,43 @@ class AddTableCommand(QUndoCommand):
     def redo(self):
         from gui_items import TableGraphicItem 
         self.main_window.tables_data[self.table_name] = self.table_data_copy
+        self.main_window.scene.index_table(self.table_data_copy)
+        self.main_window.mark_tables_dirty(self.table_name)
+
+        # In virtualized mode an offscreen table only gets its spatial index record until it scrolls into view.
+        if self.main_window.scene.should_materialize_table(self.table_data_copy):
+            # If graphic_item doesn't exist or isn't in a scene, create/add it.
+            if not self.table_data_copy.graphic_item or not self.table_data_copy.graphic_item.scene():
+                # Try to reuse the stored instance if it's not in a scene
+                if self.table_graphic_item_instance and not self.table_graphic_item_instance.scene():
+                    self.table_data_copy.graphic_item = self.table_graphic_item_instance
+                else:
+                    # Create a new graphic item if needed
+                    self.table_graphic_item_instance = TableGraphicItem(self.table_data_copy) 
+                    self.table_data_copy.graphic_item = self.table_graphic_item_instance
+            
+            self.table_data_copy.graphic_item.setPos(self.table_data_copy.x, self.table_data_copy.y)
+            if not self.table_data_copy.graphic_item.scene(): # Ensure it's added to the scene
+                self.main_window.scene.addItem(self.table_data_copy.graphic_item)
 
-        # If graphic_item doesn't exist or isn't in a scene, create/add it.
-        if not self.table_data_copy.graphic_item or not self.table_data_copy.graphic_item.scene():
-            # Try to reuse the stored instance if it's not in a scene
-            if self.table_graphic_item_instance and not self.table_graphic_item_instance.scene():
-                self.table_data_copy.graphic_item = self.table_graphic_item_instance
-            else:
-                # Create a new graphic item if needed
-                self.table_graphic_item_instance = TableGraphicItem(self.table_data_copy) 
-                self.table_data_copy.graphic_item = self.table_graphic_item_instance
-        
-        self.table_data_copy.graphic_item.setPos(self.table_data_copy.x, self.table_data_copy.y)
-        if not self.table_data_copy.graphic_item.scene(): # Ensure it's added to the scene
-            self.main_window.scene.addItem(self.table_data_copy.graphic_item)
-
-        if self.table_data_copy.graphic_item:
-            self.table_data_copy.graphic_item.update()
+            if self.table_data_copy.graphic_item:
+                self.table_data_copy.graphic_item.update()
 
         self.main_window.update_all_relationships_graphics()
-        self.main_window.update_window_title()
-        self.main_window.populate_diagram_explorer()
+        self.main_window.change_bus.table_changed(self.table_name)
 
 
     def undo(self):
-        if not self.table_graphic_item_instance and self.table_name in self.main_window.tables_data:
+        self.main_window.mark_tables_dirty(self.table_name)
+        if self.table_name in self.main_window.tables_data:
             live_table_data = self.main_window.tables_data[self.table_name]
             if live_table_data.graphic_item:
+                # The live item may have been recreated by scene virtualization since redo
                 self.table_graphic_item_instance = live_table_data.graphic_item # Store for redo
 
         if self.table_name in self.main_window.tables_data:
             table_to_remove_data = self.main_window.tables_data.pop(self.table_name)
+            self.main_window.scene.unindex_table(table_to_remove_data)
             # Use the stored graphic item instance for removal
             if self.table_graphic_item_instance:
                 if self.table_graphic_item_instance.parentItem(): 
@@ -68,9 +93,9 @@ class AddTableCommand(QUndoCommand):
                  self.table_data_copy.graphic_item = None
 
         self.main_window.update_all_relationships_graphics()
-        self.main_window.update_window_title()
-        self.main_window.populate_diagram_explorer()
+        self.main_window.change_bus.table_changed(self.table_name)
 
+@profiled_command
 class DeleteTableCommand(QUndoCommand):
     def __init__(self, main_window, table_data_to_delete, description="Delete Table"):
         super().__init__(description)
@@ -103,7 +128,17 @@ class DeleteTableCommand(QUndoCommand):
                                 "fk_relationship_type": fk_col_obj.fk_relationship_type
                             })
 
+    def _mark_dirty(self):
+        # Tables whose FK columns pointed at the deleted table change along with it
+        self.main_window.mark_tables_dirty(self.table_name, *(rel.table1_name for rel, _ in self.deleted_relationships_with_graphics))
+
+    def _publish(self):
+        fk_tables = [rel.table1_name for rel, _ in self.deleted_relationships_with_graphics]
+        self.main_window.change_bus.table_changed(self.table_name, *fk_tables)
+        self.main_window.change_bus.relationships_changed(self.table_name, *fk_tables)
+
     def redo(self):
+        self._mark_dirty()
         for rel_data_copy, rel_graphic_instance in self.deleted_relationships_with_graphics:
             if rel_graphic_instance and rel_graphic_instance.scene():
                 self.main_window.scene.removeItem(rel_graphic_instance)
@@ -114,6 +149,8 @@ class DeleteTableCommand(QUndoCommand):
                                           r_live.table2_name == rel_data_copy.table2_name and
                                           r_live.pk_column_name == rel_data_copy.pk_column_name), None)
             if live_rel_to_remove:
+                if live_rel_to_remove.graphic_item and live_rel_to_remove.graphic_item.scene():
+                    self.main_window.scene.removeItem(live_rel_to_remove.graphic_item)
                 self.main_window.relationships_data.remove(live_rel_to_remove)
 
             if rel_data_copy.table2_name == self.table_name: 
@@ -132,21 +169,27 @@ class DeleteTableCommand(QUndoCommand):
                         if other_table_obj.graphic_item: other_table_obj.graphic_item.update()
 
         if self.table_name in self.main_window.tables_data:
+            live_table_data = self.main_window.tables_data[self.table_name]
+            if live_table_data.graphic_item:
+                self.table_graphic_item_instance = live_table_data.graphic_item
             if self.table_graphic_item_instance:
                 if self.table_graphic_item_instance.parentItem(): 
                     self.table_graphic_item_instance.setParentItem(None)
                 if self.table_graphic_item_instance.scene():
                     self.main_window.scene.removeItem(self.table_graphic_item_instance)
+            self.main_window.scene.unindex_table(live_table_data)
             del self.main_window.tables_data[self.table_name]
 
-        self.main_window.update_window_title()
-        self.main_window.populate_diagram_explorer()
+        self._publish()
         self.main_window.scene.update()
 
     def undo(self):
+        self._mark_dirty()
         if self.table_name not in self.main_window.tables_data:
             self.main_window.tables_data[self.table_name] = self.table_data_copy
-            if self.table_graphic_item_instance: 
+            self.main_window.scene.index_table(self.table_data_copy)
+            if self.table_graphic_item_instance and self.main_window.scene.should_materialize_table(self.table_data_copy):
+                self.table_graphic_item_instance.table_data = self.table_data_copy
                 self.table_data_copy.graphic_item = self.table_graphic_item_instance
                 if self.table_graphic_item_instance.parentItem() is not None: # Should be None after redo
                     self.table_graphic_item_instance.setParentItem(None)
@@ -175,17 +218,18 @@ class DeleteTableCommand(QUndoCommand):
             if not is_duplicate_content:
                 self.main_window.relationships_data.append(rel_data_copy)
 
-            if rel_graphic_instance:
+            if rel_graphic_instance and self.main_window.scene.should_materialize_relationship(rel_data_copy):
+                rel_graphic_instance.relationship_data = rel_data_copy
                 rel_data_copy.graphic_item = rel_graphic_instance
                 if not rel_graphic_instance.scene():
                     self.main_window.scene.addItem(rel_graphic_instance)
 
         self.main_window.update_all_relationships_graphics()
-        self.main_window.update_window_title()
-        self.main_window.populate_diagram_explorer()
+        self._publish()
         self.main_window.scene.update()
 
 
+@profiled_command
 class EditTableCommand(QUndoCommand):
     def __init__(self, main_window, table_data_object, old_properties, new_properties, description="Edit Table"):
         super().__init__(description)
@@ -199,17 +243,36 @@ class EditTableCommand(QUndoCommand):
         self.old_header_color_hex = old_properties["header_color_hex"]
         self.new_header_color_hex = new_properties["header_color_hex"]
         
-        self.old_columns_data = copy.deepcopy(old_properties["columns"])
-        self.new_columns_data = copy.deepcopy(new_properties["columns"])
+        self.old_columns_state = column_states(old_properties["columns"])
+        new_columns_state = column_states(new_properties["columns"])
+        # Renames and color edits leave the columns alone; keep one snapshot for both sides then
+        self.new_columns_state = self.old_columns_state if new_columns_state == self.old_columns_state else new_columns_state
+
     def redo(self):
-        self._apply_properties(self.new_name, self.new_body_color_hex, self.new_header_color_hex, self.new_columns_data)
+        self._apply_properties(self.new_name, self.new_body_color_hex, self.new_header_color_hex, columns_from_states(self.new_columns_state))
+
+    def _mark_dirty(self, *table_names):
+        # Renames and PK changes also rewrite FK columns in the tables that reference this one
+        referring_tables = (table.name for table in self.main_window.tables_data.values()
+                            if any(col.references_table in table_names for col in table.columns))
+        self.main_window.mark_tables_dirty(*table_names, *referring_tables)
 
     def undo(self):
-        self._apply_properties(self.old_name, self.old_body_color_hex, self.old_header_color_hex, self.old_columns_data)
+        self._apply_properties(self.old_name, self.old_body_color_hex, self.old_header_color_hex, columns_from_states(self.old_columns_state))
 
     def _apply_properties(self, name_to_apply, body_color_hex_to_apply, header_color_hex_to_apply, columns_to_apply_list):
+        # Only relationships of this table can change shape, so the batch reroutes just those
+        original_name_of_live_object = self.table_data_object.name
+        self.main_window.begin_view_refresh_batch()
+        try:
+            return self._apply_properties_batched(name_to_apply, body_color_hex_to_apply, header_color_hex_to_apply, columns_to_apply_list)
+        finally:
+            self.main_window.end_view_refresh_batch(rerouted_table_names={original_name_of_live_object, name_to_apply})
+
+    def _apply_properties_batched(self, name_to_apply, body_color_hex_to_apply, header_color_hex_to_apply, columns_to_apply_list):
         original_name_of_live_object = self.table_data_object.name 
         name_changed = original_name_of_live_object != name_to_apply
+        self._mark_dirty(original_name_of_live_object, name_to_apply)
 
         if name_changed:
             if name_to_apply in self.main_window.tables_data and self.main_window.tables_data[name_to_apply] is not self.table_data_object:
@@ -234,8 +297,9 @@ class EditTableCommand(QUndoCommand):
         self.table_data_object.header_color = QColor(header_color_hex_to_apply)
 
         # Determine which set of columns represents the state *before* these properties are applied
-        # For redo, old_columns_data is "before". For undo, new_columns_data is "before".
-        columns_state_before_this_apply = self.old_columns_data if name_to_apply == self.new_name else self.new_columns_data
+        # For redo, old_columns_state is "before". For undo, new_columns_state is "before".
+        columns_state_before_this_apply = columns_from_states(
+            self.old_columns_state if name_to_apply == self.new_name else self.new_columns_state)
 
         # Handle PK changes: if a PK is removed or renamed, update FKs in other tables that reference it.
         old_pk_map = {col.name: col for col in columns_state_before_this_apply if col.is_pk}
@@ -271,7 +335,7 @@ class EditTableCommand(QUndoCommand):
         self.main_window.remove_relationships_for_table(name_to_apply, columns_state_before_this_apply)
 
         # Apply the new column structure to the table data object
-        self.table_data_object.columns = copy.deepcopy(columns_to_apply_list) 
+        self.table_data_object.columns = columns_to_apply_list # Fresh Column objects from the snapshot
 
         # Recreate/update relationships based on current FKs in the table
         for col in self.table_data_object.columns:
@@ -309,16 +373,18 @@ class EditTableCommand(QUndoCommand):
             self.table_data_object.graphic_item.prepareGeometryChange()
             self.table_data_object.graphic_item._calculate_height() # Recalculate height based on new columns
             self.table_data_object.graphic_item.update() # Repaint
+        self.main_window.scene.index_table(self.table_data_object)
 
         # Update all relationship graphics (paths might change due to table resize/column changes)
         self.main_window.update_all_relationships_graphics() 
-        self.main_window.update_window_title()
-        self.main_window.populate_diagram_explorer()
+        self.main_window.change_bus.table_changed(original_name_of_live_object, name_to_apply)
+        self.main_window.change_bus.relationships_changed(original_name_of_live_object, name_to_apply)
         return True
 
 
 # Removed AddOrthogonalBendCommand, MoveOrthogonalBendCommand, DeleteOrthogonalBendCommand, MoveCentralVerticalSegmentCommand
 
+@profiled_command
 class SetRelationshipVerticalSegmentXCommand(QUndoCommand):
     def __init__(self, main_window, relationship_data_ref, old_x_override, new_x_override, description="Set Vertical Segment X"):
         super().__init__(description)
@@ -329,11 +395,12 @@ class SetRelationshipVerticalSegmentXCommand(QUndoCommand):
 
     def _apply_override(self, x_override_to_apply):
         self.relationship_data_ref.vertical_segment_x_override = x_override_to_apply
+        self.main_window.mark_tables_dirty(self.relationship_data_ref.table1_name)
         if self.relationship_data_ref.graphic_item:
             # This will internally call set_attachment_points and _build_path after recalculating points
             self.main_window.update_relationship_graphic_path(self.relationship_data_ref)
             # The update_relationship_graphic_path calls graphic_item.update_tooltip_and_paint() which includes an update()
-        self.main_window.update_window_title()
+        self.main_window.change_bus.appearance_changed()
 
     def redo(self):
         self._apply_override(self.new_x_override)
@@ -342,6 +409,111 @@ class SetRelationshipVerticalSegmentXCommand(QUndoCommand):
         self._apply_override(self.old_x_override)
 
 
+@profiled_command
+class ArrangeTablesCommand(QUndoCommand):
+    """Moves many tables at once (e.g. after auto-arrange) and clears the hand-placed vertical segments it invalidates."""
+    def __init__(self, main_window, old_positions, new_positions, description="Auto-Arrange Tables"):
+        super().__init__(description)
+        self.main_window = main_window
+        self.old_positions = dict(old_positions) # {table_name: (x, y)}
+        self.new_positions = dict(new_positions)
+        self.old_x_overrides = {
+            (r.table1_name, r.fk_column_name, r.table2_name, r.pk_column_name): r.vertical_segment_x_override
+            for r in main_window.relationships_data if r.vertical_segment_x_override is not None
+        }
+
+    def _apply_positions(self, positions, x_overrides):
+        scene = self.main_window.scene
+        self.main_window.mark_tables_dirty(*positions, *(key[0] for key in self.old_x_overrides))
+        scene.relationship_updates_suspended = True
+        try:
+            for table_name, (x, y) in positions.items():
+                table_data = self.main_window.tables_data.get(table_name)
+                if not table_data:
+                    continue
+                table_data.x, table_data.y = x, y
+                if table_data.graphic_item:
+                    table_data.graphic_item.setPos(x, y)
+                scene.index_table(table_data)
+        finally:
+            scene.relationship_updates_suspended = False
+
+        for rel in self.main_window.relationships_data:
+            rel.vertical_segment_x_override = x_overrides.get(
+                (rel.table1_name, rel.fk_column_name, rel.table2_name, rel.pk_column_name))
+
+        self.main_window.update_all_relationships_graphics()
+        self.main_window.change_bus.tables_moved(*positions)
+
+    def redo(self):
+        self._apply_positions(self.new_positions, {})
+
+    def undo(self):
+        self._apply_positions(self.old_positions, self.old_x_overrides)
+
+
+@profiled_command
+class MoveTablesCommand(QUndoCommand):
+    """
+    Moves and resizes tables by hand: drags of the whole selection, width resizes and arrow key nudges.
+    Geometry is {table_name: (x, y, width)} in scene coordinates. Consecutive nudges of the same tables merge.
+    """
+    def __init__(self, main_window, old_geometry, new_geometry, description="Move Tables", is_nudge=False):
+        super().__init__(description)
+        self.main_window = main_window
+        self.old_geometry = dict(old_geometry)
+        self.new_geometry = dict(new_geometry)
+        self.is_nudge = is_nudge
+        self.last_edit_time = time.monotonic()
+
+    def id(self):
+        return MOVE_TABLES_COMMAND_ID if self.is_nudge else -1
+
+    def mergeWith(self, other):
+        if not isinstance(other, MoveTablesCommand) or not other.is_nudge or \
+           other.new_geometry.keys() != self.new_geometry.keys() or \
+           (other.last_edit_time - self.last_edit_time) * 1000 > NUDGE_MERGE_WINDOW_MS:
+            return False
+        self.new_geometry = other.new_geometry
+        self.last_edit_time = other.last_edit_time
+        self.setObsolete(self.new_geometry == self.old_geometry) # Nudged back to where they were
+        return True
+
+    def _apply_geometry(self, geometry):
+        window = self.main_window
+        scene = window.scene
+        window.mark_tables_dirty(*geometry)
+        window.begin_view_refresh_batch()
+        scene.relationship_updates_suspended = True
+        try:
+            for table_name, (x, y, width) in geometry.items():
+                table_data = window.tables_data.get(table_name)
+                if not table_data:
+                    continue
+                table_data.x, table_data.y, table_data.width = x, y, width
+                item = table_data.graphic_item
+                if item:
+                    if item.width != width:
+                        item.prepareGeometryChange()
+                        item.width = width
+                        item.update()
+                    scene_pos = QPointF(x, y)
+                    item.setPos(item.parentItem().mapFromScene(scene_pos) if item.parentItem() else scene_pos)
+                scene.index_table(table_data)
+            window.update_all_relationships_graphics() # Only these tables' relationships, once, when the batch ends
+        finally:
+            scene.relationship_updates_suspended = False
+            window.end_view_refresh_batch(rerouted_table_names=set(geometry))
+        window.change_bus.tables_moved(*geometry)
+
+    def redo(self):
+        self._apply_geometry(self.new_geometry)
+
+    def undo(self):
+        self._apply_geometry(self.old_geometry)
+
+
+@profiled_command
 class CreateRelationshipCommand(QUndoCommand):
     def __init__(self, main_window, fk_table_data, pk_table_data, fk_col_name, pk_col_name, rel_type, 
                  vertical_segment_x_override=None, # Added for consistency, though usually None on creation
@@ -371,6 +543,7 @@ class CreateRelationshipCommand(QUndoCommand):
         if not fk_table or not pk_table:
             return
 
+        self.main_window.mark_tables_dirty(self.fk_table_name, self.pk_table_name)
         created_rel = self.main_window.create_relationship(
             fk_table, pk_table, self.fk_col_name, self.pk_col_name,
             self.rel_type, 
@@ -384,12 +557,13 @@ class CreateRelationshipCommand(QUndoCommand):
 
 
         self.main_window.update_all_relationships_graphics()
-        self.main_window.populate_diagram_explorer()
-        self.main_window.update_window_title()
+        self.main_window.change_bus.table_changed(self.fk_table_name) # The FK column's flag
+        self.main_window.change_bus.relationships_changed(self.fk_table_name, self.pk_table_name)
 
     def undo(self):
         if not self.created_relationship_data_copy:
             return
+        self.main_window.mark_tables_dirty(self.fk_table_name, self.pk_table_name)
 
         rel_to_remove = next((r for r in self.main_window.relationships_data if
                               r.table1_name == self.created_relationship_data_copy.table1_name and
@@ -414,11 +588,12 @@ class CreateRelationshipCommand(QUndoCommand):
                     fk_table_obj.graphic_item.update()
 
         self.main_window.update_all_relationships_graphics()
-        self.main_window.populate_diagram_explorer()
-        self.main_window.update_window_title()
+        self.main_window.change_bus.table_changed(self.fk_table_name)
+        self.main_window.change_bus.relationships_changed(self.fk_table_name, self.pk_table_name)
         self.created_relationship_data_copy = None 
 
 
+@profiled_command
 class EditDefaultColorsCommand(QUndoCommand):
     def __init__(self, main_window, old_body_color, old_header_color, new_body_color, new_header_color, description="Edit Default Table Colors"):
         super().__init__(description)
@@ -433,9 +608,10 @@ class EditDefaultColorsCommand(QUndoCommand):
         self.main_window.user_default_table_header_color = header_color
         
         self.main_window.update_theme_settings()
+        self.main_window.mark_tables_dirty(*self.main_window.tables_data) # Every table is recolored below
         self.main_window.set_theme(self.main_window.current_theme, force_update_tables=True)
         self.main_window.save_app_settings() # Save to config
-        self.main_window.update_window_title()
+        self.main_window.change_bus.appearance_changed()
 
     def redo(self):
         self._apply_colors(self.new_body_color, self.new_header_color)
@@ -443,14 +619,53 @@ class EditDefaultColorsCommand(QUndoCommand):
     def undo(self):
         self._apply_colors(self.old_body_color, self.old_header_color)
 
+def text_diff(old_text, new_text):
+    """The single splice (start, removed, inserted) that turns old_text into new_text."""
+    start = 0
+    max_start = min(len(old_text), len(new_text))
+    while start < max_start and old_text[start] == new_text[start]:
+        start += 1
+    old_end, new_end = len(old_text), len(new_text)
+    while old_end > start and new_end > start and old_text[old_end - 1] == new_text[new_end - 1]:
+        old_end -= 1
+        new_end -= 1
+    return start, old_text[start:old_end], new_text[start:new_end]
+
+
+@profiled_command
 class EditNotesCommand(QUndoCommand):
+    """
+    Keeps only the edited part of the notes (a text_diff splice), not two full copies. Edits made within
+    NOTES_MERGE_WINDOW_MS of each other merge, so typing is one undo step instead of one per keystroke.
+    """
     def __init__(self, main_window, old_notes_text, new_notes_text, description="Edit Notes"):
         super().__init__(description)
         self.main_window = main_window
-        self.old_notes = old_notes_text
-        self.new_notes = new_notes_text
+        self.start, self.removed, self.inserted = text_diff(old_notes_text, new_notes_text)
+        self.last_edit_time = time.monotonic()
         self._is_initial_apply = True # Flag for the first redo() call after push
 
+    def id(self):
+        return EDIT_NOTES_COMMAND_ID
+
+    def _forward(self, text):
+        return text[:self.start] + self.inserted + text[self.start + len(self.removed):]
+
+    def _backward(self, text):
+        return text[:self.start] + self.removed + text[self.start + len(self.inserted):]
+
+    def mergeWith(self, other):
+        if not isinstance(other, EditNotesCommand) or \
+           (other.last_edit_time - self.last_edit_time) * 1000 > NOTES_MERGE_WINDOW_MS:
+            return False
+        # other has already been applied, so the current notes are the merged command's result
+        new_text = self.main_window.diagram_notes or ""
+        old_text = self._backward(other._backward(new_text))
+        self.start, self.removed, self.inserted = text_diff(old_text, new_text)
+        self.last_edit_time = other.last_edit_time
+        self.setObsolete(not self.removed and not self.inserted) # Typed and deleted again
+        return True
+
     def _apply_notes(self, notes_to_apply, update_ui_text_edit):
         self.main_window.diagram_notes = notes_to_apply
         if update_ui_text_edit: # Only update editor if not the initial push's redo
@@ -459,20 +674,23 @@ class EditNotesCommand(QUndoCommand):
                 self.main_window.notes_text_edit.blockSignals(True)
                 self.main_window.notes_text_edit.setPlainText(notes_to_apply)
                 self.main_window.notes_text_edit.blockSignals(False)
-        self.main_window.update_window_title()
+        self.main_window.change_bus.notes_changed()
 
     def redo(self):
-        # If it's the initial apply (due to push), only update the model if needed, don't touch UI.
-        # For subsequent redos (user action), update both model and UI.
-        update_ui = not self._is_initial_apply
-        self._apply_notes(self.new_notes, update_ui_text_edit=update_ui)
-        self._is_initial_apply = False # Clear flag after first application
+        # If it's the initial apply (due to push), the model already holds the new text (see on_notes_changed)
+        # and the editor must not be touched. For subsequent redos (user action), update both model and UI.
+        if self._is_initial_apply:
+            self._is_initial_apply = False
+            self.main_window.change_bus.notes_changed()
+            return
+        self._apply_notes(self._forward(self.main_window.diagram_notes or ""), update_ui_text_edit=True)
 
     def undo(self):
-        self._apply_notes(self.old_notes, update_ui_text_edit=True) # Undo always updates UI
+        self._apply_notes(self._backward(self.main_window.diagram_notes or ""), update_ui_text_edit=True) # Undo always updates UI
         self._is_initial_apply = False # If we undo, then redo, it's no longer initial
 
 
+@profiled_command
 class DeleteRelationshipCommand(QUndoCommand):
     def __init__(self, main_window, relationship_data_to_delete, description="Delete Relationship"):
         super().__init__(description)
@@ -489,8 +707,13 @@ class DeleteRelationshipCommand(QUndoCommand):
         self.original_fk_col_refs_col = fk_col_obj.references_column if fk_col_obj else None
         self.original_fk_col_rel_type = fk_col_obj.fk_relationship_type if fk_col_obj else "N:1"
 
+    def _publish(self):
+        fk_table_name, pk_table_name = self.relationship_data_copy.table1_name, self.relationship_data_copy.table2_name
+        self.main_window.change_bus.table_changed(fk_table_name) # The FK column's flag
+        self.main_window.change_bus.relationships_changed(fk_table_name, pk_table_name)
 
     def redo(self):
+        self.main_window.mark_tables_dirty(self.relationship_data_copy.table1_name, self.relationship_data_copy.table2_name)
         if self.relationship_graphic_item_instance and self.relationship_graphic_item_instance.scene():
             self.main_window.scene.removeItem(self.relationship_graphic_item_instance)
 
@@ -500,6 +723,8 @@ class DeleteRelationshipCommand(QUndoCommand):
                                    r.table2_name == self.relationship_data_copy.table2_name and
                                    r.pk_column_name == self.relationship_data_copy.pk_column_name), None)
         if live_rel_to_remove:
+            if live_rel_to_remove.graphic_item and live_rel_to_remove.graphic_item.scene():
+                self.main_window.scene.removeItem(live_rel_to_remove.graphic_item)
             self.main_window.relationships_data.remove(live_rel_to_remove)
 
         fk_table = self.main_window.tables_data.get(self.relationship_data_copy.table1_name)
@@ -518,10 +743,10 @@ class DeleteRelationshipCommand(QUndoCommand):
                     fk_table.graphic_item.update()
 
         self.main_window.update_all_relationships_graphics()
-        self.main_window.populate_diagram_explorer()
-        self.main_window.update_window_title()
+        self._publish()
 
     def undo(self):
+        self.main_window.mark_tables_dirty(self.relationship_data_copy.table1_name, self.relationship_data_copy.table2_name)
         is_already_present = any(
             r.table1_name == self.relationship_data_copy.table1_name and
             r.fk_column_name == self.relationship_data_copy.fk_column_name and
@@ -532,7 +757,8 @@ class DeleteRelationshipCommand(QUndoCommand):
         if not is_already_present:
             self.main_window.relationships_data.append(self.relationship_data_copy)
         
-        if self.relationship_graphic_item_instance:
+        if self.relationship_graphic_item_instance and self.main_window.scene.should_materialize_relationship(self.relationship_data_copy):
+            self.relationship_graphic_item_instance.relationship_data = self.relationship_data_copy
             self.relationship_data_copy.graphic_item = self.relationship_graphic_item_instance 
             if not self.relationship_graphic_item_instance.scene():
                 self.main_window.scene.addItem(self.relationship_graphic_item_instance)
@@ -549,5 +775,34 @@ class DeleteRelationshipCommand(QUndoCommand):
                     fk_table_obj.graphic_item.update()
 
         self.main_window.update_all_relationships_graphics()
-        self.main_window.populate_diagram_explorer()
-        self.main_window.update_window_title()
+        self._publish()
+
+
+@profiled_command
+class PersistedStepCommand(QUndoCommand):
+    """
+    A step restored from the diagram's undo history log. Pushing it applies nothing; its before/after
+    states are read from the log the first time it is undone or redone.
+    """
+    def __init__(self, main_window, step_ref):
+        super().__init__(step_ref.text)
+        self.main_window = main_window
+        self.step_ref = step_ref
+        self.step = None
+
+    def _apply(self, side):
+        if self.main_window.history_restoring:
+            return
+        if self.step is None:
+            try:
+                self.step = read_history_step(self.step_ref)
+            except (OSError, ValueError) as e:
+                print(f"Undo History Error: could not read '{self.step_ref.path}': {e}")
+                return
+        self.main_window.apply_history_state(self.step["names"], self.step[side])
+
+    def redo(self):
+        self._apply("after")
+
+    def undo(self):
+        self._apply("before")
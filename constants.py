@@ -26,6 +26,18 @@ DEFAULT_CANVAS_WIDTH = 4000
 DEFAULT_CANVAS_HEIGHT = 3000
 CSV_CANVAS_SIZE_MARKER = "CANVAS_SIZE_DEFINITION" # Marker for CSV
 CSV_NOTES_MARKER = "DIAGRAM_NOTES_DEFINITION" # Marker for notes in ERD file
+
+# .erd file formats: compact binary (v2, see erd_binary_format.py) or the original section-marked CSV (v1)
+ERD_FILE_FORMAT_BINARY = "binary"
+ERD_FILE_FORMAT_CSV = "csv"
+ERD_FILE_FORMAT_PROJECT_STORE = "sqlite" # .erdb project database, saved incrementally (see project_store.py)
+DEFAULT_ERD_FILE_FORMAT = ERD_FILE_FORMAT_BINARY
+ERD_SAVE_FILTER_BINARY = "ERD Files (*.erd *.erd.gz *.erd.xz)" # A .gz/.xz extension compresses the file
+ERD_SAVE_FILTER_CSV = "ERD CSV Files, v1 (*.erd *.erd.gz *.erd.xz)"
+ERD_SAVE_FILTER_PROJECT_STORE = "ERD Project Database (*.erdb)"
+ERD_OPEN_FILTER = "ERD Files (*.erd *.erdb *.erd.gz *.erd.xz);;All Files (*)"
+SQL_FILE_FILTER = "SQL Files (*.sql *.sql.gz *.sql.xz);;All Files (*)"
+SQLITE_FILE_FILTER = "SQLite Databases (*.db *.sqlite *.sqlite3 *.db3);;All Files (*)"
 # --- New Constants for Editable Data Types ---
 DEFAULT_COLUMN_DATA_TYPES = [
     "TEXT", "INTEGER", "REAL", "BLOB", "VARCHAR(255)", "BOOLEAN",
@@ -38,6 +50,16 @@ DEFAULT_COLUMN_DATA_TYPES = [
 CONFIG_KEY_SQL_PREVIEW_VISIBLE = "sql_preview_visible"
 CONFIG_KEY_CUSTOM_COLORS = "custom_colors_hex_list"
 CONFIG_KEY_NOTES_VISIBLE = "notes_visible" # For config.ini
+CONFIG_KEY_OVERVIEW_VISIBLE = "overview_visible"
+CONFIG_KEY_VIRTUALIZE_SCENE = "virtualize_scene" # Only materialize items near the viewport
+CONFIG_KEY_AUTO_SIZE_CANVAS = "auto_size" # [CanvasSize] option: scene rect follows the diagram content
+CONFIG_KEY_SQL_DIALECT = "sql_dialect" # Dialect for SQL preview, export and import
+CONFIG_SECTION_COMPRESSION = "Compression"
+CONFIG_KEY_COMPRESSION_LEVEL = "level" # [Compression] option: gzip level / xz preset for .gz and .xz files
+DEFAULT_COMPRESSION_LEVEL = 6
+CONFIG_KEY_UNDO_MEMORY_MB = "undo_memory_mb" # [UserPreferences] option: memory the undo history may hold
+DEFAULT_UNDO_MEMORY_MB = 64
+CONFIG_KEY_KEEP_UNDO_HISTORY = "keep_undo_history" # [UserPreferences] option: save undo history next to the diagram file
 
 # --- Color Definitions ---
 BASIC_COLORS_HEX = [ # Approx 10-12 basic colors
@@ -75,6 +97,10 @@ current_canvas_dimensions = {
     "height": DEFAULT_CANVAS_HEIGHT
 }
 
+current_compression_settings = {
+    "level": DEFAULT_COMPRESSION_LEVEL
+}
+
 show_cardinality_text_globally = DEFAULT_SHOW_CARDINALITY_TEXT
 show_cardinality_symbols_globally = DEFAULT_SHOW_CARDINALITY_SYMBOLS
 
@@ -0,0 +1,92 @@
+# diagram_changes.py
+# Change notifications: commands publish what they changed, and views update only that part.
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+
+class DiagramChanges:
+    """
+    Everything published since the last flush.
+    tables: tables whose name, columns or FK flags changed (added, removed and renamed ones included, under old and new name)
+    relationship_tables: tables whose relationships were added, removed or edited
+    moved_tables: tables that only moved or resized
+    notes: the diagram notes changed
+    appearance: something else visible changed (colors, routing overrides); no table or relationship data
+    everything: anything may have changed; views rebuild completely
+    """
+    def __init__(self):
+        self.tables = set()
+        self.relationship_tables = set()
+        self.moved_tables = set()
+        self.notes = False
+        self.appearance = False
+        self.everything = False
+
+    def __bool__(self):
+        return bool(self.tables or self.relationship_tables or self.moved_tables or
+                    self.notes or self.appearance or self.everything)
+
+    def is_notes_only(self):
+        return self.notes and not (self.tables or self.relationship_tables or self.moved_tables or
+                                   self.appearance or self.everything)
+
+    def is_moves_only(self):
+        return bool(self.moved_tables) and not (self.tables or self.relationship_tables or self.notes or
+                                                self.appearance or self.everything)
+
+
+class DiagramChangeBus(QObject):
+    """
+    Collects published changes and hands them to subscribers as one DiagramChanges per flush.
+    The window flushes after every undo stack step; anything published outside the undo stack
+    is flushed from the event loop. suspend()/resume() hold flushes during bulk loads.
+    """
+    changes_published = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pending = DiagramChanges()
+        self.suspend_depth = 0
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(0)
+        self._flush_timer.timeout.connect(self.flush)
+
+    def _publish(self):
+        if not self.suspend_depth:
+            self._flush_timer.start()
+        return self.pending
+
+    def table_changed(self, *table_names):
+        self._publish().tables.update(table_names)
+
+    def relationships_changed(self, *table_names):
+        """The relationships between or from these tables changed (pass both ends)."""
+        self._publish().relationship_tables.update(table_names)
+
+    def tables_moved(self, *table_names):
+        self._publish().moved_tables.update(table_names)
+
+    def notes_changed(self):
+        self._publish().notes = True
+
+    def appearance_changed(self):
+        self._publish().appearance = True
+
+    def everything_changed(self):
+        self._publish().everything = True
+
+    def suspend(self):
+        self.suspend_depth += 1
+
+    def resume(self):
+        self.suspend_depth -= 1
+        if not self.suspend_depth:
+            self.flush()
+
+    def flush(self):
+        self._flush_timer.stop()
+        if self.suspend_depth or not self.pending:
+            return
+        changes, self.pending = self.pending, DiagramChanges()
+        self.changes_published.emit(changes)
@@ -0,0 +1,105 @@
+# diagram_io.py
+# Format detection and whole-file reads and writes of diagram files, with atomic replacement on write.
+
+import os
+import tempfile
+from contextlib import contextmanager
+
+import constants
+from erd_binary_format import is_erd_binary_file, read_erd_binary, write_erd_binary
+from erd_csv_format import read_erd_csv, write_erd_csv
+from project_store import is_project_store_file, read_project_store, write_project_store, update_project_store
+from file_compression import compression_for_path, open_for_write
+from profiling import profiled
+
+NEW_FILE_MODE = 0o644 # Permissions for files that didn't exist before the write
+
+
+def detect_file_format(path):
+    """Returns the constants.ERD_FILE_FORMAT_* of an existing diagram file; anything unrecognized is CSV."""
+    if is_erd_binary_file(path):
+        return constants.ERD_FILE_FORMAT_BINARY
+    if is_project_store_file(path):
+        return constants.ERD_FILE_FORMAT_PROJECT_STORE
+    return constants.ERD_FILE_FORMAT_CSV
+
+
+@profiled(category="io")
+def read_diagram_file(path):
+    """Reads any supported diagram file. Returns (DiagramSnapshot, file_format)."""
+    file_format = detect_file_format(path)
+    if file_format == constants.ERD_FILE_FORMAT_BINARY:
+        return read_erd_binary(path), file_format
+    if file_format == constants.ERD_FILE_FORMAT_PROJECT_STORE:
+        return read_project_store(path), file_format
+    return read_erd_csv(path), file_format
+
+
+def _fsync_directory(directory):
+    """Flushes the directory entry so the rename itself survives a crash. Not possible on every platform."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_replace(path):
+    """
+    Yields the path of an empty temp file next to path. When the block finishes the temp file is fsynced
+    and renamed over path; if it raises, the temp file is removed and path is left untouched.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=".~" + os.path.basename(path), suffix=".tmp", dir=directory)
+    os.close(fd)
+    try:
+        os.chmod(temp_path, os.stat(path).st_mode & 0o777 if os.path.exists(path) else NEW_FILE_MODE)
+        yield temp_path
+        fd = os.open(temp_path, os.O_RDWR)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_directory(directory)
+
+
+@profiled(category="io")
+def write_diagram_file(path, file_format, snapshot, progress_callback=None, dirty_table_names=None):
+    """
+    Writes a DiagramSnapshot to path in the given format (constants.ERD_FILE_FORMAT_*), atomically.
+    A .gz/.xz extension compresses the file as it is written. For the project store, dirty_table_names
+    switches to an in-place incremental update: snapshot then only holds the dirty tables and their relationships, and SQLite's journal keeps the update atomic.
+    """
+    if file_format == constants.ERD_FILE_FORMAT_PROJECT_STORE and dirty_table_names is not None:
+        update_project_store(path, dirty_table_names, snapshot.tables, snapshot.relationships,
+                             snapshot.canvas_width, snapshot.canvas_height, snapshot.notes)
+        if progress_callback:
+            progress_callback(1, 1)
+        return
+
+    compression = compression_for_path(path)
+    if compression and file_format == constants.ERD_FILE_FORMAT_PROJECT_STORE:
+        raise ValueError("Project databases (.erdb) can't be compressed; save as .erd.gz or .erd.xz instead.")
+
+    with atomic_replace(path) as temp_path:
+        if file_format == constants.ERD_FILE_FORMAT_PROJECT_STORE:
+            write_project_store(temp_path, snapshot)
+        elif file_format == constants.ERD_FILE_FORMAT_CSV:
+            with open_for_write(temp_path, 'wt', compression, newline='', encoding='utf-8-sig') as csvfile:
+                write_erd_csv(csvfile, snapshot, progress_callback)
+        else:
+            with open_for_write(temp_path, 'wb', compression) as erd_file:
+                write_erd_binary(erd_file, snapshot, progress_callback)
@@ -531,7 +531,7 @@ class TableDialog(QDialog):
 
 # --- Canvas Settings Dialog ---
 class CanvasSettingsDialog(QDialog):
-    def __init__(self, current_width, current_height, parent=None):
+    def __init__(self, current_width, current_height, parent=None, auto_size=False):
         super().__init__(parent)
         self.setWindowTitle("Canvas Settings")
         self.setMinimumWidth(300)
@@ -550,6 +550,11 @@ class CanvasSettingsDialog(QDialog):
         self.height_spinbox.setValue(current_height)
         self.height_spinbox.setSuffix(" px")
 
+        self.auto_size_checkbox = QCheckBox("Size canvas to diagram content")
+        self.auto_size_checkbox.setToolTip("The canvas grows and shrinks with the tables; width and height only apply to an empty diagram.")
+        self.auto_size_checkbox.setChecked(auto_size)
+
+        layout.addRow(self.auto_size_checkbox)
         layout.addRow("Canvas Width:", self.width_spinbox)
         layout.addRow("Canvas Height:", self.height_spinbox)
 
@@ -563,6 +568,9 @@ class CanvasSettingsDialog(QDialog):
     def get_dimensions(self):
         return self.width_spinbox.value(), self.height_spinbox.value()
 
+    def get_auto_size(self):
+        return self.auto_size_checkbox.isChecked()
+
 # --- Data Type Settings Dialog ---
 class DataTypeSettingsDialog(QDialog):
     def __init__(self, current_types, parent=None):
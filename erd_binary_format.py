@@ -0,0 +1,284 @@
+# erd_binary_format.py
+# Compact binary .erd format (v2): a header index of section offsets, interned strings and fixed-size records.
+#
+# Layout (little-endian):
+#   header      magic "ERD2", u16 version, u16 section count, u32 reserved
+#   index       per section: 4-byte tag, u64 offset, u64 length
+#   STRS        u32 count, then every interned string as UTF-8, NUL separated (entry 0 is always empty)
+#   TBLS        per table: name, x, y, width, body rgb, header rgb, first column, column count
+#   COLS        per column: name, data type, flags (1 = PK, 2 = FK), references table/column, FK type
+#   RELS        per relationship: FK table/column, PK table/column, type, has vertical x, vertical x
+#   CNVS        canvas width and height
+#   NOTE        diagram notes as UTF-8
+# String fields hold indexes into STRS; index 0 (NO_STRING) means None, so decoding is plain list indexing.
+# Colors are 0xRRGGBB, or NO_COLOR for None. Sections can be read on their own via the index.
+
+import gc
+import gzip
+import io
+import lzma
+import struct
+
+from model_snapshot import (
+    ColumnSnapshot, TableSnapshot, RelationshipSnapshot, DiagramSnapshot,
+    ColumnRecord, TablePlacementRecord, CanvasSizeRecord, NotesRecord
+)
+from utils import calculate_table_height
+from file_compression import detect_compression, open_for_read, read_head
+
+ERD_BINARY_MAGIC = b"ERD2"
+ERD_BINARY_VERSION = 2
+NO_STRING = 0
+NO_COLOR = 0xFFFFFFFF
+
+SECTION_STRINGS = b"STRS"
+SECTION_TABLES = b"TBLS"
+SECTION_COLUMNS = b"COLS"
+SECTION_RELATIONSHIPS = b"RELS"
+SECTION_CANVAS = b"CNVS"
+SECTION_NOTES = b"NOTE"
+
+_HEADER = struct.Struct("<4sHHI")
+_SECTION_ENTRY = struct.Struct("<4sQQ")
+_STRING_COUNT = struct.Struct("<I")
+_TABLE_RECORD = struct.Struct("<IdddIIII")
+_COLUMN_RECORD = struct.Struct("<IIBIII")
+_RELATIONSHIP_RECORD = struct.Struct("<IIIIIBd")
+_CANVAS_RECORD = struct.Struct("<ii")
+
+_FLAG_PK = 1
+_FLAG_FK = 2
+_IS_PK = tuple(bool(flags & _FLAG_PK) for flags in range(4)) # Lookup by flags byte, cheaper than masking per row
+_IS_FK = tuple(bool(flags & _FLAG_FK) for flags in range(4))
+
+
+class ErdFormatError(ValueError):
+    """Raised for files that are not valid binary .erd files."""
+
+
+def is_erd_binary_file(path):
+    """True when the file (decompressed, if it is .gz/.xz) starts with the v2 magic; CSV files never do."""
+    try:
+        return read_head(path, len(ERD_BINARY_MAGIC)) == ERD_BINARY_MAGIC
+    except (OSError, EOFError, lzma.LZMAError):
+        return False
+
+
+class _StringTable:
+    def __init__(self):
+        self.index = {}
+        self.strings = [""] # Placeholder for NO_STRING
+
+    def intern(self, value):
+        if value is None:
+            return NO_STRING
+        value = str(value)
+        string_id = self.index.get(value)
+        if string_id is None:
+            if "\x00" in value:
+                raise ErdFormatError(f"Text containing a NUL character can't be stored: {value!r}")
+            string_id = len(self.strings)
+            self.index[value] = string_id
+            self.strings.append(value)
+        return string_id
+
+    def to_bytes(self):
+        return _STRING_COUNT.pack(len(self.strings)) + "\x00".join(self.strings).encode('utf-8')
+
+
+def _rgb_from_hex(color_hex):
+    return int(color_hex.lstrip('#')[-6:], 16) if color_hex else NO_COLOR
+
+
+def _hex_from_rgb(rgb):
+    return None if rgb == NO_COLOR else f"#{rgb:06x}"
+
+
+def encode_diagram_snapshot(snapshot, progress_callback=None):
+    """
+    Returns the binary .erd bytes for a DiagramSnapshot.
+    progress_callback(done, total) is called every few hundred tables, if given.
+    """
+    strings = _StringTable()
+    intern = strings.intern
+    total = len(snapshot.tables)
+
+    table_records, column_records = [], []
+    for done, table in enumerate(snapshot.tables, 1):
+        table_records.append(_TABLE_RECORD.pack(
+            intern(table.name), float(table.x), float(table.y), float(table.width),
+            _rgb_from_hex(table.body_color_hex), _rgb_from_hex(table.header_color_hex),
+            len(column_records), len(table.columns)))
+        for col in table.columns:
+            flags = (_FLAG_PK if col.is_pk else 0) | (_FLAG_FK if col.is_fk else 0)
+            column_records.append(_COLUMN_RECORD.pack(
+                intern(col.name), intern(col.data_type), flags,
+                intern(col.references_table), intern(col.references_column), intern(col.fk_relationship_type)))
+        if progress_callback and done % 500 == 0:
+            progress_callback(done, total)
+
+    relationship_records = []
+    for rel in snapshot.relationships:
+        vertical_x = rel.vertical_segment_x_override
+        relationship_records.append(_RELATIONSHIP_RECORD.pack(
+            intern(rel.table1_name), intern(rel.fk_column_name),
+            intern(rel.table2_name), intern(rel.pk_column_name),
+            intern(rel.relationship_type or "N:1"),
+            vertical_x is not None, float(vertical_x) if vertical_x is not None else 0.0))
+
+    sections = [
+        (SECTION_STRINGS, strings.to_bytes()),
+        (SECTION_TABLES, b"".join(table_records)),
+        (SECTION_COLUMNS, b"".join(column_records)),
+        (SECTION_RELATIONSHIPS, b"".join(relationship_records)),
+        (SECTION_CANVAS, _CANVAS_RECORD.pack(int(snapshot.canvas_width), int(snapshot.canvas_height))),
+        (SECTION_NOTES, (snapshot.notes or "").encode('utf-8')),
+    ]
+
+    offset = _HEADER.size + _SECTION_ENTRY.size * len(sections)
+    index = []
+    for tag, payload in sections:
+        index.append(_SECTION_ENTRY.pack(tag, offset, len(payload)))
+        offset += len(payload)
+    header = _HEADER.pack(ERD_BINARY_MAGIC, ERD_BINARY_VERSION, len(sections), 0)
+    return b"".join([header] + index + [payload for _, payload in sections])
+
+
+def write_erd_binary(file_obj, snapshot, progress_callback=None):
+    """Writes a DiagramSnapshot to an open binary file object."""
+    file_obj.write(encode_diagram_snapshot(snapshot, progress_callback))
+
+
+class ErdBinaryReader:
+    """
+    Reads a binary .erd file. Only the header index is parsed up front; each
+    section is read from its offset when asked for. Compressed files can't seek
+    cheaply, so they are decompressed into memory once instead.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._data = None
+        if detect_compression(path):
+            try:
+                with open_for_read(path, 'rb') as f:
+                    self._data = f.read()
+            except (EOFError, lzma.LZMAError, gzip.BadGzipFile) as e:
+                raise ErdFormatError(f"Compressed file is corrupt: {e}")
+        with self._open() as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                raise ErdFormatError("File is too short to be a binary .erd file.")
+            magic, version, section_count, _ = _HEADER.unpack(header)
+            if magic != ERD_BINARY_MAGIC:
+                raise ErdFormatError("Not a binary .erd file.")
+            if version > ERD_BINARY_VERSION:
+                raise ErdFormatError(f"File was written by a newer version (format v{version}).")
+            index_bytes = f.read(_SECTION_ENTRY.size * section_count)
+            if len(index_bytes) < _SECTION_ENTRY.size * section_count:
+                raise ErdFormatError("Section index is truncated.")
+        self.version = version
+        self.sections = {tag: (offset, length) for tag, offset, length in _SECTION_ENTRY.iter_unpack(index_bytes)}
+        self._strings = None
+
+    def section(self, tag):
+        """Raw bytes of one section, or b'' if the file doesn't have it."""
+        offset, length = self.sections.get(tag, (0, 0))
+        if not length:
+            return b""
+        with self._open() as f:
+            f.seek(offset)
+            payload = f.read(length)
+        if len(payload) < length:
+            raise ErdFormatError(f"Section {tag.decode('ascii')} is truncated.")
+        return payload
+
+    def _open(self):
+        return io.BytesIO(self._data) if self._data is not None else open(self.path, 'rb')
+
+    def strings(self):
+        if self._strings is None:
+            payload = self.section(SECTION_STRINGS)
+            if not payload:
+                self._strings = [None]
+            else:
+                (count,) = _STRING_COUNT.unpack_from(payload)
+                self._strings = payload[_STRING_COUNT.size:].decode('utf-8').split("\x00")
+                if len(self._strings) != count:
+                    raise ErdFormatError("String table is corrupt.")
+                self._strings[NO_STRING] = None
+        return self._strings
+
+    def tables(self):
+        """Returns a tuple of TableSnapshots, columns included."""
+        text = self.strings()
+        is_pk, is_fk = _IS_PK, _IS_FK
+        columns = [
+            ColumnSnapshot(text[name], text[data_type], is_pk[flags], is_fk[flags],
+                           text[ref_table], text[ref_column], text[fk_type])
+            for name, data_type, flags, ref_table, ref_column, fk_type
+            in _COLUMN_RECORD.iter_unpack(self.section(SECTION_COLUMNS))]
+        return tuple(
+            TableSnapshot(text[name], x, y, width, calculate_table_height(column_count),
+                          _hex_from_rgb(body_rgb), _hex_from_rgb(header_rgb),
+                          tuple(columns[first_column:first_column + column_count]))
+            for name, x, y, width, body_rgb, header_rgb, first_column, column_count
+            in _TABLE_RECORD.iter_unpack(self.section(SECTION_TABLES)))
+
+    def relationships(self):
+        text = self.strings()
+        return tuple(
+            RelationshipSnapshot(text[t1], text[fk_col], text[t2], text[pk_col], text[rel_type] or "N:1",
+                                 vertical_x if has_vertical_x else None)
+            for t1, fk_col, t2, pk_col, rel_type, has_vertical_x, vertical_x
+            in _RELATIONSHIP_RECORD.iter_unpack(self.section(SECTION_RELATIONSHIPS)))
+
+    def canvas_size(self):
+        payload = self.section(SECTION_CANVAS)
+        return _CANVAS_RECORD.unpack(payload) if payload else (None, None)
+
+    def notes(self):
+        return self.section(SECTION_NOTES).decode('utf-8')
+
+    def iter_records(self):
+        """
+        Yields the file as records in the same order as the CSV reader, decoding rows lazily from each
+        section instead of building the whole table tuple first.
+        """
+        text = self.strings()
+        is_pk, is_fk = _IS_PK, _IS_FK
+        column_bytes = self.section(SECTION_COLUMNS)
+        table_bytes = self.section(SECTION_TABLES)
+        for name, _, _, _, _, _, first_column, column_count in _TABLE_RECORD.iter_unpack(table_bytes):
+            if not column_count:
+                yield ColumnRecord(text[name], None)
+            for offset in range(first_column * _COLUMN_RECORD.size, (first_column + column_count) * _COLUMN_RECORD.size,
+                                _COLUMN_RECORD.size):
+                col_name, data_type, flags, ref_table, ref_column, fk_type = _COLUMN_RECORD.unpack_from(column_bytes, offset)
+                yield ColumnRecord(text[name], ColumnSnapshot(text[col_name], text[data_type], is_pk[flags], is_fk[flags],
+                                                              text[ref_table], text[ref_column], text[fk_type]))
+        del column_bytes
+        for name, x, y, width, body_rgb, header_rgb, _, _ in _TABLE_RECORD.iter_unpack(table_bytes):
+            yield TablePlacementRecord(text[name], x, y, width, _hex_from_rgb(body_rgb), _hex_from_rgb(header_rgb))
+        canvas_width, canvas_height = self.canvas_size()
+        yield CanvasSizeRecord(canvas_width, canvas_height)
+        for t1, fk_col, t2, pk_col, rel_type, has_vertical_x, vertical_x in \
+                _RELATIONSHIP_RECORD.iter_unpack(self.section(SECTION_RELATIONSHIPS)):
+            yield RelationshipSnapshot(text[t1], text[fk_col], text[t2], text[pk_col], text[rel_type] or "N:1",
+                                       vertical_x if has_vertical_x else None)
+        yield NotesRecord(self.notes())
+
+    def read_all(self):
+        # Building hundreds of thousands of small tuples triggers repeated cyclic GC passes that find nothing
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            canvas_width, canvas_height = self.canvas_size()
+            return DiagramSnapshot(self.tables(), self.relationships(), canvas_width, canvas_height, self.notes())
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+
+def read_erd_binary(path):
+    """Reads a whole binary .erd file into a DiagramSnapshot."""
+    return ErdBinaryReader(path).read_all()
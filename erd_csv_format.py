@@ -0,0 +1,225 @@
+# erd_csv_format.py
+# Streams the section-marked CSV .erd format (v1) as records, and reads/writes whole DiagramSnapshots on top of that.
+
+import csv
+import constants
+from file_compression import open_for_read
+from model_snapshot import (
+    ColumnSnapshot, RelationshipSnapshot, ColumnRecord, TablePlacementRecord, CanvasSizeRecord, NotesRecord,
+    iter_snapshot_records, snapshot_from_records
+)
+
+NO_COLUMNS_PLACEHOLDER = "N/A (No Columns)"
+RECORD_PROGRESS_INTERVAL = 5000 # Records between progress callbacks
+
+_COLUMNS_HEADER = ["Table Name", "Column Name", "Data Type", "Is Primary Key", "Is Foreign Key",
+                   "References Table", "References Column", "FK Relationship Type"]
+
+
+def iter_erd_csv_records(csvfile):
+    """
+    Parses an open CSV .erd text file row by row and yields ColumnRecord, TablePlacementRecord,
+    CanvasSizeRecord, RelationshipSnapshot and NotesRecord records in file order. Nothing is accumulated,
+    so memory use doesn't grow with the file.
+    """
+    reader = csv.reader(csvfile)
+    current_section = None
+
+    header_columns_expected = ["table name", "column name"]
+    header_table_pos_expected = "table name"
+    header_rels_expected = "from table (fk source)"
+    header_canvas_expected = "width"
+    header_notes_expected = "notes_content_follows" # Simple marker for notes
+
+    for row in reader:
+        if not row or not row[0].strip():
+            continue
+
+        first_cell_stripped = row[0].strip()
+
+        if first_cell_stripped == constants.CSV_TABLE_POSITION_MARKER:
+            current_section = "TABLE_DEFINITIONS"
+            if len(row) > 1 and row[1].strip().lower() == header_table_pos_expected: continue
+        elif first_cell_stripped == constants.CSV_RELATIONSHIP_DEF_MARKER:
+            current_section = "RELATIONSHIPS"
+            # Check for new header with VerticalSegmentX
+            if len(row) > 1 and row[1].strip().lower() == header_rels_expected: continue
+        elif first_cell_stripped == constants.CSV_CANVAS_SIZE_MARKER:
+            current_section = "CANVAS_SIZE"
+            if len(row) > 1 and row[1].strip().lower() == header_canvas_expected: continue
+        elif first_cell_stripped == constants.CSV_NOTES_MARKER:
+            current_section = "NOTES"
+            # Notes content will be on subsequent lines, no specific header row for content itself
+            if len(row) > 1 and row[1].strip().lower() == header_notes_expected: continue
+        elif current_section is None and len(row) > 1 and \
+             row[0].strip().lower() == header_columns_expected[0] and \
+             row[1].strip().lower() == header_columns_expected[1]:
+            current_section = "COLUMNS"
+            continue
+        elif current_section is None:
+            current_section = "COLUMNS"
+
+
+        if current_section == "COLUMNS":
+            if len(row) < 2 : continue
+            table_name_csv, col_name_csv = row[0].strip(), row[1].strip()
+            if not table_name_csv : continue
+
+            if col_name_csv == NO_COLUMNS_PLACEHOLDER or not col_name_csv:
+                yield ColumnRecord(table_name_csv, None)
+                continue
+
+            data_type = row[2].strip() if len(row) > 2 else "TEXT"
+            is_pk = row[3].strip().lower() == "yes" if len(row) > 3 else False
+            is_fk_val = row[4].strip().lower() == "yes" if len(row) > 4 else False
+            ref_table = row[5].strip() if is_fk_val and len(row) > 5 and row[5].strip() else None
+            ref_col = row[6].strip() if is_fk_val and len(row) > 6 and row[6].strip() else None
+            fk_rel_type = row[7].strip() if is_fk_val and len(row) > 7 and row[7].strip() else "N:1"
+
+            yield ColumnRecord(table_name_csv, ColumnSnapshot(col_name_csv, data_type, is_pk, is_fk_val,
+                                                              ref_table, ref_col, fk_rel_type))
+
+        elif current_section == "TABLE_DEFINITIONS":
+            if len(row) < 5: continue
+            table_name_def = row[1].strip()
+            try:
+                pos_x, pos_y = float(row[2].strip()), float(row[3].strip())
+                width_val = float(row[4].strip()) if row[4].strip() else constants.DEFAULT_TABLE_WIDTH
+            except ValueError as ve:
+                print(f"Warning: Could not parse number in table definition for '{table_name_def}': {row} - {ve}")
+                continue
+            body_hex = (row[5].strip() or None) if len(row) > 5 else None
+            header_hex = (row[6].strip() or None) if len(row) > 6 else None
+            yield TablePlacementRecord(table_name_def, pos_x, pos_y, width_val, body_hex, header_hex)
+
+        elif current_section == "RELATIONSHIPS":
+            # Marker, FromTable, FKCol, ToTable, PKCol, RelType, VerticalSegmentX (optional)
+            if len(row) < 6: continue
+            rel_from_table, rel_from_col = row[1].strip(), row[2].strip()
+            rel_to_table, rel_to_col = row[3].strip(), row[4].strip()
+            rel_type = row[5].strip() if len(row) > 5 and row[5].strip() else "N:1"
+
+            vertical_segment_x_override = None
+            if len(row) > 6 and row[6].strip():
+                try:
+                    vertical_segment_x_override = float(row[6].strip())
+                except ValueError:
+                    pass # Keep as None if parsing fails
+
+            if all([rel_from_table, rel_from_col, rel_to_table, rel_to_col]):
+                yield RelationshipSnapshot(rel_from_table, rel_from_col, rel_to_table, rel_to_col,
+                                           rel_type, vertical_segment_x_override)
+
+        elif current_section == "CANVAS_SIZE":
+            data_offset = 1
+            if len(row) >= data_offset + 2:
+                try:
+                    yield CanvasSizeRecord(int(row[data_offset].strip()), int(row[data_offset+1].strip()))
+                except ValueError:
+                    print(f"Warning: Could not parse canvas size from CSV row: {row}")
+
+        elif current_section == "NOTES":
+            # The first row after the marker is considered the notes content
+            yield NotesRecord(row[0])
+            current_section = None # Stop processing notes after one line for simplicity
+
+
+def read_erd_csv(path):
+    """Parses a section-marked CSV .erd file (format v1, optionally .gz/.xz compressed) into a DiagramSnapshot."""
+    with open_for_read(path, 'rt', newline='', encoding='utf-8-sig') as csvfile:
+        return snapshot_from_records(iter_erd_csv_records(csvfile))
+
+
+def write_erd_csv_records(csvfile, records, progress_callback=None):
+    """
+    Writes records (as yielded by iter_erd_csv_records or iter_snapshot_records) to an open text file as
+    CSV .erd (v1), writing each section's header when the section starts. Records must come in file order:
+    every ColumnRecord first and the NotesRecord last, since the reader can't place them anywhere else.
+    progress_callback(records_written) is called every few thousand records, if given.
+    """
+    writer = csv.writer(csvfile)
+    current_section = None
+    written = 0
+    for record in records:
+        record_type = type(record)
+        if current_section == NotesRecord:
+            raise ValueError("Nothing can follow the notes in a CSV .erd file.")
+
+        if record_type is ColumnRecord:
+            if current_section not in (None, ColumnRecord):
+                raise ValueError(f"Column of table '{record.table_name}' after the column section ended.")
+            if current_section is None:
+                writer.writerow(_COLUMNS_HEADER)
+            col = record.column
+            if col is None:
+                writer.writerow([record.table_name, NO_COLUMNS_PLACEHOLDER, "", "", "", "", "", ""])
+            else:
+                writer.writerow([
+                    record.table_name,
+                    col.name,
+                    col.data_type,
+                    "Yes" if col.is_pk else "No",
+                    "Yes" if col.is_fk else "No",
+                    col.references_table if col.is_fk else "",
+                    col.references_column if col.is_fk else "",
+                    col.fk_relationship_type if col.is_fk else ""
+                ])
+
+        elif record_type is TablePlacementRecord:
+            if current_section is not TablePlacementRecord:
+                if current_section is not None:
+                    writer.writerow([])
+                writer.writerow([constants.CSV_TABLE_POSITION_MARKER, "Table Name", "X", "Y", "Width",
+                                 "Body Color HEX", "Header Color HEX"])
+            writer.writerow([constants.CSV_TABLE_POSITION_MARKER, *record])
+
+        elif record_type is CanvasSizeRecord:
+            if current_section is not CanvasSizeRecord:
+                writer.writerow([constants.CSV_CANVAS_SIZE_MARKER, "Width", "Height"])
+            writer.writerow([constants.CSV_CANVAS_SIZE_MARKER, record.width, record.height])
+
+        elif record_type is RelationshipSnapshot:
+            if current_section is not RelationshipSnapshot:
+                writer.writerow([])
+                writer.writerow([constants.CSV_RELATIONSHIP_DEF_MARKER,
+                                 "From Table (FK Source)", "FK Column",
+                                 "To Table (PK Source)", "PK Column",
+                                 "Relationship Type", "VerticalSegmentX"])
+            vertical_x = record.vertical_segment_x_override
+            writer.writerow([
+                constants.CSV_RELATIONSHIP_DEF_MARKER,
+                record.table1_name,
+                record.fk_column_name,
+                record.table2_name,
+                record.pk_column_name or "",
+                record.relationship_type or "N:1",
+                str(vertical_x) if vertical_x is not None else ""
+            ])
+
+        elif record_type is NotesRecord:
+            # Notes are saved as a single cell
+            writer.writerow([])
+            writer.writerow([constants.CSV_NOTES_MARKER, "notes_content_follows"])
+            writer.writerow([record.text or ""])
+
+        else:
+            raise TypeError(f"Not a CSV .erd record: {record!r}")
+
+        current_section = record_type
+        written += 1
+        if progress_callback and written % RECORD_PROGRESS_INTERVAL == 0:
+            progress_callback(written)
+
+
+def write_erd_csv(csvfile, snapshot, progress_callback=None):
+    """
+    Writes a DiagramSnapshot to an open text file as CSV .erd (v1), relationships sorted.
+    progress_callback(done, total) is called as records are written, if given.
+    """
+    sorted_rels = tuple(sorted(snapshot.relationships, key=lambda r: (r.table1_name, r.fk_column_name or "", r.table2_name, r.pk_column_name or "")))
+    snapshot = snapshot._replace(relationships=sorted_rels)
+    total = sum(max(1, len(t.columns)) + 1 for t in snapshot.tables) + len(sorted_rels) + 2
+    write_erd_csv_records(csvfile, iter_snapshot_records(snapshot),
+                          (lambda written: progress_callback(written, total)) if progress_callback else None)
+    if progress_callback:
+        progress_callback(total, total)
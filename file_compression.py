@@ -0,0 +1,78 @@
+# file_compression.py
+# Transparent gzip/xz for diagram and SQL files: written by extension, read by magic bytes, always streamed.
+
+import gzip
+import lzma
+
+import constants
+
+COMPRESSION_GZIP = "gzip"
+COMPRESSION_XZ = "xz"
+
+_EXTENSIONS = {".gz": COMPRESSION_GZIP, ".xz": COMPRESSION_XZ}
+_GZIP_MAGIC = b"\x1f\x8b"
+_XZ_MAGIC = b"\xfd7zXZ\x00"
+
+
+def compression_for_path(path):
+    """The compression a file written to path gets from its extension (e.g. 'x.erd.gz'), or None."""
+    for extension, compression in _EXTENSIONS.items():
+        if path.lower().endswith(extension):
+            return compression
+    return None
+
+
+def strip_compression_extension(path):
+    """'x.erd.gz' -> 'x.erd'; other paths are returned unchanged."""
+    return path[:-len(".gz")] if compression_for_path(path) else path # .gz and .xz are the same length
+
+
+def detect_compression(path):
+    """The compression of an existing file from its first bytes, or None for a plain file."""
+    with open(path, 'rb') as f:
+        head = f.read(len(_XZ_MAGIC))
+    if head.startswith(_GZIP_MAGIC):
+        return COMPRESSION_GZIP
+    if head.startswith(_XZ_MAGIC):
+        return COMPRESSION_XZ
+    return None
+
+
+def _open(path, mode, compression, level, **text_kwargs):
+    if compression == COMPRESSION_GZIP:
+        if 'r' in mode:
+            return gzip.open(path, mode, **text_kwargs)
+        return gzip.open(path, mode, compresslevel=level, **text_kwargs)
+    if compression == COMPRESSION_XZ:
+        if 'r' in mode:
+            return lzma.open(path, mode, **text_kwargs)
+        return lzma.open(path, mode, preset=level, **text_kwargs)
+    return open(path, mode, **text_kwargs)
+
+
+def open_for_read(path, mode='rb', **text_kwargs):
+    """
+    Opens path for reading, decompressing gzip or xz on the fly whatever its extension.
+    mode is 'rb' or 'rt'/'r'; text_kwargs (encoding, newline) are passed on for text mode.
+    """
+    if mode == 'r':
+        mode = 'rt'
+    return _open(path, mode, detect_compression(path), None, **text_kwargs)
+
+
+def open_for_write(path, mode='wb', compression=None, level=None, **text_kwargs):
+    """
+    Opens path for writing, compressing as given (None writes a plain file). level defaults to the
+    [Compression] level from config.ini; it is the gzip compresslevel or the xz preset.
+    """
+    if mode == 'w':
+        mode = 'wt'
+    if level is None:
+        level = constants.current_compression_settings["level"]
+    return _open(path, mode, compression, level, **text_kwargs)
+
+
+def read_head(path, size):
+    """First size bytes of the file's (decompressed) contents."""
+    with open_for_read(path, 'rb') as f:
+        return f.read(size)
@@ -11,25 +11,31 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtCore import Qt, QPointF, QRectF, QSizeF, QLineF
 from PyQt6.QtGui import (
-    QPainter, QPen, QBrush, QColor, QFont, QPainterPath,
-    QFontMetrics, QPainterPathStroker, QAction, QFontDatabase
+    QPainter, QPen, QColor, QFont, QPainterPath,
+    QPainterPathStroker, QAction, QFontDatabase
 )
 
 import constants # Import the constants module
 from constants import (
     TABLE_HEADER_HEIGHT, COLUMN_HEIGHT, PADDING, GRID_SIZE, show_cardinality_text_globally, show_cardinality_symbols_globally,
     RELATIONSHIP_HANDLE_SIZE, MIN_HORIZONTAL_SEGMENT, SYMBOL_OFFSET_FROM_TABLE_EDGE, 
-    CROWS_FOOT_LINE_LENGTH, CROWS_FOOT_ANGLE_DEG, SYMBOL_STROKE_WIDTH, CARDINALITY_OFFSET,
+    CROWS_FOOT_LINE_LENGTH, CROWS_FOOT_ANGLE_DEG, CARDINALITY_OFFSET,
     CARDINALITY_TEXT_MARGIN, TABLE_RESIZE_HANDLE_WIDTH, MIN_TABLE_WIDTH, current_theme_settings
 )
-from utils import snap_to_grid, get_contrasting_text_color
+from utils import snap_to_grid, calculate_table_height, table_attachment_point
 from data_models import Table 
+from profiling import profiled_paint
+from theme_stylesheets import theme_stylesheets
+from paint_palette import current_paint_palette, RELATIONSHIP_LINE_WIDTH
 
 
 LINE_CLICK_PERPENDICULAR_TOLERANCE = 5 
 VERTICAL_SEGMENT_HANDLE_SIZE = 8 
 VERTICAL_SEGMENT_HANDLE_COLOR = QColor(0, 100, 255, 180) 
 VERTICAL_SEGMENT_HIT_AREA_PADDING = 5 
+HEADER_TEXT_ALIGNMENT = Qt.AlignmentFlag.AlignCenter
+COLUMN_NAME_ALIGNMENT = Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
+COLUMN_TYPE_ALIGNMENT = Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
 
 class TableGraphicItem(QGraphicsItem):
     def __init__(self, table_data_object, parent=None): 
@@ -58,93 +64,84 @@ class TableGraphicItem(QGraphicsItem):
         self._resize_start_x = 0
         self._initial_width_on_resize = 0
         self._old_width_for_command = 0
+        self._move_start_geometry = None # Selection geometry when a drag started, for MoveTablesCommand
+        self._outline_cache = None # ((width, height), body path, header path) for paint()
         self.setZValue(1) 
 
     def _calculate_height(self):
-        num_columns = len(self.table_data.columns)
-        self.height = self.header_height + (num_columns * self.column_row_height) + self.padding
-        if num_columns == 0:
-             self.height = self.header_height + self.padding * 1.5
+        self.height = calculate_table_height(len(self.table_data.columns))
 
     def boundingRect(self):
         return QRectF(-TABLE_RESIZE_HANDLE_WIDTH / 2, 0, self.width + TABLE_RESIZE_HANDLE_WIDTH, self.height)
 
 
+    @profiled_paint
     def paint(self, painter: QPainter, option: QStyleOptionGraphicsItem, widget=None):
-        self.prepareGeometryChange()
-        self._calculate_height()
-
-        body_rect = QRectF(0, 0, self.width, self.height)
-        path = QPainterPath()
-        path.addRoundedRect(body_rect, self.border_radius, self.border_radius)
-
-        body_color = self.table_data.body_color if self.table_data.body_color.isValid() else QColor(current_theme_settings.get("default_table_body_color", QColor(Qt.GlobalColor.white)))
-        header_color = self.table_data.header_color if self.table_data.header_color.isValid() else QColor(current_theme_settings.get("default_table_header_color", QColor(Qt.GlobalColor.lightGray)))
-
-        painter.setBrush(QBrush(body_color))
+        # Only announce a geometry change when the column count really changed the height;
+        # doing it unconditionally schedules another repaint after every paint.
+        if calculate_table_height(len(self.table_data.columns)) != self.height:
+            self.prepareGeometryChange()
+            self._calculate_height()
 
-        border_color_selected = QColor(current_theme_settings.get("button_checked_bg", QColor(0, 123, 255)))
-        border_color_default = QColor(current_theme_settings.get("view_border", QColor(200,200,200)))
-        border_color = border_color_selected if self.isSelected() else border_color_default
-        border_width = 2.0 if self.isSelected() else 1.0
-        painter.setPen(QPen(border_color, border_width))
-        painter.drawPath(path)
+        palette = current_paint_palette()
+        colors = palette.table_colors(self.table_data.body_color, self.table_data.header_color)
+        body_path, header_path = self._outline_paths()
+        selected = self.isSelected()
 
-        header_path = QPainterPath()
-        header_path.addRoundedRect(QRectF(0, 0, self.width, self.header_height), self.border_radius, self.border_radius)
-        rect_to_subtract = QRectF(0, self.header_height - self.border_radius, self.width, self.border_radius)
-        subtraction_path = QPainterPath()
-        subtraction_path.addRect(rect_to_subtract)
-        header_path = header_path.subtracted(subtraction_path)
+        painter.setBrush(colors.body_brush)
+        painter.setPen(palette.selected_border_pen if selected else palette.border_pen)
+        painter.drawPath(body_path)
 
-        painter.setBrush(QBrush(header_color))
+        painter.setBrush(colors.header_brush)
         painter.setPen(Qt.PenStyle.NoPen)
         painter.drawPath(header_path)
 
-        header_text_color = get_contrasting_text_color(header_color)
-        painter.setPen(header_text_color)
-        font = painter.font()
-        font.setBold(True)
-        font.setPointSize(10)
-        painter.setFont(font)
+        painter.setPen(colors.header_text_color)
+        painter.setFont(palette.header_font)
         text_rect_header = QRectF(0, 0, self.width, self.header_height).adjusted(self.padding / 2, 0, -self.padding / 2, 0)
-        painter.drawText(text_rect_header, Qt.AlignmentFlag.AlignCenter, self.table_data.name)
+        painter.drawText(text_rect_header, HEADER_TEXT_ALIGNMENT, self.table_data.name)
 
-        column_text_color = get_contrasting_text_color(body_color)
+        column_text_color = colors.column_text_color
         painter.setPen(column_text_color)
-        col_font = painter.font()
-        col_font.setBold(False)
-        col_font.setPointSize(9)
-        painter.setFont(col_font)
+        painter.setFont(palette.column_font)
 
         current_y = self.header_height + self.padding / 2
-        line_color = QColor(current_theme_settings.get("view_border", QColor(220,220,220))).lighter(110)
+        line_pen = palette.column_line_pen
+        line_left, line_right = self.padding / 2, self.width - self.padding / 2
+        name_x, name_width = self.padding, self.width * 0.6 - self.padding * 1.5
+        type_x, type_width = self.width * 0.6 - self.padding / 2, self.width * 0.4 - self.padding / 2
 
         for column_idx, column in enumerate(self.table_data.columns):
-            col_name_text = column.get_display_name()
-            col_type_text = column.data_type
-
             if column_idx > 0:
-                painter.setPen(QPen(line_color, 0.8))
-                painter.drawLine(QPointF(self.padding / 2, current_y - self.padding / 4),
-                                 QPointF(self.width - self.padding / 2, current_y - self.padding / 4))
+                line_y = current_y - self.padding / 4
+                painter.setPen(line_pen)
+                painter.drawLine(QLineF(line_left, line_y, line_right, line_y))
                 painter.setPen(column_text_color)
 
-            name_rect = QRectF(self.padding, current_y, self.width * 0.6 - self.padding * 1.5, self.column_row_height)
-            painter.drawText(name_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, col_name_text)
-
-            type_rect = QRectF(self.width * 0.6 - self.padding / 2, current_y, self.width * 0.4 - self.padding / 2, self.column_row_height)
-            painter.drawText(type_rect, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, col_type_text)
+            painter.drawText(QRectF(name_x, current_y, name_width, self.column_row_height), COLUMN_NAME_ALIGNMENT, column.get_display_name())
+            painter.drawText(QRectF(type_x, current_y, type_width, self.column_row_height), COLUMN_TYPE_ALIGNMENT, column.data_type)
 
             current_y += self.column_row_height
 
-        if self.isSelected():
+        if selected:
             handle_width = TABLE_RESIZE_HANDLE_WIDTH
             handle_rect = QRectF(self.width - handle_width / 2, self.height / 2 - handle_width, handle_width, handle_width * 2)
-            painter.setBrush(border_color_selected.lighter(120))
-            painter.setPen(QPen(border_color_selected.darker(120), 1))
+            painter.setBrush(palette.resize_handle_brush)
+            painter.setPen(palette.resize_handle_pen)
             painter.drawRoundedRect(handle_rect, 3, 3)
 
+    def _outline_paths(self):
+        """The rounded body and header shapes, rebuilt only when the table's size changes."""
+        if self._outline_cache is None or self._outline_cache[0] != (self.width, self.height):
+            body_path = QPainterPath()
+            body_path.addRoundedRect(QRectF(0, 0, self.width, self.height), self.border_radius, self.border_radius)
+            header_path = QPainterPath()
+            header_path.addRoundedRect(QRectF(0, 0, self.width, self.header_height), self.border_radius, self.border_radius)
+            subtraction_path = QPainterPath()
+            subtraction_path.addRect(QRectF(0, self.header_height - self.border_radius, self.width, self.border_radius))
+            self._outline_cache = ((self.width, self.height), body_path, header_path.subtracted(subtraction_path))
+        return self._outline_cache[1], self._outline_cache[2]
+
     def get_resize_handle_rect(self):
         handle_width = TABLE_RESIZE_HANDLE_WIDTH
         return QRectF(self.width - handle_width, 0, handle_width * 2 , self.height)
@@ -160,34 +157,10 @@ class TableGraphicItem(QGraphicsItem):
                              from_column_name: str | None = None, 
                              to_column_name: str | None = None,
                              hint_intermediate_x: float | None = None) -> QPointF: # Added hint
-        my_rect_scene = self.sceneBoundingRect() 
-        my_y_in_scene = my_rect_scene.center().y()
-
-        col_name_to_use = from_column_name if from_column_name else to_column_name
-
-        if col_name_to_use:
-            idx = self.table_data.get_column_index(col_name_to_use)
-            if idx != -1:
-                col_y_in_item_coords = self.header_height + self.padding / 2 + (idx * self.column_row_height) + (self.column_row_height / 2)
-                point_in_item = QPointF(0, col_y_in_item_coords)
-                point_in_scene = self.mapToScene(point_in_item)
-                my_y_in_scene = point_in_scene.y()
-        
-        exit_right = True 
-        if hint_intermediate_x is not None:
-            # If the vertical segment is to the left of my center, I should attach on my left.
-            if hint_intermediate_x < my_rect_scene.center().x():
-                exit_right = False
-            else: # Vertical segment is to the right (or at center), attach on my right.
-                exit_right = True
-        elif other_table_graphic: 
-            if other_table_graphic.sceneBoundingRect().center().x() < my_rect_scene.center().x():
-                exit_right = False 
-        
-        if exit_right:
-            return QPointF(my_rect_scene.right(), my_y_in_scene)
-        else:
-            return QPointF(my_rect_scene.left(), my_y_in_scene)
+        other_rect_scene = other_table_graphic.sceneBoundingRect() if other_table_graphic else None
+        return table_attachment_point(self.sceneBoundingRect(), self.table_data,
+                                      from_column_name if from_column_name else to_column_name,
+                                      other_rect_scene, hint_intermediate_x)
 
     def itemChange(self, change: QGraphicsItem.GraphicsItemChange, value):
         if change == QGraphicsItem.GraphicsItemChange.ItemPositionChange and self.scene():
@@ -199,7 +172,7 @@ class TableGraphicItem(QGraphicsItem):
                 return new_pos_in_parent 
             return self.pos() 
 
-        if change == QGraphicsItem.GraphicsItemChange.ItemPositionHasChanged:
+        if change == QGraphicsItem.GraphicsItemChange.ItemPositionHasChanged and not getattr(self.scene(), 'layout_preview_active', False):
             new_scene_pos = self.scenePos() 
             snapped_new_scene_pos_x = snap_to_grid(new_scene_pos.x(), GRID_SIZE)
             snapped_new_scene_pos_y = snap_to_grid(new_scene_pos.y(), GRID_SIZE)
@@ -217,6 +190,8 @@ class TableGraphicItem(QGraphicsItem):
                 self.table_data.x = new_scene_pos.x()
                 self.table_data.y = new_scene_pos.y()
 
+            if hasattr(self.scene(), 'index_table'):
+                self.scene().index_table(self.table_data)
 
             if hasattr(self.scene(), 'update_relationships_for_table'):
                  self.scene().update_relationships_for_table(self.table_data.name)
@@ -250,6 +225,10 @@ class TableGraphicItem(QGraphicsItem):
             event.accept()
             return
         super().mousePressEvent(event)
+        scene = self.scene()
+        if scene and scene.main_window and event.button() == Qt.MouseButton.LeftButton:
+            # Qt moves the whole selection with this item; remember where it all was for one undo step
+            self._move_start_geometry = scene.main_window.table_geometry_for(scene.selected_table_names())
 
     def mouseMoveEvent(self, event: QGraphicsSceneMouseEvent):
         if self._resizing_width:
@@ -262,6 +241,8 @@ class TableGraphicItem(QGraphicsItem):
                 self.width = new_width
                 self._calculate_height()
                 self.update()
+                if self.scene() and hasattr(self.scene(), 'index_table'):
+                    self.scene().index_table(self.table_data)
                 if self.scene() and hasattr(self.scene(), 'update_relationships_for_table'):
                     self.scene().update_relationships_for_table(self.table_data.name)
             event.accept()
@@ -271,12 +252,12 @@ class TableGraphicItem(QGraphicsItem):
     def mouseReleaseEvent(self, event: QGraphicsSceneMouseEvent):
         if self._resizing_width:
             self._resizing_width = False
-            if self.table_data.width != self.width: 
-                 self.table_data.width = self.width 
-                 if self.scene() and self.scene().main_window:
-                     self.scene().main_window.undo_stack.setClean(False) 
-                     self.scene().main_window.update_window_title()
-
+            if self.table_data.width != self.width:
+                main_window = self.scene().main_window if self.scene() else None
+                old_geometry = main_window.table_geometry_for([self.table_data.name]) if main_window else None
+                self.table_data.width = self.width
+                if old_geometry:
+                    main_window.record_table_geometry_change(old_geometry, "Resize Table")
 
             self.setCursor(Qt.CursorShape.ArrowCursor)
             if self.scene() and hasattr(self.scene(), 'update_relationships_for_table'):
@@ -284,6 +265,10 @@ class TableGraphicItem(QGraphicsItem):
             event.accept()
             return
         super().mouseReleaseEvent(event)
+        if self._move_start_geometry is not None:
+            old_geometry, self._move_start_geometry = self._move_start_geometry, None
+            if self.scene() and self.scene().main_window:
+                self.scene().main_window.record_table_geometry_change(old_geometry)
 
     def mouseDoubleClickEvent(self, event: QGraphicsSceneMouseEvent):
         main_window = self.scene().main_window if self.scene() else None
@@ -364,16 +349,7 @@ class TableGraphicItem(QGraphicsItem):
             return
 
         menu = QMenu()
-        menu.setStyleSheet(f"""
-            QMenu {{
-                background-color: {main_window.current_theme_settings['toolbar_bg'].name()};
-                color: {main_window.current_theme_settings['text_color'].name()};
-                border: 1px solid {main_window.current_theme_settings['toolbar_border'].name()};
-            }}
-            QMenu::item:selected {{
-                background-color: {main_window.current_theme_settings['button_hover_bg'].name()};
-            }}
-        """)
+        menu.setStyleSheet(theme_stylesheets(main_window.current_theme_settings)["menu"])
 
         edit_action = QAction("Edit Table...", menu)
         edit_action.triggered.connect(lambda: self.mouseDoubleClickEvent(event)) # Reuse double-click logic
@@ -412,7 +388,7 @@ class OrthogonalRelationshipPathItem(QGraphicsPathItem):
         super().__init__(parent)
         self.relationship_data = relationship_data
         self.relationship_data.graphic_item = self
-        self.setPen(QPen(current_theme_settings.get("relationship_line_color", QColor(70, 70, 110)), 1.8))
+        self.setPen(QPen(current_theme_settings.get("relationship_line_color", QColor(70, 70, 110)), RELATIONSHIP_LINE_WIDTH)) # Its width sets the shape; paint() takes the color from the theme
         self.setZValue(-1) 
         self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemIsSelectable)
         self.setAcceptHoverEvents(True) 
@@ -431,11 +407,7 @@ class OrthogonalRelationshipPathItem(QGraphicsPathItem):
         self.setToolTip(f"From: {self.relationship_data.table1_name}.{self.relationship_data.fk_column_name}\n"
                         f"To: {self.relationship_data.table2_name}.{self.relationship_data.pk_column_name}\n"
                         f"Type: {self.relationship_data.relationship_type}")
-        line_color = QColor(current_theme_settings.get("relationship_line_color", QColor(70, 70, 110)))
-        current_pen = self.pen()
-        current_pen.setColor(line_color)
-        self.setPen(current_pen)
-        self.update() 
+        self.update() # The line color comes from the theme in paint()
 
     def set_attachment_points(self, start_point: QPointF, end_point: QPointF):
         if self.start_attachment_point != start_point or self.end_attachment_point != end_point:
@@ -452,10 +424,10 @@ class OrthogonalRelationshipPathItem(QGraphicsPathItem):
         s_exits_right_default = s_point_scene.x() < e_point_scene.x()
         
         if self.scene() and self.scene().main_window:
-            table1_obj = self.scene().main_window.tables_data.get(self.relationship_data.table1_name)
-            table2_obj = self.scene().main_window.tables_data.get(self.relationship_data.table2_name)
-            if table1_obj and table1_obj.graphic_item and table2_obj and table2_obj.graphic_item:
-                if table1_obj.graphic_item.sceneBoundingRect().center().x() > table2_obj.graphic_item.sceneBoundingRect().center().x():
+            t1_geometry = self.scene().table_geometry(self.scene().main_window.tables_data.get(self.relationship_data.table1_name))
+            t2_geometry = self.scene().table_geometry(self.scene().main_window.tables_data.get(self.relationship_data.table2_name))
+            if t1_geometry and t2_geometry:
+                if t1_geometry.sceneBoundingRect().center().x() > t2_geometry.sceneBoundingRect().center().x():
                     s_exits_right_default = False
                 else:
                     s_exits_right_default = True
@@ -553,8 +525,29 @@ class OrthogonalRelationshipPathItem(QGraphicsPathItem):
             main_shape.addEllipse(hit_rect)
         return main_shape
 
+    def _draw_selection_outline(self, painter: QPainter, option: QStyleOptionGraphicsItem):
+        """The dashed outline QGraphicsPathItem draws around a selected item."""
+        pad = self.pen().widthF() / 2
+        rect = self.boundingRect().adjusted(pad, pad, -pad, -pad)
+        fg_color = option.palette.windowText().color()
+        bg_color = QColor(0 if fg_color.red() > 127 else 255, 0 if fg_color.green() > 127 else 255, 0 if fg_color.blue() > 127 else 255)
+        painter.save()
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.setPen(QPen(bg_color, 0, Qt.PenStyle.SolidLine))
+        painter.drawRect(rect)
+        painter.setPen(QPen(option.palette.windowText(), 0, Qt.PenStyle.DashLine))
+        painter.drawRect(rect)
+        painter.restore()
+
+    @profiled_paint
     def paint(self, painter: QPainter, option: QStyleOptionGraphicsItem, widget=None):
-        super().paint(painter, option, widget) 
+        # Drawn here instead of by QGraphicsPathItem so the line color follows the theme without a setPen() per item
+        palette = current_paint_palette()
+        painter.setPen(palette.relationship_pen)
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.drawPath(self.path())
+        if option.state & QStyle.StateFlag.State_Selected:
+            self._draw_selection_outline(painter, option)
 
         if not self.start_attachment_point.isNull() and \
            not self.end_attachment_point.isNull() and \
@@ -582,10 +575,9 @@ class OrthogonalRelationshipPathItem(QGraphicsPathItem):
             s_point_item = self.mapFromScene(s_point_scene)
             e_point_item = self.mapFromScene(e_point_scene)
             if should_show_text:
-                painter.setPen(QColor(current_theme_settings.get("cardinality_text_color", QColor(Qt.GlobalColor.black))))
-                font = painter.font(); font.setBold(True); font.setPointSize(8)
-                painter.setFont(font)
-                font_metrics = QFontMetrics(font)
+                painter.setPen(palette.cardinality_text_color)
+                painter.setFont(palette.cardinality_font)
+                font_metrics = palette.cardinality_font_metrics
 
                 # --- Cardinality at start_attachment_point (FK side) ---
                 text_rect1 = font_metrics.boundingRect(card1_symbol)
@@ -594,9 +586,9 @@ class OrthogonalRelationshipPathItem(QGraphicsPathItem):
                 
                 s_point_on_left_edge = False
                 if self.scene() and self.scene().main_window:
-                    table1_data = self.scene().main_window.tables_data.get(self.relationship_data.table1_name)
-                    if table1_data and table1_data.graphic_item:
-                        table1_rect_scene = table1_data.graphic_item.sceneBoundingRect()
+                    table1_geometry = self.scene().table_geometry(self.scene().main_window.tables_data.get(self.relationship_data.table1_name))
+                    if table1_geometry:
+                        table1_rect_scene = table1_geometry.sceneBoundingRect()
                         if abs(s_point_scene.x() - table1_rect_scene.left()) < 1.0:
                             s_point_on_left_edge = True
                 
@@ -613,9 +605,9 @@ class OrthogonalRelationshipPathItem(QGraphicsPathItem):
                 
                 e_point_on_left_edge = False
                 if self.scene() and self.scene().main_window:
-                    table2_data = self.scene().main_window.tables_data.get(self.relationship_data.table2_name)
-                    if table2_data and table2_data.graphic_item:
-                        table2_rect_scene = table2_data.graphic_item.sceneBoundingRect()
+                    table2_geometry = self.scene().table_geometry(self.scene().main_window.tables_data.get(self.relationship_data.table2_name))
+                    if table2_geometry:
+                        table2_rect_scene = table2_geometry.sceneBoundingRect()
                         if abs(e_point_scene.x() - table2_rect_scene.left()) < 1.0:
                             e_point_on_left_edge = True
                 
@@ -626,9 +618,7 @@ class OrthogonalRelationshipPathItem(QGraphicsPathItem):
                 painter.drawText(text_pos2, card2_symbol)
 
             if should_show_symbols:
-                symbol_pen = QPen(painter.pen().color(), SYMBOL_STROKE_WIDTH) 
-                symbol_pen.setCapStyle(Qt.PenCapStyle.RoundCap)
-                painter.setPen(symbol_pen)
+                painter.setPen(palette.symbol_pen_with_text if should_show_text else palette.symbol_pen)
                 
                 path_elements = [self.path().elementAt(i) for i in range(self.path().elementCount())]
                 
@@ -743,12 +733,10 @@ class OrthogonalRelationshipPathItem(QGraphicsPathItem):
             main_win = self.scene().main_window if self.scene() and hasattr(self.scene(), 'main_window') else None
             
             if main_win:
-                table1_obj = main_win.tables_data.get(self.relationship_data.table1_name)
-                table2_obj = main_win.tables_data.get(self.relationship_data.table2_name)
+                t1_graphic = self.scene().table_geometry(main_win.tables_data.get(self.relationship_data.table1_name))
+                t2_graphic = self.scene().table_geometry(main_win.tables_data.get(self.relationship_data.table2_name))
 
-                if table1_obj and table1_obj.graphic_item and table2_obj and table2_obj.graphic_item:
-                    t1_graphic = table1_obj.graphic_item
-                    t2_graphic = table2_obj.graphic_item
+                if t1_graphic and t2_graphic:
                     
                     old_p1 = self.start_attachment_point
                     old_p2 = self.end_attachment_point
@@ -830,16 +818,7 @@ class OrthogonalRelationshipPathItem(QGraphicsPathItem):
         menu = QMenu()
         main_win = self.scene().main_window if self.scene() else None
         if main_win: 
-            menu.setStyleSheet(f"""
-                QMenu {{
-                    background-color: {main_win.current_theme_settings['toolbar_bg'].name()};
-                    color: {main_win.current_theme_settings['text_color'].name()};
-                    border: 1px solid {main_win.current_theme_settings['toolbar_border'].name()};
-                }}
-                QMenu::item:selected {{
-                    background-color: {main_win.current_theme_settings['button_hover_bg'].name()};
-                }}
-            """)
+            menu.setStyleSheet(theme_stylesheets(main_win.current_theme_settings)["menu"])
         
         edit_props_action = QAction("Edit Relationship Properties...", menu) 
         edit_props_action.triggered.connect(
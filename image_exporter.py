@@ -0,0 +1,303 @@
+# image_exporter.py
+# Exports the diagram to PNG, SVG or PDF by rendering the scene in fixed-size tiles.
+# Can also be run headlessly: python image_exporter.py diagram.erd diagram.png [--scale 2]
+
+import os
+import sys
+import math
+import struct
+import zlib
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt6.QtCore import Qt, QRectF, QSize, QSizeF, QMarginsF
+from PyQt6.QtGui import QImage, QPainter, QColor, QPageSize, QPdfWriter
+from PyQt6.QtSvg import QSvgGenerator
+
+import constants
+from main_window_virtualization import materialize_region_impl, release_region_impl, sync_virtualized_items_impl
+from profiling import profiled
+
+EXPORT_TILE_WIDTH = 1024 # Raster tile size in output pixels
+EXPORT_TILE_HEIGHT = 256 # Also the height of one PNG band (one full-width row of tiles)
+EXPORT_VECTOR_TILE_SIZE = 2048 # Scene units per tile for SVG/PDF in a virtualized scene
+EXPORT_CONTENT_MARGIN = 40 # Scene units kept around the diagram's content
+EXPORT_PNG_COMPRESSION_LEVEL = 6
+PDF_MAX_PAGE_SIDE_POINTS = 14400 # Largest page side most PDF readers accept (200 inches)
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+ZLIB_HEADER = b"\x78\x9c" # Deflate, 32K window, default compression
+EXPORT_FILE_FILTERS = "PNG Image (*.png);;SVG Image (*.svg);;PDF Document (*.pdf)"
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def export_content_rect(scene, margin=EXPORT_CONTENT_MARGIN):
+    """Bounds of everything drawn (including tables without graphic items) plus a margin."""
+    content = scene.itemsBoundingRect().united(scene.table_index.bounding_rect())
+    if content.isEmpty():
+        return QRectF(scene.sceneRect())
+    return content.adjusted(-margin, -margin, margin, margin)
+
+
+def _png_chunk(chunk_type, data):
+    return (struct.pack(">I", len(data)) + chunk_type + data +
+            struct.pack(">I", zlib.crc32(chunk_type + data) & 0xFFFFFFFF))
+
+
+def _adler32_combine(adler1, adler2, length2):
+    """Adler-32 of A+B from adler(A), adler(B) and len(B) (same math as zlib's adler32_combine)."""
+    base = 65521
+    remainder = length2 % base
+    sum1 = adler1 & 0xFFFF
+    sum2 = (remainder * sum1) % base
+    sum1 += (adler2 & 0xFFFF) + base - 1
+    sum2 += ((adler1 >> 16) & 0xFFFF) + ((adler2 >> 16) & 0xFFFF) + base - remainder
+    sum1 %= base
+    sum2 %= base
+    return sum1 | (sum2 << 16)
+
+
+def _compress_png_band(pixel_bytes, width, height, bytes_per_line, level, is_last):
+    """
+    Prefixes every RGBA scanline with filter type 0 and deflates the band as raw deflate data.
+    Runs in the worker pool; zlib releases the GIL, so bands compress in parallel.
+    Non-final bands end with a sync flush so their outputs can simply be concatenated.
+    """
+    row_length = width * 4
+    view = memoryview(pixel_bytes)
+    rows = bytearray()
+    for y in range(height):
+        start = y * bytes_per_line
+        rows += b"\x00"
+        rows += view[start:start + row_length]
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    data = compressor.compress(rows) + compressor.flush(zlib.Z_FINISH if is_last else zlib.Z_SYNC_FLUSH)
+    return data, zlib.adler32(rows), len(rows)
+
+
+class _ExportSceneState:
+    """Hides the grid and the selection while exporting and restores them afterwards."""
+    def __init__(self, window, include_grid):
+        self.window = window
+        self.include_grid = include_grid
+
+    def __enter__(self):
+        scene = self.window.scene
+        self.grid_was_visible = scene.grid_visible
+        self.selected_items = scene.selectedItems()
+        scene.grid_visible = self.include_grid
+        scene.clearSelection()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        scene = self.window.scene
+        scene.grid_visible = self.grid_was_visible
+        for item in self.selected_items:
+            if item.scene() is scene:
+                item.setSelected(True)
+        if scene.virtualized:
+            sync_virtualized_items_impl(self.window)
+        return False
+
+
+def _render_region(window, painter, target_rect, source_rect):
+    """Renders one tile, materializing offscreen items of a virtualized scene just for its duration."""
+    created = materialize_region_impl(window, source_rect)
+    try:
+        window.scene.render(painter, target_rect, source_rect, Qt.AspectRatioMode.IgnoreAspectRatio)
+    finally:
+        release_region_impl(window, created)
+
+
+def _render_png_band(window, source_rect, scale, band_top, band_height, width, background):
+    image = QImage(width, band_height, QImage.Format.Format_RGBA8888)
+    image.fill(background)
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
+    for tile_left in range(0, width, EXPORT_TILE_WIDTH):
+        tile_width = min(EXPORT_TILE_WIDTH, width - tile_left)
+        target = QRectF(tile_left, 0, tile_width, band_height)
+        source = QRectF(source_rect.left() + tile_left / scale, source_rect.top() + band_top / scale,
+                        tile_width / scale, band_height / scale)
+        painter.save()
+        painter.setClipRect(target)
+        _render_region(window, painter, target, source)
+        painter.restore()
+    painter.end()
+    return image
+
+
+def export_scene_to_png(window, path, scale=1.0, include_grid=False, progress_callback=None, max_workers=None):
+    """
+    Streams the diagram to a PNG file band by band. Peak memory is bounded by a few full-width bands
+    (EXPORT_TILE_HEIGHT rows each) instead of the whole image. Tiles are rendered on the GUI thread,
+    as QGraphicsScene requires; scanline filtering and deflate run in a thread pool.
+    progress_callback(done_rows, total_rows) may return False to cancel. Returns True when written.
+    """
+    source_rect = export_content_rect(window.scene)
+    width = max(1, math.ceil(source_rect.width() * scale))
+    height = max(1, math.ceil(source_rect.height() * scale))
+    background = QColor(constants.current_theme_settings.get("view_bg", QColor(Qt.GlobalColor.white)))
+    workers = max_workers or min(4, os.cpu_count() or 1)
+    temp_path = path + ".part"
+
+    try:
+        with _ExportSceneState(window, include_grid), open(temp_path, "wb") as out, \
+                ThreadPoolExecutor(max_workers=workers) as pool:
+            out.write(PNG_SIGNATURE)
+            out.write(_png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)))
+
+            pending = deque()
+            state = {"adler": 1, "first": True}
+
+            def write_next_band():
+                data, band_adler, band_length = pending.popleft().result()
+                state["adler"] = _adler32_combine(state["adler"], band_adler, band_length)
+                if state["first"]:
+                    data = ZLIB_HEADER + data
+                    state["first"] = False
+                out.write(_png_chunk(b"IDAT", data))
+
+            for band_top in range(0, height, EXPORT_TILE_HEIGHT):
+                band_height = min(EXPORT_TILE_HEIGHT, height - band_top)
+                image = _render_png_band(window, source_rect, scale, band_top, band_height, width, background)
+                pixel_bytes = image.constBits().asstring(image.sizeInBytes())
+                bytes_per_line = image.bytesPerLine()
+                del image
+                pending.append(pool.submit(_compress_png_band, pixel_bytes, width, band_height, bytes_per_line,
+                                           EXPORT_PNG_COMPRESSION_LEVEL, band_top + band_height >= height))
+                del pixel_bytes
+                while len(pending) > workers: # Keeps at most workers + 1 bands in memory
+                    write_next_band()
+                if progress_callback and progress_callback(band_top + band_height, height) is False:
+                    raise ExportCancelled()
+            while pending:
+                write_next_band()
+
+            out.write(_png_chunk(b"IDAT", struct.pack(">I", state["adler"])))
+            out.write(_png_chunk(b"IEND", b""))
+        os.replace(temp_path, path)
+        return True
+    except ExportCancelled:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return False
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _render_vector(window, painter, source_rect, scale, progress_callback):
+    """Renders the diagram into a vector painter; only a virtualized scene is split into tiles."""
+    scene = window.scene
+    tile_size = EXPORT_VECTOR_TILE_SIZE if scene.virtualized else max(source_rect.width(), source_rect.height())
+    columns = max(1, math.ceil(source_rect.width() / tile_size))
+    rows = max(1, math.ceil(source_rect.height() / tile_size))
+    for row in range(rows):
+        for column in range(columns):
+            source = QRectF(source_rect.left() + column * tile_size, source_rect.top() + row * tile_size,
+                            tile_size, tile_size).intersected(source_rect)
+            target = QRectF((source.left() - source_rect.left()) * scale, (source.top() - source_rect.top()) * scale,
+                            source.width() * scale, source.height() * scale)
+            painter.save()
+            painter.setClipRect(target)
+            _render_region(window, painter, target, source)
+            painter.restore()
+        if progress_callback and progress_callback(row + 1, rows) is False:
+            raise ExportCancelled()
+
+
+def export_scene_to_svg(window, path, include_grid=False, progress_callback=None):
+    source_rect = export_content_rect(window.scene)
+    size = QSize(math.ceil(source_rect.width()), math.ceil(source_rect.height()))
+    generator = QSvgGenerator()
+    generator.setFileName(path)
+    generator.setSize(size)
+    generator.setViewBox(QRectF(0, 0, size.width(), size.height()))
+    generator.setTitle("ERD Diagram")
+    with _ExportSceneState(window, include_grid):
+        painter = QPainter(generator)
+        try:
+            _render_vector(window, painter, source_rect, 1.0, progress_callback)
+        except ExportCancelled:
+            painter.end()
+            os.remove(path)
+            return False
+        painter.end()
+    return True
+
+
+def export_scene_to_pdf(window, path, include_grid=False, progress_callback=None):
+    """Writes the diagram as a single PDF page, scaled down if it exceeds the PDF page size limit."""
+    source_rect = export_content_rect(window.scene)
+    scale = min(1.0, PDF_MAX_PAGE_SIDE_POINTS / max(source_rect.width(), source_rect.height()))
+    writer = QPdfWriter(path)
+    writer.setResolution(72) # One device pixel per point
+    writer.setPageSize(QPageSize(QSizeF(source_rect.width() * scale, source_rect.height() * scale), QPageSize.Unit.Point))
+    writer.setPageMargins(QMarginsF(0, 0, 0, 0))
+    writer.setTitle("ERD Diagram")
+    with _ExportSceneState(window, include_grid):
+        painter = QPainter(writer)
+        try:
+            _render_vector(window, painter, source_rect, scale, progress_callback)
+        except ExportCancelled:
+            painter.end()
+            os.remove(path)
+            return False
+        painter.end()
+    return True
+
+
+@profiled(category="io")
+def export_scene_image(window, path, scale=1.0, include_grid=False, progress_callback=None):
+    """Exports by file extension (.png, .svg or .pdf)."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".svg":
+        return export_scene_to_svg(window, path, include_grid, progress_callback)
+    if extension == ".pdf":
+        return export_scene_to_pdf(window, path, include_grid, progress_callback)
+    if extension == ".png":
+        return export_scene_to_png(window, path, scale, include_grid, progress_callback)
+    raise ValueError(f"Unsupported export format: '{extension}'")
+
+
+def main(argv=None):
+    """Headless export for scripts and docs builds; uses the offscreen Qt platform unless told otherwise."""
+    parser = argparse.ArgumentParser(description="Export an .erd diagram to PNG, SVG or PDF.")
+    parser.add_argument("input", help="Diagram file (.erd)")
+    parser.add_argument("output", help="Output file (.png, .svg or .pdf)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Pixels per scene unit for PNG output")
+    parser.add_argument("--grid", action="store_true", help="Include the background grid")
+    parser.add_argument("--theme", choices=["light", "dark"], help="Theme to render with")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+    from main_window import ERDCanvasWindow
+    from main_window_file_operations import load_erd_file_impl
+
+    _app = QApplication.instance() or QApplication(sys.argv[:1]) # Only kept referenced: PyQt deletes an unreferenced QApplication
+    window = ERDCanvasWindow(persist_settings=False) # --theme and closing mustn't change the user's config.ini
+    if args.theme and args.theme != window.current_theme:
+        window.set_theme(args.theme)
+    try:
+        if not load_erd_file_impl(window, args.input, interactive=False):
+            return 1
+        export_scene_image(window, args.output, scale=args.scale, include_grid=args.grid)
+        print(f"Exported {args.input} to {args.output}")
+        return 0
+    except (OSError, ValueError) as e:
+        print(f"Export Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        window.undo_stack.setClean() # Nothing to save; avoids the unsaved-changes prompt
+        window.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+# layout_worker.py
+# Automatic table arrangement computed off the GUI thread.
+
+import math
+import random
+import time
+from PyQt6.QtCore import QThread, pyqtSignal
+
+import constants
+from utils import snap_to_grid
+
+LAYOUT_TABLE_SPACING = 80 # Extra gap kept around every table
+LAYOUT_PROGRESS_INTERVAL_SECONDS = 1.0 / 30 # Throttle for intermediate position updates (about 30 fps)
+
+
+def iter_force_directed_layout(snapshot, iterations=None, seed=0):
+    """
+    Runs a force-directed layout over a DiagramSnapshot and yields {table_name: (x, y)} after every iteration.
+    Repulsion is only evaluated between tables in neighbouring grid cells, so one iteration costs
+    roughly O(tables + relationships) instead of O(tables^2).
+    The last yielded dict is snapped to the grid and keeps the diagram's top-left corner in place.
+    """
+    tables = snapshot.tables
+    if not tables:
+        yield {}
+        return
+
+    count = len(tables)
+    index_by_name = {t.name: i for i, t in enumerate(tables)}
+    half_w = [t.width / 2.0 for t in tables]
+    half_h = [t.height / 2.0 for t in tables]
+    radius = [math.hypot(half_w[i], half_h[i]) + LAYOUT_TABLE_SPACING / 2.0 for i in range(count)]
+    xs = [t.x + half_w[i] for i, t in enumerate(tables)]
+    ys = [t.y + half_h[i] for i, t in enumerate(tables)]
+    origin_x = min(t.x for t in tables)
+    origin_y = min(t.y for t in tables)
+
+    # Tables stacked on the same spot (e.g. pasted or imported without positions) get pushed apart randomly.
+    rng = random.Random(seed)
+    seen_points = set()
+    for i in range(count):
+        point = (round(xs[i]), round(ys[i]))
+        if point in seen_points:
+            xs[i] += rng.uniform(-radius[i], radius[i])
+            ys[i] += rng.uniform(-radius[i], radius[i])
+        seen_points.add(point)
+
+    edges = set()
+    for rel in snapshot.relationships:
+        i = index_by_name.get(rel.table1_name)
+        j = index_by_name.get(rel.table2_name)
+        if i is not None and j is not None and i != j:
+            edges.add((min(i, j), max(i, j)))
+
+    ideal_length = sum(radius) / count * 2.0
+    cell_size = max(radius) * 2.0
+    if iterations is None:
+        iterations = min(300, 60 + int(8 * math.sqrt(count)))
+    temperature = ideal_length * max(1.0, math.sqrt(count) / 4.0)
+    cooling = temperature / (iterations + 1)
+
+    for _ in range(iterations):
+        disp_x = [0.0] * count
+        disp_y = [0.0] * count
+
+        grid = {}
+        for i in range(count):
+            grid.setdefault((int(xs[i] // cell_size), int(ys[i] // cell_size)), []).append(i)
+
+        for (cell_x, cell_y), members in grid.items():
+            neighbours = []
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    neighbours.extend(grid.get((cell_x + dx, cell_y + dy), ()))
+            for i in members:
+                xi, yi, ri = xs[i], ys[i], radius[i]
+                for j in neighbours:
+                    if i == j:
+                        continue
+                    delta_x = xi - xs[j]
+                    delta_y = yi - ys[j]
+                    distance = math.hypot(delta_x, delta_y) or 0.01
+                    min_distance = ri + radius[j]
+                    if distance < cell_size:
+                        force = (min_distance * min_distance) / distance
+                        disp_x[i] += delta_x / distance * force
+                        disp_y[i] += delta_y / distance * force
+
+        for i, j in edges:
+            delta_x = xs[i] - xs[j]
+            delta_y = ys[i] - ys[j]
+            distance = math.hypot(delta_x, delta_y) or 0.01
+            force = (distance * distance) / ideal_length
+            disp_x[i] -= delta_x / distance * force
+            disp_y[i] -= delta_y / distance * force
+            disp_x[j] += delta_x / distance * force
+            disp_y[j] += delta_y / distance * force
+
+        for i in range(count):
+            length = math.hypot(disp_x[i], disp_y[i])
+            if length > 0:
+                step = min(length, temperature)
+                xs[i] += disp_x[i] / length * step
+                ys[i] += disp_y[i] / length * step
+        temperature = max(temperature - cooling, 1.0)
+
+        yield {tables[i].name: (xs[i] - half_w[i], ys[i] - half_h[i]) for i in range(count)}
+
+    shift_x = origin_x - min(xs[i] - half_w[i] for i in range(count))
+    shift_y = origin_y - min(ys[i] - half_h[i] for i in range(count))
+    yield {tables[i].name: (snap_to_grid(xs[i] - half_w[i] + shift_x, constants.GRID_SIZE),
+                            snap_to_grid(ys[i] - half_h[i] + shift_y, constants.GRID_SIZE))
+           for i in range(count)}
+
+
+class LayoutWorker(QThread):
+    """
+    Computes an arrangement for a DiagramSnapshot in a background thread.
+    Intermediate positions are emitted at a throttled rate for animation; stop it with requestInterruption().
+    """
+    positions_updated = pyqtSignal(dict)
+    layout_finished = pyqtSignal(dict)
+
+    def __init__(self, snapshot, parent=None):
+        super().__init__(parent)
+        self.snapshot = snapshot
+
+    def run(self):
+        last_emit = 0.0
+        positions = {}
+        for positions in iter_force_directed_layout(self.snapshot):
+            if self.isInterruptionRequested():
+                return
+            now = time.monotonic()
+            if now - last_emit >= LAYOUT_PROGRESS_INTERVAL_SECONDS:
+                self.positions_updated.emit(positions)
+                last_emit = now
+        if not self.isInterruptionRequested():
+            self.layout_finished.emit(positions)
@@ -2,6 +2,12 @@
 # Main entry point for the ERD Design Tool application.
 
 import sys
+import time
+from profiling import PROFILER, start_tracing_from_environment
+
+TRACE_FILE_PATH = start_tracing_from_environment() # ERD_TRACE_FILE=<path> records from here until exit
+_import_start = time.perf_counter()
+
 from PyQt6.QtWidgets import QApplication
 
 # Import the main window class from main_window.py
@@ -19,6 +25,8 @@ except NameError as e: # Catch NameError if a class within main_window isn't def
     print(f"NameError during import from main_window: {e}")
     print("This might indicate a missing import in one of the modules main_window.py depends on.")
     sys.exit(1)
+if PROFILER.enabled:
+    PROFILER.record("startup: imports", "startup", _import_start, time.perf_counter())
 
 
 def main():
@@ -33,8 +41,11 @@ def main():
     # app.setApplicationVersion("0.1.0")
 
     try:
-        window = ERDCanvasWindow()
-        window.show()
+        with PROFILER.span("startup: create window", "startup"):
+            window = ERDCanvasWindow()
+        with PROFILER.span("startup: show window", "startup"):
+            window.show()
+        window.start_autosave() # Offers crash recovery, then journals changes
     except Exception as e:
         print(f"An error occurred while initializing the main window: {e}")
         # Optionally, show an error message dialog to the user
@@ -42,7 +53,11 @@ def main():
         # QMessageBox.critical(None, "Application Error", f"Could not start the application: {e}")
         sys.exit(1)
         
-    sys.exit(app.exec())
+    exit_code = app.exec()
+    if TRACE_FILE_PATH:
+        PROFILER.save_trace(TRACE_FILE_PATH)
+        print(f"Performance trace written to {TRACE_FILE_PATH}")
+    sys.exit(exit_code)
 
 if __name__ == '__main__':
     main()
@@ -1,6 +1,7 @@
 # main_window.py
 # Contains the ERDCanvasWindow class, the main application window.
 
+import itertools
 import sys
 import os
 # import configparser # Not directly used here anymore, handled by main_window_config
@@ -11,7 +12,7 @@ from PyQt6.QtWidgets import (
     QWidget, QHBoxLayout, QDockWidget, QTreeWidget, QTreeWidgetItem,
     QPushButton, QStyle, QMenu, QHeaderView, QInputDialog 
 )
-from PyQt6.QtCore import Qt, QPointF, QSize, QSizeF, QEvent, QTimer, QByteArray 
+from PyQt6.QtCore import Qt, QPointF, QSize, QSizeF, QEvent, QTimer, QByteArray, pyqtSignal
 from PyQt6.QtGui import (
     QColor, QBrush, QAction, QIcon, QKeySequence, QPixmap, QPainter,
     QActionGroup, QUndoStack, QPen
@@ -38,6 +39,7 @@ from main_window_ui_setup import (
     create_menus, create_diagram_explorer_widget,
     create_main_floating_action_button_widget,
     create_sql_preview_widget, create_notes_widget, # Added create_notes_widget
+    create_overview_widget, ensure_sql_preview_widget, ensure_notes_widget, ensure_overview_widget,
     show_floating_button_menu_widget, # Keep this
     update_floating_button_position_widget
 )
@@ -47,10 +49,11 @@ from main_window_theming import (
 from main_window_actions import (
     new_diagram_action, save_file_action, save_file_as_action,
     delete_selected_items_action, toggle_relationship_mode_action_impl,
-    reset_drawing_mode_impl
+    reset_drawing_mode_impl, fit_diagram_to_view_impl
 )
 from main_window_table_operations import (
-    handle_add_table_button_impl
+    handle_add_table_button_impl, table_geometry_for_util, record_table_geometry_change_impl,
+    nudge_selected_tables_impl
 )
 # main_window_group_operations will be created later
 from main_window_relationship_operations import (
@@ -62,22 +65,47 @@ from main_window_relationship_operations import (
     remove_relationships_for_table_impl,
     edit_relationship_properties_impl
 )
+from main_window_layout_operations import (
+    start_auto_layout_impl, cancel_auto_layout_impl
+)
+from main_window_virtualization import (
+    setup_scene_virtualization_impl, schedule_virtualization_sync_impl,
+    set_scene_virtualization_impl, sync_virtualized_items_impl
+)
+from main_window_autosave import (
+    setup_autosave_impl, start_autosave_impl, reset_autosave_journal_impl, stop_autosave_impl
+)
+from main_window_undo_history import (
+    setup_undo_history_impl, set_keep_undo_history_impl, reset_undo_history_impl, restore_undo_history_impl,
+    write_undo_history_impl, apply_history_state_impl
+)
+from main_window_profiling import (
+    toggle_performance_overlay_impl, toggle_trace_recording_impl, save_trace_impl
+)
 from main_window_event_handlers import (
     keyPressEvent_handler, view_wheel_event_handler
 )
 from main_window_file_operations import (
     handle_import_erd_button_impl, export_to_erd_impl, # Changed CSV to ERD
-    handle_import_sql_button_impl # Keep SQL import as is
+    handle_import_sql_button_impl, # Keep SQL import as is
+    handle_import_sqlite_button_impl, wait_for_schema_import_impl,
+    handle_refresh_from_sql_button_impl, refresh_from_parsed_schema_impl,
+    export_image_impl, start_background_save_impl, wait_for_background_save_impl
 )
 from main_window_explorer_utils import (
-    populate_diagram_explorer_util, on_explorer_item_double_clicked_util,
+    populate_diagram_explorer_util, update_diagram_explorer_util, on_explorer_item_double_clicked_util,
     toggle_diagram_explorer_util, ITEM_TYPE_TABLE, ITEM_TYPE_COLUMN, ITEM_TYPE_RELATIONSHIP, ITEM_TYPE_CATEGORY
 )
 from main_window_dialog_handlers import ( # Keep this
     open_default_colors_dialog_handler, open_canvas_settings_dialog_handler,
     open_datatype_settings_dialog_handler
 )
-from sql_generator import generate_sql_for_diagram # Added
+from sql_generator import preview_sql_for_diagram, write_sql_for_diagram
+from diagram_changes import DiagramChangeBus
+from undo_budget import UndoMemoryBudget
+from profiling import PROFILER
+from sql_dialects import DEFAULT_SQL_DIALECT
+from file_compression import compression_for_path, open_for_write, strip_compression_extension
 
 class CentralWidgetWithResize(QWidget): 
     def __init__(self, main_window_ref, parent=None):
@@ -91,8 +119,11 @@ class CentralWidgetWithResize(QWidget):
 
 
 class ERDCanvasWindow(QMainWindow):
-    def __init__(self):
+    diagram_changed = pyqtSignal(object) # The DiagramChanges, after published changes to anything but the notes
+
+    def __init__(self, persist_settings=True):
         super().__init__()
+        self.persist_settings = persist_settings # False for headless windows: config.ini is read but never written
 
         app_icon_path = "icon.ico" 
         app_icon = QIcon(app_icon_path)
@@ -100,14 +131,36 @@ class ERDCanvasWindow(QMainWindow):
             self.setWindowIcon(app_icon)
 
         self.current_file_path = None
+        self.current_file_format = constants.DEFAULT_ERD_FILE_FORMAT # Format Ctrl+S writes; follows the opened file
+        self.project_store_path = None # .erdb file whose rows match the model except for dirty_table_names
+        self.dirty_table_names = set() # Tables changed since the last project store save
+        self.journal_dirty_table_names = set() # Tables changed since the last autosave journal entry
+        self.history_dirty_table_names = set() # Tables changed since the last undo stack step (kept undo history)
+        self.saving_dirty_table_names = set() # Dirty tables handed to the running save, restored if it fails
+        self.save_worker = None
+        self.pending_save = None # (path, file_format) requested while a save was running
+        self.schema_import_worker = None
+        self.last_save_succeeded = None
         self.current_theme = "light" 
         self.user_default_table_body_color = None
         self.user_default_table_header_color = None
         self.sql_preview_visible_on_load = True # Default, will be overridden by config
         self.notes_visible_on_load = True # Default for notes visibility
+        self.overview_visible_on_load = False
+        self.virtualize_scene_on_load = False # Default, will be overridden by config
+        self.auto_size_canvas_on_load = False
+        self.sql_dialect_name = DEFAULT_SQL_DIALECT # Will be overridden by config
+        self.undo_memory_mb = constants.DEFAULT_UNDO_MEMORY_MB # Will be overridden by config
+        self.keep_undo_history = False # Will be overridden by config
         self.show_cardinality_text = constants.show_cardinality_text_globally
         self.show_cardinality_symbols = constants.show_cardinality_symbols_globally
         self.copied_table_data = None # Variable to store copied table data
+        self.view_refresh_batch_depth = 0 # > 0 between begin_view_refresh_batch() and end_view_refresh_batch()
+        self.pending_view_refreshes = set()
+        self.pending_rerouted_table_names = set() # Scoped reroutes handed up by nested batches
+        self.view_refresh_batch_marks = [] # Per open batch: was a full reroute already pending when it began
+        self.performance_overlay = None # Created the first time View > Developer > Performance Overlay is turned on
+        self.trace_recording = PROFILER.enabled # Already on when started with ERD_TRACE_FILE
         
         self.loaded_window_state = None 
 
@@ -115,10 +168,14 @@ class ERDCanvasWindow(QMainWindow):
         constants.current_canvas_dimensions["height"] = constants.DEFAULT_CANVAS_HEIGHT
         constants.editable_column_data_types = constants.DEFAULT_COLUMN_DATA_TYPES[:]
 
-        self.undo_stack = QUndoStack(self)
-        self.undo_stack.setUndoLimit(50) 
+        self.undo_stack = QUndoStack(self) # No step limit; undo_budget bounds the history by memory
+        self.change_bus = DiagramChangeBus(self) # Commands publish what they changed here
+        self.sql_statement_cache = {} # Table name -> CREATE TABLE statement for the preview
+        self.sql_preview_stale = False # The preview dock was hidden when the diagram last changed
 
         load_app_settings(self) 
+        self.undo_budget = UndoMemoryBudget(self.undo_stack, self.undo_memory_mb * 1024 * 1024,
+                                            lambda: itertools.chain(self.tables_data.values(), self.relationships_data), self)
 
         self.current_theme_settings = {} 
         update_theme_settings_util(self) 
@@ -134,9 +191,8 @@ class ERDCanvasWindow(QMainWindow):
         self.drawing_relationship_mode = False 
 
         self.scene = ERDGraphicsScene(self) 
-        self.scene.setSceneRect(0, 0,
-                                 constants.current_canvas_dimensions["width"],
-                                 constants.current_canvas_dimensions["height"])
+        self.scene.auto_size_to_content = self.auto_size_canvas_on_load
+        self.scene.apply_scene_rect()
 
         self.view = QGraphicsView(self.scene, self)
         self.view.setRenderHint(QPainter.RenderHint.Antialiasing)
@@ -155,21 +211,32 @@ class ERDCanvasWindow(QMainWindow):
         create_menus(self)
         create_diagram_explorer_widget(self)
         create_main_floating_action_button_widget(self)
-        create_sql_preview_widget(self) 
-        create_notes_widget(self) # Create Notes dock
+        # Docks that were closed last time are built when first shown (ensure_*_widget)
+        if self.sql_preview_visible_on_load:
+            create_sql_preview_widget(self) 
+        if self.notes_visible_on_load:
+            create_notes_widget(self) # Create Notes dock
+        if self.overview_visible_on_load:
+            create_overview_widget(self)
 
         # Tabify SQL Preview and Notes docks if both exist
         if hasattr(self, 'sql_preview_dock') and hasattr(self, 'notes_dock'):
             self.tabifyDockWidget(self.sql_preview_dock, self.notes_dock)
             self.sql_preview_dock.raise_() # Optionally make SQL preview the default visible tab
 
-        apply_styles_util(self) 
-        self.set_theme(self.current_theme) 
+        self.set_theme(self.current_theme) # Applies the window and dock stylesheets
 
-        self.undo_stack.indexChanged.connect(self.populate_diagram_explorer) 
-        self.undo_stack.indexChanged.connect(self.update_sql_preview_pane) # Update SQL on undo/redo
+        self.undo_stack.indexChanged.connect(lambda _: self.change_bus.flush()) # Views follow each push/undo/redo at once
+        self.change_bus.changes_published.connect(self.apply_diagram_changes)
         self.undo_stack.cleanChanged.connect(self.update_window_title) 
 
+        self.scene.table_geometry_changed.connect(lambda table_name, _: self.mark_tables_dirty(table_name))
+
+        setup_scene_virtualization_impl(self)
+        setup_autosave_impl(self)
+        setup_undo_history_impl(self)
+        self.scene.virtualized = self.virtualize_scene_on_load
+
         # Restore window state (including dock visibility)
         # Must be after docks are created.
         if self.loaded_window_state:
@@ -186,6 +253,9 @@ class ERDCanvasWindow(QMainWindow):
         # Sync Notes action with its dock visibility
         if hasattr(self, 'notes_dock') and hasattr(self, 'toggleNotesAction'):
             self.toggleNotesAction.setChecked(self.notes_dock.isVisible())
+
+        if hasattr(self, 'overview_dock') and hasattr(self, 'toggleOverviewAction'):
+            self.toggleOverviewAction.setChecked(self.overview_dock.isVisible())
         
         # Sync Cardinality Display Mode menu
         if hasattr(self, 'update_cardinality_display_menu_state'):
@@ -232,7 +302,7 @@ class ERDCanvasWindow(QMainWindow):
                                      QMessageBox.StandardButton.Cancel)
 
         if reply == QMessageBox.StandardButton.Save:
-            return self.save_file() # save_file() now returns True on success, False on cancel
+            return self.save_file() and self.wait_for_background_save() # False on cancel or a failed write
         elif reply == QMessageBox.StandardButton.Discard:
             return True # Proceed without saving
         elif reply == QMessageBox.StandardButton.Cancel:
@@ -240,8 +310,14 @@ class ERDCanvasWindow(QMainWindow):
         return False # Default to cancel
 
     def closeEvent(self, event):
+        if self.schema_import_worker is not None:
+            self.schema_import_worker.requestInterruption() # Its result would only replace a closing diagram
+            self.schema_import_worker.wait()
+        self.wait_for_background_save() # A failed save leaves the stack dirty, so the prompt below still asks
         if self.prompt_to_save_if_dirty():
+            self.cancel_auto_layout()
             self.save_app_settings() # Save app settings (like window state, theme)
+            stop_autosave_impl(self)
             event.accept() # Proceed with closing
         else:
             event.ignore() # User cancelled closing
@@ -254,11 +330,40 @@ class ERDCanvasWindow(QMainWindow):
     def toggle_diagram_explorer(self, checked):
         toggle_diagram_explorer_util(self, checked)
         QTimer.singleShot(0, self.save_app_settings) 
-    def populate_diagram_explorer(self): populate_diagram_explorer_util(self)
+    def populate_diagram_explorer(self):
+        if self.view_refresh_batch_depth:
+            self.pending_view_refreshes.add(self.populate_diagram_explorer)
+            return
+        populate_diagram_explorer_util(self)
     def update_sql_preview_pane(self):
+        if self.view_refresh_batch_depth:
+            self.pending_view_refreshes.add(self.update_sql_preview_pane)
+            return
+        self.sql_statement_cache.clear()
+        self.render_sql_preview()
+    def render_sql_preview(self):
+        """Regenerates the preview text from the statement cache; deferred while the dock is hidden."""
         if hasattr(self, 'sql_preview_text_edit') and self.sql_preview_text_edit:
-            sql_code = generate_sql_for_diagram(self.tables_data, self.relationships_data)
+            if hasattr(self, 'sql_preview_dock') and not self.sql_preview_dock.isVisible():
+                self.sql_preview_stale = True
+                return
+            self.sql_preview_stale = False
+            # Only the first statements are generated; large schemas are written out by Export SQL
+            sql_code = preview_sql_for_diagram(self.tables_data, self.relationships_data, dialect=self.sql_dialect_name,
+                                               statement_cache=self.sql_statement_cache)
             self.sql_preview_text_edit.setPlainText(sql_code)
+    def apply_diagram_changes(self, changes):
+        """Brings the explorer, SQL preview and title up to date with one DiagramChanges from the change bus."""
+        if changes.everything or changes.tables or changes.relationship_tables:
+            update_diagram_explorer_util(self, changes)
+            if changes.everything:
+                self.sql_statement_cache.clear()
+            for table_name in changes.tables:
+                self.sql_statement_cache.pop(table_name, None)
+            self.render_sql_preview()
+        self.update_window_title()
+        if not changes.is_notes_only():
+            self.diagram_changed.emit(changes)
     def on_notes_changed(self):
         # This method is connected to the textChanged signal of notes_text_edit
         if hasattr(self, 'notes_text_edit') and self.notes_text_edit:
@@ -288,8 +393,20 @@ class ERDCanvasWindow(QMainWindow):
     def show_floating_button_menu(self): show_floating_button_menu_widget(self)
     
     def new_diagram(self): new_diagram_action(self) 
-    def save_file(self): save_file_action(self)
-    def save_file_as(self): save_file_as_action(self)
+    def save_file(self): return save_file_action(self)
+    def save_file_as(self): return save_file_as_action(self)
+    def save_in_background(self, path, file_format): return start_background_save_impl(self, path, file_format)
+    def wait_for_background_save(self): return wait_for_background_save_impl(self)
+    def start_autosave(self): start_autosave_impl(self)
+    def reset_autosave_journal(self): reset_autosave_journal_impl(self)
+    def set_keep_undo_history(self, enabled): set_keep_undo_history_impl(self, enabled)
+    def toggle_performance_overlay(self, checked): toggle_performance_overlay_impl(self, checked)
+    def toggle_trace_recording(self, checked): toggle_trace_recording_impl(self, checked)
+    def save_trace(self, path=None): return save_trace_impl(self, path)
+    def reset_undo_history(self): reset_undo_history_impl(self)
+    def restore_undo_history(self, path): restore_undo_history_impl(self, path)
+    def write_undo_history(self, path, saved_index): write_undo_history_impl(self, path, saved_index)
+    def apply_history_state(self, table_names, state): apply_history_state_impl(self, table_names, state)
 
     def export_to_sql_action(self):
         """Exports the current diagram to an SQL file."""
@@ -299,19 +416,29 @@ class ERDCanvasWindow(QMainWindow):
 
         suggested_filename = "schema.sql"
         if self.current_file_path:
-            base, _ = os.path.splitext(os.path.basename(self.current_file_path))
+            base, _ = os.path.splitext(os.path.basename(strip_compression_extension(self.current_file_path)))
             suggested_filename = f"{base}_schema.sql"
         
-        path, _ = QFileDialog.getSaveFileName(self, "Save SQL File", suggested_filename, "SQL Files (*.sql);;All Files (*)")
+        path, _ = QFileDialog.getSaveFileName(self, "Save SQL File", suggested_filename, constants.SQL_FILE_FILTER)
         if path:
-            sql_code = generate_sql_for_diagram(self.tables_data, self.relationships_data)
             try:
-                with open(path, 'w', encoding='utf-8') as f:
-                    f.write(sql_code)
+                with open_for_write(path, 'wt', compression_for_path(path), encoding='utf-8') as f: # .sql.gz/.sql.xz compress
+                    write_sql_for_diagram(f, self.tables_data, self.relationships_data, self.sql_dialect_name)
                 QMessageBox.information(self, "Export Successful", f"SQL schema saved to {path}")
             except Exception as e:
                 QMessageBox.critical(self, "Export Error", f"Could not save SQL file: {e}")
 
+    def export_image(self): export_image_impl(self)
+    def fit_diagram_to_view(self, padding=50): fit_diagram_to_view_impl(self, padding)
+
+    def mark_tables_dirty(self, *table_names):
+        """Records tables whose rows must be rewritten by the next incremental project store save and journal entry."""
+        names = [name for name in table_names if name]
+        self.dirty_table_names.update(names)
+        self.journal_dirty_table_names.update(names)
+        if self.keep_undo_history:
+            self.history_dirty_table_names.update(names)
+
     def delete_selected_items(self): delete_selected_items_action(self) 
     def toggle_relationship_mode_action(self, checked): toggle_relationship_mode_action_impl(self, checked)
     def reset_drawing_mode(self): reset_drawing_mode_impl(self)
@@ -344,42 +471,126 @@ class ERDCanvasWindow(QMainWindow):
             interactive_pos=interactive_pos_to_pass
         )    
 
+    def table_geometry_for(self, table_names): return table_geometry_for_util(self, table_names)
+    def record_table_geometry_change(self, old_geometry, description="Move Tables"):
+        record_table_geometry_change_impl(self, old_geometry, description)
+    def nudge_selected_tables(self, dx, dy): return nudge_selected_tables_impl(self, dx, dy)
+
     def finalize_relationship_drawing(self, source_table_data, source_column_data, dest_table_data, dest_column_data):
         finalize_relationship_drawing_impl(self, source_table_data, source_column_data, dest_table_data, dest_column_data)
     
     def create_relationship(self, fk_table_data, pk_table_data, fk_col_name, pk_col_name, rel_type, 
                             vertical_segment_x_override=None, # Added for consistency with CSV/Commands
-                            from_undo_redo=False):
+                            from_undo_redo=False, check_existing=True):
         return create_relationship_impl(self, fk_table_data, pk_table_data, fk_col_name, pk_col_name, rel_type, 
-                                        vertical_segment_x_override, from_undo_redo)
+                                        vertical_segment_x_override, from_undo_redo, check_existing)
     
     def update_relationship_graphic_path(self, relationship_data): # Renamed
         update_relationship_graphic_path_impl(self, relationship_data)
     
-    def update_all_relationships_graphics(self): update_all_relationships_graphics_impl(self)
+    def update_all_relationships_graphics(self):
+        if self.view_refresh_batch_depth:
+            self.pending_view_refreshes.add(self.update_all_relationships_graphics)
+            return
+        update_all_relationships_graphics_impl(self)
+
+    def undo_diagram_change(self):
+        """Undoes one step; a macro's commands share one relationship reroute and one view update."""
+        if not self.undo_budget.can_undo(): # Older steps were evicted by the memory budget
+            return
+        self.begin_view_refresh_batch()
+        try:
+            self.undo_stack.undo()
+        finally:
+            self.end_view_refresh_batch()
+
+    def redo_diagram_change(self):
+        self.begin_view_refresh_batch()
+        try:
+            self.undo_stack.redo()
+        finally:
+            self.end_view_refresh_batch()
+
+    def begin_view_refresh_batch(self):
+        """
+        Defers relationship rerouting, the explorer rebuild and the SQL preview until the matching
+        end_view_refresh_batch(), which does each requested one once. Adding thousands of tables
+        (load, import) then costs one refresh instead of one per table. Batches nest like undo macros.
+        Change bus notifications are held for the same span.
+        """
+        self.view_refresh_batch_depth += 1
+        self.view_refresh_batch_marks.append(self.update_all_relationships_graphics in self.pending_view_refreshes)
+        self.change_bus.suspend()
+
+    def end_view_refresh_batch(self, rerouted_table_names=None):
+        """
+        rerouted_table_names limits the reroute asked for inside this batch to relationships of those tables
+        (the only ones that changed). A nested batch hands the names up, so the outermost one reroutes them once.
+        """
+        self.view_refresh_batch_depth -= 1
+        full_reroute_was_pending = self.view_refresh_batch_marks.pop()
+        if rerouted_table_names is not None and not full_reroute_was_pending and \
+           self.update_all_relationships_graphics in self.pending_view_refreshes:
+            self.pending_view_refreshes.discard(self.update_all_relationships_graphics)
+            self.pending_rerouted_table_names.update(rerouted_table_names)
+        if self.view_refresh_batch_depth:
+            self.change_bus.resume()
+            return
+        pending, self.pending_view_refreshes = self.pending_view_refreshes, set()
+        rerouted, self.pending_rerouted_table_names = self.pending_rerouted_table_names, set()
+        if self.update_all_relationships_graphics in pending:
+            self.update_all_relationships_graphics()
+        elif rerouted:
+            for rel_data in self.relationships_data:
+                if rel_data.table1_name in rerouted or rel_data.table2_name in rerouted:
+                    update_relationship_graphic_path_impl(self, rel_data)
+        if self.populate_diagram_explorer in pending or self.update_sql_preview_pane in pending:
+            self.change_bus.everything_changed() # Full rebuilds were asked for; done once by the flush below
+        self.change_bus.resume()
     def update_relationship_table_names(self, old_table_name, new_table_name): update_relationship_table_names_impl(self, old_table_name, new_table_name)
     def update_fk_references_to_pk(self, pk_table_name, old_pk_col_name, new_pk_col_name): update_fk_references_to_pk_impl(self, pk_table_name, old_pk_col_name, new_pk_col_name)
     def remove_relationships_for_table(self, table_name, old_columns_of_table=None): remove_relationships_for_table_impl(self, table_name, old_columns_of_table)
     def edit_relationship_properties(self, relationship_data): edit_relationship_properties_impl(self, relationship_data)
     def handle_import_sql_button(self): handle_import_sql_button_impl(self)
+    def handle_import_sqlite_button(self): handle_import_sqlite_button_impl(self)
+    def handle_refresh_from_sql_button(self): handle_refresh_from_sql_button_impl(self)
+    def refresh_from_parsed_schema(self, parsed_tables, parsed_relationships, source_label):
+        return refresh_from_parsed_schema_impl(self, parsed_tables, parsed_relationships, source_label)
+    def wait_for_schema_import(self): wait_for_schema_import_impl(self)
+    def set_scene_virtualization(self, enabled): set_scene_virtualization_impl(self, enabled)
+    def schedule_virtualization_sync(self): schedule_virtualization_sync_impl(self)
+    def sync_virtualized_items(self): sync_virtualized_items_impl(self)
+    def start_auto_layout(self): start_auto_layout_impl(self)
+    def cancel_auto_layout(self): return cancel_auto_layout_impl(self)
     
     def handle_import_erd_button(self): handle_import_erd_button_impl(self) 
-    def export_to_erd(self, file_path_to_save=None): export_to_erd_impl(self, file_path_to_save) 
+    def export_to_erd(self, file_path_to_save=None, file_format=None): export_to_erd_impl(self, file_path_to_save, file_format) 
     
     def open_default_colors_dialog(self): open_default_colors_dialog_handler(self)
     def open_canvas_settings_dialog(self): open_canvas_settings_dialog_handler(self)
     def open_datatype_settings_dialog(self): open_datatype_settings_dialog_handler(self)
     def toggle_sql_preview(self, checked):
+        if checked:
+            ensure_sql_preview_widget(self)
         if hasattr(self, 'sql_preview_dock'):
             self.sql_preview_dock.setVisible(checked)
             # Save settings when visibility is toggled by user action
             QTimer.singleShot(0, self.save_app_settings)
     def toggle_notes_view(self, checked):
+        if checked:
+            ensure_notes_widget(self)
         if hasattr(self, 'notes_dock'):
             self.notes_dock.setVisible(checked)
             # Save settings when visibility is toggled by user action
             QTimer.singleShot(0, self.save_app_settings)
 
+    def toggle_overview(self, checked):
+        if checked:
+            ensure_overview_widget(self)
+        if hasattr(self, 'overview_dock'):
+            self.overview_dock.setVisible(checked)
+            QTimer.singleShot(0, self.save_app_settings)
+
     def toggle_cardinality_text_display(self, checked):
         if self.show_cardinality_text != checked:
             self.show_cardinality_text = checked
@@ -396,6 +607,13 @@ class ERDCanvasWindow(QMainWindow):
             self.save_app_settings()
             # self.update_cardinality_display_menu_state() # Action state is auto-managed
 
+    def set_sql_dialect(self, dialect_name):
+        """Switches the dialect used for the SQL preview, Export SQL and Import SQL."""
+        if self.sql_dialect_name != dialect_name:
+            self.sql_dialect_name = dialect_name
+            self.update_sql_preview_pane() # Clears the statement cache too
+            self.save_app_settings()
+
     def update_cardinality_display_menu_state(self):
         # Called after loading settings to set initial check state of menu items
         if hasattr(self, 'actionShowCardinalityText'):
@@ -408,6 +626,8 @@ class ERDCanvasWindow(QMainWindow):
     def resizeEvent(self, event): 
         super().resizeEvent(event)
         self._update_floating_button_position()
+        if hasattr(self, 'scene'):
+            self.schedule_virtualization_sync()
     def showEvent(self, event): 
         super().showEvent(event)
         QTimer.singleShot(0, self._update_floating_button_position) 
@@ -435,7 +655,7 @@ class ERDCanvasWindow(QMainWindow):
                         table_data.graphic_item.update()
 
         self.update_all_relationships_graphics() 
-        self.populate_diagram_explorer() 
+        self.change_bus.relationships_changed(old_table_name, new_table_name)
 
 
 if __name__ == '__main__':
@@ -11,10 +11,12 @@ import constants
 
 def new_diagram_action(window):
     """Clears the current diagram and starts a new one."""
+    window.wait_for_background_save()
     if not window.prompt_to_save_if_dirty():
         return # User cancelled or save failed
 
     # Proceed with creating a new diagram
+    window.cancel_auto_layout()
     window.scene.clearSelection()
 
     for item in list(window.scene.items()): 
@@ -22,31 +24,34 @@ def new_diagram_action(window):
             window.scene.removeItem(item)
 
     window.tables_data.clear()
+    window.scene.table_index.clear()
     window.relationships_data.clear()
     window.diagram_notes = "" # Clear notes
     window.copied_table_data = None # Clear copy buffer
 
     window.undo_stack.clear()
     window.current_file_path = None
+    window.current_file_format = constants.DEFAULT_ERD_FILE_FORMAT
+    window.project_store_path = None
+    window.dirty_table_names.clear()
 
     if hasattr(window, 'notes_text_edit') and window.notes_text_edit:
         window.notes_text_edit.setPlainText("") # Clear notes UI
 
-    window.scene.setSceneRect(0, 0, constants.current_canvas_dimensions["width"], constants.current_canvas_dimensions["height"])
+    window.scene.apply_scene_rect()
 
-    window.update_window_title()
-    window.populate_diagram_explorer()
-    window.update_sql_preview_pane() # Update SQL preview for new diagram
+    window.change_bus.everything_changed() # Explorer, SQL preview, title and overview start over
+    window.change_bus.flush()
+    window.reset_autosave_journal()
+    window.reset_undo_history()
     # print("New diagram created.")
 
 
 def save_file_action(window):
     """Saves the current diagram to its existing path, or calls Save As if no path."""
     if window.current_file_path:
-        window.export_to_erd(window.current_file_path) 
-        window.undo_stack.setClean()
-        window.update_window_title()
-        return True # Indicate success
+        # Written in the background; the undo stack is marked clean when the write finishes
+        return window.save_in_background(window.current_file_path, window.current_file_format)
     else:
         return save_file_as_action(window) # Delegate and return its result
 
@@ -55,13 +60,25 @@ def save_file_as_action(window):
     """Saves the current diagram to a new file path chosen by the user."""
     suggested_path = window.current_file_path or os.path.join(os.getcwd(), "untitled.erd") # Default to .erd
     
-    path, _ = QFileDialog.getSaveFileName(window, "Save ERD File As", suggested_path, "ERD Files (*.erd);;All Files (*)")
+    filters_by_format = {
+        constants.ERD_FILE_FORMAT_BINARY: constants.ERD_SAVE_FILTER_BINARY,
+        constants.ERD_FILE_FORMAT_PROJECT_STORE: constants.ERD_SAVE_FILTER_PROJECT_STORE,
+        constants.ERD_FILE_FORMAT_CSV: constants.ERD_SAVE_FILTER_CSV,
+    }
+    initial_filter = filters_by_format.get(window.current_file_format, constants.ERD_SAVE_FILTER_BINARY)
+    path, selected_filter = QFileDialog.getSaveFileName(window, "Save ERD File As", suggested_path,
+                                                        ";;".join(filters_by_format.values()), initial_filter)
     if path:
-        window.export_to_erd(path) 
+        file_format = next((fmt for fmt, file_filter in filters_by_format.items() if file_filter == selected_filter),
+                           constants.ERD_FILE_FORMAT_BINARY)
+        if file_format == constants.ERD_FILE_FORMAT_PROJECT_STORE and not os.path.splitext(path)[1]:
+            path += ".erdb"
+        if not window.save_in_background(path, file_format):
+            return False
         window.current_file_path = path 
-        window.undo_stack.setClean() 
+        window.current_file_format = file_format
         window.update_window_title() 
-        return True # Indicate success
+        return True # Indicate the save was started
     return False # Indicate cancellation or no path chosen
 
 
@@ -117,9 +134,7 @@ def delete_selected_items_action(window):
         if table_data.name in window.tables_data: 
             window.undo_stack.push(DeleteTableCommand(window, table_data))
 
-    window.undo_stack.endMacro()
-    window.populate_diagram_explorer() # Update explorer after commands are executed
-    window.update_sql_preview_pane() # Update SQL preview
+    window.undo_stack.endMacro() # The explorer and SQL preview follow the commands' change notifications
 
 
 def paste_copied_table_action(window, pos=None):
@@ -179,3 +194,13 @@ def reset_drawing_mode_impl(window):
     """Resets the drawing mode, typically called after a relationship is drawn or cancelled."""
     if window.drawing_relationship_mode:
         toggle_relationship_mode_action_impl(window, False)
+
+
+def fit_diagram_to_view_impl(window, padding=50):
+    """Zooms the view to show every table; the bounds come from the spatial index, so no items are walked."""
+    bounds = window.scene.table_index.bounding_rect()
+    if bounds.isEmpty():
+        return
+    window.scene.apply_scene_rect() # Make sure a pending auto-size has caught up with the content
+    window.view.fitInView(bounds.adjusted(-padding, -padding, padding, padding), Qt.AspectRatioMode.KeepAspectRatio)
+    window.schedule_virtualization_sync()
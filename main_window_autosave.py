@@ -0,0 +1,242 @@
+# main_window_autosave.py
+# Journals every model change for crash recovery and compacts the journal into periodic background checkpoints.
+
+import os
+import shutil
+import sys
+import tempfile
+from PyQt6.QtWidgets import QMessageBox
+from PyQt6.QtCore import QTimer, QLockFile
+
+import constants
+from autosave_journal import AutosaveJournal, make_journal_entry, has_recoverable_session, recover_session
+from main_window_config import CONFIG_FILE
+from model_snapshot import snapshot_table, snapshot_relationship, take_model_snapshot
+from save_worker import SaveWorker
+
+AUTOSAVE_DIR_NAME = "autosave" # Next to config.ini; each running instance journals into its own session directory
+SESSION_DIR_PREFIX = "session-"
+SESSION_LOCK_FILE_NAME = "instance.lock" # Held by the instance journaling into the directory
+AUTOSAVE_JOURNAL_DELAY_MS = 250 # Coalesces a drag or a burst of commands into one journal entry
+AUTOSAVE_CHECKPOINT_INTERVAL_MS = 60 * 1000
+
+
+def setup_autosave_impl(window):
+    """Creates the timers; journaling only starts with start_autosave_impl, so headless windows never touch the journal."""
+    window.autosave_journal = None
+    window.autosave_lock = None
+    window.journal_entries_since_checkpoint = 0
+    window.checkpoint_worker = None
+
+    window.journal_timer = QTimer(window)
+    window.journal_timer.setSingleShot(True)
+    window.journal_timer.setInterval(AUTOSAVE_JOURNAL_DELAY_MS)
+    window.journal_timer.timeout.connect(lambda: append_journal_entry_impl(window))
+
+    window.checkpoint_timer = QTimer(window)
+    window.checkpoint_timer.setInterval(AUTOSAVE_CHECKPOINT_INTERVAL_MS)
+    window.checkpoint_timer.timeout.connect(lambda: start_checkpoint_impl(window))
+
+    window.undo_stack.indexChanged.connect(lambda _: schedule_journal_entry_impl(window))
+    window.undo_stack.cleanChanged.connect(lambda clean: reset_autosave_journal_impl(window) if clean else None)
+    window.scene.table_geometry_changed.connect(lambda *_: schedule_journal_entry_impl(window))
+
+
+def autosave_root():
+    """The directory next to config.ini that holds every instance's session directory, as an absolute path."""
+    return os.path.join(os.path.dirname(os.path.abspath(CONFIG_FILE)), AUTOSAVE_DIR_NAME)
+
+
+def start_autosave_impl(window, root=None):
+    """
+    Offers to recover a session whose instance didn't exit normally, then starts journaling this one.
+    Sessions of instances that are still running are locked and left alone.
+    """
+    root = root or autosave_root()
+    recovered = False
+    for directory in _session_dirs(root):
+        lock = _lock_session_dir(directory)
+        if lock is None:
+            continue # Another running instance's journal
+        if not has_recoverable_session(directory):
+            _remove_session_dir(directory, lock)
+            continue
+        if recovered:
+            lock.unlock() # Only one session fits in this window; the next instance offers the rest
+            continue
+        reply = QMessageBox.question(window, "Recover Unsaved Changes",
+                                     "A previous session did not close normally.\n"
+                                     "Do you want to recover its unsaved changes?",
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        window.autosave_journal, window.autosave_lock = AutosaveJournal(directory), lock
+        if reply == QMessageBox.StandardButton.Yes:
+            recovered = recover_session_impl(window)
+        if not recovered:
+            _remove_session_dir(directory, lock)
+            window.autosave_journal = window.autosave_lock = None
+
+    if not recovered:
+        try:
+            os.makedirs(root, exist_ok=True)
+            directory = tempfile.mkdtemp(prefix=SESSION_DIR_PREFIX, dir=root)
+        except OSError as e:
+            print(f"Autosave Error: {e}", file=sys.stderr)
+            return
+        lock = _lock_session_dir(directory)
+        if lock is None:
+            print(f"Autosave Error: could not lock {directory}", file=sys.stderr)
+            return
+        window.autosave_journal, window.autosave_lock = AutosaveJournal(directory), lock
+        reset_autosave_journal_impl(window)
+    window.checkpoint_timer.start()
+
+
+def _session_dirs(root):
+    """Session directories under root, the most recently changed first."""
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return []
+    directories = [os.path.join(root, name) for name in names if name.startswith(SESSION_DIR_PREFIX)]
+    return sorted((d for d in directories if os.path.isdir(d)), key=os.path.getmtime, reverse=True)
+
+
+def _lock_session_dir(directory):
+    """Returns the held lock of a session directory, or None while a running instance holds it."""
+    lock = QLockFile(os.path.join(directory, SESSION_LOCK_FILE_NAME))
+    lock.setStaleLockTime(0) # Only a dead owner makes a lock stale, however long its session runs
+    return lock if lock.tryLock(0) else None
+
+
+def _remove_session_dir(directory, lock):
+    lock.unlock()
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def recover_session_impl(window):
+    """Replays the journal into the (empty) diagram and keeps journaling on top of it. Returns True on success."""
+    from main_window_file_operations import apply_diagram_snapshot_impl
+    try:
+        snapshot, base_path, base_format = recover_session(window.autosave_journal.directory)
+    except Exception as e:
+        QMessageBox.critical(window, "Recovery Error", f"Could not recover the previous session: {e}")
+        print(f"Session Recovery Error: {e}", file=sys.stderr)
+        return False
+
+    window.begin_view_refresh_batch()
+    apply_diagram_snapshot_impl(window, snapshot, "Recover Session")
+    window.current_file_path = base_path
+    window.current_file_format = base_format or constants.DEFAULT_ERD_FILE_FORMAT
+    window.update_all_relationships_graphics()
+    window.populate_diagram_explorer()
+    window.update_sql_preview_pane()
+    window.end_view_refresh_batch()
+    window.update_window_title()
+
+    # The journal already describes this state; only later changes need new entries
+    window.journal_timer.stop()
+    window.journal_dirty_table_names.clear()
+    window.autosave_journal.resume()
+    _remember_journaled_state(window)
+    return True
+
+
+def reset_autosave_journal_impl(window):
+    """Restarts the journal from the current file (e.g. after a save, load or New): nothing is pending any more."""
+    window.journal_timer.stop()
+    window.journal_dirty_table_names.clear()
+    window.journal_entries_since_checkpoint = 0
+    _remember_journaled_state(window)
+    if window.autosave_journal is None:
+        return
+    base_path = window.current_file_path if window.current_file_path and os.path.exists(window.current_file_path) else None
+    try:
+        window.autosave_journal.reset(base_path, window.current_file_format if base_path else None)
+    except OSError as e:
+        print(f"Autosave Error: {e}", file=sys.stderr)
+
+
+def _remember_journaled_state(window):
+    window.journaled_notes = window.diagram_notes or ""
+    window.journaled_canvas = (constants.current_canvas_dimensions["width"], constants.current_canvas_dimensions["height"])
+
+
+def schedule_journal_entry_impl(window):
+    if window.autosave_journal is not None:
+        window.journal_timer.start()
+
+
+def append_journal_entry_impl(window):
+    """Appends the state of every table changed since the last entry, plus notes and canvas size if they changed."""
+    journal = window.autosave_journal
+    if journal is None:
+        return
+    names = window.journal_dirty_table_names
+    notes = window.diagram_notes or ""
+    canvas = (constants.current_canvas_dimensions["width"], constants.current_canvas_dimensions["height"])
+    if not names and notes == window.journaled_notes and canvas == window.journaled_canvas:
+        return
+
+    tables = [snapshot_table(window.tables_data[name]) for name in sorted(names) if name in window.tables_data]
+    relationships = [snapshot_relationship(rel) for rel in window.relationships_data
+                     if rel.table1_name in names or rel.table2_name in names] if names else []
+    entry = make_journal_entry(names, tables, relationships,
+                               notes if notes != window.journaled_notes else None,
+                               canvas if canvas != window.journaled_canvas else None)
+    try:
+        journal.append(entry)
+    except OSError as e:
+        print(f"Autosave Error: {e}", file=sys.stderr)
+        return
+    window.journal_dirty_table_names = set()
+    window.journaled_notes, window.journaled_canvas = notes, canvas
+    window.journal_entries_since_checkpoint += 1
+
+
+def start_checkpoint_impl(window):
+    """Writes the whole model to the journal's checkpoint in a SaveWorker so the entries before it can be dropped."""
+    journal = window.autosave_journal
+    if journal is None or window.checkpoint_worker is not None:
+        return
+    if window.journal_timer.isActive():
+        window.journal_timer.stop()
+        append_journal_entry_impl(window)
+    if not window.journal_entries_since_checkpoint:
+        return
+
+    snapshot = take_model_snapshot(window)
+    try:
+        segment = journal.rotate()
+    except OSError as e:
+        print(f"Autosave Error: {e}", file=sys.stderr)
+        return
+    generation = journal.generation
+    window.journal_entries_since_checkpoint = 0
+
+    worker = SaveWorker(journal.checkpoint_path, constants.ERD_FILE_FORMAT_BINARY, snapshot, parent=window)
+    worker.save_finished.connect(lambda _: _commit_checkpoint(window, segment, generation))
+    worker.save_failed.connect(lambda _, error: print(f"Autosave Checkpoint Error: {error}", file=sys.stderr))
+    worker.finished.connect(lambda: setattr(window, 'checkpoint_worker', None))
+    window.checkpoint_worker = worker
+    worker.start()
+
+
+def _commit_checkpoint(window, segment, generation):
+    if window.autosave_journal is None:
+        return
+    try:
+        window.autosave_journal.commit_checkpoint(segment, generation)
+    except OSError as e:
+        print(f"Autosave Error: {e}", file=sys.stderr)
+
+
+def stop_autosave_impl(window):
+    """Normal exit: nothing needs recovering, so the journal is removed."""
+    window.journal_timer.stop()
+    window.checkpoint_timer.stop()
+    if window.checkpoint_worker is not None:
+        window.checkpoint_worker.wait()
+    if window.autosave_journal is not None:
+        window.autosave_journal.discard()
+        _remove_session_dir(window.autosave_journal.directory, window.autosave_lock)
+        window.autosave_journal = window.autosave_lock = None
@@ -6,6 +6,7 @@ import os
 from PyQt6.QtGui import QColor
 from PyQt6.QtCore import QByteArray 
 import constants
+from sql_dialects import DEFAULT_SQL_DIALECT, SQL_DIALECTS
 
 CONFIG_FILE = "config.ini" 
 
@@ -29,6 +30,8 @@ def load_app_settings(window):
         constants.user_saved_custom_colors = [] # Initialize empty for new config
         window.sql_preview_visible_on_load = True # Default for new config
         window.notes_visible_on_load = True # Default for notes
+        window.auto_size_canvas_on_load = False
+        constants.current_compression_settings["level"] = constants.DEFAULT_COMPRESSION_LEVEL
         constants.show_cardinality_text_globally = constants.DEFAULT_SHOW_CARDINALITY_TEXT
         constants.show_cardinality_symbols_globally = constants.DEFAULT_SHOW_CARDINALITY_SYMBOLS
         window.user_default_table_header_color = None
@@ -56,12 +59,22 @@ def load_app_settings(window):
         canvas_h = config.getint('CanvasSize', 'height', fallback=constants.DEFAULT_CANVAS_HEIGHT)
         constants.current_canvas_dimensions["width"] = canvas_w
         constants.current_canvas_dimensions["height"] = canvas_h
+        window.auto_size_canvas_on_load = config.getboolean('CanvasSize', constants.CONFIG_KEY_AUTO_SIZE_CANVAS, fallback=False)
     except (configparser.NoSectionError, configparser.NoOptionError, ValueError):
         constants.current_canvas_dimensions["width"] = constants.DEFAULT_CANVAS_WIDTH
         constants.current_canvas_dimensions["height"] = constants.DEFAULT_CANVAS_HEIGHT
+        window.auto_size_canvas_on_load = False
     
+    try:
+        level = config.getint(constants.CONFIG_SECTION_COMPRESSION, constants.CONFIG_KEY_COMPRESSION_LEVEL,
+                              fallback=constants.DEFAULT_COMPRESSION_LEVEL)
+        constants.current_compression_settings["level"] = min(9, max(1, level))
+    except ValueError:
+        constants.current_compression_settings["level"] = constants.DEFAULT_COMPRESSION_LEVEL
+
     if hasattr(window, 'scene') and window.scene: 
-         window.scene.setSceneRect(0, 0, constants.current_canvas_dimensions["width"], constants.current_canvas_dimensions["height"])
+         window.scene.auto_size_to_content = window.auto_size_canvas_on_load
+         window.scene.apply_scene_rect()
 
     try:
         types_str = config.get('ColumnDataTypes', 'types', fallback=','.join(constants.DEFAULT_COLUMN_DATA_TYPES))
@@ -113,10 +126,22 @@ def load_app_settings(window):
         section_to_check_ui = 'UIState' if config.has_section('UIState') else 'UserPreferences'
         window.sql_preview_visible_on_load = config.getboolean(section_to_check_ui, constants.CONFIG_KEY_SQL_PREVIEW_VISIBLE, fallback=True)
         window.notes_visible_on_load = config.getboolean(section_to_check_ui, constants.CONFIG_KEY_NOTES_VISIBLE, fallback=True)
+        window.overview_visible_on_load = config.getboolean(section_to_check_ui, constants.CONFIG_KEY_OVERVIEW_VISIBLE, fallback=False)
+        window.virtualize_scene_on_load = config.getboolean('UserPreferences', constants.CONFIG_KEY_VIRTUALIZE_SCENE, fallback=False)
+        sql_dialect_name = config.get('UserPreferences', constants.CONFIG_KEY_SQL_DIALECT, fallback=DEFAULT_SQL_DIALECT)
+        window.sql_dialect_name = sql_dialect_name if sql_dialect_name in SQL_DIALECTS else DEFAULT_SQL_DIALECT
+        undo_memory_mb = config.getint('UserPreferences', constants.CONFIG_KEY_UNDO_MEMORY_MB, fallback=constants.DEFAULT_UNDO_MEMORY_MB)
+        window.undo_memory_mb = max(1, undo_memory_mb)
+        window.keep_undo_history = config.getboolean('UserPreferences', constants.CONFIG_KEY_KEEP_UNDO_HISTORY, fallback=False)
 
     except (configparser.NoSectionError, configparser.NoOptionError, ValueError):
         window.sql_preview_visible_on_load = True # Default if not found or invalid
         window.notes_visible_on_load = True # Default if not found or invalid
+        window.overview_visible_on_load = False
+        window.virtualize_scene_on_load = False
+        window.sql_dialect_name = DEFAULT_SQL_DIALECT
+        window.undo_memory_mb = constants.DEFAULT_UNDO_MEMORY_MB
+        window.keep_undo_history = False
         
     # Load Cardinality Display Settings
     try:
@@ -144,15 +169,22 @@ def load_app_settings(window):
 
 def save_app_settings(window):
     """Saves application settings to the config file."""
+    if not window.persist_settings:
+        return
     config = configparser.ConfigParser()
     config['Theme'] = {'current_theme': window.current_theme}
     config['DefaultTableColors'] = {
         'body_color_hex': window.user_default_table_body_color.name() if window.user_default_table_body_color else '',
         'header_color_hex': window.user_default_table_header_color.name() if window.user_default_table_header_color else ''
     }
+    auto_size = window.scene.auto_size_to_content if hasattr(window, 'scene') else getattr(window, 'auto_size_canvas_on_load', False)
     config['CanvasSize'] = {
         'width': str(constants.current_canvas_dimensions["width"]),
-        'height': str(constants.current_canvas_dimensions["height"])
+        'height': str(constants.current_canvas_dimensions["height"]),
+        constants.CONFIG_KEY_AUTO_SIZE_CANVAS: str(auto_size)
+    }
+    config[constants.CONFIG_SECTION_COMPRESSION] = {
+        constants.CONFIG_KEY_COMPRESSION_LEVEL: str(constants.current_compression_settings["level"])
     }
     
     types_to_save = constants.editable_column_data_types
@@ -179,6 +211,11 @@ def save_app_settings(window):
     # Save custom colors (as comma-separated hex strings)
     custom_colors_hex = [color.name() for color in constants.user_saved_custom_colors]
     config.set('UserPreferences', constants.CONFIG_KEY_CUSTOM_COLORS, ",".join(custom_colors_hex))
+    virtualized = window.scene.virtualized if hasattr(window, 'scene') else getattr(window, 'virtualize_scene_on_load', False)
+    config.set('UserPreferences', constants.CONFIG_KEY_VIRTUALIZE_SCENE, str(virtualized))
+    config.set('UserPreferences', constants.CONFIG_KEY_SQL_DIALECT, getattr(window, 'sql_dialect_name', DEFAULT_SQL_DIALECT))
+    config.set('UserPreferences', constants.CONFIG_KEY_UNDO_MEMORY_MB, str(getattr(window, 'undo_memory_mb', constants.DEFAULT_UNDO_MEMORY_MB)))
+    config.set('UserPreferences', constants.CONFIG_KEY_KEEP_UNDO_HISTORY, str(getattr(window, 'keep_undo_history', False)))
     
     # Save SQL Preview visibility (from the dock's current state)
     sql_dock_is_visible = False
@@ -193,6 +230,8 @@ def save_app_settings(window):
     section_to_set_ui = 'UIState' if config.has_section('UIState') else 'UserPreferences'
     config.set(section_to_set_ui, constants.CONFIG_KEY_SQL_PREVIEW_VISIBLE, str(sql_dock_is_visible))
     config.set(section_to_set_ui, constants.CONFIG_KEY_NOTES_VISIBLE, str(notes_dock_is_visible))
+    overview_dock_is_visible = bool(getattr(window, 'overview_dock', None) and window.overview_dock.isVisible())
+    config.set(section_to_set_ui, constants.CONFIG_KEY_OVERVIEW_VISIBLE, str(overview_dock_is_visible))
     
     # Save Cardinality Display Settings
     display_settings_section = 'DisplaySettings' if config.has_section('DisplaySettings') else 'UserPreferences'
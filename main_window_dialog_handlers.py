@@ -2,13 +2,12 @@
 # Manages the opening and handling of various dialogs.
 
 from PyQt6.QtWidgets import QMessageBox
-from dialogs import ( # Assuming dialogs.py is accessible and contains these
-    DefaultColorsDialog, CanvasSettingsDialog, DataTypeSettingsDialog
-)
+# Dialog classes are imported inside each handler so dialogs.py loads on first use, not at startup
 import constants # Assuming constants.py is accessible
 
 def open_default_colors_dialog_handler(window):
     """Opens the dialog for setting default table colors."""
+    from dialogs import DefaultColorsDialog
     # Pass current user defaults and the main window instance (for theme access and parent)
     dialog = DefaultColorsDialog(window, window) # Parent, main_app_window
     if dialog.exec(): # Dialog was accepted
@@ -23,17 +22,21 @@ def open_default_colors_dialog_handler(window):
 
 def open_canvas_settings_dialog_handler(window):
     """Opens the dialog for setting canvas dimensions."""
+    from dialogs import CanvasSettingsDialog
     current_w = constants.current_canvas_dimensions["width"]
     current_h = constants.current_canvas_dimensions["height"]
-    dialog = CanvasSettingsDialog(current_w, current_h, window) # Parent
+    current_auto_size = window.scene.auto_size_to_content
+    dialog = CanvasSettingsDialog(current_w, current_h, window, auto_size=current_auto_size) # Parent
 
     if dialog.exec(): # Dialog was accepted
         new_w, new_h = dialog.get_dimensions()
-        if new_w != current_w or new_h != current_h:
+        new_auto_size = dialog.get_auto_size()
+        if new_w != current_w or new_h != current_h or new_auto_size != current_auto_size:
             constants.current_canvas_dimensions["width"] = new_w
             constants.current_canvas_dimensions["height"] = new_h
             if window.scene: # Check if scene exists
-                window.scene.setSceneRect(0, 0, new_w, new_h)
+                window.scene.auto_size_to_content = new_auto_size
+                window.scene.apply_scene_rect()
             window.save_app_settings() # Persist new dimensions
             QMessageBox.information(window, "Canvas Settings", "Canvas dimensions updated. You may need to adjust zoom/scroll to see changes.")
             # Optionally, auto-adjust view here, e.g., window.view.fitInView(window.scene.sceneRect(), Qt.AspectRatioMode.KeepAspectRatio)
@@ -41,6 +44,7 @@ def open_canvas_settings_dialog_handler(window):
 
 def open_datatype_settings_dialog_handler(window):
     """Opens the dialog for managing editable column data types."""
+    from dialogs import DataTypeSettingsDialog
     # Pass a copy of the current list of data types to the dialog
     current_types = list(constants.editable_column_data_types)
     dialog = DataTypeSettingsDialog(current_types, window) # Parent
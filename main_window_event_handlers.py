@@ -11,10 +11,10 @@ def keyPressEvent_handler(window, event):
         window.delete_selected_items()
         event.accept()
     elif event.matches(QKeySequence.StandardKey.Undo):
-        window.undo_stack.undo()
+        window.undo_diagram_change()
         event.accept()
     elif event.matches(QKeySequence.StandardKey.Redo):
-        window.undo_stack.redo()
+        window.redo_diagram_change()
         event.accept()
     elif event.key() == Qt.Key.Key_C and event.modifiers() == Qt.KeyboardModifier.ControlModifier:
         # Explicitly handle Ctrl+C
@@ -32,6 +32,8 @@ def keyPressEvent_handler(window, event):
         action_cancelled = False
         if hasattr(window, 'scene') and hasattr(window.scene, 'cancel_active_drawing_modes'):
             action_cancelled = window.scene.cancel_active_drawing_modes()
+        if not action_cancelled and hasattr(window, 'cancel_auto_layout'):
+            action_cancelled = window.cancel_auto_layout()
         
         if action_cancelled:
             event.accept() # Consume ESC if a drawing mode was cancelled
@@ -54,6 +56,9 @@ def view_wheel_event_handler(window, event):
         window.view.scale(factor, factor)
     else:
         window.view.scale(1.0 / factor, 1.0 / factor)
+    window.schedule_virtualization_sync()
+    if hasattr(window, 'overview_widget'):
+        window.overview_widget.update() # Viewport outline changed size
     event.accept()
 
 
@@ -3,6 +3,8 @@
 
 from PyQt6.QtWidgets import QTreeWidgetItem, QHeaderView 
 from PyQt6.QtCore import Qt
+from main_window_virtualization import ensure_table_item_impl, ensure_relationship_item_impl
+from profiling import profiled
 
 # Define item types for the explorer tree
 ITEM_TYPE_TABLE = QTreeWidgetItem.ItemType.UserType + 1
@@ -10,6 +12,58 @@ ITEM_TYPE_COLUMN = QTreeWidgetItem.ItemType.UserType + 2
 ITEM_TYPE_RELATIONSHIP = QTreeWidgetItem.ItemType.UserType + 3
 ITEM_TYPE_CATEGORY = QTreeWidgetItem.ItemType.UserType + 4 
 
+EXPLORER_INCREMENTAL_LIMIT = 200 # With more changed tables than this, rebuilding the tree is faster
+
+
+def _relationship_key(rel_data):
+    return (rel_data.table1_name, rel_data.fk_column_name, rel_data.table2_name, rel_data.pk_column_name)
+
+
+def _make_table_item(table_data):
+    table_item_explorer = QTreeWidgetItem([table_data.name, "Table"])
+    table_item_explorer.setData(0, Qt.ItemDataRole.UserRole, ITEM_TYPE_TABLE) 
+    table_item_explorer.setData(1, Qt.ItemDataRole.UserRole, table_data.name) # Store actual table name
+
+    if not table_data.columns:
+        empty_cols_node = QTreeWidgetItem(table_item_explorer, ["(No columns)", "Info"])
+        empty_cols_node.setDisabled(True)
+    else:
+        for col in table_data.columns:
+            col_display_name = col.get_display_name() 
+            col_item_explorer = QTreeWidgetItem(table_item_explorer, [col_display_name, col.data_type])
+            col_item_explorer.setData(0, Qt.ItemDataRole.UserRole, ITEM_TYPE_COLUMN) 
+            # Store full identifier: "TableName.ColumnName"
+            col_item_explorer.setData(1, Qt.ItemDataRole.UserRole, f"{table_data.name}.{col.name}")
+    return table_item_explorer
+
+
+def _make_relationship_item(rel_data):
+    rel_name = f"{rel_data.table1_name}.{rel_data.fk_column_name} -> {rel_data.table2_name}.{rel_data.pk_column_name}"
+    rel_item_explorer = QTreeWidgetItem([rel_name, rel_data.relationship_type])
+    rel_item_explorer.setData(0, Qt.ItemDataRole.UserRole, ITEM_TYPE_RELATIONSHIP) 
+    rel_item_explorer.setData(1, Qt.ItemDataRole.UserRole, _relationship_key(rel_data)) # For identification
+    return rel_item_explorer
+
+
+def _insert_sorted(category_item, item):
+    """Inserts item among the category's children, which are sorted by their identifier (column 1 UserRole)."""
+    item_key = item.data(1, Qt.ItemDataRole.UserRole)
+    low, high = 0, category_item.childCount()
+    while low < high:
+        mid = (low + high) // 2
+        if category_item.child(mid).data(1, Qt.ItemDataRole.UserRole) < item_key:
+            low = mid + 1
+        else:
+            high = mid
+    category_item.insertChild(low, item)
+    item.setExpanded(True)
+
+
+def _remove_item(category_item, item):
+    category_item.takeChild(category_item.indexOfChild(item))
+
+
+@profiled()
 def populate_diagram_explorer_util(window):
     """Populates the diagram explorer tree with current tables, relationships, and groups."""
     if not hasattr(window, 'diagram_explorer_tree') or not window.diagram_explorer_tree:
@@ -17,10 +71,13 @@ def populate_diagram_explorer_util(window):
 
     window.diagram_explorer_tree.clear()
     window.diagram_explorer_tree.setAlternatingRowColors(True) # Ensure this is set
+    window.explorer_table_items = {} # Table name -> item, for update_diagram_explorer_util
+    window.explorer_relationship_items = {} # Relationship key -> items (a list, in case the data holds duplicates)
 
     # --- Tables Category (for ungrouped tables or all tables view) ---
     tables_category_item = QTreeWidgetItem(window.diagram_explorer_tree, ["Tables", "Category"])
     tables_category_item.setData(0, Qt.ItemDataRole.UserRole, ITEM_TYPE_CATEGORY) 
+    window.explorer_tables_category = tables_category_item
     
     sorted_table_names = sorted(window.tables_data.keys())
     if not sorted_table_names:
@@ -28,42 +85,23 @@ def populate_diagram_explorer_util(window):
         empty_tables_node.setDisabled(True)
     else:
         for table_name in sorted_table_names:
-            table_data = window.tables_data[table_name]
-            display_name = table_data.name
-            
-            table_item_explorer = QTreeWidgetItem(tables_category_item, [display_name, "Table"])
-            table_item_explorer.setData(0, Qt.ItemDataRole.UserRole, ITEM_TYPE_TABLE) 
-            table_item_explorer.setData(1, Qt.ItemDataRole.UserRole, table_data.name) # Store actual table name
-
-            if not table_data.columns:
-                empty_cols_node = QTreeWidgetItem(table_item_explorer, ["(No columns)", "Info"])
-                empty_cols_node.setDisabled(True)
-            else:
-                for col in table_data.columns:
-                    col_display_name = col.get_display_name() 
-                    col_item_explorer = QTreeWidgetItem(table_item_explorer, [col_display_name, col.data_type])
-                    col_item_explorer.setData(0, Qt.ItemDataRole.UserRole, ITEM_TYPE_COLUMN) 
-                    # Store full identifier: "TableName.ColumnName"
-                    col_item_explorer.setData(1, Qt.ItemDataRole.UserRole, f"{table_data.name}.{col.name}")
+            table_item_explorer = _make_table_item(window.tables_data[table_name])
+            tables_category_item.addChild(table_item_explorer)
+            window.explorer_table_items[table_name] = table_item_explorer
     
     # --- Relationships Category ---
     rels_category_item = QTreeWidgetItem(window.diagram_explorer_tree, ["Relationships", "Category"])
     rels_category_item.setData(0, Qt.ItemDataRole.UserRole, ITEM_TYPE_CATEGORY)
+    window.explorer_relationships_category = rels_category_item
     
     if not window.relationships_data:
         empty_rels_node = QTreeWidgetItem(rels_category_item, ["(No relationships)", "Info"])
         empty_rels_node.setDisabled(True)
     else:
-        sorted_relationships = sorted(window.relationships_data, key=lambda r: (r.table1_name, r.fk_column_name, r.table2_name, r.pk_column_name))
-        for i, rel_data in enumerate(sorted_relationships):
-            rel_name = f"{rel_data.table1_name}.{rel_data.fk_column_name} -> {rel_data.table2_name}.{rel_data.pk_column_name}"
-            rel_item_explorer = QTreeWidgetItem(rels_category_item, [rel_name, rel_data.relationship_type])
-            rel_item_explorer.setData(0, Qt.ItemDataRole.UserRole, ITEM_TYPE_RELATIONSHIP) 
-            try: # Store original index in relationships_data list for identification
-                original_index = window.relationships_data.index(rel_data)
-                rel_item_explorer.setData(1, Qt.ItemDataRole.UserRole, original_index)
-            except ValueError: # Should not happen if data is consistent
-                 rel_item_explorer.setData(1, Qt.ItemDataRole.UserRole, -1) # Error case
+        for rel_data in sorted(window.relationships_data, key=_relationship_key):
+            rel_item_explorer = _make_relationship_item(rel_data)
+            rels_category_item.addChild(rel_item_explorer)
+            window.explorer_relationship_items.setdefault(_relationship_key(rel_data), []).append(rel_item_explorer)
 
     window.diagram_explorer_tree.expandAll()
     
@@ -71,6 +109,42 @@ def populate_diagram_explorer_util(window):
         window.diagram_explorer_tree.resizeColumnToContents(i)
 
 
+@profiled()
+def update_diagram_explorer_util(window, changes):
+    """
+    Updates only the explorer items of the tables and relationships named in a DiagramChanges.
+    Falls back to a full rebuild for large batches and whenever a category is (or becomes) empty.
+    """
+    if not hasattr(window, 'diagram_explorer_tree') or not window.diagram_explorer_tree:
+        return
+    if changes.everything or not getattr(window, 'explorer_table_items', None) or not window.tables_data or \
+       len(changes.tables) + len(changes.relationship_tables) > EXPLORER_INCREMENTAL_LIMIT or \
+       (changes.relationship_tables and (not window.explorer_relationship_items or not window.relationships_data)):
+        populate_diagram_explorer_util(window)
+        return
+
+    for table_name in changes.tables:
+        old_item = window.explorer_table_items.pop(table_name, None)
+        if old_item is not None:
+            _remove_item(window.explorer_tables_category, old_item)
+        table_data = window.tables_data.get(table_name)
+        if table_data is not None:
+            new_item = _make_table_item(table_data)
+            _insert_sorted(window.explorer_tables_category, new_item)
+            window.explorer_table_items[table_name] = new_item
+
+    if changes.relationship_tables:
+        touched = changes.relationship_tables
+        for key in [key for key in window.explorer_relationship_items if key[0] in touched or key[2] in touched]:
+            for old_item in window.explorer_relationship_items.pop(key):
+                _remove_item(window.explorer_relationships_category, old_item)
+        for rel_data in window.relationships_data:
+            if rel_data.table1_name in touched or rel_data.table2_name in touched:
+                new_item = _make_relationship_item(rel_data)
+                _insert_sorted(window.explorer_relationships_category, new_item)
+                window.explorer_relationship_items.setdefault(_relationship_key(rel_data), []).append(new_item)
+
+
 def on_explorer_item_double_clicked_util(window, item: QTreeWidgetItem, column: int):
     """Handles double-click events on items in the diagram explorer."""
     item_type = item.data(0, Qt.ItemDataRole.UserRole) 
@@ -80,26 +154,21 @@ def on_explorer_item_double_clicked_util(window, item: QTreeWidgetItem, column:
 
     if item_type == ITEM_TYPE_TABLE:
         table_name = identifier # Identifier is the table name
-        if table_name in window.tables_data and window.tables_data[table_name].graphic_item:
-            graphic_item_to_focus = window.tables_data[table_name].graphic_item
+        if table_name in window.tables_data:
+            graphic_item_to_focus = ensure_table_item_impl(window, window.tables_data[table_name])
     
     elif item_type == ITEM_TYPE_RELATIONSHIP:
-        try:
-            rel_index = int(identifier) # Identifier is the original index
-            if 0 <= rel_index < len(window.relationships_data):
-                relationship_data = window.relationships_data[rel_index]
-                if relationship_data.graphic_item:
-                    graphic_item_to_focus = relationship_data.graphic_item
-        except (ValueError, TypeError):
-            # print(f"Error identifying relationship from explorer: Invalid identifier '{identifier}'")
-            pass 
+        # Identifier is the relationship's (fk table, fk column, pk table, pk column)
+        relationship_data = next((r for r in window.relationships_data if _relationship_key(r) == identifier), None)
+        if relationship_data:
+            graphic_item_to_focus = ensure_relationship_item_impl(window, relationship_data)
 
     elif item_type == ITEM_TYPE_COLUMN:
         # Identifier is "TableName.ColumnName"
         if isinstance(identifier, str) and '.' in identifier:
             table_name, _ = identifier.split('.', 1)
-            if table_name in window.tables_data and window.tables_data[table_name].graphic_item:
-                graphic_item_to_focus = window.tables_data[table_name].graphic_item # Focus on the table
+            if table_name in window.tables_data:
+                graphic_item_to_focus = ensure_table_item_impl(window, window.tables_data[table_name]) # Focus on the table
     
     if graphic_item_to_focus:
         window.scene.clearSelection() 
@@ -1,20 +1,23 @@
 # main_window_file_operations.py
-# Handles file operations like import/export CSV.
+# Handles file operations like import/export of .erd files (binary v2 or CSV) and SQL.
 
-import csv
 import os
 import sys
 import math # Added for math.ceil
 from PyQt6.QtWidgets import QFileDialog, QMessageBox
-from PyQt6.QtCore import QPointF, QRectF, Qt
+from PyQt6.QtCore import QCoreApplication, QPointF, Qt
 import constants
 from data_models import Column
 from commands import AddTableCommand
-from sql_parser import parse_sql_schema # Added for SQL import
+from model_snapshot import DiagramSnapshot, snapshot_table, snapshot_relationship, take_model_snapshot
+from diagram_io import read_diagram_file, write_diagram_file
+from save_worker import SaveWorker
+from file_compression import open_for_read, strip_compression_extension
+from profiling import profiled
 
 def handle_import_erd_button_impl(window):
-    """Handles importing ERD data from an ERD file (CSV formatted)."""
-    path, _ = QFileDialog.getOpenFileName(window, "Import ERD File", "", "ERD Files (*.erd);;All Files (*)")
+    """Handles importing ERD data from an ERD file (binary v2 or CSV formatted)."""
+    path, _ = QFileDialog.getOpenFileName(window, "Import ERD File", "", constants.ERD_OPEN_FILTER)
     if not path:
         return
 
@@ -22,218 +25,144 @@ def handle_import_erd_button_impl(window):
         return # User cancelled or save failed
 
     window.new_diagram() 
+    load_erd_file_impl(window, path)
 
-    parsed_tables_from_csv = {} 
-    parsed_relationships_from_csv = [] 
-    imported_canvas_width, imported_canvas_height = None, None
-    imported_notes = ""
 
-    try:
-        with open(path, 'r', newline='', encoding='utf-8-sig') as csvfile: 
-            reader = csv.reader(csvfile)
-            current_section = None 
-            
-            header_columns_expected = ["table name", "column name"] 
-            header_table_pos_expected = "table name" 
-            header_rels_expected = "from table (fk source)" 
-            header_canvas_expected = "width" 
-            header_notes_expected = "notes_content_follows" # Simple marker for notes
-            
-
-            for row_num, row in enumerate(reader):
-                if not row or not row[0].strip(): 
+def apply_diagram_snapshot_impl(window, snapshot, macro_text):
+    """
+    Adds the tables and relationships of a DiagramSnapshot to the current diagram as one undo macro
+    and applies its canvas size and notes. Returns the graphic items of the added tables.
+    """
+    if snapshot.canvas_width and snapshot.canvas_height:
+        constants.current_canvas_dimensions["width"] = snapshot.canvas_width
+        constants.current_canvas_dimensions["height"] = snapshot.canvas_height
+        if window.scene: 
+            window.scene.apply_scene_rect()
+
+    window.diagram_notes = snapshot.notes
+    if hasattr(window, 'notes_text_edit') and window.notes_text_edit:
+        window.notes_text_edit.setPlainText(window.diagram_notes)
+
+    window.undo_stack.beginMacro(macro_text)
+    
+    all_imported_table_graphics = [] 
+    for t_data in snapshot.tables:
+        table_obj_data = window.handle_add_table_button( 
+            table_name_prop=t_data.name,
+            columns_prop=[Column(*col) for col in t_data.columns], 
+            pos=QPointF(t_data.x, t_data.y) if t_data.x is not None else None, 
+            width_prop=t_data.width,
+            body_color_hex=t_data.body_color_hex,
+            header_color_hex=t_data.header_color_hex
+        )
+        if table_obj_data and window.scene.table_geometry(table_obj_data):
+            all_imported_table_graphics.append(window.scene.table_geometry(table_obj_data))
+    
+    # Keys of relationships already on the diagram, so create_relationship can skip its own linear search
+    existing_rel_keys = {(r.table1_name, r.fk_column_name, r.table2_name, r.pk_column_name) for r in window.relationships_data}
+    for rel_info in snapshot.relationships:
+        fk_table_obj = window.tables_data.get(rel_info.table1_name)
+        pk_table_obj = window.tables_data.get(rel_info.table2_name)
+        if fk_table_obj and pk_table_obj:
+            fk_col_obj = fk_table_obj.get_column_by_name(rel_info.fk_column_name)
+            pk_col_obj = pk_table_obj.get_column_by_name(rel_info.pk_column_name)
+            if fk_col_obj and pk_col_obj: 
+                if not pk_col_obj.is_pk: 
                     continue
-                
-                first_cell_stripped = row[0].strip()
-
-                if first_cell_stripped == constants.CSV_TABLE_POSITION_MARKER:
-                    current_section = "TABLE_DEFINITIONS"
-                    if len(row) > 1 and row[1].strip().lower() == header_table_pos_expected: continue
-                elif first_cell_stripped == constants.CSV_RELATIONSHIP_DEF_MARKER:
-                    current_section = "RELATIONSHIPS"
-                    # Check for new header with VerticalSegmentX
-                    if len(row) > 1 and row[1].strip().lower() == header_rels_expected: continue
-                elif first_cell_stripped == constants.CSV_CANVAS_SIZE_MARKER:
-                    current_section = "CANVAS_SIZE"
-                    if len(row) > 1 and row[1].strip().lower() == header_canvas_expected: continue
-                elif first_cell_stripped == constants.CSV_NOTES_MARKER:
-                    current_section = "NOTES"
-                    # Notes content will be on subsequent lines, no specific header row for content itself
-                    if len(row) > 1 and row[1].strip().lower() == header_notes_expected: continue
-                elif current_section is None and len(row) > 1 and \
-                     row[0].strip().lower() == header_columns_expected[0] and \
-                     row[1].strip().lower() == header_columns_expected[1]:
-                    current_section = "COLUMNS" 
-                    continue 
-                elif current_section is None: 
-                    current_section = "COLUMNS"
-
-
-                if current_section == "COLUMNS": 
-                    if len(row) < 2 : continue 
-                    table_name_csv, col_name_csv = row[0].strip(), row[1].strip()
-                    if not table_name_csv : continue 
-
-                    if table_name_csv not in parsed_tables_from_csv:
-                        parsed_tables_from_csv[table_name_csv] = {"columns": [], "pos": None, "width": constants.DEFAULT_TABLE_WIDTH, "body_color": None, "header_color": None}
-                    
-                    if col_name_csv == "N/A (No Columns)" or not col_name_csv: 
-                        continue
-
-                    data_type = row[2].strip() if len(row) > 2 else "TEXT"
-                    is_pk = row[3].strip().lower() == "yes" if len(row) > 3 else False
-                    is_fk_val = row[4].strip().lower() == "yes" if len(row) > 4 else False
-                    ref_table = row[5].strip() if is_fk_val and len(row) > 5 and row[5].strip() else None
-                    ref_col = row[6].strip() if is_fk_val and len(row) > 6 and row[6].strip() else None
-                    fk_rel_type = row[7].strip() if is_fk_val and len(row) > 7 and row[7].strip() else "N:1"
-
-                    column = Column(name=col_name_csv, data_type=data_type, is_pk=is_pk, is_fk=is_fk_val,
-                                    references_table=ref_table, references_column=ref_col, fk_relationship_type=fk_rel_type)
-                    parsed_tables_from_csv[table_name_csv]["columns"].append(column)
-
-                elif current_section == "TABLE_DEFINITIONS": 
-                    if len(row) < 5: continue
-                    table_name_def = row[1].strip()
-                    try:
-                        pos_x, pos_y = float(row[2].strip()), float(row[3].strip())
-                        width_val = float(row[4].strip()) if row[4].strip() else constants.DEFAULT_TABLE_WIDTH
-                        body_hex = (row[5].strip() or None) if len(row) > 5 else None
-                        header_hex = (row[6].strip() or None) if len(row) > 6 else None
-
-                        if table_name_def not in parsed_tables_from_csv: 
-                            parsed_tables_from_csv[table_name_def] = {"columns": [], "width": constants.DEFAULT_TABLE_WIDTH} 
-                        
-                        parsed_tables_from_csv[table_name_def].update({
-                            "pos": QPointF(pos_x, pos_y),
-                            "width": width_val,
-                            "body_color": body_hex,
-                            "header_color": header_hex
-                        })
-                    except ValueError as ve:
-                        print(f"Warning: Could not parse number in table definition for '{table_name_def}': {row} - {ve}")
-                
-
-                elif current_section == "RELATIONSHIPS": 
-                    # Marker, FromTable, FKCol, ToTable, PKCol, RelType, VerticalSegmentX (optional)
-                    if len(row) < 6: continue 
-                    rel_from_table, rel_from_col = row[1].strip(), row[2].strip()
-                    rel_to_table, rel_to_col = row[3].strip(), row[4].strip()
-                    rel_type = row[5].strip() if len(row) > 5 and row[5].strip() else "N:1"
-                    
-                    vertical_segment_x_override = None
-                    if len(row) > 6 and row[6].strip():
-                        try:
-                            vertical_segment_x_override = float(row[6].strip())
-                        except ValueError:
-                            # print(f"Warning: Could not parse VerticalSegmentX for relationship {rel_from_table}.{rel_from_col}: '{row[6]}'")
-                            pass # Keep as None if parsing fails
-
-                    if all([rel_from_table, rel_from_col, rel_to_table, rel_to_col]):
-                        parsed_relationships_from_csv.append({
-                            "from_table": rel_from_table, "from_col": rel_from_col,
-                            "to_table": rel_to_table, "to_col": rel_to_col,
-                            "type": rel_type, 
-                            "vertical_segment_x_override": vertical_segment_x_override 
-                        })
-                
-                elif current_section == "CANVAS_SIZE": 
-                    data_offset = 1 
-                    if len(row) >= data_offset + 2: 
-                        try:
-                            imported_canvas_width = int(row[data_offset].strip())
-                            imported_canvas_height = int(row[data_offset+1].strip())
-                        except ValueError:
-                            print(f"Warning: Could not parse canvas size from CSV row: {row}")
-                
-                elif current_section == "NOTES":
-                    # The first row after the marker is considered the notes content
-                    # For multi-line notes, we'd need a more complex parsing or an end marker.
-                    imported_notes = row[0] # Assuming notes are in the first cell of the row after marker
-                    current_section = None # Stop processing notes after one line for simplicity
-            
-            if imported_canvas_width and imported_canvas_height:
-                constants.current_canvas_dimensions["width"] = imported_canvas_width
-                constants.current_canvas_dimensions["height"] = imported_canvas_height
-                if window.scene: 
-                    window.scene.setSceneRect(0,0, imported_canvas_width, imported_canvas_height)
-
-            window.diagram_notes = imported_notes
-            if hasattr(window, 'notes_text_edit') and window.notes_text_edit:
-                window.notes_text_edit.setPlainText(window.diagram_notes)
-
-            window.undo_stack.beginMacro("Import CSV")
-            
-            all_imported_table_graphics = [] 
-            for table_name_to_import, t_data in parsed_tables_from_csv.items():
-                table_obj_data = window.handle_add_table_button( 
-                    table_name_prop=table_name_to_import,
-                    columns_prop=t_data["columns"], 
-                    pos=t_data.get("pos"), 
-                    width_prop=t_data.get("width"),
-                    body_color_hex=t_data.get("body_color"),
-                    header_color_hex=t_data.get("header_color")
+                rel_key = (fk_table_obj.name, fk_col_obj.name, pk_table_obj.name, pk_col_obj.name)
+                is_new_rel = rel_key not in existing_rel_keys # Known duplicates still go through the update path
+                existing_rel_keys.add(rel_key)
+                # Pass vertical_segment_x_override to create_relationship
+                window.create_relationship(
+                    fk_table_obj, pk_table_obj,
+                    fk_col_obj.name, pk_col_obj.name,
+                    rel_info.relationship_type, 
+                    vertical_segment_x_override=rel_info.vertical_segment_x_override,
+                    check_existing=not is_new_rel
                 )
-                if table_obj_data and table_obj_data.graphic_item:
-                    all_imported_table_graphics.append(table_obj_data.graphic_item)
-            
-            for rel_info in parsed_relationships_from_csv:
-                fk_table_obj = window.tables_data.get(rel_info["from_table"])
-                pk_table_obj = window.tables_data.get(rel_info["to_table"])
-                if fk_table_obj and pk_table_obj:
-                    fk_col_obj = fk_table_obj.get_column_by_name(rel_info["from_col"])
-                    pk_col_obj = pk_table_obj.get_column_by_name(rel_info["to_col"])
-                    if fk_col_obj and pk_col_obj: 
-                        if not pk_col_obj.is_pk: 
-                            continue
-                        # Pass vertical_segment_x_override to create_relationship
-                        window.create_relationship(
-                            fk_table_obj, pk_table_obj,
-                            fk_col_obj.name, pk_col_obj.name,
-                            rel_info["type"], 
-                            vertical_segment_x_override=rel_info["vertical_segment_x_override"]
-                        )
-            
-            window.undo_stack.endMacro()
-
-            window.update_all_relationships_graphics() 
+    
+    window.undo_stack.endMacro()
+    return all_imported_table_graphics
+
+
+@profiled(category="io")
+def load_erd_file_impl(window, path, interactive=True):
+    """
+    Loads an ERD file (binary v2 or CSV formatted) into the current, already cleared, diagram.
+    With interactive=False no message boxes are shown (headless use); returns True on success.
+    """
+    try:
+        snapshot, window.current_file_format = read_diagram_file(path)
+
+        window.begin_view_refresh_batch()
+        try:
+            all_imported_table_graphics = apply_diagram_snapshot_impl(window, snapshot, "Import ERD")
+
+            window.update_all_relationships_graphics()
             window.populate_diagram_explorer()
             window.update_sql_preview_pane() # Update SQL preview after import
-            window.current_file_path = path 
-            window.update_window_title()
-
-            if all_imported_table_graphics:
-                overall_rect = QRectF()
-                if all_imported_table_graphics[0].sceneBoundingRect().isValid(): 
-                    overall_rect = all_imported_table_graphics[0].sceneBoundingRect()
-                
-                for item_graphic in all_imported_table_graphics[1:]:
-                    item_rect = item_graphic.sceneBoundingRect()
-                    if item_rect.isValid(): 
-                        overall_rect = overall_rect.united(item_rect)
-                
-                if overall_rect.isValid() and not overall_rect.isEmpty():
-                    padding = 50 
-                    overall_rect.adjust(-padding, -padding, padding, padding)
-                    window.view.fitInView(overall_rect, Qt.AspectRatioMode.KeepAspectRatio)
-
+        finally:
+            window.end_view_refresh_batch()
+        window.current_file_path = path 
+        window.update_window_title()
+        if window.current_file_format == constants.ERD_FILE_FORMAT_PROJECT_STORE:
+            window.project_store_path = path
+            window.dirty_table_names.clear() # The file already holds exactly what was just loaded
+        window.restore_undo_history(path) # Steps kept from earlier sessions, if the file hasn't changed since
+        window.reset_autosave_journal() # Recovery replays changes on top of the loaded file
+
+        if all_imported_table_graphics:
+            if window.scene.virtualized:
+                # Fitting everything would materialize every item; start at the first table instead
+                window.view.centerOn(all_imported_table_graphics[0].sceneBoundingRect().center())
+            else:
+                window.fit_diagram_to_view(padding=50)
+
+        if interactive:
             QMessageBox.information(window, "Import Successful",
-                                    f"{len(parsed_tables_from_csv)} tables, "
+                                    f"{len(snapshot.tables)} tables, "
                                     f"and {len(window.relationships_data)} relationships processed from {os.path.basename(path)}. "
                                     f"Check console for details.")
+        return True
 
     except FileNotFoundError:
-        QMessageBox.critical(window, "Import Error", f"File not found: {path}")
+        if interactive:
+            QMessageBox.critical(window, "Import Error", f"File not found: {path}")
+        else:
+            print(f"Import Error: File not found: {path}", file=sys.stderr)
         if window.undo_stack.isActive(): window.undo_stack.endMacro() 
     except Exception as e:
-        QMessageBox.critical(window, "Import Error", f"Could not import from CSV: {e}\nCheck console for details.")
-        print(f"CSV Import Error: {e}", file=sys.stderr) 
+        if interactive:
+            QMessageBox.critical(window, "Import Error", f"Could not import ERD file: {e}\nCheck console for details.")
+        print(f"ERD Import Error: {e}", file=sys.stderr) 
         import traceback
         traceback.print_exc(file=sys.stderr)
         if window.undo_stack.isActive(): window.undo_stack.endMacro() 
-
-
-def export_to_erd_impl(window, file_path_to_save=None):
-    """Exports the current ERD data to an ERD file (CSV formatted)."""
+    return False
+
+
+@profiled(category="io")
+def _snapshot_for_save(window, path, file_format):
+    """
+    Returns (snapshot, dirty_table_names) for saving to path. Saving back to the project database last
+    saved or loaded only snapshots the dirty tables; dirty_table_names is None for a full write.
+    """
+    if file_format == constants.ERD_FILE_FORMAT_PROJECT_STORE and window.project_store_path == path and os.path.exists(path):
+        dirty_names = set(window.dirty_table_names)
+        tables = tuple(snapshot_table(window.tables_data[name]) for name in sorted(dirty_names) if name in window.tables_data)
+        relationships = tuple(snapshot_relationship(rel) for rel in window.relationships_data
+                              if rel.table1_name in dirty_names or rel.table2_name in dirty_names)
+        return DiagramSnapshot(tables, relationships,
+                               constants.current_canvas_dimensions["width"], constants.current_canvas_dimensions["height"],
+                               window.diagram_notes or ""), dirty_names
+    return take_model_snapshot(window), None
+
+
+def export_to_erd_impl(window, file_path_to_save=None, file_format=None):
+    """
+    Exports the current ERD data to an ERD file, binary v2 by default, CSV formatted (v1) or a project database.
+    Writes synchronously; the Save actions go through start_background_save_impl instead.
+    """
     if not window.tables_data and not window.relationships_data: 
         QMessageBox.information(window, "Export ERD File", "No data to export.")
         return
@@ -242,88 +171,115 @@ def export_to_erd_impl(window, file_path_to_save=None):
         print("Error: No file path provided for export.")
         return
 
+    file_format = file_format or getattr(window, 'current_file_format', constants.DEFAULT_ERD_FILE_FORMAT)
     try:
-        with open(file_path_to_save, 'w', newline='', encoding='utf-8-sig') as csvfile: 
-            writer = csv.writer(csvfile)
-
-            writer.writerow(["Table Name", "Column Name", "Data Type", "Is Primary Key", "Is Foreign Key", 
-                             "References Table", "References Column", "FK Relationship Type"])
-            for _, table_obj in sorted(window.tables_data.items()): 
-                if not table_obj.columns:
-                    writer.writerow([table_obj.name, "N/A (No Columns)", "", "", "", "", "", ""])
-                else:
-                    for col in table_obj.columns:
-                        writer.writerow([
-                            table_obj.name,
-                            col.name,
-                            col.data_type,
-                            "Yes" if col.is_pk else "No",
-                            "Yes" if col.is_fk else "No",
-                            col.references_table if col.is_fk else "",
-                            col.references_column if col.is_fk else "",
-                            col.fk_relationship_type if col.is_fk else ""
-                        ])
-            
-            writer.writerow([]) 
-
-            writer.writerow([constants.CSV_TABLE_POSITION_MARKER, "Table Name", "X", "Y", "Width", 
-                             "Body Color HEX", "Header Color HEX"])
-            for table_name, table_obj in sorted(window.tables_data.items()):
-                writer.writerow([
-                    constants.CSV_TABLE_POSITION_MARKER, 
-                    table_name,
-                    table_obj.x,
-                    table_obj.y,
-                    table_obj.width,
-                    table_obj.body_color.name(), 
-                    table_obj.header_color.name()
-                ])
-            
-
-            writer.writerow([constants.CSV_CANVAS_SIZE_MARKER, "Width", "Height"]) 
-            writer.writerow([constants.CSV_CANVAS_SIZE_MARKER, constants.current_canvas_dimensions["width"], constants.current_canvas_dimensions["height"]])
-            
-            if window.relationships_data:
-                writer.writerow([]) 
-                # Updated header for relationships to include VerticalSegmentX
-                writer.writerow([constants.CSV_RELATIONSHIP_DEF_MARKER, 
-                                 "From Table (FK Source)", "FK Column", 
-                                 "To Table (PK Source)", "PK Column", 
-                                 "Relationship Type", "VerticalSegmentX"])
-                sorted_rels = sorted(window.relationships_data, key=lambda r: (r.table1_name, r.fk_column_name, r.table2_name, r.pk_column_name))
-                for rel in sorted_rels:
-                    # Ensure all fields are present, even if empty, for consistent row length
-                    rel_type_str = rel.relationship_type if rel.relationship_type else "N:1"
-                    fk_col_str = rel.fk_column_name if rel.fk_column_name else ""
-                    pk_col_str = rel.pk_column_name if rel.pk_column_name else ""
-
-                    # Write vertical_segment_x_override, or empty string if None
-                    vertical_x_str = str(rel.vertical_segment_x_override) if rel.vertical_segment_x_override is not None else ""
-                    writer.writerow([
-                        constants.CSV_RELATIONSHIP_DEF_MARKER, 
-                        rel.table1_name,
-                        rel.fk_column_name,
-                        rel.table2_name,
-                        pk_col_str,
-                        rel_type_str,
-                        vertical_x_str 
-                    ])
-
-            # Save Notes
-            writer.writerow([])
-            writer.writerow([constants.CSV_NOTES_MARKER, "notes_content_follows"])
-            # For simplicity, save notes as a single line. For multi-line, would need to handle newlines.
-            writer.writerow([window.diagram_notes if window.diagram_notes else ""])
-
-            QMessageBox.information(window, "File Saved", f"Data saved successfully to: {file_path_to_save}")
+        if file_format == constants.ERD_FILE_FORMAT_PROJECT_STORE:
+            export_to_project_store_impl(window, file_path_to_save)
+        else:
+            write_diagram_file(file_path_to_save, file_format, take_model_snapshot(window))
+        QMessageBox.information(window, "File Saved", f"Data saved successfully to: {file_path_to_save}")
     except Exception as e:
         QMessageBox.critical(window, "Save Error", f"Could not save file: {e}")
         print(f"Error exporting to ERD file: {e}")
 
 
+def export_to_project_store_impl(window, path):
+    """
+    Saves to an .erdb project database. When the file is the one last saved or loaded, only the
+    tables marked dirty since then (and their columns and relationships) are rewritten.
+    """
+    snapshot, dirty_names = _snapshot_for_save(window, path, constants.ERD_FILE_FORMAT_PROJECT_STORE)
+    write_diagram_file(path, constants.ERD_FILE_FORMAT_PROJECT_STORE, snapshot, dirty_table_names=dirty_names)
+    window.project_store_path = path
+    window.dirty_table_names.clear()
+
+
+def start_background_save_impl(window, path, file_format):
+    """
+    Snapshots the model and writes it to path in a SaveWorker, so editing continues during the write.
+    A save requested while another one is running is queued and started when that one ends.
+    Returns False if there was nothing to save.
+    """
+    if not window.tables_data and not window.relationships_data:
+        QMessageBox.information(window, "Export ERD File", "No data to export.")
+        return False
+    if window.save_worker: # Cleared once the worker's signals have all been handled
+        window.pending_save = (path, file_format)
+        return True
+
+    snapshot, dirty_names = _snapshot_for_save(window, path, file_format)
+    if file_format == constants.ERD_FILE_FORMAT_PROJECT_STORE:
+        # Tables edited while the worker runs are marked dirty again for the next save
+        window.saving_dirty_table_names = set(window.dirty_table_names)
+        window.dirty_table_names.clear()
+    saved_position = _undo_position(window)
+
+    worker = SaveWorker(path, file_format, snapshot, dirty_names, window)
+    worker.progress.connect(lambda percent: window.statusBar().showMessage(f"Saving {os.path.basename(path)}... {percent}%"))
+    worker.save_finished.connect(lambda saved_path: _on_background_save_finished(window, saved_path, file_format, saved_position))
+    worker.save_failed.connect(lambda failed_path, error: _on_background_save_failed(window, failed_path, file_format, error))
+    worker.finished.connect(lambda: _on_save_worker_done(window))
+    window.save_worker = worker
+    window.last_save_succeeded = None
+    window.statusBar().showMessage(f"Saving {os.path.basename(path)}...")
+    worker.start()
+    return True
+
+
+def _undo_position(window):
+    # The index alone stays put once the undo limit is reached, so the top command is compared too
+    index = window.undo_stack.index()
+    return index, window.undo_stack.command(index - 1) if index else None
+
+
+def _on_background_save_finished(window, path, file_format, saved_position):
+    window.last_save_succeeded = True
+    if file_format == constants.ERD_FILE_FORMAT_PROJECT_STORE:
+        window.project_store_path = path
+        window.saving_dirty_table_names = set()
+    saved_index, saved_command = saved_position
+    window.write_undo_history(path, saved_index)
+    index, command = _undo_position(window)
+    if index == saved_index and command is saved_command: # Nothing was edited while the file was written
+        window.undo_stack.setClean()
+    window.update_window_title()
+    window.statusBar().showMessage(f"Saved {path}", 5000)
+
+
+def _on_background_save_failed(window, path, file_format, error):
+    window.last_save_succeeded = False
+    if file_format == constants.ERD_FILE_FORMAT_PROJECT_STORE:
+        window.dirty_table_names.update(window.saving_dirty_table_names)
+        window.saving_dirty_table_names = set()
+    window.pending_save = None
+    window.statusBar().clearMessage()
+    print(f"Error exporting to ERD file: {error}", file=sys.stderr)
+    QMessageBox.critical(window, "Save Error", f"Could not save file: {error}")
+
+
+def _on_save_worker_done(window):
+    window.save_worker = None
+    if window.pending_save:
+        path, file_format = window.pending_save
+        window.pending_save = None
+        start_background_save_impl(window, path, file_format)
+
+
+def wait_for_background_save_impl(window):
+    """
+    Blocks until the running save (and any queued one) has been written.
+    Returns False if the last save failed, True otherwise.
+    """
+    while window.save_worker:
+        window.save_worker.wait()
+        QCoreApplication.sendPostedEvents() # Delivers the worker's queued signals, which may start the pending save
+    return window.last_save_succeeded is not False
+
+
 def handle_import_sql_button_impl(window):
     """Handles importing ERD data from an SQL file."""
-    path, _ = QFileDialog.getOpenFileName(window, "Import SQL File", "", "SQL Files (*.sql);;All Files (*)")
+    from sql_parser import parse_sql_schema # Loaded on first use
+    path, _ = QFileDialog.getOpenFileName(window, "Import SQL File", "", constants.SQL_FILE_FILTER)
     if not path:
         return
 
@@ -331,7 +287,7 @@ def handle_import_sql_button_impl(window):
         return # User cancelled or save failed
 
     try:
-        with open(path, 'r', encoding='utf-8') as f:
+        with open_for_read(path, 'rt', encoding='utf-8') as f:
             sql_content = f.read()
     except Exception as e:
         QMessageBox.critical(window, "Import Error", f"Could not read SQL file: {e}")
@@ -344,7 +300,7 @@ def handle_import_sql_button_impl(window):
     window.new_diagram() # Clear current diagram
 
     try:
-        parsed_tables_from_sql, parsed_relationships_from_sql = parse_sql_schema(sql_content)
+        parsed_tables_from_sql, parsed_relationships_from_sql = parse_sql_schema(sql_content, window.sql_dialect_name)
     except Exception as e:
         QMessageBox.critical(window, "SQL Parse Error", f"Could not parse SQL schema: {e}\nCheck console for details.")
         print(f"SQL Parse Error: {e}", file=sys.stderr)
@@ -352,97 +308,298 @@ def handle_import_sql_button_impl(window):
         traceback.print_exc(file=sys.stderr)
         return
 
-    window.undo_stack.beginMacro("Import SQL")
+    import_parsed_schema_impl(window, parsed_tables_from_sql, parsed_relationships_from_sql, "Import SQL", "SQL")
 
-    all_imported_table_graphics = []
-    target_positions = []
-
-    if parsed_tables_from_sql:
-        num_tables = len(parsed_tables_from_sql)
-        avg_table_width = constants.DEFAULT_TABLE_WIDTH
-        # Estimate average table height (header + 5 columns + padding)
-        avg_table_height_estimate = constants.TABLE_HEADER_HEIGHT + (5 * constants.COLUMN_HEIGHT) + constants.PADDING
-        
-        inter_table_spacing_x = 50
-        inter_table_spacing_y = 50 # Spacing between rows of tables
-
-        view_width_for_calc = window.view.width() if window.view and window.view.width() > 200 else 1200
-        
-        tables_per_row = max(1, int((view_width_for_calc - inter_table_spacing_x) / (avg_table_width + inter_table_spacing_x)))
-        num_rows = math.ceil(num_tables / tables_per_row)
-
-        block_content_width = tables_per_row * avg_table_width + max(0, tables_per_row - 1) * inter_table_spacing_x
-        block_content_height = num_rows * avg_table_height_estimate + max(0, num_rows - 1) * inter_table_spacing_y
-
-        view_center_scene = QPointF(view_width_for_calc / 2, (window.view.height() if window.view else 800) / 2)
-        if window.view:
-            view_center_scene = window.view.mapToScene(window.view.viewport().rect().center())
-
-        start_x_for_block = view_center_scene.x() - block_content_width / 2
-        start_y_for_block = view_center_scene.y() - block_content_height / 2
-
-        current_row_idx = 0
-        current_col_idx = 0
-        for i in range(num_tables):
-            px = start_x_for_block + current_col_idx * (avg_table_width + inter_table_spacing_x)
-            py = start_y_for_block + current_row_idx * (avg_table_height_estimate + inter_table_spacing_y)
-            target_positions.append(QPointF(px, py))
-            current_col_idx += 1
-            if current_col_idx >= tables_per_row:
-                current_col_idx = 0
-                current_row_idx += 1
-
-    # Add tables at calculated positions
-    table_names_ordered = list(parsed_tables_from_sql.keys()) # Keep an order
-    for i, table_name_to_import in enumerate(table_names_ordered):
-        t_data = parsed_tables_from_sql[table_name_to_import]
-        pos_for_table = target_positions[i] if i < len(target_positions) else QPointF(50 + (i % 5) * 250, 50 + (i // 5) * 200) # Fallback
-
-        table_obj_data = window.handle_add_table_button(
-            table_name_prop=table_name_to_import,
-            columns_prop=t_data["columns"], # These are already Column objects from parser
-            pos=pos_for_table
-        )
-        if table_obj_data and table_obj_data.graphic_item:
-            all_imported_table_graphics.append(table_obj_data.graphic_item)
 
-    # Add relationships
-    for rel_info in parsed_relationships_from_sql:
-        fk_table_obj = window.tables_data.get(rel_info["from_table"])
-        pk_table_obj = window.tables_data.get(rel_info["to_table"])
-        if fk_table_obj and pk_table_obj:
-            # The parser should have already marked fk_col_obj.is_fk = True
-            window.create_relationship(
-                fk_table_obj, pk_table_obj,
-                rel_info["from_col"], rel_info["to_col"],
-                rel_info["type"]
-            )
+@profiled(category="io")
+def import_parsed_schema_impl(window, parsed_tables_from_sql, parsed_relationships_from_sql, macro_text, source_label, interactive=True):
+    """
+    Adds a parsed schema ({name: {"columns", "pks"}} plus relationship dicts, as returned by parse_sql_schema
+    or read_sqlite_schema) to the cleared diagram as one undo macro, laid out on a grid around the view center.
+    With interactive=False the summary message box is skipped (headless use).
+    """
+    window.begin_view_refresh_batch() # One explorer/SQL refresh and reroute for the whole import
+    window.undo_stack.beginMacro(macro_text)
 
-    window.undo_stack.endMacro()
-    window.update_all_relationships_graphics()
-    window.populate_diagram_explorer()
-    window.update_sql_preview_pane()
+    all_imported_table_graphics = []
+    try:
+        target_positions = []
+
+        if parsed_tables_from_sql:
+            num_tables = len(parsed_tables_from_sql)
+            avg_table_width = constants.DEFAULT_TABLE_WIDTH
+            # Estimate average table height (header + 5 columns + padding)
+            avg_table_height_estimate = constants.TABLE_HEADER_HEIGHT + (5 * constants.COLUMN_HEIGHT) + constants.PADDING
+
+            inter_table_spacing_x = 50
+            inter_table_spacing_y = 50 # Spacing between rows of tables
+
+            view_width_for_calc = window.view.width() if window.view and window.view.width() > 200 else 1200
+
+            tables_per_row = max(1, int((view_width_for_calc - inter_table_spacing_x) / (avg_table_width + inter_table_spacing_x)))
+            num_rows = math.ceil(num_tables / tables_per_row)
+
+            block_content_width = tables_per_row * avg_table_width + max(0, tables_per_row - 1) * inter_table_spacing_x
+            block_content_height = num_rows * avg_table_height_estimate + max(0, num_rows - 1) * inter_table_spacing_y
+
+            view_center_scene = QPointF(view_width_for_calc / 2, (window.view.height() if window.view else 800) / 2)
+            if window.view:
+                view_center_scene = window.view.mapToScene(window.view.viewport().rect().center())
+
+            start_x_for_block = view_center_scene.x() - block_content_width / 2
+            start_y_for_block = view_center_scene.y() - block_content_height / 2
+
+            current_row_idx = 0
+            current_col_idx = 0
+            for i in range(num_tables):
+                px = start_x_for_block + current_col_idx * (avg_table_width + inter_table_spacing_x)
+                py = start_y_for_block + current_row_idx * (avg_table_height_estimate + inter_table_spacing_y)
+                target_positions.append(QPointF(px, py))
+                current_col_idx += 1
+                if current_col_idx >= tables_per_row:
+                    current_col_idx = 0
+                    current_row_idx += 1
+
+        # Add tables at calculated positions
+        table_names_ordered = list(parsed_tables_from_sql.keys()) # Keep an order
+        for i, table_name_to_import in enumerate(table_names_ordered):
+            t_data = parsed_tables_from_sql[table_name_to_import]
+            pos_for_table = target_positions[i] if i < len(target_positions) else QPointF(50 + (i % 5) * 250, 50 + (i // 5) * 200) # Fallback
+
+            table_obj_data = window.handle_add_table_button(
+                table_name_prop=table_name_to_import,
+                columns_prop=t_data["columns"], # These are already Column objects from parser
+                pos=pos_for_table
+            )
+            if table_obj_data and window.scene.table_geometry(table_obj_data):
+                all_imported_table_graphics.append(window.scene.table_geometry(table_obj_data))
+
+        # Add relationships
+        existing_rel_keys = {(r.table1_name, r.fk_column_name, r.table2_name, r.pk_column_name) for r in window.relationships_data}
+        for rel_info in parsed_relationships_from_sql:
+            fk_table_obj = window.tables_data.get(rel_info["from_table"])
+            pk_table_obj = window.tables_data.get(rel_info["to_table"])
+            if fk_table_obj and pk_table_obj:
+                rel_key = (fk_table_obj.name, rel_info["from_col"], pk_table_obj.name, rel_info["to_col"])
+                is_new_rel = rel_key not in existing_rel_keys # Known duplicates still go through the update path
+                existing_rel_keys.add(rel_key)
+                # The parser should have already marked fk_col_obj.is_fk = True
+                window.create_relationship(
+                    fk_table_obj, pk_table_obj,
+                    rel_info["from_col"], rel_info["to_col"],
+                    rel_info["type"],
+                    check_existing=not is_new_rel
+                )
+    finally:
+        window.undo_stack.endMacro()
+        window.update_all_relationships_graphics()
+        window.populate_diagram_explorer()
+        window.update_sql_preview_pane()
+        window.end_view_refresh_batch()
     window.current_file_path = None # Imported SQL is not a "saved" ERD file
     window.copied_table_data = None # Clear copy buffer on new/import
     window.update_window_title()
 
     # Focus on imported content
     if all_imported_table_graphics:
-        overall_rect = QRectF()
-        if all_imported_table_graphics[0].sceneBoundingRect().isValid():
-            overall_rect = all_imported_table_graphics[0].sceneBoundingRect()
-        
-        for item_graphic in all_imported_table_graphics[1:]:
-            item_rect = item_graphic.sceneBoundingRect()
-            if item_rect.isValid():
-                overall_rect = overall_rect.united(item_rect)
-        
-        if overall_rect.isValid() and not overall_rect.isEmpty():
-            padding = 75 # Increased padding for better view
-            overall_rect.adjust(-padding, -padding, padding, padding)
-            window.view.fitInView(overall_rect, Qt.AspectRatioMode.KeepAspectRatio)
-
-    QMessageBox.information(window, "Import Successful",
-                            f"{len(parsed_tables_from_sql)} tables and "
-                            f"{len(parsed_relationships_from_sql)} potential relationships processed from SQL.\n"
-                            "Tables have been centered on the canvas.")
+        if window.scene.virtualized:
+            window.view.centerOn(all_imported_table_graphics[0].sceneBoundingRect().center())
+        else:
+            window.fit_diagram_to_view(padding=75) # Increased padding for better view
+
+    if interactive:
+        QMessageBox.information(window, "Import Successful",
+                                f"{len(parsed_tables_from_sql)} tables and "
+                                f"{len(parsed_relationships_from_sql)} potential relationships processed from {source_label}.\n"
+                                "Tables have been centered on the canvas.")
+
+
+def handle_refresh_from_sql_button_impl(window):
+    """Updates the current diagram to match an SQL file, keeping the layout of everything that still exists."""
+    from sql_parser import parse_sql_schema # Loaded on first use
+    path, _ = QFileDialog.getOpenFileName(window, "Refresh from SQL File", "", constants.SQL_FILE_FILTER)
+    if not path:
+        return
+
+    try:
+        with open_for_read(path, 'rt', encoding='utf-8') as f:
+            sql_content = f.read()
+        parsed_tables_from_sql, parsed_relationships_from_sql = parse_sql_schema(sql_content, window.sql_dialect_name)
+    except Exception as e:
+        QMessageBox.critical(window, "Refresh Error", f"Could not read SQL schema: {e}")
+        return
+
+    if not parsed_tables_from_sql: # Almost certainly the wrong file; don't drop the whole diagram
+        QMessageBox.information(window, "Refresh from SQL", "No CREATE TABLE statements found in the SQL file.")
+        return
+
+    refresh_from_parsed_schema_impl(window, parsed_tables_from_sql, parsed_relationships_from_sql, os.path.basename(path))
+
+
+@profiled(category="io")
+def refresh_from_parsed_schema_impl(window, parsed_tables, parsed_relationships, source_label):
+    """
+    Applies only the differences between a parsed schema and the diagram, as one undo macro.
+    Existing tables keep their position, size and colors, and relationships keep their vertical segment.
+    Only new tables get placed, in a grid below the current diagram. Returns the SchemaDiff.
+    """
+    from commands import DeleteRelationshipCommand, DeleteTableCommand, EditTableCommand, CreateRelationshipCommand
+    from schema_diff import diff_schema, is_empty_diff, relationship_key
+
+    diff = diff_schema(window.tables_data, window.relationships_data, parsed_tables, parsed_relationships, window.sql_dialect_name)
+    if is_empty_diff(diff):
+        QMessageBox.information(window, "Refresh from SQL", f"The diagram already matches {source_label}.")
+        return diff
+
+    window.begin_view_refresh_batch() # Explorer, SQL preview and rerouting once, after all changes
+    window.undo_stack.beginMacro(f"Refresh from {source_label}")
+    try:
+        for rel in diff.dropped_relationships:
+            window.undo_stack.push(DeleteRelationshipCommand(window, rel))
+        for table_name in diff.dropped_tables: # Also removes the table's relationships
+            window.undo_stack.push(DeleteTableCommand(window, window.tables_data[table_name]))
+
+        # New tables go in rows below everything that's already there
+        bounds = window.scene.table_index.bounding_rect()
+        origin_x = bounds.left() if not bounds.isEmpty() else 50
+        origin_y = bounds.bottom() + 100 if not bounds.isEmpty() else 50
+        row_height = constants.TABLE_HEADER_HEIGHT + 5 * constants.COLUMN_HEIGHT + constants.PADDING + 50
+        tables_per_row = max(1, math.ceil(math.sqrt(len(diff.added_tables))))
+        for i, table_name in enumerate(diff.added_tables):
+            pos = QPointF(origin_x + (i % tables_per_row) * (constants.DEFAULT_TABLE_WIDTH + 50),
+                          origin_y + (i // tables_per_row) * row_height)
+            window.handle_add_table_button(table_name_prop=table_name, columns_prop=parsed_tables[table_name]["columns"], pos=pos)
+
+        for table_name, new_columns in diff.altered_tables.items():
+            table = window.tables_data[table_name]
+            # New FKs are left to CreateRelationshipCommand below: EditTableCommand's undo wouldn't remove their relationships
+            for col in new_columns:
+                live_col = table.get_column_by_name(col.name)
+                if col.is_fk and not (live_col and live_col.is_fk and live_col.references_table == col.references_table
+                                      and live_col.references_column == col.references_column):
+                    col.is_fk = False
+                    col.references_table = None
+                    col.references_column = None
+            old_props = {"name": table.name, "body_color_hex": table.body_color.name(), "header_color_hex": table.header_color.name(), "columns": table.columns}
+            new_props = dict(old_props, columns=new_columns)
+            window.undo_stack.push(EditTableCommand(window, table, old_props, new_props, description=f"Alter {table_name}"))
+
+        live_rel_keys = {relationship_key(r) for r in window.relationships_data}
+        for rel_info in diff.added_relationships:
+            fk_table = window.tables_data.get(rel_info["from_table"])
+            pk_table = window.tables_data.get(rel_info["to_table"])
+            if not fk_table or not pk_table or not fk_table.get_column_by_name(rel_info["from_col"]):
+                continue
+            key = (fk_table.name, rel_info["from_col"], pk_table.name, rel_info["to_col"])
+            if key in live_rel_keys:
+                continue
+            window.undo_stack.push(CreateRelationshipCommand(window, fk_table, pk_table, rel_info["from_col"], rel_info["to_col"], rel_info["type"]))
+    finally:
+        window.undo_stack.endMacro()
+        # Relationships between untouched tables keep their route
+        window.end_view_refresh_batch(rerouted_table_names=set(diff.added_tables) | set(diff.altered_tables) |
+                                      {name for rel in diff.dropped_relationships for name in (rel.table1_name, rel.table2_name)})
+
+    window.statusBar().showMessage(
+        f"Refreshed from {source_label}: {len(diff.added_tables)} tables added, {len(diff.dropped_tables)} dropped, "
+        f"{len(diff.altered_tables)} altered; {len(diff.added_relationships)} relationships added, "
+        f"{len(diff.dropped_relationships)} dropped.", 8000)
+    return diff
+
+
+def handle_import_sqlite_button_impl(window):
+    """Imports the schema of a SQLite database file, introspected read-only in a SchemaImportWorker."""
+    from PyQt6.QtWidgets import QProgressDialog
+    from schema_import_worker import SchemaImportWorker
+    from sqlite_introspection import is_sqlite_database_file
+
+    if getattr(window, 'schema_import_worker', None) is not None:
+        return # One import at a time
+    path, _ = QFileDialog.getOpenFileName(window, "Import SQLite Database", "", constants.SQLITE_FILE_FILTER)
+    if not path:
+        return
+    if not is_sqlite_database_file(path):
+        QMessageBox.critical(window, "Import Error", f"{os.path.basename(path)} is not a SQLite database.")
+        return
+
+    if not window.prompt_to_save_if_dirty():
+        return # User cancelled or save failed
+
+    progress = QProgressDialog("Reading database schema...", "Cancel", 0, 100, window)
+    progress.setWindowTitle("Import SQLite Database")
+    progress.setWindowModality(Qt.WindowModality.WindowModal) # No edits while the diagram is about to be replaced
+    progress.setMinimumDuration(300)
+
+    worker = SchemaImportWorker(path, window)
+    worker.progress.connect(progress.setValue)
+    worker.import_finished.connect(lambda tables, relationships: _on_sqlite_schema_read(window, path, tables, relationships))
+    worker.import_failed.connect(lambda _, error: QMessageBox.critical(window, "Import Error", f"Could not read the database schema: {error}"))
+    worker.finished.connect(lambda: _on_schema_import_worker_done(window, progress))
+    progress.canceled.connect(worker.requestInterruption)
+    window.schema_import_worker = worker
+    worker.start()
+
+
+def _on_sqlite_schema_read(window, path, parsed_tables, parsed_relationships):
+    window.undo_stack.setClean() # Unsaved changes were already saved or discarded before the read started
+    window.new_diagram() # Clear current diagram
+    import_parsed_schema_impl(window, parsed_tables, parsed_relationships, "Import SQLite Database", os.path.basename(path))
+
+
+def _on_schema_import_worker_done(window, progress):
+    window.schema_import_worker = None
+    progress.close()
+
+
+def wait_for_schema_import_impl(window):
+    """Blocks until a running SQLite import has been applied (e.g. before closing)."""
+    while window.schema_import_worker is not None:
+        window.schema_import_worker.wait()
+        QCoreApplication.sendPostedEvents() # Delivers the worker's queued signals
+
+
+def export_image_impl(window):
+    """Asks for a target file and exports the diagram as PNG, SVG or PDF with a progress dialog."""
+    from PyQt6.QtWidgets import QInputDialog, QProgressDialog, QApplication
+    from image_exporter import export_scene_image, EXPORT_FILE_FILTERS
+
+    if not window.tables_data:
+        QMessageBox.information(window, "Export Image", "No tables to export.")
+        return
+
+    suggested_filename = "diagram.png"
+    if window.current_file_path:
+        base, _ = os.path.splitext(os.path.basename(strip_compression_extension(window.current_file_path)))
+        suggested_filename = f"{base}.png"
+
+    path, selected_filter = QFileDialog.getSaveFileName(window, "Export Image", suggested_filename, EXPORT_FILE_FILTERS)
+    if not path:
+        return
+    if not os.path.splitext(path)[1]:
+        path += ".svg" if "svg" in selected_filter.lower() else ".pdf" if "pdf" in selected_filter.lower() else ".png"
+
+    scale = 1.0
+    if path.lower().endswith(".png"):
+        scale, ok = QInputDialog.getDouble(window, "Export Image", "Scale (pixels per canvas unit):", 1.0, 0.25, 8.0, 2)
+        if not ok:
+            return
+
+    progress = QProgressDialog("Exporting image...", "Cancel", 0, 100, window)
+    progress.setWindowTitle("Export Image")
+    progress.setWindowModality(Qt.WindowModality.WindowModal)
+    progress.setMinimumDuration(300)
+
+    def on_progress(done, total):
+        progress.setValue(int(done * 100 / max(1, total)))
+        QApplication.processEvents()
+        return not progress.wasCanceled()
+
+    try:
+        exported = export_scene_image(window, path, scale=scale, progress_callback=on_progress)
+    except Exception as e:
+        progress.close()
+        QMessageBox.critical(window, "Export Error", f"Could not export image: {e}")
+        return
+    progress.close()
+    if exported:
+        QMessageBox.information(window, "Export Successful", f"Diagram exported to {path}")
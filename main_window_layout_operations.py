@@ -0,0 +1,91 @@
+# main_window_layout_operations.py
+# Runs automatic table arrangement in a background worker and applies the result as one undoable command.
+
+from PyQt6.QtWidgets import QMessageBox
+from model_snapshot import take_model_snapshot
+from commands import ArrangeTablesCommand
+
+
+def start_auto_layout_impl(window):
+    """Snapshots the model and starts arranging it in a worker thread."""
+    if getattr(window, 'layout_worker', None) and window.layout_worker.isRunning():
+        return
+    if len(window.tables_data) < 2:
+        QMessageBox.information(window, "Auto-Arrange", "Add at least two tables to arrange the diagram.")
+        return
+
+    snapshot = take_model_snapshot(window)
+    window.layout_original_positions = {t.name: (t.x, t.y) for t in snapshot.tables}
+    from layout_worker import LayoutWorker # Loaded on first use
+    worker = window.layout_worker = LayoutWorker(snapshot, window)
+    # Signals still queued when the layout is cancelled arrive after it; the slots drop them by worker identity
+    worker.positions_updated.connect(lambda positions: apply_layout_preview_impl(window, worker, positions))
+    worker.layout_finished.connect(lambda positions: finish_auto_layout_impl(window, worker, positions))
+    worker.finished.connect(lambda: _update_layout_actions(window))
+    worker.start()
+    _update_layout_actions(window)
+
+
+def apply_layout_preview_impl(window, worker, positions):
+    """
+    Moves the table graphics to intermediate positions streamed from the worker, rerouting relationships once.
+    Only the graphics move: a save or autosave during the arrangement still sees the original positions.
+    """
+    if window.layout_worker is not worker or worker.isInterruptionRequested():
+        return
+    window.scene.relationship_updates_suspended = True
+    window.scene.layout_preview_active = True
+    try:
+        for table_name, (x, y) in positions.items():
+            table_data = window.tables_data.get(table_name)
+            if table_data and table_data.graphic_item:
+                table_data.graphic_item.setPos(x, y)
+    finally:
+        window.scene.layout_preview_active = False
+        window.scene.relationship_updates_suspended = False
+    window.update_all_relationships_graphics()
+
+
+def finish_auto_layout_impl(window, worker, final_positions):
+    """Pushes the final arrangement onto the undo stack as a single command."""
+    if window.layout_worker is not worker:
+        return
+    old_positions = getattr(window, 'layout_original_positions', {})
+    new_positions = {name: pos for name, pos in final_positions.items() if name in window.tables_data}
+    old_positions = {name: pos for name, pos in old_positions.items() if name in new_positions}
+    window.layout_original_positions = {}
+    if new_positions and new_positions != old_positions:
+        window.undo_stack.push(ArrangeTablesCommand(window, old_positions, new_positions))
+
+
+def cancel_auto_layout_impl(window):
+    """Stops a running arrangement and puts the tables back where they were."""
+    worker = getattr(window, 'layout_worker', None)
+    if not worker or not worker.isRunning():
+        return False
+    worker.requestInterruption()
+    worker.wait()
+    window.layout_worker = None # Its queued previews and result are ignored from here on
+    original_positions = getattr(window, 'layout_original_positions', {})
+    window.layout_original_positions = {}
+    window.scene.relationship_updates_suspended = True
+    try:
+        for table_name, (x, y) in original_positions.items():
+            table_data = window.tables_data.get(table_name)
+            if table_data and table_data.graphic_item:
+                table_data.graphic_item.setPos(x, y)
+            if table_data:
+                table_data.x, table_data.y = x, y
+    finally:
+        window.scene.relationship_updates_suspended = False
+    window.update_all_relationships_graphics()
+    _update_layout_actions(window)
+    return True
+
+
+def _update_layout_actions(window):
+    running = bool(getattr(window, 'layout_worker', None) and window.layout_worker.isRunning())
+    if hasattr(window, 'actionAutoArrange'):
+        window.actionAutoArrange.setEnabled(not running)
+    if hasattr(window, 'actionCancelAutoArrange'):
+        window.actionCancelAutoArrange.setEnabled(running)
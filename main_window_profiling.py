@@ -0,0 +1,49 @@
+# main_window_profiling.py
+# Developer tools on the View menu: the performance overlay and recording/saving a Chrome trace.
+
+import os
+import sys
+
+from PyQt6.QtWidgets import QFileDialog, QMessageBox
+
+from profiling import PROFILER
+
+
+def _sync_profiler(window):
+    # Spans are only timed while something shows or records them
+    overlay_visible = window.performance_overlay is not None and window.performance_overlay.isVisible()
+    PROFILER.enable(overlay_visible or window.trace_recording)
+
+
+def toggle_performance_overlay_impl(window, checked):
+    if checked and window.performance_overlay is None:
+        from performance_overlay import PerformanceOverlay # Loaded on first use
+        window.performance_overlay = PerformanceOverlay(window.view)
+    if window.performance_overlay is not None:
+        window.performance_overlay.setVisible(checked)
+    _sync_profiler(window)
+
+
+def toggle_trace_recording_impl(window, checked):
+    """Starting a recording drops earlier events, so the saved trace covers just what was recorded."""
+    window.trace_recording = bool(checked)
+    if checked:
+        PROFILER.clear()
+    _sync_profiler(window)
+
+
+def save_trace_impl(window, path=None):
+    """Writes the recorded events as a Chrome trace (open it in chrome://tracing or Perfetto). Returns True if written."""
+    if path is None:
+        suggested_path = os.path.join(os.getcwd(), "erd_trace.json")
+        path, _ = QFileDialog.getSaveFileName(window, "Save Performance Trace", suggested_path, "Chrome Trace Files (*.json)")
+        if not path:
+            return False
+    try:
+        PROFILER.save_trace(path)
+    except OSError as e:
+        print(f"Trace Error: {e}", file=sys.stderr)
+        QMessageBox.critical(window, "Save Trace Error", f"Could not save the trace: {e}")
+        return False
+    window.statusBar().showMessage(f"Saved {len(PROFILER.events)} trace events to {path}", 5000)
+    return True
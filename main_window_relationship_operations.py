@@ -4,14 +4,13 @@
 import math
 from PyQt6.QtWidgets import QMessageBox
 from PyQt6.QtCore import QPointF, Qt
-from PyQt6.QtGui import QPen, QColor
 from data_models import Relationship
 import copy # For deepcopying column lists
 from gui_items import OrthogonalRelationshipPathItem 
 from commands import CreateRelationshipCommand, DeleteRelationshipCommand, SetRelationshipVerticalSegmentXCommand # Added SetRelationshipVerticalSegmentXCommand
-from dialogs import RelationshipDialog
 import constants
 from utils import snap_to_grid
+from profiling import profiled
 
 
 def finalize_relationship_drawing_impl(window, source_table_data, source_column_data, dest_table_data, dest_column_data):
@@ -129,14 +128,16 @@ def finalize_relationship_drawing_impl(window, source_table_data, source_column_
 
 def create_relationship_impl(window, fk_table_data, pk_table_data, fk_col_name, pk_col_name, rel_type,
                              vertical_segment_x_override=None, # Added for CSV import / command restoration
-                             from_undo_redo=False):
+                             from_undo_redo=False, check_existing=True):
     """
     Creates a relationship data object and its graphical representation.
     'vertical_segment_x_override' allows setting a specific X for the vertical segment.
+    check_existing=False skips the linear search for an identical relationship; bulk loads pass it
+    after de-duplicating themselves.
     """
     existing_rel = next((r for r in window.relationships_data if
                          r.table1_name == fk_table_data.name and r.fk_column_name == fk_col_name and
-                         r.table2_name == pk_table_data.name and r.pk_column_name == pk_col_name), None)
+                         r.table2_name == pk_table_data.name and r.pk_column_name == pk_col_name), None) if check_existing else None
 
     fk_col_in_table = fk_table_data.get_column_by_name(fk_col_name)
     if not fk_col_in_table:
@@ -176,22 +177,9 @@ def create_relationship_impl(window, fk_table_data, pk_table_data, fk_col_name,
 
     window.relationships_data.append(relationship)
 
-    line_item = OrthogonalRelationshipPathItem(relationship) 
-    default_line_color = QColor(70,70,110) 
-    line_color_from_theme = window.current_theme_settings.get("relationship_line_color", default_line_color)
-
-    if isinstance(line_color_from_theme, str):
-        line_color_to_use = QColor(line_color_from_theme)
-    elif isinstance(line_color_from_theme, QColor):
-        line_color_to_use = line_color_from_theme
-    else:
-        line_color_to_use = default_line_color
-
-    line_item.setPen(QPen(line_color_to_use, 1.8))
-    window.scene.addItem(line_item)
-    relationship.graphic_item = line_item 
-
-    update_relationship_graphic_path_impl(window, relationship) 
+    # In virtualized mode lines between two offscreen tables are created when they scroll into view
+    if window.scene.should_materialize_relationship(relationship):
+        create_relationship_graphic_impl(window, relationship)
 
     fk_col_in_table.is_fk = True
     fk_col_in_table.references_table = pk_table_data.name
@@ -200,12 +188,25 @@ def create_relationship_impl(window, fk_table_data, pk_table_data, fk_col_name,
     if fk_table_data.graphic_item:
         fk_table_data.graphic_item.update() 
 
-    if not from_undo_redo and not window.undo_stack.isActive(): 
-        window.populate_diagram_explorer()
+    window.change_bus.table_changed(fk_table_data.name) # The FK column's flag
+    window.change_bus.relationships_changed(fk_table_data.name, pk_table_data.name)
 
     return relationship
 
 
+def create_relationship_graphic_impl(window, relationship):
+    """Creates the line item for an existing relationship, adds it to the scene and routes it."""
+    line_item = OrthogonalRelationshipPathItem(relationship) # Paints in the theme's line color
+    window.scene.addItem(line_item)
+    relationship.graphic_item = line_item 
+
+    if window.view_refresh_batch_depth:
+        window.update_all_relationships_graphics() # Routed once when the batch ends
+    else:
+        update_relationship_graphic_path_impl(window, relationship) 
+    return line_item
+
+
 def update_relationship_graphic_path_impl(window, relationship_data): # Renamed from update_custom_orthogonal_path_impl
     """Updates the path of a simplified orthogonal relationship line."""
     if not relationship_data.graphic_item or not isinstance(relationship_data.graphic_item, OrthogonalRelationshipPathItem):
@@ -214,13 +215,14 @@ def update_relationship_graphic_path_impl(window, relationship_data): # Renamed
     table1_obj = window.tables_data.get(relationship_data.table1_name) 
     table2_obj = window.tables_data.get(relationship_data.table2_name) 
 
-    if not (table1_obj and table1_obj.graphic_item and table2_obj and table2_obj.graphic_item):
+    # Either table may be offscreen in virtualized mode; its spatial index record has the same geometry API.
+    t1_graphic = window.scene.table_geometry(table1_obj)
+    t2_graphic = window.scene.table_geometry(table2_obj)
+
+    if not (t1_graphic and t2_graphic):
         relationship_data.graphic_item.set_attachment_points(QPointF(), QPointF()) 
         return
 
-    t1_graphic = table1_obj.graphic_item
-    t2_graphic = table2_obj.graphic_item
-
     # Step 1: Get initial attachment points (without hint, based on relative table positions)
     p1_initial = t1_graphic.get_attachment_point(t2_graphic, from_column_name=relationship_data.fk_column_name)
     p2_initial = t2_graphic.get_attachment_point(t1_graphic, to_column_name=relationship_data.pk_column_name)
@@ -254,6 +256,7 @@ def update_relationship_graphic_path_impl(window, relationship_data): # Renamed
     relationship_data.graphic_item.update_tooltip_and_paint() 
 
 
+@profiled()
 def update_all_relationships_graphics_impl(window):
     """Updates the graphics for all relationships."""
     for rel_data in window.relationships_data:
@@ -267,8 +270,8 @@ def update_relationship_table_names_impl(window, old_table_name, new_table_name)
             rel.table1_name = new_table_name
         if rel.table2_name == old_table_name:
             rel.table2_name = new_table_name
-    update_all_relationships_graphics_impl(window)
-    window.populate_diagram_explorer()
+    window.update_all_relationships_graphics()
+    window.change_bus.relationships_changed(old_table_name, new_table_name)
 
 
 def update_fk_references_to_pk_impl(window, pk_table_name, old_pk_col_name, new_pk_col_name):
@@ -286,6 +289,7 @@ def update_fk_references_to_pk_impl(window, pk_table_name, old_pk_col_name, new_
                     column.is_fk = False
                     column.references_table = None
                     column.references_column = None
+                    window.change_bus.table_changed(table_data.name)
                 if table_data.graphic_item:
                     table_data.graphic_item.update() 
 
@@ -309,7 +313,8 @@ def update_fk_references_to_pk_impl(window, pk_table_name, old_pk_col_name, new_
                 # print(f"    Removed relationship: {rel_to_remove.table1_name}.{rel_to_remove.fk_column_name} -> {rel_to_remove.table2_name}.{rel_to_remove.pk_column_name}")
 
     update_all_relationships_graphics_impl(window)
-    window.populate_diagram_explorer()
+    window.change_bus.relationships_changed(pk_table_name, *(rel.table1_name for rel in window.relationships_data if rel.table2_name == pk_table_name),
+                                            *(rel.table1_name for rel in rels_to_remove_if_pk_deleted))
 
 
 def remove_relationships_for_table_impl(window, table_name, old_columns_of_table=None):
@@ -360,7 +365,7 @@ def remove_relationships_for_table_impl(window, table_name, old_columns_of_table
                 # print(f"Relationship removed: {rel_to_remove.table1_name}.{rel_to_remove.fk_column_name} -> {rel_to_remove.table2_name}.{rel_to_remove.pk_column_name}")
 
         update_all_relationships_graphics_impl(window)
-        window.populate_diagram_explorer()
+        window.change_bus.relationships_changed(table_name, *(rel.table2_name for rel in rels_to_remove))
 
 
 def edit_relationship_properties_impl(window, relationship_data):
@@ -373,6 +378,7 @@ def edit_relationship_properties_impl(window, relationship_data):
     original_vertical_x = relationship_data.vertical_segment_x_override
 
 
+    from dialogs import RelationshipDialog # Loaded on first use
     dialog = RelationshipDialog(relationship_data, window) 
     if dialog.exec():
         new_type = relationship_data.relationship_type # Dialog modifies relationship_data directly
@@ -386,6 +392,7 @@ def edit_relationship_properties_impl(window, relationship_data):
         # but if it were, we would check for changes here.
 
         if changed:
+            window.mark_tables_dirty(relationship_data.table1_name, relationship_data.table2_name)
             fk_table = window.tables_data.get(relationship_data.table1_name)
             if fk_table:
                 fk_col = fk_table.get_column_by_name(relationship_data.fk_column_name)
@@ -395,7 +402,8 @@ def edit_relationship_properties_impl(window, relationship_data):
                         if fk_table.graphic_item: fk_table.graphic_item.update()
 
             update_relationship_graphic_path_impl(window, relationship_data) 
-            window.populate_diagram_explorer()
+            window.change_bus.table_changed(relationship_data.table1_name)
+            window.change_bus.relationships_changed(relationship_data.table1_name, relationship_data.table2_name)
             # TODO: Implement EditRelationshipPropertiesCommand for undo/redo
             window.undo_stack.setClean(False) 
             window.update_window_title()
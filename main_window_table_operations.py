@@ -5,8 +5,7 @@ from PyQt6.QtWidgets import QMessageBox
 from PyQt6.QtCore import QPointF
 from PyQt6.QtGui import QColor
 from data_models import Table # Assuming data_models.py is accessible
-from dialogs import TableDialog # Assuming dialogs.py is accessible
-from commands import AddTableCommand, EditTableCommand # Assuming commands.py is accessible
+from commands import AddTableCommand, EditTableCommand, MoveTablesCommand # Assuming commands.py is accessible
 import constants
 from utils import snap_to_grid
 
@@ -74,6 +73,7 @@ def handle_add_table_button_impl(window, table_props=None, from_undo_redo=False,
             
             # TableDialog constructor expects QColor objects or None.
             # If None, TableDialog itself falls back to constants.current_theme_settings.
+            from dialogs import TableDialog # Loaded on first use
             dialog = TableDialog(window, "", None, initial_dialog_body_qcolor, initial_dialog_header_qcolor)
             if not dialog.exec():
                 return None # Dialog cancelled
@@ -130,13 +130,9 @@ def handle_add_table_button_impl(window, table_props=None, from_undo_redo=False,
         window.undo_stack.push(command)
         
         # After command execution, the table should be in window.tables_data
+        # (the SQL preview and explorer follow the command's change notification)
         table_data_result = window.tables_data.get(name_for_table_creation)
-        if table_data_result:
-             # print(f"  Table '{table_data_result.name}' added/updated via command. Final pos in tables_data: ({table_data_result.x}, {table_data_result.y})")
-             if table_data_result.graphic_item:
-                 window.update_sql_preview_pane() # Update SQL after table add
-                 # print(f"    Graphic item scenePos: {table_data_result.graphic_item.scenePos()}")
-        else:
+        if not table_data_result:
             print(f"  Error: Table '{name_for_table_creation}' not found in tables_data after AddTableCommand.")
             # This case should ideally not happen if AddTableCommand works correctly.
 
@@ -160,3 +156,36 @@ def handle_add_table_button_impl(window, table_props=None, from_undo_redo=False,
 # edit_table_impl could be added here if needed, using EditTableCommand
 # def handle_edit_table_impl(window, table_to_edit_data):
 #     pass
+
+
+def table_geometry_for_util(window, table_names):
+    """{table_name: (x, y, width)} for the given tables, as MoveTablesCommand stores it."""
+    geometry = {}
+    for table_name in table_names:
+        table_data = window.tables_data.get(table_name)
+        if table_data:
+            geometry[table_name] = (table_data.x, table_data.y, table_data.width)
+    return geometry
+
+
+def record_table_geometry_change_impl(window, old_geometry, description="Move Tables"):
+    """
+    Pushes one MoveTablesCommand for the tables that moved or resized since old_geometry was captured.
+    Drags and resizes have already changed the tables, so the push only makes the change undoable.
+    """
+    new_geometry = table_geometry_for_util(window, old_geometry)
+    changed = [name for name, geometry in new_geometry.items() if geometry != old_geometry[name]]
+    if not changed:
+        return
+    window.undo_stack.push(MoveTablesCommand(window, {name: old_geometry[name] for name in changed},
+                                             {name: new_geometry[name] for name in changed}, description))
+
+
+def nudge_selected_tables_impl(window, dx, dy):
+    """Moves the selected tables by (dx, dy); returns False if no table is selected."""
+    old_geometry = table_geometry_for_util(window, window.scene.selected_table_names())
+    if not old_geometry:
+        return False
+    new_geometry = {name: (x + dx, y + dy, width) for name, (x, y, width) in old_geometry.items()}
+    window.undo_stack.push(MoveTablesCommand(window, old_geometry, new_geometry, "Nudge Tables", is_nudge=True))
+    return True
@@ -4,6 +4,8 @@
 from PyQt6.QtGui import QColor, QBrush, QPixmap, QPainter, QPen, QIcon
 from PyQt6.QtCore import Qt, QPointF
 import constants
+from theme_stylesheets import theme_stylesheets, apply_stylesheet
+from paint_palette import reset_paint_palette
 
 def update_theme_settings_util(window):
     """Updates window.current_theme_settings based on current_theme and user defaults."""
@@ -20,10 +22,12 @@ def update_theme_settings_util(window):
     
     constants.current_theme_settings.clear()
     constants.current_theme_settings.update(window.current_theme_settings)
+    reset_paint_palette() # Items paint with the pens and brushes of the new colors
 
 
 def set_theme_util(window, theme_name, force_update_tables=False):
     """Sets the application theme and updates UI elements accordingly."""
+    theme_changed = theme_name != window.current_theme
     window.current_theme = theme_name
     update_theme_settings_util(window) 
     apply_styles_util(window) 
@@ -53,6 +57,9 @@ def set_theme_util(window, theme_name, force_update_tables=False):
         window.mainFloatingButton.setIcon(QIcon(pm))
 
 
+    new_body_color = QColor(window.current_theme_settings["default_table_body_color"])
+    new_header_color = QColor(window.current_theme_settings["default_table_header_color"])
+    recolored_table_names = []
     for table_data in window.tables_data.values():
         update_body_color = False
         update_header_color = False
@@ -76,199 +83,51 @@ def set_theme_util(window, theme_name, force_update_tables=False):
             elif table_data.header_color == previous_theme_default_header:
                  update_header_color = True
         
+        if (update_body_color and table_data.body_color != new_body_color) or \
+           (update_header_color and table_data.header_color != new_header_color):
+            recolored_table_names.append(table_data.name)
         if update_body_color:
-            table_data.body_color = QColor(window.current_theme_settings["default_table_body_color"])
+            table_data.body_color = QColor(new_body_color)
         if update_header_color:
-            table_data.header_color = QColor(window.current_theme_settings["default_table_header_color"])
-        
-        if table_data.graphic_item and (update_body_color or update_header_color):
-            table_data.graphic_item.update() 
+            table_data.header_color = QColor(new_header_color)
+    if recolored_table_names: # Saved files, the autosave journal and the undo history must pick up the new colors
+        window.mark_tables_dirty(*recolored_table_names)
 
+    # Tables paint with the colors just set and relationship lines take theirs from the theme at paint time,
+    # so one invalidation of the whole scene redraws everything; per-item update()/setPen() is slow on big diagrams.
     if window.scene:
         window.scene.grid_pen.setColor(QColor(window.current_theme_settings.get("grid_color")))
         window.scene.setBackgroundBrush(QBrush(window.current_theme_settings['view_bg']))
-        window.scene.update() 
-
-    for rel_data in window.relationships_data:
-        if rel_data.graphic_item:
-            rel_data.graphic_item.setPen(QPen(window.current_theme_settings.get("relationship_line_color"), 1.8))
-            rel_data.graphic_item.update_tooltip_and_paint() 
+        window.scene.update()
 
-    if hasattr(window, 'diagram_explorer_tree') and window.diagram_explorer_tree:
-        window.diagram_explorer_tree.setStyleSheet(f"""
-            QTreeWidget {{
-                background-color: {window.current_theme_settings['window_bg'].name()};
-                color: {window.current_theme_settings['text_color'].name()};
-                border: 1px solid {window.current_theme_settings['toolbar_border'].name()};
-            }}
-            QTreeWidget::item:hover {{
-                background-color: {window.current_theme_settings['button_hover_bg'].name()};
-            }}
-            QTreeWidget::item:selected {{
-                background-color: {window.current_theme_settings['button_checked_bg'].name()};
-                color: {window.current_theme_settings['button_checked_text_color'].name()};
-            }}
-            QHeaderView::section {{ 
-                background-color: {window.current_theme_settings['toolbar_bg'].name()};
-                color: {window.current_theme_settings['text_color'].name()};
-                padding: 4px;
-                border: 1px solid {window.current_theme_settings['toolbar_border'].name()};
-            }}
-        """)
-    if hasattr(window, 'diagram_explorer_dock') and window.diagram_explorer_dock:
-         window.diagram_explorer_dock.setStyleSheet(f"""
-            QDockWidget {{
-                background-color: {window.current_theme_settings['toolbar_bg'].name()};
-                color: {window.current_theme_settings['text_color'].name()};
-            }}
-            QDockWidget::title {{ 
-                text-align: left; 
-                background: {window.current_theme_settings['toolbar_bg'].name()};
-                padding: 5px;
-                padding-left: 8px; 
-                color: {window.current_theme_settings['text_color'].name()};
-                border-bottom: 1px solid {window.current_theme_settings['toolbar_border'].name()};
-            }}
-        """)
-    
-    # Style SQL Preview Dock and TextEdit
-    if hasattr(window, 'sql_preview_dock') and window.sql_preview_dock:
-        window.sql_preview_dock.setStyleSheet(f"""
-            QDockWidget {{
-                background-color: {window.current_theme_settings['toolbar_bg'].name()};
-                color: {window.current_theme_settings['text_color'].name()};
-            }}
-            QDockWidget::title {{
-                text-align: left; background: {window.current_theme_settings['toolbar_bg'].name()};
-                padding: 5px; padding-left: 8px;
-                color: {window.current_theme_settings['text_color'].name()};
-                border-bottom: 1px solid {window.current_theme_settings['toolbar_border'].name()};
-            }}""")
-    if hasattr(window, 'sql_preview_text_edit') and window.sql_preview_text_edit:
-        window.sql_preview_text_edit.setStyleSheet(f"""
-            QTextEdit {{
-                background-color: {window.current_theme_settings['view_bg'].name()};
-                color: {window.current_theme_settings['text_color'].name()};
-                border: 1px solid {window.current_theme_settings['toolbar_border'].name()};
-                font-family: Consolas, 'Courier New', monospace; 
-            }}""")
-    
-    # Style Notes Dock and TextEdit
-    if hasattr(window, 'notes_dock') and window.notes_dock:
-        window.notes_dock.setStyleSheet(f"""
-            QDockWidget {{
-                background-color: {window.current_theme_settings['toolbar_bg'].name()};
-                color: {window.current_theme_settings['text_color'].name()};
-            }}
-            QDockWidget::title {{
-                text-align: left; background: {window.current_theme_settings['toolbar_bg'].name()};
-                padding: 5px; padding-left: 8px;
-                color: {window.current_theme_settings['text_color'].name()};
-                border-bottom: 1px solid {window.current_theme_settings['toolbar_border'].name()};
-            }}""")
-    if hasattr(window, 'notes_text_edit') and window.notes_text_edit:
-        window.notes_text_edit.setStyleSheet(f"""
-            QTextEdit {{
-                background-color: {window.current_theme_settings['view_bg'].name()};
-                color: {window.current_theme_settings['text_color'].name()};
-                border: 1px solid {window.current_theme_settings['toolbar_border'].name()};
-                /* font-family: Consolas, 'Courier New', monospace; */ /* Optional: keep standard font for notes */
-            }}""")
+    apply_dock_styles_util(window)
 
-    window.save_app_settings() 
+    if theme_changed: # Re-applying the loaded theme at startup has nothing new to persist
+        window.save_app_settings() 
     if hasattr(window, '_update_floating_button_position'): 
         window._update_floating_button_position()
 
 
+def apply_dock_styles_util(window):
+    """Styles the dock widgets that exist so far; docks built later call this when they're created."""
+    stylesheets = theme_stylesheets(window.current_theme_settings)
+    if getattr(window, 'diagram_explorer_tree', None):
+        apply_stylesheet(window.diagram_explorer_tree, stylesheets["explorer_tree"])
+    for dock_name in ('diagram_explorer_dock', 'sql_preview_dock', 'notes_dock'):
+        if getattr(window, dock_name, None):
+            apply_stylesheet(getattr(window, dock_name), stylesheets["dock"])
+    if getattr(window, 'sql_preview_text_edit', None):
+        apply_stylesheet(window.sql_preview_text_edit, stylesheets["sql_text_edit"])
+    if getattr(window, 'notes_text_edit', None):
+        apply_stylesheet(window.notes_text_edit, stylesheets["notes_text_edit"])
+
+
 def apply_styles_util(window):
     """Applies the general stylesheet to the main window and its components."""
-    # Define the style for the floating action button specifically
-    # Button size is 44px, so radius is 22px for a circle.
-    fab_style = """
-        QPushButton#mainFloatingButton {{
-            border-radius: 22px; /* Half of the button's width/height (44px / 2) */
-            background-color: {button_bg};
-            color: {text_color}; 
-            border: 1px solid {button_border};
-            padding: 0px; 
-        }}
-        QPushButton#mainFloatingButton:hover {{
-            background-color: {button_hover_bg};
-        }}
-    """.format(
-        button_bg=window.current_theme_settings['button_bg'].name(),
-        text_color=window.current_theme_settings['text_color'].name(), 
-        button_border=window.current_theme_settings['button_border'].name(),
-        button_hover_bg=window.current_theme_settings['button_hover_bg'].name()
-    )
-
-    super_stylesheet = f"""
-        QMainWindow {{
-            background-color: {window.current_theme_settings['window_bg'].name()};
-        }}
-        QPushButton {{
-            background-color: {window.current_theme_settings['button_bg'].name()};
-            border: 1px solid {window.current_theme_settings['button_border'].name()};
-            border-radius: 4px;
-            padding: 5px 10px;
-            min-width: 80px;
-            color: {window.current_theme_settings['text_color'].name()};
-        }}
-        QPushButton:hover {{
-            background-color: {window.current_theme_settings['button_hover_bg'].name()};
-        }}
-        QPushButton:pressed {{
-            background-color: {window.current_theme_settings['button_pressed_bg'].name()};
-        }}
-        QComboBox, QLineEdit {{
-            border: 1px solid {window.current_theme_settings['button_border'].name()};
-            border-radius: 3px;
-            padding: 3px;
-            min-height: 20px; 
-            background-color: {window.current_theme_settings['dialog_input_bg'].name()}; 
-            color: {window.current_theme_settings['text_color'].name()};
-        }}
-        QComboBox QAbstractItemView {{ 
-            background-color: {window.current_theme_settings['view_bg'].name()};
-            color: {window.current_theme_settings['text_color'].name()};
-            selection-background-color: {window.current_theme_settings['button_checked_bg'].name()};
-        }}
-        QScrollArea {{
-             border: 1px solid {window.current_theme_settings['toolbar_border'].name()};
-        }}
-        QLabel {{
-            padding: 2px;
-            color: {window.current_theme_settings['dialog_text_color'].name()}; 
-        }}
-        QDialog {{
-            background-color: {window.current_theme_settings['window_bg'].name()};
-        }}
-        QMenuBar {{
-            background-color: {window.current_theme_settings['toolbar_bg'].name()};
-            color: {window.current_theme_settings['text_color'].name()};
-        }}
-        QMenuBar::item:selected {{ 
-            background-color: {window.current_theme_settings['button_hover_bg'].name()};
-        }}
-        QMenu {{
-            background-color: {window.current_theme_settings['toolbar_bg'].name()};
-            color: {window.current_theme_settings['text_color'].name()};
-            border: 1px solid {window.current_theme_settings['toolbar_border'].name()};
-        }}
-        QMenu::item:selected {{
-            background-color: {window.current_theme_settings['button_hover_bg'].name()};
-        }}
-        QTextEdit {{
-            background-color: {window.current_theme_settings['view_bg'].name()};
-            color: {window.current_theme_settings['text_color'].name()};
-            border: 1px solid {window.current_theme_settings['toolbar_border'].name()};
-            font-family: Consolas, 'Courier New', monospace;
-        }}
-        {fab_style}
-    """
-    window.setStyleSheet(super_stylesheet)
+    stylesheets = theme_stylesheets(window.current_theme_settings)
+    apply_stylesheet(window, stylesheets["main_window"])
 
     if window.view:
-        window.view.setStyleSheet(f"background-color: {window.current_theme_settings['view_bg'].name()}; border: 1px solid {window.current_theme_settings['view_border'].name()};")
+        apply_stylesheet(window.view, stylesheets["view"])
     if window.scene:
         window.scene.setBackgroundBrush(QBrush(window.current_theme_settings['view_bg']))
@@ -10,6 +10,8 @@ from PyQt6.QtGui import QAction, QIcon, QKeySequence, QPixmap, QPainter, QPen, Q
 
 from utils import get_standard_icon 
 import constants 
+from sql_dialects import SQL_DIALECTS
+from main_window_theming import apply_dock_styles_util
 
 def create_menus(window):
     """Creates the main menubar and its menus."""
@@ -42,11 +44,24 @@ def create_menus(window):
     actionImportSQL.triggered.connect(window.handle_import_sql_button)
     fileMenu.addAction(actionImportSQL)
 
+    actionImportSQLite = QAction(get_standard_icon(QApplication.style().StandardPixmap.SP_ArrowDown, "Import SQLite"), "Import SQLite &Database...", window)
+    actionImportSQLite.triggered.connect(window.handle_import_sqlite_button)
+    fileMenu.addAction(actionImportSQLite)
+
+    actionRefreshFromSQL = QAction(get_standard_icon(QApplication.style().StandardPixmap.SP_BrowserReload, "Refresh from SQL"), "&Refresh from SQL...", window)
+    actionRefreshFromSQL.setToolTip("Apply only the changes in an updated SQL schema, keeping the current layout")
+    actionRefreshFromSQL.triggered.connect(window.handle_refresh_from_sql_button)
+    fileMenu.addAction(actionRefreshFromSQL)
+
     fileMenu.addSeparator()
     actionExportSQL = QAction(get_standard_icon(QApplication.style().StandardPixmap.SP_DialogSaveButton, "SQL"), "Export to S&QL...", window)
     actionExportSQL.triggered.connect(window.export_to_sql_action)
     fileMenu.addAction(actionExportSQL)
 
+    actionExportImage = QAction(get_standard_icon(QApplication.style().StandardPixmap.SP_DialogSaveButton, "Image"), "Export &Image...", window)
+    actionExportImage.triggered.connect(window.export_image)
+    fileMenu.addAction(actionExportImage)
+
     fileMenu.addSeparator()
     actionExit = QAction(get_standard_icon(QApplication.style().StandardPixmap.SP_DialogCloseButton, "Exit"), "E&xit", window)
     actionExit.triggered.connect(window.close)
@@ -57,13 +72,24 @@ def create_menus(window):
     window.undo_action = window.undo_stack.createUndoAction(window, "&Undo")
     window.undo_action.setIcon(get_standard_icon(QApplication.style().StandardPixmap.SP_ArrowLeft, "Undo"))
     window.undo_action.setShortcut(QKeySequence.StandardKey.Undo)
+    window.undo_action.triggered.disconnect() # Go through the window so a whole macro reroutes once
+    window.undo_action.triggered.connect(window.undo_diagram_change)
+    window.undo_budget.bind_undo_action(window.undo_action)
     editMenu.addAction(window.undo_action)
 
     window.redo_action = window.undo_stack.createRedoAction(window, "&Redo")
     window.redo_action.setIcon(get_standard_icon(QApplication.style().StandardPixmap.SP_ArrowRight, "Redo"))
     window.redo_action.setShortcut(QKeySequence.StandardKey.Redo)
+    window.redo_action.triggered.disconnect()
+    window.redo_action.triggered.connect(window.redo_diagram_change)
     editMenu.addAction(window.redo_action)
 
+    window.actionKeepUndoHistory = QAction("&Keep Undo History with File", window, checkable=True)
+    window.actionKeepUndoHistory.setToolTip("Save the undo history next to the diagram file and restore it when the file is opened again")
+    window.actionKeepUndoHistory.setChecked(getattr(window, 'keep_undo_history', False))
+    window.actionKeepUndoHistory.triggered.connect(window.set_keep_undo_history)
+    editMenu.addAction(window.actionKeepUndoHistory)
+
     editMenu.addSeparator()
     window.delete_action = QAction(get_standard_icon(QApplication.style().StandardPixmap.SP_TrashIcon, "Delete"), "&Delete", window)
     window.delete_action.setShortcut(QKeySequence.StandardKey.Delete)
@@ -94,6 +120,16 @@ def create_menus(window):
     window.actionDrawRelationship.triggered.connect(window.toggle_relationship_mode_action) 
     editMenu.addAction(window.actionDrawRelationship)
 
+    editMenu.addSeparator()
+    window.actionAutoArrange = QAction("Auto-&Arrange Tables", window)
+    window.actionAutoArrange.triggered.connect(window.start_auto_layout)
+    editMenu.addAction(window.actionAutoArrange)
+
+    window.actionCancelAutoArrange = QAction("Cancel Auto-Arrange", window)
+    window.actionCancelAutoArrange.setEnabled(False)
+    window.actionCancelAutoArrange.triggered.connect(window.cancel_auto_layout)
+    editMenu.addAction(window.actionCancelAutoArrange)
+
     # View Menu
     viewMenu = menubar.addMenu("&View")
     window.toggleExplorerAction = QAction("Toggle Diagram Explorer", window, checkable=True)
@@ -108,6 +144,16 @@ def create_menus(window):
     window.toggleNotesAction.triggered.connect(window.toggle_notes_view)
     viewMenu.addAction(window.toggleNotesAction)
 
+    window.toggleOverviewAction = QAction("Toggle Overview", window, checkable=True)
+    window.toggleOverviewAction.triggered.connect(window.toggle_overview)
+    viewMenu.addAction(window.toggleOverviewAction)
+
+    viewMenu.addSeparator()
+    window.actionFitDiagram = QAction("&Fit Diagram to View", window)
+    window.actionFitDiagram.setShortcut(QKeySequence("Ctrl+0"))
+    window.actionFitDiagram.triggered.connect(lambda: window.fit_diagram_to_view())
+    viewMenu.addAction(window.actionFitDiagram)
+
     viewMenu.addSeparator()
     cardinalityMenu = viewMenu.addMenu("Cardinality Display")
     
@@ -123,6 +169,11 @@ def create_menus(window):
 
     # Initial check state will be set in main_window after loading settings
 
+    window.actionVirtualizeScene = QAction("Only Draw Items Near the Viewport", window, checkable=True)
+    window.actionVirtualizeScene.setToolTip("Keeps offscreen tables as lightweight records; useful for very large diagrams.")
+    window.actionVirtualizeScene.setChecked(getattr(window, 'virtualize_scene_on_load', False))
+    window.actionVirtualizeScene.triggered.connect(window.set_scene_virtualization)
+    viewMenu.addAction(window.actionVirtualizeScene)
     
     viewMenu.addSeparator()
     themeMenu = viewMenu.addMenu("&Theme")
@@ -136,11 +187,29 @@ def create_menus(window):
     window.darkThemeAction.triggered.connect(lambda: window.set_theme("dark"))
     themeMenu.addAction(window.darkThemeAction)
 
+
     theme_action_group = QActionGroup(window)
     theme_action_group.addAction(window.lightThemeAction)
     theme_action_group.addAction(window.darkThemeAction)
     theme_action_group.setExclusive(True)
 
+    viewMenu.addSeparator()
+    developerMenu = viewMenu.addMenu("&Developer")
+    window.actionPerformanceOverlay = QAction("Performance Overlay", window, checkable=True)
+    window.actionPerformanceOverlay.setShortcut(QKeySequence("Ctrl+Shift+F12"))
+    window.actionPerformanceOverlay.setToolTip("Shows frames per second, paint time per item type and the slowest recent operations")
+    window.actionPerformanceOverlay.triggered.connect(window.toggle_performance_overlay)
+    developerMenu.addAction(window.actionPerformanceOverlay)
+
+    window.actionRecordTrace = QAction("Record Performance Trace", window, checkable=True)
+    window.actionRecordTrace.setChecked(window.trace_recording)
+    window.actionRecordTrace.triggered.connect(window.toggle_trace_recording)
+    developerMenu.addAction(window.actionRecordTrace)
+
+    actionSaveTrace = QAction("Save Performance Trace...", window)
+    actionSaveTrace.triggered.connect(lambda: window.save_trace())
+    developerMenu.addAction(actionSaveTrace)
+
     # Settings Menu
     settingsMenu = menubar.addMenu("&Settings")
     actionDefaultColors = QAction("Default Table Colors...", window)
@@ -155,6 +224,18 @@ def create_menus(window):
     actionDataTypeSettings.triggered.connect(window.open_datatype_settings_dialog)
     settingsMenu.addAction(actionDataTypeSettings)
 
+    sqlDialectMenu = settingsMenu.addMenu("SQL Dialect")
+    sql_dialect_action_group = QActionGroup(window)
+    sql_dialect_action_group.setExclusive(True)
+    window.sqlDialectActions = {}
+    for dialect in SQL_DIALECTS.values():
+        action = QAction(dialect.display_name, window, checkable=True)
+        action.setChecked(window.sql_dialect_name == dialect.name)
+        action.triggered.connect(lambda checked, name=dialect.name: window.set_sql_dialect(name))
+        sql_dialect_action_group.addAction(action)
+        sqlDialectMenu.addAction(action)
+        window.sqlDialectActions[dialect.name] = action
+
 
 def create_diagram_explorer_widget(window):
     """Creates the diagram explorer dock widget and tree."""
@@ -178,8 +259,16 @@ def create_diagram_explorer_widget(window):
     )
 
 
+def _add_dock_widget(window, dock, area):
+    # restoreState() keeps the saved position of docks that didn't exist yet; that only works before addDockWidget
+    if window.restoreDockWidget(dock):
+        return True
+    window.addDockWidget(area, dock)
+    return False
+
+
 def create_sql_preview_widget(window):
-    """Creates the SQL preview dock widget and its text edit area."""
+    """Creates the SQL preview dock widget and its text edit area. Returns True if it went back to a saved position."""
     from PyQt6.QtWidgets import QTextEdit # Local import for clarity
     window.sql_preview_dock = QDockWidget("SQL Preview", window)
     window.sql_preview_dock.setObjectName("SqlPreviewDock")
@@ -190,13 +279,16 @@ def create_sql_preview_widget(window):
     window.sql_preview_text_edit.setFontFamily("Consolas, 'Courier New', monospace") # Monospaced font
 
     window.sql_preview_dock.setWidget(window.sql_preview_text_edit)
-    window.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, window.sql_preview_dock)
+    restored = _add_dock_widget(window, window.sql_preview_dock, Qt.DockWidgetArea.BottomDockWidgetArea)
     window.sql_preview_dock.visibilityChanged.connect(
         lambda visible: window.toggleSqlPreviewAction.setChecked(visible) if hasattr(window, 'toggleSqlPreviewAction') else None
     )
+    # The preview isn't regenerated while hidden; catch up when it's shown
+    window.sql_preview_dock.visibilityChanged.connect(lambda visible: window.render_sql_preview() if visible and window.sql_preview_stale else None)
+    return restored
 
 def create_notes_widget(window):
-    """Creates the Notes dock widget and its text edit area."""
+    """Creates the Notes dock widget and its text edit area. Returns True if it went back to a saved position."""
     from PyQt6.QtWidgets import QTextEdit # Local import for clarity
     window.notes_dock = QDockWidget("Notes", window)
     window.notes_dock.setObjectName("NotesDock")
@@ -213,11 +305,61 @@ def create_notes_widget(window):
     window.notes_text_edit.textChanged.connect(window.on_notes_changed)
 
     window.notes_dock.setWidget(window.notes_text_edit)
-    window.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, window.notes_dock)
+    restored = _add_dock_widget(window, window.notes_dock, Qt.DockWidgetArea.BottomDockWidgetArea)
     window.notes_dock.visibilityChanged.connect(
         lambda visible: window.toggleNotesAction.setChecked(visible) if hasattr(window, 'toggleNotesAction') else None
     )
+    return restored
+
+
 
+def create_overview_widget(window):
+    """Creates the Overview (minimap) dock widget. Returns True if it went back to a saved position."""
+    from overview_widget import OverviewWidget
+    window.overview_dock = QDockWidget("Overview", window)
+    window.overview_dock.setObjectName("OverviewDock")
+    window.overview_dock.setAllowedAreas(Qt.DockWidgetArea.LeftDockWidgetArea | Qt.DockWidgetArea.RightDockWidgetArea)
+
+    window.overview_widget = OverviewWidget(window)
+    window.overview_dock.setWidget(window.overview_widget)
+    restored = _add_dock_widget(window, window.overview_dock, Qt.DockWidgetArea.RightDockWidgetArea)
+    window.overview_dock.setVisible(getattr(window, 'overview_visible_on_load', False))
+    window.overview_dock.visibilityChanged.connect(
+        lambda visible: window.toggleOverviewAction.setChecked(visible) if hasattr(window, 'toggleOverviewAction') else None
+    )
+    return restored
+
+
+# SQL preview, notes and overview docks closed at startup are only built when first shown from the View menu
+
+def ensure_sql_preview_widget(window):
+    """Returns the SQL preview dock, creating it on first use."""
+    if not hasattr(window, 'sql_preview_dock'):
+        window.sql_preview_stale = True # Rendered once it's shown
+        if not create_sql_preview_widget(window) and hasattr(window, 'notes_dock'):
+            window.tabifyDockWidget(window.notes_dock, window.sql_preview_dock)
+        apply_dock_styles_util(window)
+    return window.sql_preview_dock
+
+
+def ensure_notes_widget(window):
+    """Returns the Notes dock, creating it (with the current notes) on first use."""
+    if not hasattr(window, 'notes_dock'):
+        if not create_notes_widget(window) and hasattr(window, 'sql_preview_dock'):
+            window.tabifyDockWidget(window.sql_preview_dock, window.notes_dock)
+        window.notes_text_edit.blockSignals(True)
+        window.notes_text_edit.setPlainText(window.diagram_notes)
+        window.notes_text_edit.blockSignals(False)
+        apply_dock_styles_util(window)
+    return window.notes_dock
+
+
+def ensure_overview_widget(window):
+    """Returns the Overview dock, creating it on first use."""
+    if not hasattr(window, 'overview_dock'):
+        create_overview_widget(window)
+        apply_dock_styles_util(window)
+    return window.overview_dock
 
 
 def create_main_floating_action_button_widget(window):
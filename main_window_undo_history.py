@@ -0,0 +1,271 @@
+# main_window_undo_history.py
+# Records each undo step as before/after table states and keeps them in a log next to the diagram file.
+
+import sys
+
+from PyQt6 import sip
+
+from data_models import Table, Column
+from model_snapshot import snapshot_table, snapshot_relationship
+from undo_history_log import (
+    UndoHistoryLog, make_history_state, make_history_step, read_history_index, undo_history_path,
+    tables_from_state, relationships_from_state
+)
+
+
+def setup_undo_history_impl(window):
+    window.undo_history_log = None # Log our steps continue; None until the first save (or restore)
+    window.history_restoring = False # Set while restored steps are pushed; they apply nothing then
+    window.history_dirty_table_names = set() # Tables changed since the last undo stack step
+    reset_undo_history_impl(window)
+    window.undo_stack.indexChanged.connect(lambda index: on_undo_history_index_changed_impl(window, index))
+
+
+def reset_undo_history_impl(window, base_index=None):
+    """
+    Starts recording from the current state: steps below base_index (default: the current index) are not
+    part of the history. Keeps a snapshot of every table as the "before" state of the next step.
+    """
+    window.history_base_index = window.undo_stack.index() if base_index is None else base_index
+    window.history_step_commands = [] # Undo stack command per recorded step, to tell pushes from redos
+    window.history_pending_steps = [] # Recorded but not written to the log yet
+    window.history_last_step = None
+    window.history_last_index = window.undo_stack.index()
+    window.history_dirty_table_names = set()
+    window.undo_history_log = None
+    if window.keep_undo_history:
+        window.history_table_snapshots = {name: snapshot_table(t) for name, t in window.tables_data.items()}
+        window.history_relationship_snapshots = [snapshot_relationship(rel) for rel in window.relationships_data]
+    else: # Nothing is recorded; don't hold a copy of the diagram
+        window.history_table_snapshots = {}
+        window.history_relationship_snapshots = []
+    window.history_notes = window.diagram_notes or ""
+
+
+def set_keep_undo_history_impl(window, enabled):
+    window.keep_undo_history = bool(enabled)
+    if hasattr(window, 'actionKeepUndoHistory') and window.actionKeepUndoHistory.isChecked() != window.keep_undo_history:
+        window.actionKeepUndoHistory.setChecked(window.keep_undo_history)
+    reset_undo_history_impl(window)
+    window.save_app_settings()
+
+
+def _recorded_state(window, names, notes):
+    """The last recorded state of the named tables and their relationships (before a step)."""
+    tables = [window.history_table_snapshots[name] for name in sorted(names) if name in window.history_table_snapshots]
+    relationships = [rel for rel in window.history_relationship_snapshots if rel.table1_name in names or rel.table2_name in names]
+    return make_history_state(tables, relationships, notes)
+
+
+def _current_state(window, names, notes):
+    tables = [snapshot_table(window.tables_data[name]) for name in sorted(names) if name in window.tables_data]
+    relationships = [snapshot_relationship(rel) for rel in window.relationships_data
+                     if rel.table1_name in names or rel.table2_name in names]
+    return make_history_state(tables, relationships, notes)
+
+
+def _remember_state(window, names, state):
+    for name in names:
+        window.history_table_snapshots.pop(name, None)
+    for table in state["tables"]:
+        window.history_table_snapshots[table.name] = table
+    if names:
+        window.history_relationship_snapshots = [rel for rel in window.history_relationship_snapshots
+                                                 if rel.table1_name not in names and rel.table2_name not in names]
+        window.history_relationship_snapshots.extend(state["relationships"])
+    if "notes" in state:
+        window.history_notes = state["notes"]
+
+
+def on_undo_history_index_changed_impl(window, index):
+    """
+    Turns a push into a history step: its "before" is the recorded state of the tables it touched (marked
+    dirty while it ran) and its "after" their current state. Undo and redo only update the recorded state.
+    """
+    if not window.keep_undo_history or window.history_restoring or sip.isdeleted(window.undo_stack):
+        return # The stack also signals while the window is torn down
+    stack = window.undo_stack
+    count = stack.count()
+    if count == 0: # clear(); New and Open reset the history themselves
+        return
+    names, window.history_dirty_table_names = window.history_dirty_table_names, set()
+    notes = window.diagram_notes or ""
+    notes_changed = notes != window.history_notes
+
+    commands = window.history_step_commands
+    del commands[max(0, count - window.history_base_index):] # Redo steps dropped by a push, or an obsolete merge
+    top_command = stack.command(index - 1) if index else None
+    top = index - 1 - window.history_base_index
+    is_recorded = 0 <= top < len(commands) and commands[top] is top_command
+    last_step = window.history_last_step
+
+    if top_command is not None and not is_recorded: # A new step
+        if top < 0: # Pushed after undoing past where recording started; start over from this step
+            window.history_base_index = index - 1
+            top = 0
+            commands.clear()
+        before = _recorded_state(window, names, window.history_notes if notes_changed else None)
+        after = _current_state(window, names, notes if notes_changed else None)
+        step = make_history_step(top, top_command.text(), names, before, after)
+        commands.append(top_command)
+        window.history_pending_steps.append(step)
+        window.history_last_step = step
+        _remember_state(window, names, after)
+    elif is_recorded and index == window.history_last_index and last_step is not None and \
+         last_step["index"] == top and (names or notes_changed): # A newer edit merged into the top step
+        all_names = set(last_step["names"]) | names
+        had_notes = "notes" in last_step["before"]
+        before = _recorded_state(window, names - set(last_step["names"]), None)
+        before["tables"] += last_step["before"]["tables"]
+        before["relationships"] += [rel for rel in last_step["before"]["relationships"] if rel not in before["relationships"]]
+        if had_notes or notes_changed:
+            before["notes"] = last_step["before"]["notes"] if had_notes else window.history_notes
+        after = _current_state(window, all_names, notes if (had_notes or notes_changed) else None)
+        step = make_history_step(top, top_command.text(), all_names, before, after)
+        if window.history_pending_steps and window.history_pending_steps[-1] is last_step:
+            window.history_pending_steps[-1] = step
+        else:
+            window.history_pending_steps.append(step)
+        window.history_last_step = step
+        _remember_state(window, all_names, after)
+    else: # Undo or redo
+        _remember_state(window, names, _current_state(window, names, notes if notes_changed else None))
+    window.history_last_index = index
+
+
+def write_undo_history_impl(window, path, saved_index):
+    """After a save to path at undo index saved_index: appends the new steps and a marker for this save."""
+    if not window.keep_undo_history:
+        return
+    relative_index = saved_index - window.history_base_index
+    if relative_index < 0:
+        return # Saved after undoing past where recording started; the file can't be tied to the history
+    log = UndoHistoryLog(path)
+    try:
+        if window.undo_history_log is None or window.undo_history_log.path != log.path:
+            log.start_from(window.undo_history_log) # Save As carries the history over
+        log.append_saved_marker(window.history_pending_steps, relative_index,
+                                window.undo_stack.count() - window.history_base_index)
+    except OSError as e:
+        print(f"Undo History Error: {e}", file=sys.stderr)
+        return
+    window.history_pending_steps = []
+    window.undo_history_log = log
+
+
+def restore_undo_history_impl(window, path):
+    """
+    After opening path: puts the steps of its history log back on the undo stack. Nothing is read or
+    applied yet; each step loads its states from the log the first time it is undone or redone.
+    """
+    from commands import PersistedStepCommand
+    reset_undo_history_impl(window, window.undo_stack.count())
+    if not window.keep_undo_history:
+        return
+    history = read_history_index(undo_history_path(path), path)
+    if history is None:
+        return
+    step_refs, saved_index = history
+    window.history_restoring = True
+    window.begin_view_refresh_batch()
+    try:
+        for ref in step_refs:
+            command = PersistedStepCommand(window, ref)
+            window.undo_stack.push(command)
+            window.history_step_commands.append(command)
+        window.undo_stack.setIndex(window.history_base_index + saved_index)
+        window.undo_stack.setClean() # The file holds exactly this state
+    finally:
+        window.history_restoring = False
+        window.end_view_refresh_batch()
+    window.history_last_index = window.undo_stack.index()
+    window.undo_history_log = UndoHistoryLog(path)
+
+
+def apply_history_state_impl(window, table_names, state):
+    """
+    Puts the named tables and every relationship touching them into a step's recorded state. Tables and
+    relationships that exist on both sides are updated in place, so other commands' references stay valid.
+    """
+    from PyQt6.QtCore import QPointF
+    from PyQt6.QtGui import QColor
+    from gui_items import TableGraphicItem
+    names = set(table_names)
+    scene = window.scene
+    window.mark_tables_dirty(*names)
+    window.begin_view_refresh_batch()
+    scene.relationship_updates_suspended = True
+    try:
+        state_relationships = {(rel.table1_name, rel.fk_column_name, rel.table2_name, rel.pk_column_name): rel
+                               for rel in relationships_from_state(state)}
+        kept_relationships = []
+        for rel in window.relationships_data:
+            key = (rel.table1_name, rel.fk_column_name, rel.table2_name, rel.pk_column_name)
+            if (rel.table1_name in names or rel.table2_name in names) and key not in state_relationships:
+                if rel.graphic_item and rel.graphic_item.scene():
+                    scene.removeItem(rel.graphic_item)
+                rel.graphic_item = None
+            else:
+                kept_relationships.append(rel)
+        window.relationships_data[:] = kept_relationships
+
+        state_tables = {table.name: table for table in tables_from_state(state)}
+        for name in names - set(state_tables):
+            table_data = window.tables_data.pop(name, None)
+            if table_data is None:
+                continue
+            if table_data.graphic_item and table_data.graphic_item.scene():
+                scene.removeItem(table_data.graphic_item)
+            table_data.graphic_item = None
+            scene.unindex_table(table_data)
+
+        for table in state_tables.values():
+            table_data = window.tables_data.get(table.name)
+            if table_data is None:
+                table_data = Table(table.name, table.x, table.y, table.width, table.body_color_hex, table.header_color_hex)
+                window.tables_data[table.name] = table_data
+            table_data.x, table_data.y, table_data.width = table.x, table.y, table.width
+            table_data.body_color, table_data.header_color = QColor(table.body_color_hex), QColor(table.header_color_hex)
+            table_data.columns = [Column(*col) for col in table.columns]
+            item = table_data.graphic_item
+            if item:
+                item.prepareGeometryChange()
+                item.width = table.width
+                item._calculate_height()
+                item.setPos(item.parentItem().mapFromScene(QPointF(table.x, table.y)) if item.parentItem() else QPointF(table.x, table.y))
+                item.update()
+            scene.index_table(table_data)
+            if item is None and scene.should_materialize_table(table_data):
+                scene.addItem(TableGraphicItem(table_data))
+
+        live_relationships = {(rel.table1_name, rel.fk_column_name, rel.table2_name, rel.pk_column_name): rel
+                              for rel in window.relationships_data}
+        for key, rel in state_relationships.items():
+            live_rel = live_relationships.get(key)
+            if live_rel is not None:
+                live_rel.relationship_type = rel.relationship_type
+                live_rel.vertical_segment_x_override = rel.vertical_segment_x_override
+                if live_rel.graphic_item:
+                    live_rel.graphic_item.update_tooltip_and_paint()
+                continue
+            fk_table = window.tables_data.get(rel.table1_name)
+            pk_table = window.tables_data.get(rel.table2_name)
+            if fk_table and pk_table:
+                window.create_relationship(fk_table, pk_table, rel.fk_column_name, rel.pk_column_name, rel.relationship_type,
+                                           vertical_segment_x_override=rel.vertical_segment_x_override,
+                                           from_undo_redo=True, check_existing=False)
+
+        if "notes" in state:
+            window.diagram_notes = state["notes"]
+            if getattr(window, 'notes_text_edit', None):
+                window.notes_text_edit.blockSignals(True)
+                window.notes_text_edit.setPlainText(window.diagram_notes)
+                window.notes_text_edit.blockSignals(False)
+            window.change_bus.notes_changed()
+
+        window.update_all_relationships_graphics()
+        window.change_bus.table_changed(*names)
+        window.change_bus.relationships_changed(*names)
+    finally:
+        scene.relationship_updates_suspended = False
+        window.end_view_refresh_batch(rerouted_table_names=names)
@@ -0,0 +1,145 @@
+# main_window_virtualization.py
+# Keeps graphic items only for tables and relationships near the viewport when the scene is virtualized.
+
+from PyQt6.QtCore import QTimer
+
+VIRTUALIZATION_SYNC_DELAY_MS = 30 # Coalesces bursts of scroll/zoom/undo events into one sync
+
+
+def setup_scene_virtualization_impl(window):
+    """Connects the view and undo stack so a virtualized scene follows the visible region."""
+    window.virtualization_sync_timer = QTimer(window)
+    window.virtualization_sync_timer.setSingleShot(True)
+    window.virtualization_sync_timer.setInterval(VIRTUALIZATION_SYNC_DELAY_MS)
+    window.virtualization_sync_timer.timeout.connect(lambda: sync_virtualized_items_impl(window))
+
+    window.view.horizontalScrollBar().valueChanged.connect(lambda _: schedule_virtualization_sync_impl(window))
+    window.view.verticalScrollBar().valueChanged.connect(lambda _: schedule_virtualization_sync_impl(window))
+    window.diagram_changed.connect(lambda _: schedule_virtualization_sync_impl(window))
+
+
+def schedule_virtualization_sync_impl(window):
+    if window.scene.virtualized and hasattr(window, 'virtualization_sync_timer'):
+        window.virtualization_sync_timer.start()
+
+
+def set_scene_virtualization_impl(window, enabled):
+    """Turns virtualized mode on or off; turning it off materializes every item again."""
+    window.scene.virtualized = bool(enabled)
+    if hasattr(window, 'actionVirtualizeScene') and window.actionVirtualizeScene.isChecked() != window.scene.virtualized:
+        window.actionVirtualizeScene.setChecked(window.scene.virtualized)
+    sync_virtualized_items_impl(window)
+
+
+def materialize_table_impl(window, table_data):
+    """Creates and adds the graphic item for a table that only has a spatial index record."""
+    from gui_items import TableGraphicItem
+    if table_data.graphic_item:
+        return table_data.graphic_item
+    window.scene.index_table(table_data)
+    item = TableGraphicItem(table_data)
+    window.scene.addItem(item)
+    return item
+
+
+def dematerialize_table_impl(window, table_data):
+    item = table_data.graphic_item
+    if item is None:
+        return
+    window.scene.index_table(table_data) # Record keeps the last drawn geometry
+    if item.scene():
+        window.scene.removeItem(item)
+    table_data.graphic_item = None
+
+
+def sync_virtualized_items_impl(window):
+    """
+    Materializes tables and relationships that intersect the viewport plus margin and drops the rest.
+    Selected items and the item under the mouse are kept so drags and selections survive scrolling.
+    Cost is proportional to the visible items plus one cheap pass over the relationship list.
+    """
+    from gui_items import TableGraphicItem
+    from main_window_relationship_operations import create_relationship_graphic_impl
+    scene = window.scene
+    grabber = scene.mouseGrabberItem()
+
+    region = scene.materialization_rect()
+    if scene.virtualized:
+        wanted_tables = {record.table_data for record in scene.table_index.query(region)}
+        for item in scene.items():
+            if not isinstance(item, TableGraphicItem) or item.isSelected() or item is grabber:
+                continue
+            if item.table_data.graphic_item is not item: # Orphaned by an undo/redo, just drop it
+                scene.removeItem(item)
+            elif item.table_data not in wanted_tables:
+                dematerialize_table_impl(window, item.table_data)
+    else:
+        wanted_tables = set(window.tables_data.values())
+
+    for table_data in wanted_tables:
+        if not table_data.graphic_item and window.tables_data.get(table_data.name) is table_data:
+            materialize_table_impl(window, table_data)
+
+    for rel in window.relationships_data:
+        wanted = scene.should_materialize_relationship(rel, region)
+        if wanted and not rel.graphic_item:
+            create_relationship_graphic_impl(window, rel)
+        elif not wanted and rel.graphic_item and not rel.graphic_item.isSelected() and rel.graphic_item is not grabber:
+            if rel.graphic_item.scene():
+                scene.removeItem(rel.graphic_item)
+            rel.graphic_item = None
+
+
+def ensure_table_item_impl(window, table_data):
+    """Scrolls an offscreen table into view if needed and returns its graphic item."""
+    if table_data.graphic_item:
+        return table_data.graphic_item
+    record = window.scene.table_index.record_for(table_data) or window.scene.index_table(table_data)
+    window.view.centerOn(record.sceneBoundingRect().center())
+    sync_virtualized_items_impl(window)
+    return table_data.graphic_item or materialize_table_impl(window, table_data)
+
+
+def ensure_relationship_item_impl(window, relationship_data):
+    """Scrolls an offscreen relationship into view if needed and returns its line item."""
+    if relationship_data.graphic_item:
+        return relationship_data.graphic_item
+    t1_geometry = window.scene.table_geometry(window.tables_data.get(relationship_data.table1_name))
+    t2_geometry = window.scene.table_geometry(window.tables_data.get(relationship_data.table2_name))
+    if t1_geometry and t2_geometry:
+        span = t1_geometry.sceneBoundingRect().united(t2_geometry.sceneBoundingRect())
+        window.view.centerOn(span.center())
+        sync_virtualized_items_impl(window)
+    return relationship_data.graphic_item
+
+
+def materialize_region_impl(window, region):
+    """
+    Temporarily creates items for everything intersecting region (e.g. one export tile) in a virtualized scene.
+    Returns what was created so release_region_impl can drop it again.
+    """
+    scene = window.scene
+    created_tables, created_relationships = [], []
+    if not scene.virtualized:
+        return created_tables, created_relationships
+    for record in scene.table_index.query(region):
+        table_data = record.table_data
+        if not table_data.graphic_item and window.tables_data.get(table_data.name) is table_data:
+            materialize_table_impl(window, table_data)
+            created_tables.append(table_data)
+    from main_window_relationship_operations import create_relationship_graphic_impl
+    for rel in window.relationships_data:
+        if not rel.graphic_item and scene.should_materialize_relationship(rel, region):
+            create_relationship_graphic_impl(window, rel)
+            created_relationships.append(rel)
+    return created_tables, created_relationships
+
+
+def release_region_impl(window, created):
+    created_tables, created_relationships = created
+    for rel in created_relationships:
+        if rel.graphic_item and rel.graphic_item.scene():
+            window.scene.removeItem(rel.graphic_item)
+        rel.graphic_item = None
+    for table_data in created_tables:
+        dematerialize_table_impl(window, table_data)
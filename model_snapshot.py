@@ -0,0 +1,120 @@
+# model_snapshot.py
+# Immutable snapshots of the diagram model for work done outside the GUI thread.
+
+from collections import namedtuple
+import constants
+from utils import calculate_table_height
+
+ColumnSnapshot = namedtuple("ColumnSnapshot", [
+    "name", "data_type", "is_pk", "is_fk",
+    "references_table", "references_column", "fk_relationship_type"
+])
+
+TableSnapshot = namedtuple("TableSnapshot", [
+    "name", "x", "y", "width", "height",
+    "body_color_hex", "header_color_hex", "columns"
+])
+
+RelationshipSnapshot = namedtuple("RelationshipSnapshot", [
+    "table1_name", "fk_column_name", "table2_name", "pk_column_name",
+    "relationship_type", "vertical_segment_x_override"
+])
+
+DiagramSnapshot = namedtuple("DiagramSnapshot", [
+    "tables", "relationships", "canvas_width", "canvas_height", "notes"
+])
+
+
+def snapshot_column(column):
+    """Returns an immutable copy of a Column."""
+    return ColumnSnapshot(column.name, column.data_type, column.is_pk, column.is_fk,
+                          column.references_table, column.references_column,
+                          column.fk_relationship_type)
+
+
+def snapshot_table(table_data):
+    """Returns an immutable copy of a Table, including its drawn height."""
+    height = table_data.graphic_item.height if table_data.graphic_item else calculate_table_height(len(table_data.columns))
+    return TableSnapshot(table_data.name, table_data.x, table_data.y, table_data.width, height,
+                         table_data.body_color.name(), table_data.header_color.name(),
+                         tuple(snapshot_column(col) for col in table_data.columns))
+
+
+def snapshot_relationship(rel):
+    """Returns an immutable copy of a Relationship."""
+    return RelationshipSnapshot(rel.table1_name, rel.fk_column_name, rel.table2_name, rel.pk_column_name,
+                                rel.relationship_type or "N:1", rel.vertical_segment_x_override)
+
+
+def take_model_snapshot(window):
+    """
+    Captures the window's tables, relationships, canvas size and notes as nested tuples.
+    The result shares nothing mutable with the live model, so it can be handed to a worker thread.
+    """
+    tables = tuple(snapshot_table(window.tables_data[name]) for name in sorted(window.tables_data))
+    relationships = tuple(snapshot_relationship(rel) for rel in window.relationships_data)
+    return DiagramSnapshot(tables, relationships,
+                           constants.current_canvas_dimensions["width"],
+                           constants.current_canvas_dimensions["height"],
+                           window.diagram_notes or "")
+
+
+# Records streamed by the file readers/writers, in file order: columns, placements, canvas, relationships, notes.
+# A table without columns is a ColumnRecord whose column is None.
+ColumnRecord = namedtuple("ColumnRecord", ["table_name", "column"])
+TablePlacementRecord = namedtuple("TablePlacementRecord", [
+    "table_name", "x", "y", "width", "body_color_hex", "header_color_hex"
+])
+CanvasSizeRecord = namedtuple("CanvasSizeRecord", ["width", "height"])
+NotesRecord = namedtuple("NotesRecord", ["text"])
+
+
+def iter_snapshot_records(snapshot):
+    """Yields a DiagramSnapshot as records in file order (relationships being RelationshipSnapshots)."""
+    for table in snapshot.tables:
+        if not table.columns:
+            yield ColumnRecord(table.name, None)
+        for col in table.columns:
+            yield ColumnRecord(table.name, col)
+    for table in snapshot.tables:
+        yield TablePlacementRecord(table.name, table.x, table.y, table.width,
+                                   table.body_color_hex, table.header_color_hex)
+    yield CanvasSizeRecord(snapshot.canvas_width, snapshot.canvas_height)
+    yield from snapshot.relationships
+    yield NotesRecord(snapshot.notes or "")
+
+
+def snapshot_from_records(records):
+    """
+    Collects records into a DiagramSnapshot. Tables keep the order they first appear in; tables without
+    a placement get x/y None (placed by the importer) and the default width.
+    """
+    columns_by_table = {}
+    placements = {}
+    relationships = []
+    canvas_width, canvas_height, notes = None, None, ""
+    for record in records:
+        record_type = type(record)
+        if record_type is ColumnRecord:
+            columns = columns_by_table.setdefault(record.table_name, [])
+            if record.column is not None:
+                columns.append(record.column)
+        elif record_type is TablePlacementRecord:
+            columns_by_table.setdefault(record.table_name, [])
+            placements[record.table_name] = record
+        elif record_type is RelationshipSnapshot:
+            relationships.append(record)
+        elif record_type is CanvasSizeRecord:
+            canvas_width, canvas_height = record
+        elif record_type is NotesRecord:
+            notes = record.text
+
+    tables = []
+    for name, columns in columns_by_table.items():
+        placement = placements.get(name)
+        if placement:
+            tables.append(TableSnapshot(name, placement.x, placement.y, placement.width, None,
+                                        placement.body_color_hex, placement.header_color_hex, tuple(columns)))
+        else:
+            tables.append(TableSnapshot(name, None, None, constants.DEFAULT_TABLE_WIDTH, None, None, None, tuple(columns)))
+    return DiagramSnapshot(tuple(tables), tuple(relationships), canvas_width, canvas_height, notes)
@@ -0,0 +1,293 @@
+# overview_widget.py
+# Minimap of the whole scene, rendered once into a downscaled image and patched tile by tile.
+
+import math
+
+from PyQt6.QtWidgets import QWidget, QSizePolicy
+from PyQt6.QtCore import Qt, QRectF, QPoint, QPointF, QTimer
+from PyQt6.QtGui import QImage, QPainter, QColor, QPen, QBrush
+
+from constants import current_theme_settings
+
+OVERVIEW_MAX_IMAGE_SIDE = 1024 # Longest side of the cached image, in pixels
+OVERVIEW_TILE_SIZE = 128 # Cached image is re-rendered in tiles of this many pixels
+OVERVIEW_REFRESH_DELAY_MS = 150 # Coalesces bursts of scene changes (e.g. a drag) into one refresh
+OVERVIEW_SCALE_SLACK = 1.5 # The image keeps its scale while the scene rect keeps its longest side within this factor
+
+
+class OverviewWidget(QWidget):
+    """
+    Shows the whole scene at low resolution with the main view's visible area outlined.
+    Clicking or dragging pans the main view. Moving or resizing a table only re-renders the tiles
+    under its old and new bounds and its relationship lines; other edits rebuild the image once, debounced.
+    """
+    def __init__(self, main_window, parent=None):
+        super().__init__(parent)
+        self.main_window = main_window
+        self.scene = main_window.scene
+        self.view = main_window.view
+        self.setMinimumSize(120, 90)
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.setCursor(Qt.CursorShape.PointingHandCursor)
+
+        self._cache = None # QImage of the whole scene rect
+        self._cache_scene_rect = QRectF()
+        self._cache_scale = 1.0 # Image pixels per scene unit
+        self._dirty_tiles = set() # {(tile_x, tile_y)}
+        self._moved_tables = {} # {table_name: scene rect covering its old and new bounds}
+
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(OVERVIEW_REFRESH_DELAY_MS)
+        self._refresh_timer.timeout.connect(self._refresh_dirty_tiles)
+
+        self.scene.changed.connect(self._on_scene_changed)
+        self.scene.table_geometry_changed.connect(self._on_table_geometry_changed)
+        main_window.diagram_changed.connect(self._on_diagram_changed)
+        self.scene.sceneRectChanged.connect(self._on_scene_rect_changed)
+        self.view.horizontalScrollBar().valueChanged.connect(lambda _: self.update())
+        self.view.verticalScrollBar().valueChanged.connect(lambda _: self.update())
+
+    def invalidate_all(self):
+        """Drops the cached image; it is rebuilt on the next paint (e.g. after a theme change)."""
+        self._cache = None
+        self._dirty_tiles.clear()
+        self._moved_tables.clear()
+        self.update()
+
+    def _schedule_rebuild(self):
+        self._cache = None
+        self._moved_tables.clear()
+        if self.isVisible():
+            self._refresh_timer.start()
+
+    def _on_diagram_changed(self, changes):
+        if changes.is_moves_only():
+            return # _on_table_geometry_changed already marked the tiles under the moved tables and their lines
+        self._schedule_rebuild()
+
+    def _on_scene_changed(self, regions):
+        if not regions or self._cache is None:
+            return
+        if not self.isVisible():
+            self._cache = None # Rebuilt from scratch when shown again
+            return
+        for region in regions:
+            if region.contains(self._cache_scene_rect):
+                self._schedule_rebuild()
+                return
+            self._dirty_tiles.update(self._tiles_for_scene_rect(region))
+        if self._dirty_tiles:
+            self._refresh_timer.start()
+
+    def _on_scene_rect_changed(self, scene_rect):
+        """
+        Keeps the cached pixels when the scene rect grows or shrinks (e.g. auto-size after a drag): the image is
+        resized around them at the same scale and only newly exposed areas are rendered. Rebuilds if the scale
+        would drift too far from OVERVIEW_MAX_IMAGE_SIDE.
+        """
+        if self._cache is None or not self.isVisible():
+            self.invalidate_all()
+            return
+        longest_side = max(scene_rect.width(), scene_rect.height()) * self._cache_scale
+        if not OVERVIEW_MAX_IMAGE_SIDE / OVERVIEW_SCALE_SLACK <= longest_side <= OVERVIEW_MAX_IMAGE_SIDE * OVERVIEW_SCALE_SLACK:
+            self.invalidate_all()
+            return
+
+        # New image bounds in the old image's pixels, snapped outwards so the kept pixels copy over unscaled
+        old_origin, scale = self._cache_scene_rect.topLeft(), self._cache_scale
+        left = math.floor((scene_rect.left() - old_origin.x()) * scale)
+        top = math.floor((scene_rect.top() - old_origin.y()) * scale)
+        right = max(left + 1, math.ceil((scene_rect.right() - old_origin.x()) * scale))
+        bottom = max(top + 1, math.ceil((scene_rect.bottom() - old_origin.y()) * scale))
+        old_cache = self._cache
+        self._cache = QImage(right - left, bottom - top, QImage.Format.Format_ARGB32_Premultiplied)
+        self._cache.fill(QColor(current_theme_settings.get("view_bg", QColor(Qt.GlobalColor.white))))
+        painter = QPainter(self._cache)
+        painter.drawImage(QPoint(-left, -top), old_cache)
+        painter.end()
+        self._cache_scene_rect = QRectF(old_origin.x() + left / scale, old_origin.y() + top / scale,
+                                        (right - left) / scale, (bottom - top) / scale)
+
+        # Pending tiles were numbered from the old image's corner, so they are re-tiled along with the exposed area
+        pending_tiles, self._dirty_tiles = self._dirty_tiles, set()
+        for tile_x, tile_y in pending_tiles:
+            self._dirty_tiles.update(self._tiles_for_image_rect(QRectF(
+                tile_x * OVERVIEW_TILE_SIZE - left, tile_y * OVERVIEW_TILE_SIZE - top, OVERVIEW_TILE_SIZE, OVERVIEW_TILE_SIZE)))
+        kept_rect = QRectF(old_cache.rect()).translated(-left, -top)
+        for tile in self._tiles_for_image_rect(QRectF(self._cache.rect())):
+            if not kept_rect.contains(self._tile_rect(tile)):
+                self._dirty_tiles.add(tile)
+        if self._dirty_tiles or self._moved_tables:
+            self._refresh_timer.start()
+        self.update()
+
+    def _on_table_geometry_changed(self, table_name, dirty_scene_rect):
+        if self._cache is None:
+            return
+        if not self.isVisible():
+            self._cache = None
+            return
+        previous = self._moved_tables.get(table_name)
+        self._moved_tables[table_name] = previous.united(dirty_scene_rect) if previous else QRectF(dirty_scene_rect)
+        self._dirty_tiles.update(self._tiles_for_scene_rect(dirty_scene_rect))
+        self._refresh_timer.start()
+
+    def _mark_moved_relationships_dirty(self):
+        """Adds the tiles under every relationship line attached to a moved table."""
+        if not self._moved_tables:
+            return
+        tables_data = self.main_window.tables_data
+        for rel in self.main_window.relationships_data:
+            for moved_name, other_name in ((rel.table1_name, rel.table2_name), (rel.table2_name, rel.table1_name)):
+                moved_rect = self._moved_tables.get(moved_name)
+                if moved_rect is None:
+                    continue
+                other_geometry = self.scene.table_geometry(tables_data.get(other_name))
+                span = moved_rect.united(other_geometry.sceneBoundingRect()) if other_geometry else moved_rect
+                self._dirty_tiles.update(self._tiles_for_scene_rect(span))
+        self._moved_tables.clear()
+
+    def _tiles_for_scene_rect(self, scene_rect):
+        return self._tiles_for_image_rect(self._scene_to_image_rect(scene_rect))
+
+    def _tiles_for_image_rect(self, image_rect):
+        image_rect = image_rect.intersected(QRectF(self._cache.rect()))
+        if image_rect.isEmpty():
+            return ()
+        x0, x1 = int(image_rect.left()) // OVERVIEW_TILE_SIZE, int(image_rect.right()) // OVERVIEW_TILE_SIZE
+        y0, y1 = int(image_rect.top()) // OVERVIEW_TILE_SIZE, int(image_rect.bottom()) // OVERVIEW_TILE_SIZE
+        return [(tx, ty) for tx in range(x0, x1 + 1) for ty in range(y0, y1 + 1)]
+
+    def _tile_rect(self, tile):
+        """The part of the cached image a tile covers."""
+        tile_x, tile_y = tile
+        return QRectF(tile_x * OVERVIEW_TILE_SIZE, tile_y * OVERVIEW_TILE_SIZE,
+                      OVERVIEW_TILE_SIZE, OVERVIEW_TILE_SIZE).intersected(QRectF(self._cache.rect()))
+
+    def _scene_to_image_rect(self, scene_rect):
+        origin = self._cache_scene_rect.topLeft()
+        return QRectF((scene_rect.left() - origin.x()) * self._cache_scale,
+                      (scene_rect.top() - origin.y()) * self._cache_scale,
+                      scene_rect.width() * self._cache_scale,
+                      scene_rect.height() * self._cache_scale)
+
+    def _image_to_scene_rect(self, image_rect):
+        origin = self._cache_scene_rect.topLeft()
+        return QRectF(origin.x() + image_rect.left() / self._cache_scale,
+                      origin.y() + image_rect.top() / self._cache_scale,
+                      image_rect.width() / self._cache_scale,
+                      image_rect.height() / self._cache_scale)
+
+    def _rebuild_cache(self):
+        scene_rect = self.scene.sceneRect()
+        if scene_rect.isEmpty():
+            self._cache = None
+            return
+        self._cache_scene_rect = QRectF(scene_rect)
+        self._cache_scale = OVERVIEW_MAX_IMAGE_SIDE / max(scene_rect.width(), scene_rect.height())
+        self._cache = QImage(max(1, round(scene_rect.width() * self._cache_scale)),
+                             max(1, round(scene_rect.height() * self._cache_scale)),
+                             QImage.Format.Format_ARGB32_Premultiplied)
+        self._render_image_rect(QRectF(self._cache.rect()))
+        self._dirty_tiles.clear()
+        self._moved_tables.clear()
+
+    def _refresh_dirty_tiles(self):
+        if self._cache is None:
+            self._rebuild_cache()
+        else:
+            self._mark_moved_relationships_dirty()
+            for tile in self._dirty_tiles:
+                self._render_image_rect(self._tile_rect(tile))
+            self._dirty_tiles.clear()
+        self.update()
+
+    def _render_image_rect(self, image_rect):
+        """Renders the scene area behind image_rect into the cache, without the grid."""
+        if image_rect.isEmpty():
+            return
+        scene_rect = self._image_to_scene_rect(image_rect)
+        painter = QPainter(self._cache)
+        painter.setClipRect(image_rect)
+        painter.fillRect(image_rect, QColor(current_theme_settings.get("view_bg", QColor(Qt.GlobalColor.white))))
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing, False)
+        grid_was_visible = self.scene.grid_visible
+        self.scene.grid_visible = False
+        try:
+            self.scene.render(painter, image_rect, scene_rect, Qt.AspectRatioMode.IgnoreAspectRatio)
+        finally:
+            self.scene.grid_visible = grid_was_visible
+
+        # Tables that are not materialized (virtualized scene) are drawn from their index records
+        if self.scene.virtualized:
+            painter.setPen(Qt.PenStyle.NoPen)
+            for record in self.scene.table_index.query(scene_rect):
+                if record.table_data.graphic_item is None:
+                    painter.setBrush(QBrush(record.table_data.header_color))
+                    painter.drawRect(self._scene_to_image_rect(record.sceneBoundingRect()))
+        painter.end()
+
+    def _image_target_rect(self):
+        """Where the cached image is drawn inside the widget, keeping its aspect ratio."""
+        if self._cache is None:
+            return QRectF()
+        image_w, image_h = self._cache.width(), self._cache.height()
+        factor = min(self.width() / image_w, self.height() / image_h)
+        target_w, target_h = image_w * factor, image_h * factor
+        return QRectF((self.width() - target_w) / 2, (self.height() - target_h) / 2, target_w, target_h)
+
+    def paintEvent(self, event):
+        if self._cache is None:
+            self._rebuild_cache()
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(current_theme_settings.get("window_bg", QColor(Qt.GlobalColor.lightGray))))
+        if self._cache is None:
+            painter.end()
+            return
+        target = self._image_target_rect()
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        painter.drawImage(target, self._cache)
+
+        # Outline of the main view's visible area
+        visible_scene = self.view.mapToScene(self.view.viewport().rect()).boundingRect()
+        widget_factor = target.width() / self._cache.width()
+        visible_image = self._scene_to_image_rect(visible_scene)
+        visible_widget = QRectF(target.left() + visible_image.left() * widget_factor,
+                                target.top() + visible_image.top() * widget_factor,
+                                visible_image.width() * widget_factor,
+                                visible_image.height() * widget_factor).intersected(target)
+        painter.setPen(QPen(QColor(0, 123, 255), 1.5))
+        painter.setBrush(QColor(0, 123, 255, 40))
+        painter.drawRect(visible_widget)
+        painter.end()
+
+    def _pan_to(self, widget_pos):
+        target = self._image_target_rect()
+        if target.isEmpty():
+            return
+        widget_factor = target.width() / self._cache.width()
+        image_point = QPointF((widget_pos.x() - target.left()) / widget_factor,
+                              (widget_pos.y() - target.top()) / widget_factor)
+        origin = self._cache_scene_rect.topLeft()
+        self.view.centerOn(QPointF(origin.x() + image_point.x() / self._cache_scale,
+                                   origin.y() + image_point.y() / self._cache_scale))
+        self.update()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self._pan_to(event.position())
+            event.accept()
+            return
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.MouseButton.LeftButton:
+            self._pan_to(event.position())
+            event.accept()
+            return
+        super().mouseMoveEvent(event)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.invalidate_all()
@@ -0,0 +1,106 @@
+# paint_palette.py
+# Pens, brushes, colors and fonts for painting tables and relationships, built once per theme and shared by every item.
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QBrush, QColor, QFont, QFontMetrics, QGuiApplication, QPen
+
+import constants
+from utils import get_contrasting_text_color
+
+RELATIONSHIP_LINE_WIDTH = 1.8
+
+# Theme colors the palette is built from; their values are the cache key
+PALETTE_COLOR_KEYS = (
+    "default_table_body_color", "default_table_header_color", "button_checked_bg", "view_border",
+    "relationship_line_color", "cardinality_text_color"
+)
+
+
+class TableColors:
+    """Brushes and text colors for one body/header color combination."""
+    __slots__ = ("body_brush", "header_brush", "header_text_color", "column_text_color")
+
+    def __init__(self, body_color, header_color):
+        self.body_brush = QBrush(body_color)
+        self.header_brush = QBrush(header_color)
+        self.header_text_color = get_contrasting_text_color(header_color)
+        self.column_text_color = get_contrasting_text_color(body_color)
+
+
+class PaintPalette:
+    """
+    Everything TableGraphicItem.paint and OrthogonalRelationshipPathItem.paint draw with under one theme.
+    Table colors are built per body/header combination the first time a table with them paints.
+    """
+    def __init__(self, theme_settings):
+        get = theme_settings.get
+        self.default_body_color = QColor(get("default_table_body_color", QColor(Qt.GlobalColor.white)))
+        self.default_header_color = QColor(get("default_table_header_color", QColor(Qt.GlobalColor.lightGray)))
+
+        border_color_selected = QColor(get("button_checked_bg", QColor(0, 123, 255)))
+        self.border_pen = QPen(QColor(get("view_border", QColor(200, 200, 200))), 1.0)
+        self.selected_border_pen = QPen(border_color_selected, 2.0)
+        self.column_line_pen = QPen(QColor(get("view_border", QColor(220, 220, 220))).lighter(110), 0.8)
+        self.resize_handle_brush = QBrush(border_color_selected.lighter(120))
+        self.resize_handle_pen = QPen(border_color_selected.darker(120), 1)
+
+        base_font = QGuiApplication.font() # What painter.font() starts as on the canvas
+        self.header_font = QFont(base_font)
+        self.header_font.setBold(True)
+        self.header_font.setPointSize(10)
+        self.column_font = QFont(base_font)
+        self.column_font.setBold(False)
+        self.column_font.setPointSize(9)
+
+        line_color = QColor(get("relationship_line_color", QColor(70, 70, 110)))
+        self.cardinality_text_color = QColor(get("cardinality_text_color", QColor(Qt.GlobalColor.black)))
+        self.relationship_pen = QPen(line_color, RELATIONSHIP_LINE_WIDTH)
+        self.cardinality_font = QFont(base_font)
+        self.cardinality_font.setBold(True)
+        self.cardinality_font.setPointSize(8)
+        self.cardinality_font_metrics = QFontMetrics(self.cardinality_font)
+        # Crow's feet are drawn in whatever color the painter last used: the cardinality text's or the line's
+        self.symbol_pen_with_text = self._symbol_pen(self.cardinality_text_color)
+        self.symbol_pen = self._symbol_pen(line_color)
+
+        self._table_colors = {} # (body rgba, header rgba) -> TableColors
+
+    @staticmethod
+    def _symbol_pen(color):
+        pen = QPen(color, constants.SYMBOL_STROKE_WIDTH)
+        pen.setCapStyle(Qt.PenCapStyle.RoundCap)
+        return pen
+
+    def table_colors(self, body_color, header_color):
+        """The shared TableColors for a table's colors; invalid colors fall back to the theme defaults."""
+        if not body_color.isValid():
+            body_color = self.default_body_color
+        if not header_color.isValid():
+            header_color = self.default_header_color
+        key = (body_color.rgba(), header_color.rgba())
+        colors = self._table_colors.get(key)
+        if colors is None:
+            colors = self._table_colors[key] = TableColors(body_color, header_color)
+        return colors
+
+
+_palettes = {} # Theme color values -> PaintPalette
+_current_palette = None
+
+
+def current_paint_palette():
+    """The palette for constants.current_theme_settings."""
+    if _current_palette is None:
+        reset_paint_palette()
+    return _current_palette
+
+
+def reset_paint_palette():
+    """Picks the palette for the current theme settings (building it the first time); call after they change."""
+    global _current_palette
+    settings = constants.current_theme_settings
+    key = tuple(QColor(settings[name]).rgba() if name in settings else None for name in PALETTE_COLOR_KEYS)
+    palette = _palettes.get(key)
+    if palette is None:
+        palette = _palettes[key] = PaintPalette(settings)
+    _current_palette = palette
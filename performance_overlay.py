@@ -0,0 +1,81 @@
+# performance_overlay.py
+# Developer overlay on the canvas: frames per second, the last frame's paint time per item type and the slowest recent operations.
+
+import time
+from collections import deque
+
+from PyQt6.QtWidgets import QLabel
+from PyQt6.QtCore import Qt, QTimer, QEvent
+from PyQt6.QtGui import QColor, QFont, QPalette
+
+from profiling import PROFILER
+
+OVERLAY_REFRESH_MS = 500
+OVERLAY_MARGIN = 8 # Pixels from the view's top-left corner
+
+
+class PerformanceOverlay(QLabel):
+    """
+    A label over the top-left corner of the view. Canvas frames are counted from the viewport's paint events.
+    The background is opaque so refreshing the label doesn't repaint the canvas under it (and count as a frame).
+    """
+    def __init__(self, view):
+        super().__init__(view)
+        self.view = view
+        self.frame_times = deque(maxlen=600)
+        self.last_frame = None # (duration_ms, {item type: [total_ms, count]}) of the last finished frame
+
+        font = QFont("Consolas, 'Courier New', monospace")
+        font.setStyleHint(QFont.StyleHint.Monospace)
+        font.setPointSize(8)
+        self.setFont(font)
+        palette = self.palette()
+        palette.setColor(QPalette.ColorRole.Window, QColor(32, 32, 32))
+        palette.setColor(QPalette.ColorRole.WindowText, QColor(220, 255, 220))
+        self.setPalette(palette)
+        self.setAutoFillBackground(True)
+        self.setContentsMargins(6, 4, 6, 4)
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setInterval(OVERLAY_REFRESH_MS)
+        self._refresh_timer.timeout.connect(self.refresh)
+        view.viewport().installEventFilter(self)
+        self.hide()
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint and self.isVisible():
+            self.frame_times.append(time.perf_counter())
+            previous = PROFILER.frame_started()
+            if previous is not None:
+                self.last_frame = previous
+        return False
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self._refresh_timer.start()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self._refresh_timer.stop()
+
+    def refresh(self):
+        now = time.perf_counter()
+        fps = sum(1 for t in self.frame_times if t >= now - 1.0)
+        lines = [f"{fps} FPS"]
+        if self.last_frame is not None:
+            frame_ms, paint_totals = self.last_frame
+            lines.append(f"Last frame   {frame_ms:7.1f} ms")
+            for name, (total_ms, count) in sorted(paint_totals.items(), key=lambda item: -item[1][0]):
+                lines.append(f"  {name[:28]:<28} {total_ms:7.1f} ms x{count}")
+        slowest = PROFILER.slowest_recent()
+        if slowest:
+            lines.append("Slowest recent operations")
+            lines.extend(f"  {name[:28]:<28} {ms:7.1f} ms" for ms, name in slowest)
+        text = "\n".join(lines)
+        if text != self.text():
+            self.setText(text)
+            self.adjustSize()
+        self.move(OVERLAY_MARGIN, OVERLAY_MARGIN)
+        self.raise_()
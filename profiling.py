@@ -0,0 +1,184 @@
+# profiling.py
+# Optional timing of hot paths. Spans go to a bounded buffer that can be saved as a Chrome trace (chrome://tracing, Perfetto).
+#
+# Off by default; a disabled span costs one attribute check. Turn it on from View > Developer, or start the app
+# with ERD_TRACE_FILE=<path> to record from startup and write the trace when the app exits.
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+TRACE_FILE_ENV = "ERD_TRACE_FILE"
+TRACE_BUFFER_SIZE = 200000 # Oldest events are dropped beyond this
+RECENT_OPERATION_SECONDS = 10.0 # Window for "slowest recent operations"
+PAINT_CATEGORY = "paint"
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "category", "args", "start")
+
+    def __init__(self, profiler, name, category, args):
+        self.profiler = profiler
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.category, self.start, time.perf_counter(), self.args)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Profiler:
+    """
+    Collects complete ("X") trace events. record() may be called from worker threads; deque appends are atomic.
+    Paint spans are also summed per item type for the current frame, which frame_started() begins.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.origin = time.perf_counter()
+        self.events = deque(maxlen=TRACE_BUFFER_SIZE)
+        self.recent = deque(maxlen=2000) # (end, duration_ms, name) of non-paint spans, for the overlay
+        self.thread_names = {} # tid -> name, written as trace metadata
+        self.frame_start = None
+        self.frame_paint = {} # Item type -> [total_ms, count] for the current frame
+        self.last_paint_end = None
+
+    def enable(self, enabled=True):
+        self.enabled = bool(enabled)
+
+    def clear(self):
+        self.events.clear()
+        self.recent.clear()
+        self.frame_paint = {}
+
+    def span(self, name, category="app", args=None):
+        """Context manager timing its block; does nothing while disabled."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, category, args)
+
+    def record(self, name, category, start, end, args=None):
+        tid = threading.get_ident()
+        if tid not in self.thread_names:
+            self.thread_names[tid] = threading.current_thread().name
+        event = {"name": name, "cat": category, "ph": "X", "ts": round((start - self.origin) * 1e6, 1),
+                 "dur": round((end - start) * 1e6, 1), "pid": os.getpid(), "tid": tid}
+        if args:
+            event["args"] = args
+        self.events.append(event)
+        if category == PAINT_CATEGORY:
+            totals = self.frame_paint.setdefault(name, [0.0, 0])
+            totals[0] += (end - start) * 1000
+            totals[1] += 1
+            self.last_paint_end = end
+        else:
+            self.recent.append((end, (end - start) * 1000, name))
+
+    def frame_started(self):
+        """Called when the canvas starts painting a frame; returns the previous frame's (duration_ms, paint totals)."""
+        previous = None
+        if self.frame_start is not None and self.last_paint_end is not None and self.last_paint_end >= self.frame_start:
+            previous = ((self.last_paint_end - self.frame_start) * 1000, self.frame_paint)
+        self.frame_start = time.perf_counter()
+        self.frame_paint = {}
+        return previous
+
+    def slowest_recent(self, count=5, within_seconds=RECENT_OPERATION_SECONDS):
+        """The slowest non-paint spans that ended in the last within_seconds, as (duration_ms, name)."""
+        cutoff = time.perf_counter() - within_seconds
+        return sorted(((ms, name) for end, ms, name in list(self.recent) if end >= cutoff), reverse=True)[:count]
+
+    def trace_document(self):
+        pid = os.getpid()
+        metadata = [{"name": "thread_name", "ph": "M", "ts": 0, "pid": pid, "tid": tid, "args": {"name": name}}
+                    for tid, name in self.thread_names.items()]
+        return {"traceEvents": metadata + list(self.events), "displayTimeUnit": "ms"}
+
+    def save_trace(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.trace_document(), f, separators=(",", ":"))
+
+
+PROFILER = Profiler()
+
+
+def profiled(name=None, category="app"):
+    """Decorator timing each call of a function as one span (named after the function by default)."""
+    def decorate(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                PROFILER.record(label, category, start, time.perf_counter())
+        return wrapper
+    return decorate
+
+
+def profiled_paint(func):
+    """Decorator for paint methods: one span per call, named after the item's class."""
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if not PROFILER.enabled:
+            return func(self, *args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            PROFILER.record(type(self).__name__, PAINT_CATEGORY, start, time.perf_counter())
+    return wrapper
+
+
+def profiled_command(command_class):
+    """Class decorator for QUndoCommands: times redo() and undo(), with the command text as an argument."""
+    for method_name in ("redo", "undo"):
+        method = command_class.__dict__.get(method_name)
+        if method is None:
+            continue
+
+        def make_wrapper(method, label):
+            @functools.wraps(method)
+            def wrapper(self):
+                if not PROFILER.enabled:
+                    return method(self)
+                start = time.perf_counter()
+                try:
+                    return method(self)
+                finally:
+                    PROFILER.record(label, "command", start, time.perf_counter(), {"text": self.text()})
+            return wrapper
+        setattr(command_class, method_name, make_wrapper(method, f"{command_class.__name__}.{method_name}"))
+    return command_class
+
+
+def start_tracing_from_environment():
+    """Enables recording if ERD_TRACE_FILE is set; returns the path the trace should be written to, or None."""
+    path = os.environ.get(TRACE_FILE_ENV)
+    if path:
+        PROFILER.enable()
+    return path
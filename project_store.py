@@ -0,0 +1,146 @@
+# project_store.py
+# SQLite-backed project files (.erdb): one row per table, column and relationship, so saves can rewrite only what changed.
+
+import sqlite3
+
+from model_snapshot import ColumnSnapshot, TableSnapshot, RelationshipSnapshot, DiagramSnapshot
+from utils import calculate_table_height
+
+PROJECT_STORE_SCHEMA_VERSION = 1
+SQLITE_FILE_MAGIC = b"SQLite format 3\x00"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS erd_tables (
+    name TEXT PRIMARY KEY,
+    x REAL NOT NULL,
+    y REAL NOT NULL,
+    width REAL NOT NULL,
+    body_color TEXT,
+    header_color TEXT
+);
+CREATE TABLE IF NOT EXISTS erd_columns (
+    table_name TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    data_type TEXT,
+    is_pk INTEGER NOT NULL,
+    is_fk INTEGER NOT NULL,
+    references_table TEXT,
+    references_column TEXT,
+    fk_relationship_type TEXT,
+    PRIMARY KEY (table_name, position)
+);
+CREATE TABLE IF NOT EXISTS erd_relationships (
+    table1_name TEXT NOT NULL,
+    fk_column_name TEXT,
+    table2_name TEXT NOT NULL,
+    pk_column_name TEXT,
+    relationship_type TEXT,
+    vertical_segment_x_override REAL
+);
+CREATE INDEX IF NOT EXISTS erd_relationships_table1 ON erd_relationships (table1_name);
+CREATE INDEX IF NOT EXISTS erd_relationships_table2 ON erd_relationships (table2_name);
+"""
+
+
+def is_project_store_file(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(SQLITE_FILE_MAGIC)) == SQLITE_FILE_MAGIC
+    except OSError:
+        return False
+
+
+def _connect(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(_SCHEMA)
+    version = conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+    if version and int(version[0]) > PROJECT_STORE_SCHEMA_VERSION:
+        conn.close()
+        raise ValueError(f"Project file was written by a newer version (schema v{version[0]}).")
+    return conn
+
+
+def _insert_rows(conn, tables, relationships):
+    conn.executemany("INSERT INTO erd_tables VALUES (?, ?, ?, ?, ?, ?)",
+                     [(t.name, t.x, t.y, t.width, t.body_color_hex, t.header_color_hex) for t in tables])
+    conn.executemany("INSERT INTO erd_columns VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                     [(t.name, position, col.name, col.data_type, int(col.is_pk), int(col.is_fk),
+                       col.references_table, col.references_column, col.fk_relationship_type)
+                      for t in tables for position, col in enumerate(t.columns)])
+    conn.executemany("INSERT INTO erd_relationships VALUES (?, ?, ?, ?, ?, ?)",
+                     [tuple(rel) for rel in relationships])
+
+
+def _write_meta(conn, canvas_width, canvas_height, notes):
+    conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", [
+        ("schema_version", str(PROJECT_STORE_SCHEMA_VERSION)),
+        ("canvas_width", str(canvas_width)),
+        ("canvas_height", str(canvas_height)),
+        ("notes", notes or ""),
+    ])
+
+
+def write_project_store(path, snapshot):
+    """Replaces the whole contents of the project file with a DiagramSnapshot."""
+    conn = _connect(path)
+    try:
+        with conn:
+            conn.execute("DELETE FROM erd_tables")
+            conn.execute("DELETE FROM erd_columns")
+            conn.execute("DELETE FROM erd_relationships")
+            _insert_rows(conn, snapshot.tables, snapshot.relationships)
+            _write_meta(conn, snapshot.canvas_width, snapshot.canvas_height, snapshot.notes)
+    finally:
+        conn.close()
+
+
+def update_project_store(path, dirty_table_names, tables, relationships, canvas_width, canvas_height, notes):
+    """
+    Rewrites only the rows of the named tables: their table row, their columns and every relationship
+    touching them. 'tables' holds TableSnapshots for the dirty names that still exist and 'relationships'
+    every RelationshipSnapshot with either end in dirty_table_names. Names without a snapshot are deleted.
+    """
+    names = [(name,) for name in dirty_table_names]
+    conn = _connect(path)
+    try:
+        with conn:
+            conn.executemany("DELETE FROM erd_tables WHERE name = ?", names)
+            conn.executemany("DELETE FROM erd_columns WHERE table_name = ?", names)
+            conn.executemany("DELETE FROM erd_relationships WHERE table1_name = ?", names)
+            conn.executemany("DELETE FROM erd_relationships WHERE table2_name = ?", names)
+            _insert_rows(conn, tables, relationships)
+            _write_meta(conn, canvas_width, canvas_height, notes)
+    finally:
+        conn.close()
+
+
+def read_project_store(path):
+    """Reads a project file into a DiagramSnapshot."""
+    conn = _connect(path)
+    try:
+        meta = dict(conn.execute("SELECT key, value FROM meta"))
+        columns_by_table = {}
+        for row in conn.execute("SELECT table_name, name, data_type, is_pk, is_fk, references_table, "
+                                "references_column, fk_relationship_type FROM erd_columns "
+                                "ORDER BY table_name, position"):
+            columns_by_table.setdefault(row[0], []).append(
+                ColumnSnapshot(row[1], row[2], bool(row[3]), bool(row[4]), row[5], row[6], row[7] or "N:1"))
+        tables = tuple(
+            TableSnapshot(name, x, y, width, calculate_table_height(len(columns_by_table.get(name, ()))),
+                          body_color, header_color, tuple(columns_by_table.get(name, ())))
+            for name, x, y, width, body_color, header_color
+            in conn.execute("SELECT name, x, y, width, body_color, header_color FROM erd_tables ORDER BY name"))
+        relationships = tuple(RelationshipSnapshot(*row) for row in conn.execute(
+            "SELECT table1_name, fk_column_name, table2_name, pk_column_name, relationship_type, "
+            "vertical_segment_x_override FROM erd_relationships "
+            "ORDER BY table1_name, fk_column_name, table2_name, pk_column_name"))
+    finally:
+        conn.close()
+    canvas_width = int(meta["canvas_width"]) if meta.get("canvas_width") else None
+    canvas_height = int(meta["canvas_height"]) if meta.get("canvas_height") else None
+    return DiagramSnapshot(tables, relationships, canvas_width, canvas_height, meta.get("notes", ""))
@@ -0,0 +1,36 @@
+# save_worker.py
+# Writes diagram snapshots to disk off the GUI thread.
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from diagram_io import write_diagram_file
+
+
+class SaveWorker(QThread):
+    """
+    Writes a DiagramSnapshot with write_diagram_file in a background thread.
+    progress carries a percentage; exactly one of save_finished / save_failed is emitted at the end.
+    """
+    progress = pyqtSignal(int)
+    save_finished = pyqtSignal(str)
+    save_failed = pyqtSignal(str, str)
+
+    def __init__(self, path, file_format, snapshot, dirty_table_names=None, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.file_format = file_format
+        self.snapshot = snapshot
+        self.dirty_table_names = dirty_table_names
+
+    def _report_progress(self, done, total):
+        # 100% is only reported once the file is in place
+        self.progress.emit(min(99, done * 100 // total) if total else 99)
+
+    def run(self):
+        try:
+            write_diagram_file(self.path, self.file_format, self.snapshot, self._report_progress, self.dirty_table_names)
+        except Exception as e:
+            self.save_failed.emit(self.path, str(e))
+            return
+        self.progress.emit(100)
+        self.save_finished.emit(self.path)
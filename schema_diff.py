@@ -0,0 +1,100 @@
+# schema_diff.py
+# Compares a parsed schema with the current diagram, so Refresh from SQL only applies what changed.
+
+import copy
+from collections import namedtuple
+
+from sql_dialects import get_sql_dialect
+
+# added_tables: new table names, in schema order; dropped_tables: names no longer in the schema;
+# altered_tables: {name: new column list}; added_relationships: relationship dicts as returned by the parser;
+# dropped_relationships: Relationship objects whose FK is gone (not counting those of dropped tables)
+SchemaDiff = namedtuple("SchemaDiff", "added_tables dropped_tables altered_tables added_relationships dropped_relationships")
+
+
+def relationship_key(relationship):
+    return (relationship.table1_name, relationship.fk_column_name, relationship.table2_name, relationship.pk_column_name)
+
+
+def _parsed_relationship_key(rel_info):
+    return (rel_info["from_table"], rel_info["from_col"], rel_info["to_table"], rel_info["to_col"])
+
+
+def _same_fk(live_col, parsed_col):
+    return (live_col.is_fk, live_col.references_table, live_col.references_column) == \
+           (parsed_col.is_fk, parsed_col.references_table, parsed_col.references_column)
+
+
+def _columns_changed(live_columns, parsed_columns, same_type):
+    """True if columns were added, dropped, reordered, or changed type, PK or FK."""
+    if len(live_columns) != len(parsed_columns):
+        return True
+    for live_col, parsed_col in zip(live_columns, parsed_columns):
+        if live_col.name != parsed_col.name or live_col.is_pk != parsed_col.is_pk or \
+           not _same_fk(live_col, parsed_col) or not same_type(live_col.data_type, parsed_col.data_type):
+            return True
+    return False
+
+
+def _merged_columns(live_columns, parsed_columns, same_type):
+    """
+    Copies of the parsed columns, except that a column whose type only differs in spelling (INT vs INTEGER)
+    keeps the diagram's type, and an unchanged FK keeps its relationship type, which SQL can't express.
+    """
+    live_by_name = {col.name: col for col in live_columns}
+    merged = []
+    for parsed_col in parsed_columns:
+        col = copy.deepcopy(parsed_col)
+        live_col = live_by_name.get(col.name)
+        if live_col is not None:
+            if same_type(live_col.data_type, col.data_type):
+                col.data_type = live_col.data_type
+            if _same_fk(live_col, col):
+                col.fk_relationship_type = live_col.fk_relationship_type
+        merged.append(col)
+    return merged
+
+
+def diff_schema(tables_data, relationships_data, parsed_tables, parsed_relationships, dialect=None):
+    """
+    Diffs a schema from parse_sql_schema/read_sqlite_schema against tables_data and relationships_data.
+    Tables and columns are matched by name, so a rename shows up as a drop plus an add.
+    Types are compared the way they would come back from the dialect's SQL.
+    """
+    dialect = get_sql_dialect(dialect)
+
+    def normalized(type_str):
+        return dialect.to_app_type(dialect.to_sql_type(type_str))
+
+    def same_type(live_type, parsed_type):
+        return live_type == parsed_type or normalized(live_type) == normalized(parsed_type)
+
+    added_tables = [name for name in parsed_tables if name not in tables_data]
+    dropped_tables = [name for name in tables_data if name not in parsed_tables]
+
+    altered_tables = {}
+    for name, table in tables_data.items():
+        parsed = parsed_tables.get(name)
+        if parsed is None:
+            continue
+        if _columns_changed(table.columns, parsed["columns"], same_type):
+            altered_tables[name] = _merged_columns(table.columns, parsed["columns"], same_type)
+
+    parsed_rels_by_key = {}
+    for rel_info in parsed_relationships:
+        parsed_rels_by_key.setdefault(_parsed_relationship_key(rel_info), rel_info)
+    live_keys = set()
+    dropped_relationships = []
+    dropped_table_names = set(dropped_tables)
+    for rel in relationships_data:
+        key = relationship_key(rel)
+        live_keys.add(key)
+        if key not in parsed_rels_by_key and rel.table1_name not in dropped_table_names and rel.table2_name not in dropped_table_names:
+            dropped_relationships.append(rel)
+    added_relationships = [rel_info for key, rel_info in parsed_rels_by_key.items() if key not in live_keys]
+
+    return SchemaDiff(added_tables, dropped_tables, altered_tables, added_relationships, dropped_relationships)
+
+
+def is_empty_diff(diff):
+    return not any(diff)
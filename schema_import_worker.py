@@ -0,0 +1,36 @@
+# schema_import_worker.py
+# Introspects a SQLite database off the GUI thread for Import SQLite Database.
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from sqlite_introspection import read_sqlite_schema, SchemaImportCancelled
+
+
+class SchemaImportWorker(QThread):
+    """
+    Reads a database schema with read_sqlite_schema in a background thread. progress carries a percentage;
+    at the end either import_finished(tables, relationships) or import_failed(path, error) is emitted,
+    unless the read was stopped with requestInterruption().
+    """
+    progress = pyqtSignal(int)
+    import_finished = pyqtSignal(object, object)
+    import_failed = pyqtSignal(str, str)
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.path = path
+
+    def _report_progress(self, done, total):
+        self.progress.emit(done * 100 // total if total else 100)
+        return not self.isInterruptionRequested()
+
+    def run(self):
+        try:
+            tables, relationships = read_sqlite_schema(self.path, self._report_progress)
+        except SchemaImportCancelled:
+            return
+        except Exception as e:
+            self.import_failed.emit(self.path, str(e))
+            return
+        if not self.isInterruptionRequested():
+            self.import_finished.emit(tables, relationships)
@@ -0,0 +1,143 @@
+# spatial_index.py
+# Lightweight rectangle records for tables, bucketed in a uniform grid for fast region queries.
+
+from PyQt6.QtCore import QRectF
+from constants import TABLE_RESIZE_HANDLE_WIDTH
+from utils import calculate_table_height, table_attachment_point
+
+SPATIAL_INDEX_CELL_SIZE = 512
+
+
+class TableRectRecord:
+    """
+    Scene geometry of one table, kept even when the table has no graphic item.
+    Mirrors the parts of TableGraphicItem's API that relationship routing relies on.
+    """
+    __slots__ = ("table_data", "x", "y", "width", "height", "cells")
+
+    def __init__(self, table_data, x, y, width, height):
+        self.table_data = table_data
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.cells = ()
+
+    def sceneBoundingRect(self):
+        return QRectF(self.x - TABLE_RESIZE_HANDLE_WIDTH / 2, self.y,
+                      self.width + TABLE_RESIZE_HANDLE_WIDTH, self.height)
+
+    def get_attachment_point(self, other_table_graphic, from_column_name=None, to_column_name=None,
+                             hint_intermediate_x=None):
+        other_rect = other_table_graphic.sceneBoundingRect() if other_table_graphic else None
+        return table_attachment_point(self.sceneBoundingRect(), self.table_data,
+                                      from_column_name or to_column_name, other_rect, hint_intermediate_x)
+
+
+class TableSpatialIndex:
+    """Uniform-grid index of TableRectRecords keyed by the Table object."""
+
+    def __init__(self, cell_size=SPATIAL_INDEX_CELL_SIZE):
+        self.cell_size = cell_size
+        self.records = {} # {Table: TableRectRecord}
+        self.cells = {}   # {(cell_x, cell_y): set of TableRectRecord}
+        self._bounds = QRectF() # Union of all record rectangles, maintained incrementally
+        self._bounds_stale = False # Set when a record on the boundary moved inward or went away
+
+    def __len__(self):
+        return len(self.records)
+
+    def _cells_for(self, x, y, width, height):
+        size = self.cell_size
+        x0, x1 = int((x - TABLE_RESIZE_HANDLE_WIDTH) // size), int((x + width + TABLE_RESIZE_HANDLE_WIDTH) // size)
+        y0, y1 = int(y // size), int((y + height) // size)
+        return tuple((cx, cy) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1))
+
+    def _touches_bounds(self, rect):
+        bounds = self._bounds
+        return (rect.left() <= bounds.left() or rect.top() <= bounds.top() or
+                rect.right() >= bounds.right() or rect.bottom() >= bounds.bottom())
+
+    def _grow_bounds(self, rect):
+        if not self._bounds_stale:
+            self._bounds = rect if self._bounds.isEmpty() else self._bounds.united(rect)
+
+    def update_table(self, table_data, height=None):
+        """Inserts or moves the record for table_data; returns the record."""
+        if height is None:
+            height = table_data.graphic_item.height if table_data.graphic_item else calculate_table_height(len(table_data.columns))
+        width = table_data.graphic_item.width if table_data.graphic_item else table_data.width
+        record = self.records.get(table_data)
+        if record is None:
+            record = TableRectRecord(table_data, table_data.x, table_data.y, width, height)
+            self.records[table_data] = record
+        elif (record.x, record.y, record.width, record.height) == (table_data.x, table_data.y, width, height):
+            return record
+        else:
+            if not self._bounds_stale and self._touches_bounds(record.sceneBoundingRect()):
+                self._bounds_stale = True # It may have been the only record holding that edge
+            record.x, record.y, record.width, record.height = table_data.x, table_data.y, width, height
+        self._grow_bounds(record.sceneBoundingRect())
+
+        new_cells = self._cells_for(record.x, record.y, record.width, record.height)
+        if new_cells != record.cells:
+            for cell in record.cells:
+                bucket = self.cells.get(cell)
+                if bucket is not None:
+                    bucket.discard(record)
+                    if not bucket:
+                        del self.cells[cell]
+            for cell in new_cells:
+                self.cells.setdefault(cell, set()).add(record)
+            record.cells = new_cells
+        return record
+
+    def remove_table(self, table_data):
+        record = self.records.pop(table_data, None)
+        if record is None:
+            return
+        if not self._bounds_stale and self._touches_bounds(record.sceneBoundingRect()):
+            self._bounds_stale = True
+        for cell in record.cells:
+            bucket = self.cells.get(cell)
+            if bucket is not None:
+                bucket.discard(record)
+                if not bucket:
+                    del self.cells[cell]
+
+    def record_for(self, table_data):
+        return self.records.get(table_data)
+
+    def clear(self):
+        self.records.clear()
+        self.cells.clear()
+        self._bounds = QRectF()
+        self._bounds_stale = False
+
+    def query(self, rect):
+        """Returns the set of records whose rectangles intersect the given QRectF."""
+        size = self.cell_size
+        x0, x1 = int(rect.left() // size), int(rect.right() // size)
+        y0, y1 = int(rect.top() // size), int(rect.bottom() // size)
+        found = set()
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > len(self.cells):
+            candidate_buckets = self.cells.values()
+        else:
+            candidate_buckets = (self.cells[(cx, cy)] for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1)
+                                 if (cx, cy) in self.cells)
+        for bucket in candidate_buckets:
+            found.update(bucket)
+        return {record for record in found if record.sceneBoundingRect().intersects(rect)}
+
+    def bounding_rect(self):
+        """
+        Returns the union of all record rectangles, or an empty QRectF.
+        Growing is O(1) per update; a full pass only happens after a boundary record moved inward or was removed.
+        """
+        if self._bounds_stale:
+            overall = QRectF()
+            for record in self.records.values():
+                overall = overall.united(record.sceneBoundingRect())
+            self._bounds = overall
+            self._bounds_stale = False
+        return QRectF(self._bounds)
@@ -0,0 +1,219 @@
+# sql_dialects.py
+# SQL dialects for export and import: identifier quoting and precompiled, memoized type mappings in both directions.
+
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+SqlType = namedtuple("SqlType", "name args auto_increment")
+SqlType.__doc__ = "A tokenized column type: upper-cased name words, tuple of length/precision args, and whether it auto-increments."
+
+TYPE_CACHE_SIZE = 4096 # Distinct type strings remembered per dialect and direction
+
+_TYPE_TOKEN_RE = re.compile(
+    r"'(?:[^']|'')*'"                     # String literal (e.g. a DEFAULT value), skipped as one token
+    r"|\"(?:[^\"]|\"\")*\""               # Quoted identifier (e.g. a COLLATE name)
+    r"|\((?:[^()]|\([^()]*\))*\)"         # Parenthesized args, one level of nesting
+    r"|[A-Za-z_][A-Za-z0-9_$]*"           # Word
+    r"|\S"
+)
+# Words that end the type part of a column definition
+_TYPE_STOP_WORDS = frozenset((
+    "CONSTRAINT", "PRIMARY", "NOT", "NULL", "UNIQUE", "DEFAULT", "REFERENCES", "CHECK", "COLLATE",
+    "GENERATED", "AUTO_INCREMENT", "AUTOINCREMENT", "IDENTITY", "ON", "COMMENT", "CHARSET", "SET", "AS",
+))
+_AUTO_INCREMENT_WORDS = frozenset(("AUTO_INCREMENT", "AUTOINCREMENT", "IDENTITY"))
+_BARE_NAME_RE = re.compile(r"[A-Z][A-Z0-9_]*")
+
+INTEGER_APP_TYPES = frozenset(("INTEGER", "INT", "BIGINT", "SMALLINT"))
+SIZED_APP_TYPES = frozenset(("VARCHAR", "CHAR", "NUMERIC", "DECIMAL")) # App types that keep their (length) on import
+
+
+def parse_sql_type(type_str):
+    """
+    Tokenizes a column type, or the rest of a column definition after its name, into an SqlType.
+    'varchar( 255 ) NOT NULL' -> SqlType('VARCHAR', ('255',), False); 'INT UNSIGNED AUTO_INCREMENT'
+    -> SqlType('INT UNSIGNED', (), True). Whole words are compared, so 'BIGINT' never reads as 'INT'.
+    """
+    words = []
+    args = ()
+    auto_increment = False
+    collecting = True
+    for token in _TYPE_TOKEN_RE.findall(type_str or ""):
+        first = token[0]
+        if first == "(":
+            if collecting and words:
+                args = tuple(arg.strip().upper() for arg in token[1:-1].split(",") if arg.strip())
+            collecting = False
+            continue
+        if not (first.isalpha() or first == "_"):
+            collecting = False
+            continue
+        word = token.upper()
+        if word in _AUTO_INCREMENT_WORDS:
+            auto_increment = True
+        if collecting:
+            if word in _TYPE_STOP_WORDS:
+                if word == "SET" and words and words[-1] == "CHARACTER": # CHARACTER SET, not CHARACTER VARYING
+                    words.pop()
+                collecting = False
+            else:
+                words.append(word)
+    return SqlType(" ".join(words), args, auto_increment)
+
+
+def _format_type(name, args):
+    return f"{name}({','.join(args)})" if args else name
+
+
+class SqlDialect:
+    """
+    One SQL flavour. sql_types maps app data types (upper-case, without args) to this dialect's column
+    types; app_types maps the dialect's type names back, and sized_app_types maps (name, args) pairs
+    such as ('TINYINT', ('1',)) that mean something else with those args.
+    """
+    def __init__(self, name, display_name, quote_open, quote_close, sql_types, app_types, sized_app_types=None):
+        self.name = name
+        self.display_name = display_name
+        self.quote_open = quote_open
+        self.quote_close = quote_close
+        self.sql_types = dict(sql_types)
+        self.app_types = dict(app_types)
+        self.sized_app_types = dict(sized_app_types or {})
+        # Per-instance caches, so each dialect keeps its own hot entries
+        self.to_sql_type = lru_cache(maxsize=TYPE_CACHE_SIZE)(self._to_sql_type)
+        self._app_type_for = lru_cache(maxsize=TYPE_CACHE_SIZE)(self._app_type_for_uncached)
+
+    def __repr__(self):
+        return f"SqlDialect({self.name!r})"
+
+    def quote_identifier(self, identifier):
+        """Quotes a table/column/constraint name, doubling any closing quote inside it."""
+        return f"{self.quote_open}{identifier.replace(self.quote_close, self.quote_close * 2)}{self.quote_close}"
+
+    def _to_sql_type(self, app_type_str):
+        """App data type -> column type for this dialect. Memoized as to_sql_type."""
+        sql_type = parse_sql_type(app_type_str or "TEXT")
+        if not sql_type.name:
+            return app_type_str.strip().upper()
+        mapped = self.sql_types.get(sql_type.name)
+        if sql_type.args:
+            # VARCHAR(255), DECIMAL(10,2): rename the base only when the dialect's type is a bare name too,
+            # otherwise keep it as the user wrote it
+            if mapped and mapped != sql_type.name and _BARE_NAME_RE.fullmatch(mapped):
+                return _format_type(mapped, sql_type.args)
+            return app_type_str.strip().upper()
+        return mapped or sql_type.name
+
+    def to_app_type(self, sql_type_str):
+        """Column type (or the rest of a column definition) in this dialect -> app data type."""
+        if not sql_type_str:
+            return "TEXT"
+        return self._app_type_for(parse_sql_type(sql_type_str))
+
+    def _app_type_for_uncached(self, sql_type):
+        if not sql_type.name:
+            return "TEXT"
+        if sql_type.args:
+            sized = self.sized_app_types.get((sql_type.name, sql_type.args))
+            if sized:
+                return sized
+        app_type = self.app_types.get(sql_type.name)
+        if app_type is None:
+            return _format_type(sql_type.name, sql_type.args) # Unknown type, kept as written
+        if sql_type.auto_increment and app_type in INTEGER_APP_TYPES:
+            return "SERIAL"
+        if sql_type.args and app_type in SIZED_APP_TYPES:
+            return _format_type(app_type, sql_type.args)
+        return app_type
+
+
+# Type names every dialect reads back the same way (aliases from the other dialects are accepted too,
+# so a PostgreSQL dump still imports sensibly with the SQLite dialect selected)
+_COMMON_APP_TYPES = {
+    "TEXT": "TEXT", "CLOB": "TEXT", "STRING": "TEXT",
+    "INTEGER": "INTEGER", "INT": "INTEGER", "INT4": "INTEGER", "MEDIUMINT": "INTEGER",
+    "BIGINT": "BIGINT", "INT8": "BIGINT",
+    "SMALLINT": "SMALLINT", "INT2": "SMALLINT", "TINYINT": "SMALLINT",
+    "SERIAL": "SERIAL", "SERIAL4": "SERIAL", "BIGSERIAL": "SERIAL", "SERIAL8": "SERIAL", "SMALLSERIAL": "SERIAL",
+    "REAL": "REAL", "FLOAT4": "REAL",
+    "FLOAT": "FLOAT",
+    "DOUBLE": "DOUBLE PRECISION", "DOUBLE PRECISION": "DOUBLE PRECISION", "FLOAT8": "DOUBLE PRECISION",
+    "NUMERIC": "NUMERIC", "DECIMAL": "DECIMAL", "DEC": "DECIMAL", "MONEY": "DECIMAL",
+    "BOOLEAN": "BOOLEAN", "BOOL": "BOOLEAN", "BIT": "BOOLEAN",
+    "DATE": "DATE",
+    "DATETIME": "DATETIME", "DATETIME2": "DATETIME", "SMALLDATETIME": "DATETIME", "DATETIMEOFFSET": "DATETIME",
+    "TIMESTAMP": "TIMESTAMP", "TIMESTAMPTZ": "TIMESTAMP",
+    "TIMESTAMP WITH TIME ZONE": "TIMESTAMP", "TIMESTAMP WITHOUT TIME ZONE": "TIMESTAMP",
+    "TIME": "TIME", "TIMETZ": "TIME", "TIME WITH TIME ZONE": "TIME", "TIME WITHOUT TIME ZONE": "TIME",
+    "BLOB": "BLOB", "BYTEA": "BLOB", "BINARY": "BLOB", "VARBINARY": "BLOB", "IMAGE": "BLOB",
+    "TINYBLOB": "BLOB", "MEDIUMBLOB": "BLOB", "LONGBLOB": "BLOB",
+    "TINYTEXT": "TEXT", "MEDIUMTEXT": "TEXT", "LONGTEXT": "TEXT", "NTEXT": "TEXT",
+    "UUID": "UUID", "UNIQUEIDENTIFIER": "UUID",
+    "JSON": "JSON", "JSONB": "JSON",
+    "VARCHAR": "VARCHAR", "CHARACTER VARYING": "VARCHAR", "NVARCHAR": "VARCHAR", "VARCHAR2": "VARCHAR",
+    "CHAR": "CHAR", "CHARACTER": "CHAR", "NCHAR": "CHAR", "BPCHAR": "CHAR",
+}
+_COMMON_SIZED_APP_TYPES = {
+    ("VARCHAR", ("MAX",)): "TEXT", ("NVARCHAR", ("MAX",)): "TEXT", ("VARBINARY", ("MAX",)): "BLOB",
+}
+
+# The original, dialect-neutral mapping; its output is what the app has always exported
+_GENERIC_SQL_TYPES = {
+    "TEXT": "TEXT", "INTEGER": "INTEGER", "INT": "INTEGER",
+    "SERIAL": "INTEGER", # Simplified; pick a dialect for SERIAL/AUTO_INCREMENT/IDENTITY
+    "BIGINT": "BIGINT", "SMALLINT": "SMALLINT", "REAL": "REAL", "FLOAT": "FLOAT",
+    "DOUBLE PRECISION": "DOUBLE PRECISION", "NUMERIC": "NUMERIC", "DECIMAL": "DECIMAL",
+    "BOOLEAN": "BOOLEAN", # Standard SQL; some DBs use INTEGER
+    "DATE": "DATE", "DATETIME": "DATETIME", "TIMESTAMP": "TIMESTAMP", "TIME": "TIME", "BLOB": "BLOB",
+    "UUID": "VARCHAR(36)", # Common representation for UUID
+    "JSON": "TEXT",
+    "CHAR": "CHAR",
+}
+
+GENERIC_DIALECT = SqlDialect(
+    "generic", "Standard SQL", '"', '"', _GENERIC_SQL_TYPES, _COMMON_APP_TYPES, _COMMON_SIZED_APP_TYPES)
+
+POSTGRESQL_DIALECT = SqlDialect(
+    "postgresql", "PostgreSQL", '"', '"',
+    {**_GENERIC_SQL_TYPES, "SERIAL": "SERIAL", "DATETIME": "TIMESTAMP", "BLOB": "BYTEA", "UUID": "UUID", "JSON": "JSONB"},
+    _COMMON_APP_TYPES, _COMMON_SIZED_APP_TYPES)
+
+MYSQL_DIALECT = SqlDialect(
+    "mysql", "MySQL", "`", "`",
+    {**_GENERIC_SQL_TYPES, "INTEGER": "INT", "INT": "INT", "SERIAL": "INT AUTO_INCREMENT",
+     "DOUBLE PRECISION": "DOUBLE", "BOOLEAN": "TINYINT(1)", "UUID": "CHAR(36)", "JSON": "JSON"},
+    _COMMON_APP_TYPES,
+    {**_COMMON_SIZED_APP_TYPES, ("TINYINT", ("1",)): "BOOLEAN"})
+
+SQLITE_DIALECT = SqlDialect(
+    "sqlite", "SQLite", '"', '"',
+    {**_GENERIC_SQL_TYPES, "INT": "INTEGER", "SERIAL": "INTEGER", "UUID": "TEXT"}, # INTEGER PRIMARY KEY is the rowid
+    _COMMON_APP_TYPES, _COMMON_SIZED_APP_TYPES)
+
+SQLSERVER_DIALECT = SqlDialect(
+    "sqlserver", "SQL Server", "[", "]",
+    {**_GENERIC_SQL_TYPES, "TEXT": "NVARCHAR(MAX)", "INTEGER": "INT", "INT": "INT", "SERIAL": "INT IDENTITY(1,1)",
+     "DOUBLE PRECISION": "FLOAT", "BOOLEAN": "BIT", "DATETIME": "DATETIME2", "TIMESTAMP": "DATETIME2",
+     "BLOB": "VARBINARY(MAX)", "UUID": "UNIQUEIDENTIFIER", "JSON": "NVARCHAR(MAX)"},
+    _COMMON_APP_TYPES, _COMMON_SIZED_APP_TYPES) # TIMESTAMP there is rowversion, hence DATETIME2 on export
+
+SQL_DIALECTS = {d.name: d for d in (GENERIC_DIALECT, POSTGRESQL_DIALECT, MYSQL_DIALECT, SQLITE_DIALECT, SQLSERVER_DIALECT)}
+DEFAULT_SQL_DIALECT = GENERIC_DIALECT.name
+
+
+def register_sql_dialect(dialect):
+    """Adds (or replaces) a dialect so it can be selected by name."""
+    SQL_DIALECTS[dialect.name] = dialect
+
+
+def get_sql_dialect(dialect=None):
+    """Returns the SqlDialect for a name, passes an SqlDialect through, and gives the default dialect for None."""
+    if dialect is None:
+        return SQL_DIALECTS[DEFAULT_SQL_DIALECT]
+    if isinstance(dialect, SqlDialect):
+        return dialect
+    try:
+        return SQL_DIALECTS[dialect]
+    except KeyError:
+        raise ValueError(f"Unknown SQL dialect: {dialect!r}") from None
@@ -1,88 +1,101 @@
 # sql_generator.py
 # Contains logic to generate SQL statements from diagram data.
 
-def map_data_type_to_sql(app_type_str):
-    """Maps application-specific data types to common SQL types."""
-    if not app_type_str:
-        return "TEXT" # Default if type is empty
-    app_type_upper = app_type_str.upper()
-
-    # Handle types with lengths like VARCHAR(255), CHAR(N)
-    if "VARCHAR" in app_type_upper and "(" in app_type_upper and ")" in app_type_upper:
-        return app_type_upper
-    if "CHAR" in app_type_upper and "(" in app_type_upper and ")" in app_type_upper:
-        return app_type_upper
+from sql_dialects import get_sql_dialect
+from profiling import profiled
+
+
+def map_data_type_to_sql(app_type_str, dialect=None):
+    """Maps an application data type to a column type of the given SQL dialect (name or SqlDialect; None is standard SQL)."""
+    return get_sql_dialect(dialect).to_sql_type(app_type_str)
+
+
+SQL_PREVIEW_MAX_CHARS = 64 * 1024 # The preview pane shows at most this much of the DDL
+
+
+def create_table_sql(table, dialect=None):
+    """The CREATE TABLE statement for one table (a comment if it has no columns)."""
+    dialect = get_sql_dialect(dialect)
+    quote = dialect.quote_identifier
+    to_sql_type = dialect.to_sql_type
+    if not table.columns:
+        return f"-- Table {quote(table.name)} has no columns and will not be created.\n"
+
+    cols_sql = []
+    pk_cols = []
+    for col in table.columns:
+        col_sql_part = f"    {quote(col.name)} {to_sql_type(col.data_type)}"
+        if col.is_pk:
+            pk_cols.append(quote(col.name))
+        cols_sql.append(col_sql_part)
+    
+    create_table_sql = f"CREATE TABLE {quote(table.name)} (\n"
+    create_table_sql += ",\n".join(cols_sql)
+    
+    if pk_cols:
+        create_table_sql += f",\n    PRIMARY KEY ({', '.join(pk_cols)})"
     
-    # Mapping for common types
-    mapping = {
-        "TEXT": "TEXT",
-        "INTEGER": "INTEGER",
-        "INT": "INTEGER",
-        "SERIAL": "INTEGER", # Simplified; consider dialect for AUTOINCREMENT/SERIAL
-        "BIGINT": "BIGINT",
-        "SMALLINT": "SMALLINT",
-        "REAL": "REAL",
-        "FLOAT": "FLOAT",
-        "DOUBLE PRECISION": "DOUBLE PRECISION",
-        "NUMERIC": "NUMERIC",
-        "DECIMAL": "DECIMAL",
-        "BOOLEAN": "BOOLEAN", # Standard SQL; some DBs use INTEGER
-        "DATE": "DATE",
-        "DATETIME": "DATETIME",
-        "TIMESTAMP": "TIMESTAMP",
-        "TIME": "TIME",
-        "BLOB": "BLOB",
-        "UUID": "VARCHAR(36)", # Common representation for UUID
-        "JSON": "TEXT",        # Or JSON type if DB supports it
-        "CHAR": "CHAR"         # Default for CHAR if no length, or CHAR(1)
-    }
-    return mapping.get(app_type_upper, app_type_upper) # Return original if not in map (e.g. VARCHAR) or default
-
-def generate_sql_for_diagram(tables_data, relationships_data):
+    create_table_sql += "\n);\n"
+    return create_table_sql
+
+
+def iter_sql_for_diagram(tables_data, relationships_data, dialect=None, statement_cache=None):
     """
-    Generates SQL CREATE TABLE and ALTER TABLE statements for the diagram.
+    Yields the SQL CREATE TABLE and ALTER TABLE statements for the diagram one fragment at a time,
+    so callers can write or display them without building the whole script in memory.
     tables_data: dict of {name: Table_object}
     relationships_data: list of Relationship_object
+    dialect: SQL dialect name or SqlDialect; decides identifier quoting and column types
+    statement_cache: optional {table name: CREATE TABLE statement} that is reused and filled in;
+    the caller drops the entries of changed tables (and everything when the dialect changes)
     """
-    sql_statements = []
-    
+    dialect = get_sql_dialect(dialect)
+    quote = dialect.quote_identifier
     sorted_table_names = sorted(tables_data.keys())
 
     for table_name in sorted_table_names:
-        table = tables_data[table_name]
-        if not table.columns:
-            sql_statements.append(f"-- Table \"{table.name}\" has no columns and will not be created.\n")
-            continue
-
-        cols_sql = []
-        pk_cols = []
-        for col in table.columns:
-            col_sql_part = f"    \"{col.name}\" {map_data_type_to_sql(col.data_type)}"
-            if col.is_pk:
-                pk_cols.append(f"\"{col.name}\"")
-            cols_sql.append(col_sql_part)
-        
-        create_table_sql = f"CREATE TABLE \"{table.name}\" (\n"
-        create_table_sql += ",\n".join(cols_sql)
-        
-        if pk_cols:
-            create_table_sql += f",\n    PRIMARY KEY ({', '.join(pk_cols)})"
-        
-        create_table_sql += "\n);"
-        sql_statements.append(create_table_sql)
-        sql_statements.append("\n")
+        statement = statement_cache.get(table_name) if statement_cache is not None else None
+        if statement is None:
+            statement = create_table_sql(tables_data[table_name], dialect)
+            if statement_cache is not None:
+                statement_cache[table_name] = statement
+        yield statement
 
     if relationships_data:
-        sql_statements.append("-- Foreign Key Constraints\n")
+        yield "-- Foreign Key Constraints\n"
         sorted_relationships = sorted(relationships_data, key=lambda r: (r.table1_name, r.fk_column_name))
         for rel in sorted_relationships:
             constraint_name = f"fk_{rel.table1_name}_{rel.fk_column_name}"
-            alter_sql = (
-                f"ALTER TABLE \"{rel.table1_name}\"\n"
-                f"ADD CONSTRAINT \"{constraint_name}\" FOREIGN KEY (\"{rel.fk_column_name}\")\n"
-                f"REFERENCES \"{rel.table2_name}\" (\"{rel.pk_column_name}\");"
+            yield (
+                f"ALTER TABLE {quote(rel.table1_name)}\n"
+                f"ADD CONSTRAINT {quote(constraint_name)} FOREIGN KEY ({quote(rel.fk_column_name)})\n"
+                f"REFERENCES {quote(rel.table2_name)} ({quote(rel.pk_column_name)});\n"
             )
-            sql_statements.append(alter_sql)
-            sql_statements.append("\n")
-            
-    return "".join(sql_statements)
\ No newline at end of file
+
+
+@profiled(category="sql")
+def write_sql_for_diagram(file_obj, tables_data, relationships_data, dialect=None):
+    """Writes the diagram's SQL to an open text file (or anything with write()) statement by statement."""
+    write = file_obj.write
+    for statement in iter_sql_for_diagram(tables_data, relationships_data, dialect):
+        write(statement)
+
+
+@profiled(category="sql")
+def preview_sql_for_diagram(tables_data, relationships_data, max_chars=SQL_PREVIEW_MAX_CHARS, dialect=None, statement_cache=None):
+    """Returns the first statements of the diagram's SQL, stopping once max_chars have been produced."""
+    fragments = []
+    length = 0
+    for statement in iter_sql_for_diagram(tables_data, relationships_data, dialect, statement_cache):
+        if length + len(statement) > max_chars and fragments:
+            fragments.append(f"\n-- Preview truncated after {max_chars // 1024} KB; export the SQL to see the complete script.\n")
+            break
+        fragments.append(statement)
+        length += len(statement)
+    return "".join(fragments)
+
+
+@profiled(category="sql")
+def generate_sql_for_diagram(tables_data, relationships_data, dialect=None):
+    """Generates the whole SQL script for the diagram as one string."""
+    return "".join(iter_sql_for_diagram(tables_data, relationships_data, dialect))
@@ -3,166 +3,195 @@
 
 import re
 from data_models import Column
+from sql_dialects import get_sql_dialect
+from profiling import profiled
 
-def map_sql_type_to_app_type(sql_type_str):
-    """Maps common SQL types back to application-specific data types."""
-    if not sql_type_str:
-        return "TEXT"
-    sql_type_upper = sql_type_str.upper()
-
-    # Handle types with lengths like VARCHAR(255), CHAR(N)
-    # This will keep them as is, assuming the app's type list might contain them.
-    if "VARCHAR" in sql_type_upper and "(" in sql_type_upper and ")" in sql_type_upper:
-        return sql_type_upper
-    if "CHAR" in sql_type_upper and "(" in sql_type_upper and ")" in sql_type_upper:
-        return sql_type_upper
-    if "NUMERIC" in sql_type_upper and "(" in sql_type_upper and ")" in sql_type_upper:
-        return sql_type_upper
-    if "DECIMAL" in sql_type_upper and "(" in sql_type_upper and ")" in sql_type_upper:
-        return sql_type_upper
-
-    # Reverse mapping (simplified)
-    # This should ideally align with the app's DEFAULT_COLUMN_DATA_TYPES
-    mapping = {
-        "TEXT": "TEXT",
-        "INTEGER": "INTEGER",
-        "INT": "INTEGER",
-        "BIGINT": "BIGINT",
-        "SMALLINT": "SMALLINT",
-        "REAL": "REAL",
-        "FLOAT": "FLOAT",
-        "DOUBLE": "DOUBLE PRECISION", # Common alias
-        "DOUBLE PRECISION": "DOUBLE PRECISION",
-        "NUMERIC": "NUMERIC", # Base type
-        "DECIMAL": "DECIMAL", # Base type
-        "BOOLEAN": "BOOLEAN",
-        "DATE": "DATE",
-        "DATETIME": "DATETIME",
-        "TIMESTAMP": "TIMESTAMP",
-        "TIME": "TIME",
-        "BLOB": "BLOB",
-        "VARCHAR": "VARCHAR", # Base type
-        "CHAR": "CHAR"        # Base type
-        # Add more mappings as needed
-    }
-    # Attempt to find a direct match or a match for the base type (e.g., "INTEGER" for "INTEGER PRIMARY KEY")
-    for key in mapping:
-        if key in sql_type_upper:
-            return mapping[key]
-    
-    return sql_type_upper # Return original if no simple mapping found
-
-def _extract_identifier(match_obj, group_idx_quoted, group_idx_unquoted):
-    """Helper to get an identifier from regex match groups (quoted or unquoted)."""
-    quoted_val = match_obj.group(group_idx_quoted)
-    if quoted_val is not None:
-        return quoted_val
-    return match_obj.group(group_idx_unquoted)
-
-def parse_sql_schema(sql_content):
+# "Name", `Name`, [Name] or Name; optionally schema-qualified, in which case only the last part is kept
+_IDENT = r'(?:"(?:[^"]|"")+"|`(?:[^`]|``)+`|\[(?:[^\]]|\]\])+\]|[A-Za-z0-9_$]+)'
+_QUALIFIED_IDENT = rf'(?:{_IDENT}\s*\.\s*)*({_IDENT})'
+
+_CREATE_TABLE_RE = re.compile(
+    rf"CREATE\s+(?:TEMP(?:ORARY)?\s+)?TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?{_QUALIFIED_IDENT}\s*\(", re.IGNORECASE)
+_COLUMN_RE = re.compile(rf"({_IDENT})\s+(.+)", re.DOTALL)
+_INLINE_PRIMARY_KEY_RE = re.compile(r"\bPRIMARY\s+KEY\b", re.IGNORECASE)
+_CONSTRAINT_NAME_RE = re.compile(rf"CONSTRAINT\s+{_IDENT}\s+", re.IGNORECASE)
+_IDENT_LIST_RE = re.compile(r"\(([^()]*)\)")
+_FOREIGN_KEY_RE = re.compile(
+    rf"FOREIGN\s+KEY\s*\(\s*({_IDENT})\s*\)\s*REFERENCES\s+{_QUALIFIED_IDENT}\s*\(\s*({_IDENT})\s*\)", re.IGNORECASE)
+_INLINE_REFERENCES_RE = re.compile(rf"\bREFERENCES\s+{_QUALIFIED_IDENT}\s*\(\s*({_IDENT})\s*\)", re.IGNORECASE)
+_ALTER_TABLE_FK_RE = re.compile(
+    rf"ALTER\s+TABLE\s+(?:ONLY\s+)?{_QUALIFIED_IDENT}\s+"  # From Table
+    rf"ADD\s+(?:CONSTRAINT\s+{_IDENT}\s+)?"  # Optional constraint name, not used
+    rf"FOREIGN\s+KEY\s*\(\s*({_IDENT})\s*\)\s*"  # From Column
+    rf"REFERENCES\s+{_QUALIFIED_IDENT}\s*\(\s*({_IDENT})\s*\)",  # To Table, To Column
+    re.IGNORECASE)
+# Table-level definitions that aren't columns. CONSTRAINT/PRIMARY/FOREIGN/UNIQUE/CHECK are reserved words; KEY, INDEX,
+# FULLTEXT, SPATIAL and EXCLUDE aren't (`key TEXT` is a column), so they only count when followed by a column list:
+# [FULLTEXT|SPATIAL] KEY|INDEX [name] [USING type] (col, ...) or EXCLUDE [USING method] (...)
+_TABLE_CONSTRAINT_RE = re.compile(
+    r"(?:CONSTRAINT|PRIMARY|FOREIGN|UNIQUE|CHECK)\b"
+    rf"|(?:(?:FULLTEXT|SPATIAL)\b\s*(?:(?:KEY|INDEX)\b\s*)?|(?:KEY|INDEX)\b\s*)(?:(?!USING\b){_IDENT}\s*)?(?:USING\s+\w+\s*)?"
+    r"\(\s*[A-Za-z_\"`\[]"
+    r"|EXCLUDE\s*(?:USING\s+\w+\s*)?\(",
+    re.IGNORECASE)
+
+
+def map_sql_type_to_app_type(sql_type_str, dialect=None):
+    """Maps an SQL column type of the given dialect (name or SqlDialect; None is standard SQL) back to an app data type."""
+    return get_sql_dialect(dialect).to_app_type(sql_type_str)
+
+
+def _unquote_identifier(identifier):
+    """Strips "..", `..` or [..] quoting and undoubles escaped quote characters."""
+    first = identifier[:1]
+    if first == '"' or first == '`':
+        return identifier[1:-1].replace(first * 2, first)
+    if first == '[':
+        return identifier[1:-1].replace(']]', ']')
+    return identifier
+
+
+def _split_top_level(text, separator=","):
+    """Splits on separator outside parentheses and quotes, so NUMERIC(10,2) or CHECK (x IN (1, 2)) stay whole."""
+    parts = []
+    depth = 0
+    quote = None
+    start = 0
+    for i, ch in enumerate(text):
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in "'\"`":
+            quote = ch
+        elif ch == "[":
+            quote = "]"
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == separator and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+
+def _parenthesized_body(text, open_index):
+    """Text between the '(' at open_index and its matching ')', or None if it is never closed."""
+    depth = 0
+    quote = None
+    for i in range(open_index, len(text)):
+        ch = text[i]
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in "'\"`":
+            quote = ch
+        elif ch == "[":
+            quote = "]"
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+            if depth == 0:
+                return text[open_index + 1:i]
+    return None
+
+
+def _add_foreign_key(tables, relationships, from_table, from_col, to_table, to_col):
+    relationships.append({
+        "from_table": from_table, "from_col": from_col,
+        "to_table": to_table, "to_col": to_col,
+        "type": "N:1" # Default type, can be refined later
+    })
+    # Mark the column as FK in the table structure
+    if from_table in tables:
+        for col_obj in tables[from_table]["columns"]:
+            if col_obj.name == from_col:
+                col_obj.is_fk = True
+                col_obj.references_table = to_table
+                col_obj.references_column = to_col
+
+
+@profiled(category="io")
+def parse_sql_schema(sql_content, dialect=None):
     """
     Parses SQL content to extract table definitions and relationships.
+    Identifiers may be quoted in any dialect's style; dialect (name or SqlDialect) decides how column types map back.
     Returns a tuple: (tables_dict, relationships_list)
     tables_dict: {table_name: {"columns": [Column_objects], "pks": [pk_col_names]}}
     relationships_list: [{"from_table": str, "from_col": str, "to_table": str, "to_col": str, "type": "N:1"}]
     """
+    dialect = get_sql_dialect(dialect)
     tables = {}
     relationships = []
 
     # Remove comments (simple /* ... */ and -- ...)
     sql_content = re.sub(r"/\*.*?\*/", "", sql_content, flags=re.DOTALL)
-    sql_content = re.sub(r"--.*?\n", "", sql_content)
-    
-    # Split statements by semicolon, handling potential semicolons within strings later if needed
-    statements = [stmt.strip() for stmt in sql_content.split(';') if stmt.strip()]
+    sql_content = re.sub(r"--[^\n]*", "", sql_content)
 
-    for stmt in statements:
-        stmt_upper = stmt.upper()
+    # Split statements by semicolon, ignoring semicolons inside quotes and parentheses
+    statements = [stmt.strip() for stmt in _split_top_level(sql_content, ";") if stmt.strip()]
 
+    for stmt in statements:
         # Parse CREATE TABLE
-        if stmt_upper.startswith("CREATE TABLE"):
-            # Regex to capture table name and column definitions
-            # Handles quoted (e.g., "My Table") and unquoted (e.g., My_Table) names.
-            create_table_match = re.search(
-                r"CREATE TABLE\s+(?:IF NOT EXISTS\s+)?(?:\"([^\"]+)\"|([a-zA-Z0-9_]+))\s*\((.+)\)",
-                stmt, re.IGNORECASE | re.DOTALL
-            )
-            if create_table_match:
-                # group(1) is for quoted table name, group(2) for unquoted
-                table_name_quoted = create_table_match.group(1)
-                table_name_unquoted = create_table_match.group(2)
-                table_name = table_name_quoted if table_name_quoted is not None else table_name_unquoted
-                if not table_name: continue # Should not happen if regex matches
-                columns_str = create_table_match.group(3)
-                
-                current_columns = []
-                primary_keys = []
-
-                # Split column definitions by comma, careful about commas in type definitions like NUMERIC(10,2)
-                # This simple split might fail for complex column defs or table constraints defined inline.
-                col_defs = re.split(r',(?![^\(]*\))', columns_str) # Split by comma not inside parentheses
-
-                for col_def_full in col_defs:
-                    col_def = col_def_full.strip()
-                    if not col_def: continue
-
-                    if col_def.upper().startswith("PRIMARY KEY"):
-                        pk_match = re.search(r"PRIMARY KEY\s*\((.+)\)", col_def, re.IGNORECASE)
+        create_table_match = _CREATE_TABLE_RE.match(stmt)
+        if create_table_match:
+            table_name = _unquote_identifier(create_table_match.group(1))
+            columns_str = _parenthesized_body(stmt, create_table_match.end() - 1)
+            if columns_str is None: continue
+
+            current_columns = []
+            primary_keys = []
+            inline_foreign_keys = []
+
+            for col_def_full in _split_top_level(columns_str):
+                col_def = col_def_full.strip()
+                if not col_def: continue
+
+                if _TABLE_CONSTRAINT_RE.match(col_def):
+                    # [CONSTRAINT name] PRIMARY KEY (...) / FOREIGN KEY (...) REFERENCES ...; others are ignored
+                    constraint_match = _CONSTRAINT_NAME_RE.match(col_def)
+                    body = col_def[constraint_match.end():] if constraint_match else col_def
+                    body_upper = body.upper()
+                    if body_upper.startswith("PRIMARY"):
+                        pk_match = _IDENT_LIST_RE.search(body)
                         if pk_match:
-                            pks = [pk.strip().strip('"') for pk in pk_match.group(1).split(',')]
-                            primary_keys.extend(pks)
-                        continue
-                    
-                    # Regex for column name (quoted or unquoted) and type
-                    col_match = re.match(
-                        r"(?:\"([^\"]+)\"|([a-zA-Z0-9_]+))\s+([\w\s\(\),]+?)(?:\s+PRIMARY KEY|\s+NOT NULL|\s+NULL|\s+UNIQUE|\s+DEFAULT.*|$)",
-                        col_def, re.IGNORECASE
-                    )
-                    if col_match:
-                        col_name_quoted = col_match.group(1)
-                        col_name_unquoted = col_match.group(2)
-                        col_name = col_name_quoted if col_name_quoted is not None else col_name_unquoted
-                        col_type_sql = col_match.group(3).strip()
-                        col_type_app = map_sql_type_to_app_type(col_type_sql)
-                        
-                        is_pk = "PRIMARY KEY" in col_def.upper() or col_name in primary_keys
-                        if is_pk and col_name not in primary_keys: # Add if defined inline
-                            primary_keys.append(col_name)
-
-                        current_columns.append(Column(name=col_name, data_type=col_type_app, is_pk=is_pk))
-                
-                tables[table_name] = {"columns": current_columns, "pks": list(set(primary_keys))} # Ensure unique PKs
-                # Update is_pk for columns based on collected primary_keys
-                for col_obj in tables[table_name]["columns"]:
-                    if col_obj.name in tables[table_name]["pks"]:
-                        col_obj.is_pk = True
+                            primary_keys.extend(_unquote_identifier(pk.strip()) for pk in _split_top_level(pk_match.group(1)) if pk.strip())
+                    elif body_upper.startswith("FOREIGN"):
+                        fk_match = _FOREIGN_KEY_RE.match(body)
+                        if fk_match:
+                            inline_foreign_keys.append(tuple(_unquote_identifier(g) for g in fk_match.groups()))
+                    continue
+
+                # Column name (in any quoting style), then its type and constraints
+                col_match = _COLUMN_RE.match(col_def)
+                if not col_match: continue
+                col_name = _unquote_identifier(col_match.group(1))
+                col_rest = col_match.group(2)
+                col_type_app = dialect.to_app_type(col_rest)
+
+                is_pk = bool(_INLINE_PRIMARY_KEY_RE.search(col_rest)) or col_name in primary_keys
+                if is_pk and col_name not in primary_keys: # Add if defined inline
+                    primary_keys.append(col_name)
+                ref_match = _INLINE_REFERENCES_RE.search(col_rest)
+                if ref_match:
+                    inline_foreign_keys.append((col_name, _unquote_identifier(ref_match.group(1)), _unquote_identifier(ref_match.group(2))))
+
+                current_columns.append(Column(name=col_name, data_type=col_type_app, is_pk=is_pk))
+
+            tables[table_name] = {"columns": current_columns, "pks": list(dict.fromkeys(primary_keys))} # Ensure unique PKs
+            # Update is_pk for columns based on collected primary_keys
+            for col_obj in tables[table_name]["columns"]:
+                if col_obj.name in tables[table_name]["pks"]:
+                    col_obj.is_pk = True
+            for from_col, to_table, to_col in inline_foreign_keys:
+                _add_foreign_key(tables, relationships, table_name, from_col, to_table, to_col)
 
         # Parse ALTER TABLE for FOREIGN KEY constraints
-        elif stmt_upper.startswith("ALTER TABLE"):
-            fk_match = re.search(
-                r"ALTER TABLE\s+(?:\"([^\"]+)\"|([a-zA-Z0-9_]+))\s+"  # From Table
-                r"ADD\s+(?:CONSTRAINT\s+(?:\"([^\"]+)\"|([a-zA-Z0-9_]+))\s+)?FOREIGN KEY\s*\((?:\"([^\"]+)\"|([a-zA-Z0-9_]+))\)\s+"  # Opt. Constraint, From Column
-                r"REFERENCES\s+(?:\"([^\"]+)\"|([a-zA-Z0-9_]+))\s*\((?:\"([^\"]+)\"|([a-zA-Z0-9_]+))\)",  # To Table, To Column
-                stmt, re.IGNORECASE
-            )
+        elif stmt[:5].upper() == "ALTER":
+            fk_match = _ALTER_TABLE_FK_RE.search(stmt)
             if fk_match:
-                from_table = _extract_identifier(fk_match, 1, 2)
-                # Constraint name is group 3 (quoted) or 4 (unquoted), optional. We don't use it here.
-                from_col = _extract_identifier(fk_match, 5, 6)
-                to_table = _extract_identifier(fk_match, 7, 8)
-                to_col = _extract_identifier(fk_match, 9, 10)
-                
-                relationships.append({
-                    "from_table": from_table, "from_col": from_col,
-                    "to_table": to_table, "to_col": to_col,
-                    "type": "N:1" # Default type, can be refined later
-                })
-                # Mark the column as FK in the table structure
-                if from_table in tables and tables[from_table]["columns"]:
-                    for col_obj in tables[from_table]["columns"]:
-                        if col_obj.name == from_col:
-                            col_obj.is_fk = True
-                            col_obj.references_table = to_table
-                            col_obj.references_column = to_col
-                            # col_obj.fk_relationship_type could be set here if parsed
-    return tables, relationships
\ No newline at end of file
+                from_table, from_col, to_table, to_col = (_unquote_identifier(g) for g in fk_match.groups())
+                _add_foreign_key(tables, relationships, from_table, from_col, to_table, to_col)
+    return tables, relationships
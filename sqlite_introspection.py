@@ -0,0 +1,113 @@
+# sqlite_introspection.py
+# Reads tables, columns, primary keys and foreign keys straight from a SQLite database file, read-only.
+
+import os
+import re
+import sqlite3
+from urllib.request import pathname2url
+
+from data_models import Column
+from project_store import SQLITE_FILE_MAGIC
+from sql_dialects import get_sql_dialect
+
+INTROSPECTION_BATCH_SIZE = 500 # Tables per pragma_table_info / pragma_foreign_key_list query
+
+_PROJECT_STORE_TABLES = {"meta", "erd_tables", "erd_columns", "erd_relationships"}
+_AUTOINCREMENT_RE = re.compile(r"\bAUTOINCREMENT\b", re.IGNORECASE)
+
+
+class SchemaImportCancelled(Exception):
+    """Raised when the progress callback asks to stop."""
+
+
+def is_sqlite_database_file(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(SQLITE_FILE_MAGIC)) == SQLITE_FILE_MAGIC
+    except OSError:
+        return False
+
+
+def _connect_read_only(path):
+    # mode=ro never creates, writes or takes a write lock; a missing file is an error instead of a new database
+    uri = f"file:{pathname2url(os.path.abspath(path))}?mode=ro"
+    conn = sqlite3.connect(uri, uri=True)
+    conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+def read_sqlite_schema(path, progress_callback=None, batch_size=INTROSPECTION_BATCH_SIZE):
+    """
+    Introspects a SQLite database with one pragma_table_info and one pragma_foreign_key_list query per
+    batch of tables. Returns (tables_dict, relationships_list) in the same shape as sql_parser.parse_sql_schema,
+    so it goes through the same import. progress_callback(done, total) is called after each batch; if it
+    returns False the read stops with SchemaImportCancelled.
+    """
+    if not is_sqlite_database_file(path):
+        raise ValueError("Not a SQLite database file.")
+    dialect = get_sql_dialect("sqlite")
+
+    conn = _connect_read_only(path)
+    try:
+        table_rows = conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite\\_%' ESCAPE '\\' "
+            "ORDER BY name").fetchall()
+        if _PROJECT_STORE_TABLES.issubset(name for name, _ in table_rows):
+            raise ValueError("This is an ERD project database; open it with Import ERD File instead.")
+
+        table_names = [name for name, _ in table_rows]
+        autoincrement_tables = {name for name, sql in table_rows if sql and _AUTOINCREMENT_RE.search(sql)}
+        tables = {name: {"columns": [], "pks": []} for name in table_names}
+        foreign_keys = [] # (from_table, from_col, to_table, to_col or None)
+
+        total = len(table_names)
+        for start in range(0, total, batch_size):
+            batch = table_names[start:start + batch_size]
+            placeholders = ",".join("?" * len(batch))
+
+            pk_positions = {}
+            for table_name, col_name, col_type, pk_position in conn.execute(
+                    "SELECT m.name, p.name, p.type, p.pk FROM sqlite_master AS m "
+                    "JOIN pragma_table_info(m.name) AS p "
+                    f"WHERE m.type = 'table' AND m.name IN ({placeholders}) ORDER BY m.name, p.cid", batch):
+                col_type_app = dialect.to_app_type(col_type) if col_type else "TEXT" # SQLite allows untyped columns
+                column = Column(name=col_name, data_type=col_type_app, is_pk=pk_position > 0)
+                tables[table_name]["columns"].append(column)
+                if pk_position:
+                    pk_positions.setdefault(table_name, []).append((pk_position, column))
+
+            for table_name, pk_columns in pk_positions.items():
+                pk_columns.sort(key=lambda item: item[0])
+                tables[table_name]["pks"] = [column.name for _, column in pk_columns]
+                # Only a lone INTEGER PRIMARY KEY can be AUTOINCREMENT
+                if table_name in autoincrement_tables and len(pk_columns) == 1 and pk_columns[0][1].data_type == "INTEGER":
+                    pk_columns[0][1].data_type = "SERIAL"
+
+            foreign_keys.extend(conn.execute(
+                'SELECT m.name, f."from", f."table", f."to" FROM sqlite_master AS m '
+                "JOIN pragma_foreign_key_list(m.name) AS f "
+                f"WHERE m.type = 'table' AND m.name IN ({placeholders}) ORDER BY m.name, f.id, f.seq", batch))
+
+            if progress_callback and progress_callback(min(start + batch_size, total), total) is False:
+                raise SchemaImportCancelled()
+    finally:
+        conn.close()
+
+    relationships = []
+    for from_table, from_col, to_table, to_col in foreign_keys:
+        if to_col is None: # REFERENCES parent without a column list means the parent's primary key
+            target = tables.get(to_table)
+            if not target or len(target["pks"]) != 1:
+                continue
+            to_col = target["pks"][0]
+        relationships.append({
+            "from_table": from_table, "from_col": from_col,
+            "to_table": to_table, "to_col": to_col,
+            "type": "N:1"
+        })
+        for col_obj in tables[from_table]["columns"]:
+            if col_obj.name == from_col:
+                col_obj.is_fk = True
+                col_obj.references_table = to_table
+                col_obj.references_column = to_col
+    return tables, relationships
@@ -0,0 +1,174 @@
+# theme_stylesheets.py
+# Qt stylesheets for the main window, docks and context menus, built once per set of theme colors and reused.
+
+# Theme colors the stylesheets use; their names are the cache key
+STYLE_COLOR_KEYS = (
+    "window_bg", "view_bg", "view_border", "toolbar_bg", "toolbar_border", "button_bg", "button_border",
+    "button_hover_bg", "button_pressed_bg", "button_checked_bg", "button_checked_text_color",
+    "text_color", "dialog_text_color", "dialog_input_bg"
+)
+
+_MENU_STYLESHEET = """
+    QMenu {{
+        background-color: {toolbar_bg};
+        color: {text_color};
+        border: 1px solid {toolbar_border};
+    }}
+    QMenu::item:selected {{
+        background-color: {button_hover_bg};
+    }}
+"""
+
+# Button size is 44px, so radius is 22px for a circle.
+_FLOATING_BUTTON_STYLESHEET = """
+    QPushButton#mainFloatingButton {{
+        border-radius: 22px; /* Half of the button's width/height (44px / 2) */
+        background-color: {button_bg};
+        color: {text_color};
+        border: 1px solid {button_border};
+        padding: 0px;
+    }}
+    QPushButton#mainFloatingButton:hover {{
+        background-color: {button_hover_bg};
+    }}
+"""
+
+_MAIN_WINDOW_STYLESHEET = """
+    QMainWindow {{
+        background-color: {window_bg};
+    }}
+    QPushButton {{
+        background-color: {button_bg};
+        border: 1px solid {button_border};
+        border-radius: 4px;
+        padding: 5px 10px;
+        min-width: 80px;
+        color: {text_color};
+    }}
+    QPushButton:hover {{
+        background-color: {button_hover_bg};
+    }}
+    QPushButton:pressed {{
+        background-color: {button_pressed_bg};
+    }}
+    QComboBox, QLineEdit {{
+        border: 1px solid {button_border};
+        border-radius: 3px;
+        padding: 3px;
+        min-height: 20px;
+        background-color: {dialog_input_bg};
+        color: {text_color};
+    }}
+    QComboBox QAbstractItemView {{
+        background-color: {view_bg};
+        color: {text_color};
+        selection-background-color: {button_checked_bg};
+    }}
+    QScrollArea {{
+         border: 1px solid {toolbar_border};
+    }}
+    QLabel {{
+        padding: 2px;
+        color: {dialog_text_color};
+    }}
+    QDialog {{
+        background-color: {window_bg};
+    }}
+    QMenuBar {{
+        background-color: {toolbar_bg};
+        color: {text_color};
+    }}
+    QMenuBar::item:selected {{
+        background-color: {button_hover_bg};
+    }}
+    QTextEdit {{
+        background-color: {view_bg};
+        color: {text_color};
+        border: 1px solid {toolbar_border};
+        font-family: Consolas, 'Courier New', monospace;
+    }}
+""" + _MENU_STYLESHEET + _FLOATING_BUTTON_STYLESHEET
+
+_VIEW_STYLESHEET = "background-color: {view_bg}; border: 1px solid {view_border};"
+
+_EXPLORER_TREE_STYLESHEET = """
+    QTreeWidget {{
+        background-color: {window_bg};
+        color: {text_color};
+        border: 1px solid {toolbar_border};
+    }}
+    QTreeWidget::item:hover {{
+        background-color: {button_hover_bg};
+    }}
+    QTreeWidget::item:selected {{
+        background-color: {button_checked_bg};
+        color: {button_checked_text_color};
+    }}
+    QHeaderView::section {{
+        background-color: {toolbar_bg};
+        color: {text_color};
+        padding: 4px;
+        border: 1px solid {toolbar_border};
+    }}
+"""
+
+_DOCK_STYLESHEET = """
+    QDockWidget {{
+        background-color: {toolbar_bg};
+        color: {text_color};
+    }}
+    QDockWidget::title {{
+        text-align: left;
+        background: {toolbar_bg};
+        padding: 5px;
+        padding-left: 8px;
+        color: {text_color};
+        border-bottom: 1px solid {toolbar_border};
+    }}
+"""
+
+_SQL_TEXT_EDIT_STYLESHEET = """
+    QTextEdit {{
+        background-color: {view_bg};
+        color: {text_color};
+        border: 1px solid {toolbar_border};
+        font-family: Consolas, 'Courier New', monospace;
+    }}
+"""
+
+_NOTES_TEXT_EDIT_STYLESHEET = """
+    QTextEdit {{
+        background-color: {view_bg};
+        color: {text_color};
+        border: 1px solid {toolbar_border};
+    }}
+"""
+
+_TEMPLATES = {
+    "main_window": _MAIN_WINDOW_STYLESHEET,
+    "view": _VIEW_STYLESHEET,
+    "explorer_tree": _EXPLORER_TREE_STYLESHEET,
+    "dock": _DOCK_STYLESHEET,
+    "sql_text_edit": _SQL_TEXT_EDIT_STYLESHEET,
+    "notes_text_edit": _NOTES_TEXT_EDIT_STYLESHEET,
+    "menu": _MENU_STYLESHEET,
+}
+
+_stylesheet_cache = {} # Color names -> {role: stylesheet}
+
+
+def theme_stylesheets(theme_settings):
+    """Returns {role: stylesheet} for the theme colors in theme_settings (roles as in _TEMPLATES); built once per theme."""
+    colors = {key: theme_settings[key].name() for key in STYLE_COLOR_KEYS}
+    cache_key = tuple(colors.values())
+    stylesheets = _stylesheet_cache.get(cache_key)
+    if stylesheets is None:
+        stylesheets = {role: template.format(**colors) for role, template in _TEMPLATES.items()}
+        _stylesheet_cache[cache_key] = stylesheets
+    return stylesheets
+
+
+def apply_stylesheet(widget, stylesheet):
+    """Sets a widget's stylesheet unless it already has exactly this one; setting it again re-polishes every child."""
+    if widget.styleSheet() != stylesheet:
+        widget.setStyleSheet(stylesheet)
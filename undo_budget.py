@@ -0,0 +1,111 @@
+# undo_budget.py
+# Bounds the undo history by the memory its commands hold instead of by a step count.
+
+import sys
+
+from PyQt6 import sip
+from PyQt6.QtCore import QObject
+
+
+def estimate_size(obj, seen):
+    """
+    Rough bytes held by obj: sys.getsizeof over containers and plain objects, each counted once per seen set.
+    Qt wrappers (graphics items, colors, the window) are not walked; the scene owns the items anyway.
+    """
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, sip.simplewrapper):
+        return size
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += estimate_size(key, seen) + estimate_size(value, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += estimate_size(item, seen)
+    elif hasattr(obj, "__dict__"):
+        size += estimate_size(vars(obj), seen)
+    return size
+
+
+def command_size(command, seen=None):
+    """Bytes held by a command's own attributes and those of its children (macros)."""
+    seen = set() if seen is None else seen
+    size = sys.getsizeof(command) + estimate_size(getattr(command, "__dict__", {}), seen)
+    for i in range(command.childCount()):
+        size += command_size(command.child(i), seen)
+    return size
+
+
+def _release(command):
+    # An evicted command is never undone or redone again, only deleted by the stack, so its data can go now
+    for i in range(command.childCount()):
+        _release(command.child(i))
+    getattr(command, "__dict__", {}).clear()
+
+
+class UndoMemoryBudget(QObject):
+    """
+    Keeps the undo history of a QUndoStack under budget_bytes. QUndoStack can't drop its oldest commands,
+    so once the history is over budget the oldest steps are evicted instead: their data is released and
+    undo stops at floor_index. The most recent step always stays undoable, however big it is.
+    """
+    def __init__(self, undo_stack, budget_bytes, live_objects=None, parent=None):
+        super().__init__(parent)
+        self.undo_stack = undo_stack
+        self.budget_bytes = budget_bytes
+        self.live_objects = live_objects # Callable returning the diagram's own objects; commands aren't charged for those
+        self.floor_index = 0 # Steps below this were evicted
+        self.command_sizes = [] # Estimated bytes per stack index; 0 once evicted
+        self.undo_action = None
+        undo_stack.indexChanged.connect(self.on_index_changed)
+
+    def total_bytes(self):
+        return sum(self.command_sizes)
+
+    def can_undo(self):
+        return self.undo_stack.canUndo() and self.undo_stack.index() > self.floor_index
+
+    def set_budget(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self._evict()
+
+    def bind_undo_action(self, action):
+        """Keeps action disabled at the floor; call after createUndoAction so this runs after Qt's own update."""
+        self.undo_action = action
+        self.undo_stack.canUndoChanged.connect(self._sync_undo_action)
+        self.undo_stack.indexChanged.connect(self._sync_undo_action)
+
+    def _sync_undo_action(self, *_):
+        if self.undo_action is not None and not sip.isdeleted(self.undo_action) and not sip.isdeleted(self.undo_stack):
+            self.undo_action.setEnabled(self.can_undo())
+
+    def _measure(self, index):
+        # A command that refers to a live table (edits, the table an add put back) holds no extra memory for it
+        live_ids = {id(obj) for obj in self.live_objects()} if self.live_objects else set()
+        return command_size(self.undo_stack.command(index), live_ids)
+
+    def on_index_changed(self, index):
+        if sip.isdeleted(self.undo_stack): # indexChanged still arrives while the window is torn down
+            return
+        count = self.undo_stack.count()
+        if count < self.floor_index or count == 0: # clear()
+            self.floor_index = 0
+        del self.command_sizes[count:] # Redo steps dropped by a push
+        for i in range(len(self.command_sizes), count):
+            self.command_sizes.append(self._measure(i))
+        top = index - 1
+        if top >= self.floor_index and top < len(self.command_sizes) and self.undo_stack.command(top).id() != -1:
+            self.command_sizes[top] = self._measure(top) # May have merged a newer edit
+        self._evict()
+
+    def _evict(self):
+        total = self.total_bytes()
+        last_undoable = self.undo_stack.index() - 1
+        while total > self.budget_bytes and self.floor_index < last_undoable:
+            _release(self.undo_stack.command(self.floor_index))
+            total -= self.command_sizes[self.floor_index]
+            self.command_sizes[self.floor_index] = 0
+            self.floor_index += 1
+        self._sync_undo_action()
@@ -0,0 +1,118 @@
+# undo_history_log.py
+# Append-only undo history kept next to a diagram file, so undo/redo survives closing and reopening it.
+#
+# "<diagram file>.history" holds one JSON object per line:
+#   {"op": "step", "index": i, "text": ..., "names": [...], "before": state, "after": state}
+#       step i of the history (0 = first step after the file was opened); replaces step i and everything after it
+#   {"op": "saved", "index": i, "count": n, "size": ..., "mtime_ns": ...}
+#       the diagram file was written at step position i with n steps in the history; size/mtime_ns identify that write
+# A state is {"tables": [...], "relationships": [...]} for the step's tables (a table absent from "tables" does
+# not exist in that state) plus "notes" when the notes changed. Steps are read back only when undone or redone.
+
+import json
+import os
+import shutil
+
+from model_snapshot import ColumnSnapshot, TableSnapshot, RelationshipSnapshot
+
+HISTORY_FILE_SUFFIX = ".history"
+
+
+def undo_history_path(diagram_path):
+    return diagram_path + HISTORY_FILE_SUFFIX
+
+
+def file_fingerprint(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def make_history_state(tables, relationships, notes=None):
+    state = {"tables": list(tables), "relationships": list(relationships)}
+    if notes is not None:
+        state["notes"] = notes
+    return state
+
+
+def make_history_step(index, text, table_names, before, after):
+    return {"op": "step", "index": index, "text": text, "names": sorted(table_names), "before": before, "after": after}
+
+
+def tables_from_state(state):
+    return [TableSnapshot(*row[:7], tuple(ColumnSnapshot(*col) for col in row[7])) for row in state["tables"]]
+
+
+def relationships_from_state(state):
+    return [RelationshipSnapshot(*row) for row in state["relationships"]]
+
+
+class HistoryStepRef:
+    """Where a step lives in the log; the step itself is read with read_history_step() when needed."""
+    __slots__ = ("path", "offset", "text")
+
+    def __init__(self, path, offset, text):
+        self.path = path
+        self.offset = offset
+        self.text = text
+
+
+def read_history_index(path, diagram_path):
+    """
+    Scans the log and returns (step_refs, saved_index) for the state the diagram file was last saved in,
+    or None when there is no log or it doesn't belong to the file as it is on disk now.
+    Only each step's offset and text are kept.
+    """
+    try:
+        fingerprint = file_fingerprint(diagram_path)
+        f = open(path, 'rb')
+    except OSError:
+        return None
+    steps = []
+    saved = None
+    with f:
+        offset = 0
+        for line in f:
+            line_offset, offset = offset, offset + len(line)
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break # Torn last line from a crash mid-write
+            if record.get("op") == "step":
+                del steps[record["index"]:]
+                steps.append(HistoryStepRef(path, line_offset, record.get("text", "")))
+            elif record.get("op") == "saved":
+                del steps[record["count"]:]
+                saved = (list(steps), record["index"], (record["size"], record["mtime_ns"]))
+    if saved is None or saved[2] != fingerprint:
+        return None
+    return saved[0], saved[1]
+
+
+def read_history_step(ref):
+    with open(ref.path, 'rb') as f:
+        f.seek(ref.offset)
+        return json.loads(f.readline())
+
+
+class UndoHistoryLog:
+    """Appends steps and save markers to one diagram's history file."""
+    def __init__(self, diagram_path):
+        self.diagram_path = diagram_path
+        self.path = undo_history_path(diagram_path)
+
+    def start_from(self, other_log):
+        """
+        Continues other_log's history here (Save As). With other_log None the next steps simply start again
+        at index 0; the file is never truncated, since restored steps may still read from it.
+        """
+        if other_log is not None and os.path.exists(other_log.path):
+            shutil.copyfile(other_log.path, self.path)
+
+    def append(self, records):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, separators=(',', ':')) + "\n")
+
+    def append_saved_marker(self, pending_steps, index, count):
+        size, mtime_ns = file_fingerprint(self.diagram_path)
+        self.append(list(pending_steps) + [{"op": "saved", "index": index, "count": count, "size": size, "mtime_ns": mtime_ns}])
@@ -3,10 +3,10 @@
 
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtGui import QPixmap, QPainter, QColor, QIcon
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QPointF
 
 # Import current_theme_settings from constants.py
-from constants import current_theme_settings 
+from constants import current_theme_settings, TABLE_HEADER_HEIGHT, COLUMN_HEIGHT, PADDING
 
 
 def get_standard_icon(standard_pixmap, fallback_text=""):
@@ -30,6 +30,34 @@ def snap_to_grid(value, grid_size):
     if grid_size == 0: return value 
     return round(value / grid_size) * grid_size
 
+def calculate_table_height(num_columns):
+    """Returns the drawn height of a table with the given number of columns."""
+    if num_columns == 0:
+        return TABLE_HEADER_HEIGHT + PADDING * 1.5
+    return TABLE_HEADER_HEIGHT + (num_columns * COLUMN_HEIGHT) + PADDING
+
+def table_attachment_point(table_rect_scene, table_data, column_name=None, other_rect_scene=None, hint_intermediate_x=None):
+    """
+    Returns the scene point where a relationship line meets a table's left or right edge.
+    The y follows the given column's row when it exists, otherwise the table's vertical center.
+    """
+    y_in_scene = table_rect_scene.center().y()
+    if column_name:
+        idx = table_data.get_column_index(column_name)
+        if idx != -1:
+            y_in_scene = table_rect_scene.top() + TABLE_HEADER_HEIGHT + PADDING / 2 + (idx * COLUMN_HEIGHT) + (COLUMN_HEIGHT / 2)
+
+    exit_right = True
+    if hint_intermediate_x is not None:
+        # If the vertical segment is to the left of the table's center, attach on its left.
+        exit_right = hint_intermediate_x >= table_rect_scene.center().x()
+    elif other_rect_scene is not None:
+        exit_right = other_rect_scene.center().x() >= table_rect_scene.center().x()
+
+    if exit_right:
+        return QPointF(table_rect_scene.right(), y_in_scene)
+    return QPointF(table_rect_scene.left(), y_in_scene)
+
 def get_contrasting_text_color(bg_color):
     """Returns black or white based on the background color's luminance."""
     if not isinstance(bg_color, QColor) or not bg_color.isValid():